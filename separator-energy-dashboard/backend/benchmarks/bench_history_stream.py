@@ -0,0 +1,104 @@
+"""Peak-memory benchmark: buffered ``resp.json()`` vs streamed history decode.
+
+Serves a synthetic i3X /objects/history body (four tags, one point per tag per
+minute) through httpx.MockTransport and measures the tracemalloc peak of
+
+    buffered  — await client.post(...); resp.json(); normalize
+    streamed  — i3x_client._stream_history (client.stream + history_stream)
+
+for 7-, 30- and 90-day windows, each one unchunked request (all longer than
+history_stream.INCREMENTAL_MIN_WINDOW, so "streamed" is the incremental scan). Run from the backend directory:
+
+    python -m benchmarks.bench_history_stream
+"""
+
+import asyncio
+import gc
+import json
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+
+import httpx
+
+from config import I3X_TAGS
+from services import i3x_client
+
+WINDOWS_DAYS = (7, 30, 90)
+_ORIGIN = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def _body(days: int) -> bytes:
+    minutes = days * 24 * 60
+    stamps = [i3x_client._iso_utc(_ORIGIN + timedelta(minutes=m)) for m in range(minutes)]
+    doc = {}
+    for n, eid in enumerate(I3X_TAGS.values()):
+        doc[eid] = {"data": [
+            {"value": (m % 97) * 0.5 if n == 0 else bool(m % 2), "quality": "GOOD", "timestamp": ts}
+            for m, ts in enumerate(stamps)
+        ]}
+    return json.dumps(doc).encode("utf-8")
+
+
+def _client(body: bytes) -> httpx.AsyncClient:
+    def handler(request: httpx.Request) -> httpx.Response:
+        # Serve the body in 64 KiB pieces, the way a socket read would.
+        return httpx.Response(200, stream=_ChunkStream(body))
+
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler), base_url="http://bench")
+
+
+class _ChunkStream(httpx.AsyncByteStream):
+    def __init__(self, body: bytes, size: int = 64 * 1024) -> None:
+        self._body = body
+        self._size = size
+
+    async def __aiter__(self):
+        for i in range(0, len(self._body), self._size):
+            yield self._body[i:i + self._size]
+
+
+async def _buffered(client: httpx.AsyncClient, request: dict, start: datetime) -> int:
+    resp = await client.post("/i3x/objects/history", json=request)
+    payload = resp.json()
+    n = 0
+    for eid in request["elementIds"]:
+        pts = [i3x_client._to_contract_point(p, start=start) for p in payload[eid]["data"]]
+        n += sum(1 for p in pts if p is not None)
+    return n
+
+
+async def _streamed(client: httpx.AsyncClient, request: dict, start: datetime) -> int:
+    result = await i3x_client._stream_history(client, request, start, allow_partial=True)
+    return sum(len(points) for _, points in result.values())
+
+
+async def _measure(fn, body: bytes, request: dict, start: datetime) -> tuple[int, float, int]:
+    async with _client(body) as client:
+        gc.collect()
+        tracemalloc.start()
+        t0 = time.perf_counter()
+        n = await fn(client, request, start)
+        elapsed = time.perf_counter() - t0
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return peak, elapsed, n
+
+
+async def main() -> None:
+    print(f"{'window':>7} {'body MB':>8} {'mode':>9} {'peak MB':>8} {'seconds':>8} {'points':>9}")
+    for days in WINDOWS_DAYS:
+        body = _body(days)
+        start = _ORIGIN
+        request = {
+            "elementIds": list(I3X_TAGS.values()),
+            "startTime": i3x_client._iso_utc(start),
+            "endTime": i3x_client._iso_utc(start + timedelta(days=days)),
+        }
+        for name, fn in (("buffered", _buffered), ("streamed", _streamed)):
+            peak, elapsed, n = await _measure(fn, body, request, start)
+            print(f"{days:>6}d {len(body) / 1e6:>8.1f} {name:>9} {peak / 1e6:>8.1f} {elapsed:>8.2f} {n:>9}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
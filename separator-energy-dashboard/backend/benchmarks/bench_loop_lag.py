@@ -0,0 +1,70 @@
+"""Event-loop lag while analytics windows are computed, per executor.
+
+Builds the same columnar history the analytics path would fetch for each
+window (fake Timebase simulator, one sample per tag every ``--interval``
+seconds) and pushes it through analytics' executor job — minute alignment
+plus costing — under each ANALYTICS_EXECUTOR mode, while a LagMonitor
+samples the loop every 10 ms the way the processing tick would feel it.
+Run from the backend directory:
+
+    python -m benchmarks.bench_loop_lag [--interval 10] [--days 7 30 90]
+
+``inline`` is the old behaviour: the loop stalls for the whole computation.
+"""
+
+import argparse
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+
+from benchmarks.bench_build_dataframe import _raw
+from fake_timebase.simulator import SeparatorSimulator
+from services import analytics, compute_pool
+from services.loop_monitor import LagMonitor
+from services.tag_columns import datetime_to_ns
+
+_ORIGIN = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+async def _measure(kind: str, raw: dict, days: int) -> tuple[float, dict]:
+    compute_pool.shutdown()
+    compute_pool.ANALYTICS_EXECUTOR = kind
+    # Warm the pool (thread start / process spawn) outside the measurement.
+    await compute_pool.run(len, [])
+    monitor = LagMonitor(interval=0.01, warn_ms=float("inf"))
+    monitor.start()
+    await asyncio.sleep(0.05)
+    t0 = time.perf_counter()
+    await compute_pool.run(
+        analytics._costed_minutes, raw,
+        datetime_to_ns(_ORIGIN), datetime_to_ns(_ORIGIN + timedelta(days=days)),
+    )
+    elapsed = time.perf_counter() - t0
+    await asyncio.sleep(0.05)
+    await monitor.stop()
+    return elapsed, monitor.stats()
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--interval", type=float, default=10.0)
+    parser.add_argument("--days", type=int, nargs="+", default=[7, 30, 90])
+    parser.add_argument("--executors", nargs="+", default=list(compute_pool.EXECUTOR_KINDS[::-1]))
+    args = parser.parse_args()
+
+    sim = SeparatorSimulator(
+        origin=_ORIGIN,
+        interval_seconds=args.interval,
+        clock=lambda: _ORIGIN + timedelta(days=max(args.days)),
+    )
+    print(f"{'window':>7} {'executor':>9} {'compute s':>10} {'lag p99 ms':>11} {'lag max ms':>11}")
+    for days in args.days:
+        raw = _raw(sim, days)
+        for kind in args.executors:
+            elapsed, lag = await _measure(kind, raw, days)
+            print(f"{days:>6}d {kind:>9} {elapsed:>10.2f} {lag['p99_ms']:>11.1f} {lag['max_ms']:>11.1f}")
+    compute_pool.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
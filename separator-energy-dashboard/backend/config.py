@@ -36,6 +36,13 @@ I3X_TAG_RUNNING = os.getenv("I3X_TAG_RUNNING", "Running")
 I3X_TAG_CIP = os.getenv("I3X_TAG_CIP", "CIP")
 I3X_TAG_PROCESS = os.getenv("I3X_TAG_PROCESS", "Process")
 I3X_TIMEOUT_SECONDS = float(os.getenv("I3X_TIMEOUT_SECONDS", "10"))
+# Long /history windows are split into UTC-aligned chunks fetched concurrently.
+# A 90-day window is 90 one-day requests, at most I3X_HISTORY_MAX_CONCURRENCY
+# in flight at once; a failed chunk is retried on its own instead of blanking
+# the whole window.
+I3X_HISTORY_CHUNK_HOURS     = float(os.getenv("I3X_HISTORY_CHUNK_HOURS", "24"))
+I3X_HISTORY_MAX_CONCURRENCY = int(os.getenv("I3X_HISTORY_MAX_CONCURRENCY", "4"))
+I3X_HISTORY_CHUNK_RETRIES   = int(os.getenv("I3X_HISTORY_CHUNK_RETRIES", "2"))
 
 
 def _i3x_element_id(tag_name: str) -> str:
@@ -152,3 +159,142 @@ UNS_RECONNECT_MAX_BACKOFF = float(os.getenv("UNS_RECONNECT_MAX_BACKOFF", "60"))
 # via per-topic message age (the _status / LWT covers process-level liveness;
 # this covers stuck-LatestState liveness).
 UNS_HEARTBEAT_FLOOR_SEC = float(os.getenv("UNS_HEARTBEAT_FLOOR_SEC", "60"))
+
+# --- Local tag archive --------------------------------------------------------
+# On-disk mirror of the four separator tags, one directory per tag and one
+# JSON-lines file per UTC day. When enabled, analytical windows read from the
+# archive and only the un-archived tail is requested from the historian.
+# Points younger than TAG_ARCHIVE_SETTLE_SECONDS are never frozen into the
+# archive so store-and-forward stragglers from the Edge gateway still land.
+#
+# Days older than TAG_ARCHIVE_RETENTION_DAYS are deleted (0 keeps everything);
+# windows reaching further back are read straight from the historian. Parsed
+# partitions are cached in memory up to TAG_ARCHIVE_CACHE_MB.
+#
+# Ships OFF by default — same gate pattern as USE_I3X / UNS_PUBLISH_ENABLED.
+# In Docker, mount a volume at TAG_ARCHIVE_DIR or the archive is rebuilt on
+# every container recreate.
+TAG_ARCHIVE_ENABLED        = _env_bool("TAG_ARCHIVE_ENABLED", "false")
+TAG_ARCHIVE_DIR            = os.getenv("TAG_ARCHIVE_DIR", "/app/data/archive")
+TAG_ARCHIVE_SETTLE_SECONDS = float(os.getenv("TAG_ARCHIVE_SETTLE_SECONDS", "300"))
+TAG_ARCHIVE_RETENTION_DAYS = int(os.getenv("TAG_ARCHIVE_RETENTION_DAYS", "400"))
+TAG_ARCHIVE_CACHE_MB       = float(os.getenv("TAG_ARCHIVE_CACHE_MB", "32"))
+
+# --- Historian read coalescing ------------------------------------------------
+# Concurrent historian reads whose window sits inside one already in flight
+# (the same tags, or a subset) wait for that request and slice its result
+# instead of issuing their own. A window may end up to
+# HISTORIAN_COALESCE_SLACK_SECONDS after the in-flight one — "now" moves on
+# between two callers that both asked for "the last 24h".
+HISTORIAN_COALESCE_ENABLED       = _env_bool("HISTORIAN_COALESCE_ENABLED", "true")
+HISTORIAN_COALESCE_SLACK_SECONDS = float(os.getenv("HISTORIAN_COALESCE_SLACK_SECONDS", "5"))
+
+# --- Historian circuit breaker ------------------------------------------------
+# After HISTORIAN_BREAKER_FAILURE_THRESHOLD consecutive unreachable/5xx
+# historian calls, further calls fail fast instead of each waiting out the
+# httpx timeout. One probe call is let through after
+# HISTORIAN_BREAKER_PROBE_SECONDS, doubling after every failed probe up to
+# HISTORIAN_BREAKER_MAX_PROBE_SECONDS. The processing loop stretches its
+# tick interval to the probe schedule while the breaker is open.
+HISTORIAN_BREAKER_ENABLED           = _env_bool("HISTORIAN_BREAKER_ENABLED", "true")
+HISTORIAN_BREAKER_FAILURE_THRESHOLD = int(os.getenv("HISTORIAN_BREAKER_FAILURE_THRESHOLD", "3"))
+HISTORIAN_BREAKER_PROBE_SECONDS     = float(os.getenv("HISTORIAN_BREAKER_PROBE_SECONDS", "5"))
+HISTORIAN_BREAKER_MAX_PROBE_SECONDS = float(os.getenv("HISTORIAN_BREAKER_MAX_PROBE_SECONDS", "300"))
+
+# --- Historian day-segment cache ------------------------------------------------
+# Columnar historian reads (analytics, backfill) are assembled from cached
+# per-tag, per-facility-local-day segments plus a live tail. A day is cached
+# once it ended at least SEGMENT_CACHE_SETTLE_SECONDS ago, and never changes
+# after that. Segments are held in memory up to SEGMENT_CACHE_MAX_MB (least
+# recently used evicted first); set SEGMENT_CACHE_DIR to also keep them on
+# disk, so evicted days and restarts reload locally instead of re-pulling.
+#
+# Ships OFF by default — same gate pattern as TAG_ARCHIVE_ENABLED.
+SEGMENT_CACHE_ENABLED        = _env_bool("SEGMENT_CACHE_ENABLED", "false")
+SEGMENT_CACHE_MAX_MB         = float(os.getenv("SEGMENT_CACHE_MAX_MB", "64"))
+SEGMENT_CACHE_DIR            = os.getenv("SEGMENT_CACHE_DIR", "")
+SEGMENT_CACHE_SETTLE_SECONDS = float(os.getenv("SEGMENT_CACHE_SETTLE_SECONDS", "3600"))
+
+# --- Historian request scheduler ----------------------------------------------
+# Every historian read takes a slot in one shared scheduler. Live tick reads
+# are admitted immediately; interactive, prewarm and backfill reads (in that
+# order of precedence) share HISTORIAN_MAX_CONCURRENT_READS slots. With
+# HISTORIAN_BYTES_PER_SECOND > 0, response bodies draw from a token bucket
+# and prewarm/backfill reads pause whenever it runs dry. 0 = no byte budget.
+HISTORIAN_MAX_CONCURRENT_READS = int(os.getenv("HISTORIAN_MAX_CONCURRENT_READS", "3"))
+HISTORIAN_BYTES_PER_SECOND     = float(os.getenv("HISTORIAN_BYTES_PER_SECOND", "0"))
+
+# --- Incremental analytics windows ---------------------------------------------
+# Rolling windows (offset 0) keep their aligned minute frame between
+# refreshes: each refresh re-reads only the last
+# ANALYTICS_REORDER_WINDOW_SECONDS plus whatever is new, and re-aligns those
+# minutes. Points that reach the historian later than that are picked up by
+# a full rebuild every ANALYTICS_FULL_REBUILD_SECONDS.
+ANALYTICS_INCREMENTAL_ENABLED    = _env_bool("ANALYTICS_INCREMENTAL_ENABLED", "true")
+ANALYTICS_REORDER_WINDOW_SECONDS = float(os.getenv("ANALYTICS_REORDER_WINDOW_SECONDS", "300"))
+ANALYTICS_FULL_REBUILD_SECONDS   = float(os.getenv("ANALYTICS_FULL_REBUILD_SECONDS", "3600"))
+
+# --- Analytics day partials ----------------------------------------------------
+# Summary/daily windows are merged from per-facility-local-day partials.
+# A day is reduced once it ended at least ANALYTICS_PARTIALS_SETTLE_SECONDS
+# ago and kept (least recently used evicted first) up to
+# ANALYTICS_PARTIALS_MAX_MB — about 60 KB per day.
+ANALYTICS_PARTIALS_SETTLE_SECONDS = float(os.getenv("ANALYTICS_PARTIALS_SETTLE_SECONDS", "3600"))
+ANALYTICS_PARTIALS_MAX_MB         = float(os.getenv("ANALYTICS_PARTIALS_MAX_MB", "32"))
+
+# --- Analytics payload cache ---------------------------------------------------
+# Finished summary/daily payloads, one per (endpoint, days, offset). Any
+# window a client asks for is cached, so the cache is capped at
+# ANALYTICS_CACHE_MAX_ENTRIES payloads and ANALYTICS_CACHE_MAX_MB of
+# serialized JSON; least recently used are evicted first.
+ANALYTICS_CACHE_MAX_ENTRIES = int(os.getenv("ANALYTICS_CACHE_MAX_ENTRIES", "256"))
+ANALYTICS_CACHE_MAX_MB      = float(os.getenv("ANALYTICS_CACHE_MAX_MB", "16"))
+
+# --- Analytics executor ----------------------------------------------------------
+# Where analytics CPU work (minute alignment, costing) runs, so it never
+# blocks the event loop the processing tick and live endpoints share:
+#   thread  — ANALYTICS_EXECUTOR_WORKERS threads (default)
+#   process — ANALYTICS_EXECUTOR_WORKERS worker processes; spreads heavy
+#             windows across cores at the cost of pickling minute arrays
+#   inline  — on the event loop (debugging / benchmarks only)
+ANALYTICS_EXECUTOR         = os.getenv("ANALYTICS_EXECUTOR", "thread").strip().lower()
+ANALYTICS_EXECUTOR_WORKERS = int(os.getenv("ANALYTICS_EXECUTOR_WORKERS", "2"))
+
+# --- Event-loop lag monitor ------------------------------------------------------
+# A background task wakes every LOOP_LAG_SAMPLE_SECONDS and measures how late
+# it ran; percentiles are on /health. Lags over LOOP_LAG_WARN_MS are logged.
+LOOP_LAG_SAMPLE_SECONDS = float(os.getenv("LOOP_LAG_SAMPLE_SECONDS", "0.5"))
+LOOP_LAG_WARN_MS        = float(os.getenv("LOOP_LAG_WARN_MS", "250"))
+
+# --- Analytics worker processes --------------------------------------------------
+# Keep closed days' costed minutes in shared memory and assemble summary,
+# daily and what-if windows in ANALYTICS_EXECUTOR_WORKERS worker processes,
+# which attach those minutes instead of receiving a copy. Independent of
+# ANALYTICS_EXECUTOR (which still decides where minutes are aligned/costed).
+#
+# Ships OFF by default — same gate pattern as TAG_ARCHIVE_ENABLED. Needs a
+# /dev/shm big enough for ANALYTICS_PARTIALS_MAX_MB (Docker's default is 64 MB).
+ANALYTICS_WORKER_ENABLED = _env_bool("ANALYTICS_WORKER_ENABLED", "false")
+
+# --- Warm-start snapshot ---------------------------------------------------------
+# Every WARM_START_INTERVAL_SECONDS (and at shutdown) write the ring buffer,
+# cost_today, closed days' costed minutes and finished analytics payloads to
+# WARM_START_PATH. At boot a snapshot younger than WARM_START_MAX_AGE_SECONDS
+# is loaded and only the minutes since it are read from the historian.
+#
+# Ships OFF by default — same gate pattern as TAG_ARCHIVE_ENABLED. In Docker,
+# mount a volume at the snapshot's directory or it is lost on recreate.
+WARM_START_ENABLED          = _env_bool("WARM_START_ENABLED", "false")
+WARM_START_PATH             = os.getenv("WARM_START_PATH", "/app/data/warm_start.npz")
+WARM_START_INTERVAL_SECONDS = float(os.getenv("WARM_START_INTERVAL_SECONDS", "120"))
+WARM_START_MAX_AGE_SECONDS  = float(os.getenv("WARM_START_MAX_AGE_SECONDS", "21600"))
+
+# --- Live stream (SSE) -----------------------------------------------------------
+# /api/energy/stream pushes current_metrics() every processing tick and new
+# timeline minutes as they land, encoded once and fanned out to every client.
+# Each client has a LIVE_STREAM_QUEUE_FRAMES backlog; one that falls that far
+# behind is disconnected (its EventSource reconnects and resumes from its
+# Last-Event-ID). An idle stream gets a comment line every
+# LIVE_STREAM_HEARTBEAT_SECONDS so proxies don't time it out.
+LIVE_STREAM_QUEUE_FRAMES      = int(os.getenv("LIVE_STREAM_QUEUE_FRAMES", "32"))
+LIVE_STREAM_HEARTBEAT_SECONDS = float(os.getenv("LIVE_STREAM_HEARTBEAT_SECONDS", "15"))
@@ -0,0 +1,2 @@
+"""Local stand-in for the Timebase historian — synthetic separator data over
+the i3X and legacy REST wire shapes, for running the backend off-site."""
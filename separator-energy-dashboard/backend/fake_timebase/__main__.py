@@ -0,0 +1,45 @@
+"""Run the fake Timebase historian under uvicorn.
+
+    python -m fake_timebase --port 4511 --interval 60 --days 30
+
+then start the backend with I3X_BASE_URL=http://localhost:4511 (the legacy
+client uses the same base URL). Run from the backend directory.
+"""
+
+import argparse
+
+import uvicorn
+
+from fake_timebase.app import FakeTimebaseSettings, create_app
+from fake_timebase.simulator import SeparatorSimulator
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m fake_timebase", description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=4511)
+    parser.add_argument("--interval", type=float, default=60.0, help="seconds between samples")
+    parser.add_argument("--days", type=float, default=30.0, help="days of history before now")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--sparse-bools", action="store_true", help="record boolean tags on change only")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="fixed delay per request")
+    parser.add_argument("--latency-per-kpoint-ms", type=float, default=0.0, help="extra delay per 1000 points served")
+    parser.add_argument("--history-point-limit", type=int, default=None, help="answer /history with 206 past this many points per tag")
+    args = parser.parse_args()
+
+    simulator = SeparatorSimulator(
+        interval_seconds=args.interval,
+        seed=args.seed,
+        sparse_bools=args.sparse_bools,
+        history_days=args.days,
+    )
+    settings = FakeTimebaseSettings(
+        latency_ms=args.latency_ms,
+        latency_per_kpoint_ms=args.latency_per_kpoint_ms,
+        history_point_limit=args.history_point_limit,
+    )
+    uvicorn.run(create_app(simulator, settings), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+"""Stand-in Timebase historian serving SeparatorSimulator data.
+
+Speaks the wire format services/i3x_client.py documents for the live
+historian, not the CESMII spec:
+
+    POST /i3x/objects/list      spec-shape array of ObjectInstance dicts
+    POST /i3x/objects/value     {"<elementId>": {"data": [VQT]}}
+    POST /i3x/objects/history   {"<elementId>": {"data": [VQT, ...]}}, led by
+                                the last point before startTime at its own
+                                (unclamped) timestamp — the client clamps it
+    GET  /api/datasets/{ds}/data?tagname=&start=&end=
+                                legacy REST: {"tl": [{"d": [{t, v, q}]}]}
+
+VQT quality is the literal "GOOD"; unknown elementIds get a per-tag
+``{"error": ...}`` entry. History bodies are streamed in pieces, so a
+90-day read at 1 s density arrives the way a large Timebase response does.
+
+``latency_ms`` (plus ``latency_per_kpoint_ms`` per thousand points served)
+is slept before every response. ``history_point_limit`` makes /history
+answer 206 with the data cut at that many points per tag, which exercises
+the client's bisect path.
+
+In-process, hand ``create_app(...)`` to ``httpx.ASGITransport``; standalone,
+see ``python -m fake_timebase --help``.
+"""
+
+import asyncio
+import json
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import AsyncIterator, Iterable, Optional
+
+from fastapi import FastAPI, HTTPException, Query
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel
+
+from config import I3X_DATASET, I3X_TAGS, TAGS
+from fake_timebase.simulator import SeparatorSimulator
+from services.tag_columns import datetime_to_ns, ns_to_iso
+
+_BODY_PIECE_POINTS = 2000
+
+
+@dataclass
+class FakeTimebaseSettings:
+    dataset:                str = I3X_DATASET
+    # alias -> i3X elementId / legacy tag path; default to what the backend
+    # is configured to ask for, so no env changes are needed to point at us.
+    element_ids:            dict[str, str] = field(default_factory=lambda: dict(I3X_TAGS))
+    tag_paths:              dict[str, str] = field(default_factory=lambda: dict(TAGS))
+    latency_ms:             float = 0.0
+    latency_per_kpoint_ms:  float = 0.0
+    history_point_limit:    Optional[int] = None
+
+
+class _ElementIdsBody(BaseModel):
+    elementIds: list[str]
+
+
+class _HistoryBody(_ElementIdsBody):
+    startTime: str
+    endTime:   str
+
+
+def _parse_ns(value: str) -> int:
+    try:
+        return datetime_to_ns(datetime.fromisoformat(value.replace("Z", "+00:00")))
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=f"bad timestamp {value!r}") from exc
+
+
+def _vqt(t_ns: int, value: object) -> dict:
+    return {"value": value, "quality": "GOOD", "timestamp": ns_to_iso(t_ns)}
+
+
+def create_app(
+    simulator: Optional[SeparatorSimulator] = None,
+    settings: Optional[FakeTimebaseSettings] = None,
+) -> FastAPI:
+    sim = simulator or SeparatorSimulator()
+    cfg = settings or FakeTimebaseSettings()
+    alias_by_eid = {eid: alias for alias, eid in cfg.element_ids.items()}
+    alias_by_path = {path: alias for alias, path in cfg.tag_paths.items()}
+
+    app = FastAPI(title="Fake Timebase")
+    app.state.simulator = sim
+    app.state.settings = cfg
+    app.state.requests = 0
+
+    async def delay(points: int) -> None:
+        app.state.requests += 1
+        seconds = (cfg.latency_ms + cfg.latency_per_kpoint_ms * points / 1000.0) / 1000.0
+        if seconds > 0:
+            await asyncio.sleep(seconds)
+
+    def window(alias: str, start_ns: int, end_ns: int, seed: bool) -> list[tuple[int, object]]:
+        t, v = sim.points(alias, start_ns, end_ns)
+        out = list(zip(t.tolist(), v.tolist()))
+        if seed and (not out or out[0][0] != start_ns):
+            prev = sim.previous(alias, start_ns)
+            if prev is not None:
+                out.insert(0, prev)
+        return out
+
+    async def stream(pieces: Iterable[str]) -> AsyncIterator[bytes]:
+        for piece in pieces:
+            yield piece.encode("utf-8")
+            await asyncio.sleep(0)
+
+    # --- i3X ------------------------------------------------------------------
+    @app.post("/i3x/objects/list")
+    async def objects_list(body: _ElementIdsBody):
+        await delay(0)
+        return [
+            {
+                "elementId": eid,
+                "displayName": eid.rsplit("/", 1)[-1],
+                "typeElementId": "tag",
+                "parentId": eid.rsplit("/", 1)[0],
+                "isComposition": False,
+            }
+            for eid in body.elementIds
+            if eid in alias_by_eid
+        ]
+
+    @app.post("/i3x/objects/value")
+    async def objects_value(body: _ElementIdsBody):
+        await delay(len(body.elementIds))
+        out: dict[str, dict] = {}
+        for eid in body.elementIds:
+            alias = alias_by_eid.get(eid)
+            if alias is None:
+                out[eid] = {"error": f"unknown elementId {eid}"}
+                continue
+            latest = sim.latest(alias)
+            out[eid] = {"data": [_vqt(*latest)] if latest else []}
+        return out
+
+    @app.post("/i3x/objects/history")
+    async def objects_history(body: _HistoryBody):
+        start_ns, end_ns = _parse_ns(body.startTime), _parse_ns(body.endTime)
+        per_tag: dict[str, Optional[list[tuple[int, object]]]] = {}
+        truncated = False
+        for eid in body.elementIds:
+            alias = alias_by_eid.get(eid)
+            if alias is None:
+                per_tag[eid] = None
+                continue
+            points = window(alias, start_ns, end_ns, seed=True)
+            if cfg.history_point_limit is not None and len(points) > cfg.history_point_limit:
+                points = points[:cfg.history_point_limit]
+                truncated = True
+            per_tag[eid] = points
+        await delay(sum(len(p) for p in per_tag.values() if p))
+
+        def pieces() -> Iterable[str]:
+            yield "{"
+            for n, (eid, points) in enumerate(per_tag.items()):
+                yield ("," if n else "") + json.dumps(eid) + ":"
+                if points is None:
+                    yield json.dumps({"error": f"unknown elementId {eid}"})
+                    continue
+                yield '{"data":['
+                for i in range(0, len(points), _BODY_PIECE_POINTS):
+                    batch = points[i:i + _BODY_PIECE_POINTS]
+                    yield ("," if i else "") + ",".join(json.dumps(_vqt(t, v)) for t, v in batch)
+                yield "]}"
+            yield "}"
+
+        return StreamingResponse(
+            stream(pieces()), status_code=206 if truncated else 200, media_type="application/json",
+        )
+
+    # --- Legacy REST ------------------------------------------------------------
+    @app.get("/api/datasets/{dataset}/data")
+    async def legacy_data(
+        dataset: str,
+        tagname: str = Query(...),
+        start: str = Query(...),
+        end: str = Query(...),
+    ):
+        if dataset != cfg.dataset:
+            return JSONResponse({"error": f"unknown dataset {dataset}"}, status_code=404)
+        alias = alias_by_path.get(tagname)
+        points = window(alias, _parse_ns(start), _parse_ns(end), seed=False) if alias else []
+        await delay(len(points))
+
+        def pieces() -> Iterable[str]:
+            yield '{"tl":[{"d":['
+            for i in range(0, len(points), _BODY_PIECE_POINTS):
+                batch = points[i:i + _BODY_PIECE_POINTS]
+                yield ("," if i else "") + ",".join(
+                    json.dumps({"t": ns_to_iso(t), "v": v, "q": 192}) for t, v in batch
+                )
+            yield "]}]}"
+
+        return StreamingResponse(stream(pieces()), media_type="application/json")
+
+    return app
@@ -0,0 +1,192 @@
+"""Synthetic separator history for the fake Timebase server.
+
+The separator moves through the four dashboard states on a seeded Markov
+schedule (services/state_engine.py defines how the booleans map to them):
+
+    Processing   running, process          motor ~45 A
+    CIP          running, cip              motor ~30 A
+    Idle         running only              motor ~18 A
+    Shutdown     nothing                   motor ~0 A
+
+The schedule is generated forward from ``origin`` and extended lazily, so
+the same seed always yields the same history no matter which windows are
+read in which order. Samples sit on a fixed grid of ``interval_seconds``
+(any density — 1 s for stress runs, 60 s for a realistic dashboard);
+motor-amp noise is a hash of the grid index, so it is random-access too.
+
+With ``sparse_bools`` the three boolean tags are recorded on change only,
+which is what makes boundary seeds matter: a window can contain no boolean
+point at all and still need the value in force at its start.
+
+Nothing exists after ``clock()`` — the history ends at "now".
+"""
+
+import random
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Optional
+
+import numpy as np
+
+from services.tag_columns import datetime_to_ns
+
+PROCESSING, CIP, IDLE, SHUTDOWN = range(4)
+STATE_NAMES = ("Processing", "CIP", "Idle", "Shutdown")
+
+BOOL_ALIASES = ("running", "cip", "process")
+ALIASES = ("motor_amps",) + BOOL_ALIASES
+
+
+@dataclass(frozen=True)
+class StateProfile:
+    minutes:    tuple[float, float]    # uniform duration range
+    amps:       float                  # mean motor current
+    amps_noise: float                  # +/- uniform noise
+    next:       tuple[tuple[int, float], ...]   # (state, weight)
+
+
+DEFAULT_PROFILES: dict[int, StateProfile] = {
+    PROCESSING: StateProfile((90, 360), 45.0, 3.0, ((CIP, 0.35), (IDLE, 0.5), (SHUTDOWN, 0.15))),
+    CIP:        StateProfile((30, 75), 30.0, 2.0, ((IDLE, 0.7), (PROCESSING, 0.3))),
+    IDLE:       StateProfile((5, 45), 18.0, 1.5, ((PROCESSING, 0.8), (CIP, 0.1), (SHUTDOWN, 0.1))),
+    SHUTDOWN:   StateProfile((60, 480), 0.15, 0.15, ((IDLE, 1.0),)),
+}
+
+_NS_PER_S = 1_000_000_000
+_NS_PER_MIN = 60 * _NS_PER_S
+_MASK64 = np.uint64(0xFFFFFFFFFFFFFFFF)
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _unit_noise(k: np.ndarray, salt: int) -> np.ndarray:
+    """Deterministic uniform noise in [-1, 1) per grid index (splitmix64)."""
+    with np.errstate(over="ignore"):
+        x = k.astype(np.uint64) * np.uint64(0x9E3779B97F4A7C15) + np.uint64(salt)
+        x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        x = (x ^ (x >> np.uint64(31))) & _MASK64
+    return (x >> np.uint64(11)).astype(np.float64) / float(1 << 53) * 2.0 - 1.0
+
+
+class SeparatorSimulator:
+    def __init__(
+        self,
+        origin: Optional[datetime] = None,
+        interval_seconds: float = 60.0,
+        seed: int = 0,
+        sparse_bools: bool = False,
+        history_days: float = 30.0,
+        clock: Callable[[], datetime] = _utcnow,
+        profiles: Optional[dict[int, StateProfile]] = None,
+    ) -> None:
+        self.clock = clock
+        self.interval_ns = max(1, int(interval_seconds * _NS_PER_S))
+        if origin is None:
+            origin = clock() - timedelta(days=history_days)
+        # Grid-aligned so the same wall-clock instants recur across restarts.
+        self.origin_ns = datetime_to_ns(origin) // self.interval_ns * self.interval_ns
+        self.sparse_bools = sparse_bools
+        self.profiles = profiles or DEFAULT_PROFILES
+        self._rng = random.Random(seed)
+        self._salt = seed * 7919
+        self._starts: list[int] = [self.origin_ns]
+        self._states: list[int] = [PROCESSING]
+        self._next_start = self.origin_ns + self._duration_ns(PROCESSING)
+
+    # --- Schedule -----------------------------------------------------------------
+    def _duration_ns(self, state: int) -> int:
+        lo, hi = self.profiles[state].minutes
+        return int(self._rng.uniform(lo, hi) * _NS_PER_MIN)
+
+    def _extend(self, until_ns: int) -> None:
+        while self._next_start <= until_ns:
+            options = self.profiles[self._states[-1]].next
+            state = self._rng.choices([s for s, _ in options], weights=[w for _, w in options])[0]
+            self._starts.append(self._next_start)
+            self._states.append(state)
+            self._next_start += self._duration_ns(state)
+
+    def schedule(self, start_ns: int, end_ns: int) -> tuple[np.ndarray, np.ndarray]:
+        """State segments overlapping [start_ns, end_ns]: (start times, codes)."""
+        self._extend(end_ns)
+        starts = np.asarray(self._starts, dtype=np.int64)
+        states = np.asarray(self._states, dtype=np.int8)
+        i = max(0, int(np.searchsorted(starts, start_ns, side="right")) - 1)
+        j = int(np.searchsorted(starts, end_ns, side="right"))
+        return starts[i:j], states[i:j]
+
+    def states_at(self, t_ns: np.ndarray) -> np.ndarray:
+        if not len(t_ns):
+            return np.empty(0, dtype=np.int8)
+        starts, states = self.schedule(int(t_ns[0]), int(t_ns[-1]))
+        return states[np.searchsorted(starts, t_ns, side="right") - 1]
+
+    # --- Samples ------------------------------------------------------------------
+    def now_ns(self) -> int:
+        return datetime_to_ns(self.clock())
+
+    def _values(self, alias: str, t_ns: np.ndarray) -> np.ndarray:
+        states = self.states_at(t_ns)
+        if alias == "running":
+            return states != SHUTDOWN
+        if alias == "cip":
+            return states == CIP
+        if alias == "process":
+            return states == PROCESSING
+        means = np.array([self.profiles[s].amps for s in range(4)])
+        spread = np.array([self.profiles[s].amps_noise for s in range(4)])
+        k = (t_ns - self.origin_ns) // self.interval_ns
+        amps = means[states] + spread[states] * _unit_noise(k, self._salt)
+        return np.round(np.maximum(amps, 0.0), 2)
+
+    def _grid(self, start_ns: int, end_ns: int) -> np.ndarray:
+        first = max(0, -(-(start_ns - self.origin_ns) // self.interval_ns))
+        last = (end_ns - self.origin_ns) // self.interval_ns
+        if last < first:
+            return np.empty(0, dtype=np.int64)
+        return self.origin_ns + np.arange(first, last + 1, dtype=np.int64) * self.interval_ns
+
+    def _changes(self, alias: str, start_ns: int, end_ns: int) -> np.ndarray:
+        """On-change timestamps of a boolean tag in [start_ns, end_ns]."""
+        starts, _ = self.schedule(self.origin_ns, end_ns)
+        values = self._values(alias, starts)
+        keep = np.concatenate(([True], values[1:] != values[:-1]))
+        t = starts[keep]
+        return t[(t >= start_ns) & (t <= end_ns)]
+
+    def _times(self, alias: str, start_ns: int, end_ns: int) -> np.ndarray:
+        if self.sparse_bools and alias in BOOL_ALIASES:
+            return self._changes(alias, start_ns, end_ns)
+        return self._grid(start_ns, end_ns)
+
+    def points(self, alias: str, start_ns: int, end_ns: int) -> tuple[np.ndarray, np.ndarray]:
+        """Recorded (t_ns, values) in [start_ns, end_ns], clipped to now."""
+        end_ns = min(end_ns, self.now_ns())
+        if end_ns < start_ns or end_ns < self.origin_ns:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        t = self._times(alias, max(start_ns, self.origin_ns), end_ns)
+        return t, self._values(alias, t)
+
+    def previous(self, alias: str, before_ns: int) -> Optional[tuple[int, object]]:
+        """The last recorded point strictly before ``before_ns`` — what
+        Timebase returns as a history window's boundary seed."""
+        end_ns = min(before_ns - 1, self.now_ns())
+        if end_ns < self.origin_ns:
+            return None
+        if self.sparse_bools and alias in BOOL_ALIASES:
+            t = self._changes(alias, self.origin_ns, end_ns)
+        else:
+            t = self._grid(max(self.origin_ns, end_ns - self.interval_ns), end_ns)
+        if not len(t):
+            return None
+        t = t[-1:]
+        return int(t[0]), self._values(alias, t)[0].item()
+
+    def latest(self, alias: str) -> Optional[tuple[int, object]]:
+        return self.previous(alias, self.now_ns() + 1)
+
+    def state_name_at(self, when: datetime) -> str:
+        return STATE_NAMES[int(self.states_at(np.array([datetime_to_ns(when)], dtype=np.int64))[0])]
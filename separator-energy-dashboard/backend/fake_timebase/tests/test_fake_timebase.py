@@ -0,0 +1,151 @@
+"""The fake Timebase server, exercised through the real historian clients.
+
+Both clients are pointed at the app in-process via httpx.ASGITransport, so
+these tests double as a check that the fake speaks the wire format the
+clients were written against.
+"""
+
+import time
+from datetime import datetime, timedelta, timezone
+from unittest import IsolatedAsyncioTestCase, TestCase
+from unittest.mock import patch
+
+import httpx
+import numpy as np
+
+from config import I3X_TAGS
+from fake_timebase.app import FakeTimebaseSettings, create_app
+from fake_timebase.simulator import STATE_NAMES, SeparatorSimulator
+from services import i3x_client, timebase_client_legacy
+from services.circuit_breaker import historian_breaker
+from services.state_engine import build_dataframe
+from services.tag_columns import datetime_to_ns
+
+ORIGIN = datetime(2026, 6, 1, tzinfo=timezone.utc)
+NOW = ORIGIN + timedelta(days=7)
+
+
+def _simulator(**kwargs) -> SeparatorSimulator:
+    return SeparatorSimulator(origin=ORIGIN, clock=lambda: NOW, **kwargs)
+
+
+class SimulatorTests(TestCase):
+    def test_history_is_independent_of_read_order(self) -> None:
+        a, b = _simulator(seed=3), _simulator(seed=3)
+        late = datetime_to_ns(ORIGIN + timedelta(days=5))
+        b.points("running", late, late + 3600 * 10**9)
+        t_a, v_a = a.points("motor_amps", datetime_to_ns(ORIGIN), datetime_to_ns(NOW))
+        t_b, v_b = b.points("motor_amps", datetime_to_ns(ORIGIN), datetime_to_ns(NOW))
+        np.testing.assert_array_equal(t_a, t_b)
+        np.testing.assert_array_equal(v_a, v_b)
+
+    def test_week_visits_every_state_with_consistent_tags(self) -> None:
+        sim = _simulator()
+        raw = {
+            alias: [
+                {"t": datetime.fromtimestamp(t / 1e9, tz=timezone.utc).isoformat(), "v": v, "q": 192}
+                for t, v in zip(*(x.tolist() for x in sim.points(alias, datetime_to_ns(ORIGIN), datetime_to_ns(NOW))))
+            ]
+            for alias in ("motor_amps", "running", "cip", "process")
+        }
+        df = build_dataframe(raw)
+        self.assertEqual(set(df["state"]), set(STATE_NAMES))
+        self.assertTrue((df.loc[df["process"], "running"]).all())
+        self.assertGreater(df.loc[df["state"] == "Processing", "motor_amps"].mean(),
+                           df.loc[df["state"] == "Idle", "motor_amps"].mean())
+
+    def test_density_and_now_cutoff(self) -> None:
+        sim = _simulator(interval_seconds=5)
+        t, _ = sim.points("motor_amps", datetime_to_ns(NOW - timedelta(minutes=1)), datetime_to_ns(NOW + timedelta(hours=1)))
+        self.assertEqual(len(t), 13)
+        self.assertEqual(int(t[-1]), datetime_to_ns(NOW))
+
+    def test_sparse_bools_record_changes_only(self) -> None:
+        sim = _simulator(sparse_bools=True)
+        _, v = sim.points("cip", datetime_to_ns(ORIGIN), datetime_to_ns(NOW))
+        self.assertTrue((v[1:] != v[:-1]).all())
+
+
+class _ClientHarness(IsolatedAsyncioTestCase):
+    settings = FakeTimebaseSettings()
+    sim_kwargs: dict = {}
+
+    async def asyncSetUp(self) -> None:
+        historian_breaker.reset()
+        self.sim = _simulator(**self.sim_kwargs)
+        self.app = create_app(self.sim, self.settings)
+        transport = httpx.ASGITransport(app=self.app)
+        self.i3x = httpx.AsyncClient(transport=transport, base_url="http://fake-timebase")
+        self.legacy = httpx.AsyncClient(transport=transport)
+        self._patchers = [
+            patch.object(i3x_client, "_client", self.i3x),
+            patch.object(i3x_client, "_history_slots", None),
+            patch.object(timebase_client_legacy, "_client", self.legacy),
+        ]
+        for p in self._patchers:
+            p.start()
+
+    async def asyncTearDown(self) -> None:
+        for p in self._patchers:
+            p.stop()
+        await self.i3x.aclose()
+        await self.legacy.aclose()
+        historian_breaker.reset()
+
+
+class I3XWireTests(_ClientHarness):
+    sim_kwargs = {"sparse_bools": True}
+
+    async def test_startup_validation_accepts_configured_tags(self) -> None:
+        await i3x_client.startup()
+
+    async def test_history_matches_simulator_with_clamped_seed(self) -> None:
+        start, end = ORIGIN + timedelta(days=2, minutes=7, seconds=30), ORIGIN + timedelta(days=4)
+        got = await i3x_client.fetch_all_tags(start, end, strict=True, columnar=True)
+
+        t, v = self.sim.points("motor_amps", datetime_to_ns(start), datetime_to_ns(end))
+        amps = got["motor_amps"]
+        self.assertEqual(int(amps.t_ns[0]), datetime_to_ns(start), "seed clamps to startTime")
+        np.testing.assert_array_equal(amps.t_ns[1:], t)
+        np.testing.assert_array_equal(amps.values[1:], v)
+        # Change-only booleans: the seed carries the state in force at start.
+        expected = self.sim.previous("process", datetime_to_ns(start))[1]
+        self.assertEqual(bool(got["process"].values[0]), expected)
+
+    async def test_current_values(self) -> None:
+        current = await i3x_client.fetch_current_values()
+        self.assertEqual(current["motor_amps"], self.sim.latest("motor_amps")[1])
+        self.assertIsInstance(current["running"], bool)
+
+    async def test_unknown_element_id_gets_per_tag_error(self) -> None:
+        r = await self.i3x.post("/i3x/objects/value", json={"elementIds": ["nope"]})
+        self.assertIn("error", r.json()["nope"])
+
+
+class PartialContentTests(_ClientHarness):
+    settings = FakeTimebaseSettings(history_point_limit=500)
+
+    async def test_truncated_history_is_bisected_to_completion(self) -> None:
+        start, end = ORIGIN + timedelta(days=1), ORIGIN + timedelta(days=1, hours=20)
+        got = await i3x_client.fetch_all_tags(start, end, strict=True, columnar=True)
+        t, _ = self.sim.points("motor_amps", datetime_to_ns(start), datetime_to_ns(end))
+        np.testing.assert_array_equal(got["motor_amps"].t_ns, t)
+
+
+class LatencyTests(_ClientHarness):
+    settings = FakeTimebaseSettings(latency_ms=50)
+
+    async def test_latency_is_injected(self) -> None:
+        began = time.perf_counter()
+        await i3x_client.fetch_current_values()
+        self.assertGreaterEqual(time.perf_counter() - began, 0.05)
+
+
+class LegacyWireTests(_ClientHarness):
+    async def test_legacy_history_matches_simulator(self) -> None:
+        start, end = ORIGIN + timedelta(days=3), ORIGIN + timedelta(days=3, hours=6)
+        got = await timebase_client_legacy.fetch_all_tags(start, end, strict=True)
+        t, v = self.sim.points("running", datetime_to_ns(start), datetime_to_ns(end))
+        self.assertEqual(len(got["running"]), len(t))
+        self.assertEqual([p["v"] for p in got["running"]], v.tolist())
+        self.assertEqual(set(got), set(I3X_TAGS))
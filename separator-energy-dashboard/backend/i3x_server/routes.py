@@ -19,7 +19,7 @@ docs/phase3-producer-plan.md Appendix C):
 from datetime import datetime
 from typing import Optional
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
 from pydantic import BaseModel, Field, field_validator
 
 from . import envelope, model, values
@@ -244,9 +244,13 @@ async def get_values(body: ElementIdsBody) -> dict:
 
 # --- /objects/history -------------------------------------------------------
 @router.post("/objects/history")
-async def get_history(body: HistoryBody) -> dict:
+async def get_history(
+    body: HistoryBody,
+    points: Optional[int] = Query(default=None, ge=3, description="Downsample each series to about this many points"),
+) -> dict:
     """Time-series reads. Derived signals from the 24h ring buffer;
-    raw passthrough tags from the historian."""
+    raw passthrough tags from the historian. `points` (an extension, not
+    in the reference API) thins each series for charting."""
     try:
         start = _parse_iso(body.startTime)
         end = _parse_iso(body.endTime)
@@ -261,6 +265,6 @@ async def get_history(body: HistoryBody) -> dict:
         if not model.is_tag(eid):
             items.append(envelope.per_element_error(eid, "NotFound", "elementId not found"))
             continue
-        vqt_list = await values.history_for_tag(eid, start, end)
+        vqt_list = await values.history_for_tag(eid, start, end, points)
         items.append(envelope.per_element_success(eid, envelope.history_result(vqt_list or [])))
     return envelope.bulk_success(items)
@@ -235,3 +235,25 @@ class HistoryTests(TestCase):
         self.assertTrue(item["success"])
         self.assertEqual(item["result"]["values"], [])
         self.assertEqual(item["result"]["isComposition"], False)
+
+    def test_history_points_downsamples_each_series(self) -> None:
+        first = 29734200  # 2026-07-14T18:00Z, in epoch minutes
+        for i in range(600):
+            state = "CIP" if 200 <= i < 203 else "Processing"
+            processing._ring.append(first + i, 40.0 + (25.0 if i == 377 else i % 3), state,
+                                    "On-Peak", 0.31, "1st Shift", 0.0)
+        request = {
+            "elementIds": ["separator-1-kw", "separator-1-state"],
+            "startTime": "2026-07-14T18:00:00Z",
+            "endTime":   "2026-07-15T18:00:00Z",
+        }
+        with _client() as c:
+            r = c.post("/api/i3x/v1/objects/history?points=50", json=request)
+            bad = c.post("/api/i3x/v1/objects/history?points=1", json=request)
+        kw, state = (item["result"]["values"] for item in r.json()["results"])
+        self.assertEqual(len(kw), 50)
+        self.assertIn(65.0, [v["value"] for v in kw])  # the spike survives
+        # State keeps every run boundary: Processing, CIP, Processing, last.
+        self.assertEqual([v["value"] for v in state], ["Processing", "CIP", "Processing", "Processing"])
+        self.assertEqual(state[1]["timestamp"], "2026-07-14T21:20:00Z")
+        self.assertEqual(bad.status_code, 422)
@@ -6,12 +6,16 @@ Routes import from here, not from processing/historian directly, so the
 binding rules stay in one place.
 """
 
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 from typing import Any, Optional
 
-from services import historian_client, processing
+import numpy as np
+
+from services import downsample, historian_client, minute_ring, processing
 from . import envelope, model
 
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
 
 def _parse_iso(value: str) -> datetime:
     """Stdlib ISO parser. Python 3.11+ handles 'Z' suffix natively."""
@@ -47,85 +51,87 @@ async def history_for_tag(
     element_id: str,
     start: datetime,
     end: datetime,
+    max_points: Optional[int] = None,
 ) -> Optional[list[dict]]:
     """Return a list of VQT records for a tag's history in the [start, end]
     window. Returns None if the tag isn't in the catalog. Empty list when
-    the tag is known but has no points in the window."""
+    the tag is known but has no points in the window. With ``max_points``
+    the series is downsampled (services/downsample.py): LTTB for numbers,
+    run starts for strings and booleans."""
     tag = model.TAG_LOOKUP.get(element_id)
     if tag is None:
         return None
 
     if tag["is_passthrough"]:
-        return await _passthrough_history(tag, start, end)
-    return _derived_history(tag, start, end)
+        return await _passthrough_history(tag, start, end, max_points)
+    return _derived_history(tag, start, end, max_points)
 
 
-def _derived_history(tag: dict, start: datetime, end: datetime) -> list[dict]:
-    """Source: processing.timeline_points() — the in-memory ring buffer
+def _derived_history(tag: dict, start: datetime, end: datetime, max_points: Optional[int] = None) -> list[dict]:
+    """Source: processing.buffer_rows() — the in-memory ring buffer
     populated by the Phase 2 processing loop and pre-filled at boot."""
-    field = tag["latest_field"]
-    points = processing.timeline_points()
-
-    out: list[dict] = []
-    for p in points:
-        # timeline_points returns timestamps as ISO strings; parse for filter.
-        ts_str = p.get("timestamp")
-        if not ts_str:
-            continue
-        ts = _parse_iso(ts_str)
-        if ts < start or ts > end:
-            continue
-        value = _extract_derived_value(p, field)
-        out.append(envelope.vqt(value=value, quality=envelope.QUALITY_GOOD, timestamp=ts))
-    return out
-
-
-def _extract_derived_value(point: dict, field: str) -> Any:
-    """Map a LatestState field name to the corresponding key in a
-    timeline_points entry. The shapes diverge slightly: the buffer uses
-    historian-style names (no `cost_per_hour`/`cost_today` since those
-    aren't in the buffer), so we translate."""
-    # Direct hits
-    if field in ("state", "kw", "tou_period", "shift"):
-        return point.get(field)
-    # Derived but not in buffer — best-effort reconstruction from kw + tou_rate.
-    # Buffer doesn't store cost_per_hour or cost_today directly because Phase 2
-    # only writes minute-resolution snapshots that are about kW + classification.
-    # For history of cost_per_hour: kw × tou_rate; for cost_today we don't have
-    # historical accumulator state, so return None (consumers see GoodNoData).
+    rows = processing.buffer_rows(start, end)
+    values = _derived_values(rows, tag["latest_field"])
+    if max_points:
+        keep = downsample.series(rows["minute"], values, max_points)
+        rows, values = rows[keep], [values[i] for i in keep.tolist()]
+    stamps = [_EPOCH + timedelta(minutes=m) for m in rows["minute"].tolist()]
+    return [
+        envelope.vqt(
+            value=value,
+            quality=envelope.QUALITY_GOOD if value is not None else envelope.QUALITY_BAD,
+            timestamp=ts,
+        )
+        for value, ts in zip(values, stamps)
+    ]
+
+
+def _derived_values(rows: np.ndarray, field: str) -> list[Any]:
+    """Map a LatestState field name to the matching ring-buffer column. The
+    buffer keeps minute-resolution kW + classification plus the cost_today
+    accumulator, so cost_per_hour is reconstructed from kw x tou_rate.
+    Unknown (NaN) readings come back as None."""
+    kw = np.round(rows["kw"], 2)
+    if field == "kw":
+        return _nullable(kw)
+    if field in ("state", "tou_period", "shift"):
+        column, labels = {
+            "state":      ("state", minute_ring.STATES),
+            "tou_period": ("tou", minute_ring.PERIODS),
+            "shift":      ("shift", minute_ring.SHIFT_LABELS),
+        }[field]
+        return labels.decode(rows[column]).tolist()
     if field == "cost_per_hour":
-        kw = point.get("kw")
-        rate = point.get("tou_rate")
-        if kw is not None and rate is not None:
-            return round(kw * rate, 2)
-        return None
-    # cost_today is a stateful accumulator — historical values would require
-    # snapshot-per-minute storage we don't currently keep. Return None until
-    # we add that to the ring buffer.
+        return _nullable(np.round(kw * np.round(rows["rate"], 4), 2))
     if field == "cost_today":
-        return None
+        return _nullable(np.round(rows["cost"], 4))
     # amps/running/cip aren't in the derived path (they'd be passthrough).
-    return None
+    return [None] * len(rows)
+
+
+def _nullable(values: np.ndarray) -> list[Optional[float]]:
+    return [None if v != v else v for v in values.tolist()]
 
 
-async def _passthrough_history(tag: dict, start: datetime, end: datetime) -> list[dict]:
-    """Source: historian_client.fetch_tag_history — same path Phase 1 uses
-    on the consumer side. Available for the full historian retention window."""
+async def _passthrough_history(
+    tag: dict, start: datetime, end: datetime, max_points: Optional[int] = None,
+) -> list[dict]:
+    """Source: historian_client.fetch_passthrough_history — the i3X client's
+    fetch_tag_history, same path Phase 1 uses on the consumer side.
+    Available for the full historian retention window."""
     historian_tag = tag["historian_tag"]
     try:
-        # historian_client.fetch_tag_history is only exposed on the i3x_client
-        # path (legacy client has different semantics). Use the active i3x
-        # client directly to avoid the dispatcher's signature ambiguity.
-        from services import i3x_client  # noqa: PLC0415 — lazy import is intentional
-        raw_points = await i3x_client.fetch_tag_history(historian_tag, start, end)
+        # Always i3X (the legacy client has different semantics), but through
+        # the dispatcher so a concurrent bulk read covering this window is
+        # shared instead of repeated.
+        raw_points = await historian_client.fetch_passthrough_history(historian_tag, start, end)
     except Exception:
         return []
 
-    out: list[dict] = []
-    for p in raw_points:
-        ts_str = p.get("t")
-        if not ts_str:
-            continue
-        ts = _parse_iso(ts_str)
-        out.append(envelope.vqt(value=p.get("v"), quality=envelope.QUALITY_GOOD, timestamp=ts))
-    return out
+    points = [(_parse_iso(p["t"]), p.get("v")) for p in raw_points if p.get("t")]
+    if max_points:
+        keep = downsample.series(
+            np.array([ts.timestamp() for ts, _ in points]), [v for _, v in points], max_points,
+        )
+        points = [points[i] for i in keep.tolist()]
+    return [envelope.vqt(value=v, quality=envelope.QUALITY_GOOD, timestamp=ts) for ts, v in points]
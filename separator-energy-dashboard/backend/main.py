@@ -20,10 +20,14 @@ from fastapi.staticfiles import StaticFiles
 
 load_dotenv()
 
-from config import I3X_BASE_URL, UNS_PUBLISH_ENABLED, USE_I3X
+from config import I3X_BASE_URL, UNS_PUBLISH_ENABLED, USE_I3X, WARM_START_ENABLED
 from i3x_server.routes import router as i3x_producer_router
 from routers.energy import router as energy_router
-from services import analytics, historian_client, processing, uns_publisher
+from services import analytics, compute_pool, historian_client, processing, uns_publisher, warm_start
+from services.circuit_breaker import historian_breaker
+from services.historian_scheduler import historian_scheduler
+from services.live_stream import live_stream
+from services.loop_monitor import loop_monitor
 
 # ---------------------------------------------------------------------------
 # Logging
@@ -51,6 +55,9 @@ STATIC_DIR = Path(__file__).parent / "static"
 # Order on shutdown (reverse):
 #   uns_publisher.stop() -> processing.stop() -> historian_client.shutdown()
 #
+# The event-loop lag monitor starts first and the analytics executor is shut
+# down last, so lag is measured across startup backfill and prewarm.
+#
 # Reverse order on shutdown ensures each layer stops before the layer it
 # depends on tears down: uns_publisher reads from processing.LatestState,
 # and processing reads via historian_client's httpx session.
@@ -67,24 +74,37 @@ async def lifespan(app: FastAPI):
         I3X_BASE_URL if USE_I3X else "n/a",
         UNS_PUBLISH_ENABLED,
     )
+    loop_monitor.start()
     try:
         await historian_client.startup()
     except Exception as exc:
         logger.error("Historian client startup failed: %s", exc)
         raise
+    if WARM_START_ENABLED:
+        # Before processing.start(), so its backfill reads only the gap.
+        await warm_start.restore()
+    processing.add_tick_listener(live_stream.publish)
     await processing.start()
     await analytics.start_prewarm()
     if UNS_PUBLISH_ENABLED:
         await uns_publisher.start()
+    if WARM_START_ENABLED:
+        warm_start.start()
 
     yield
 
     logger.info("Shutting down — stopping publisher + prewarm + processing, closing historian client")
+    live_stream.close_all()
     if UNS_PUBLISH_ENABLED:
         await uns_publisher.stop()
     await analytics.stop_prewarm()
     await processing.stop()
+    processing.remove_tick_listener(live_stream.publish)
+    if WARM_START_ENABLED:
+        await warm_start.stop()  # final snapshot, after the last tick
     await historian_client.shutdown()
+    compute_pool.shutdown()
+    await loop_monitor.stop()
 
 
 # ---------------------------------------------------------------------------
@@ -117,6 +137,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Timeline-Seq"],
 )
 
 # ---------------------------------------------------------------------------
@@ -128,7 +149,24 @@ app.include_router(i3x_producer_router)
 
 @app.get("/health")
 async def health():
-    return {"status": "ok", "service": "separator-energy-dashboard"}
+    """Liveness plus historian reachability. Always 200 — the container is
+    healthy even when Timebase isn't; `status` reads "degraded" while the
+    historian circuit breaker is not closed. `historian_scheduler` carries
+    per-priority-class queue times; `event_loop` the loop-lag percentiles
+    and `analytics_executor` where analytics CPU work ran and for how long;
+    `analytics` the payload cache and day-partial counters; `live_stream`
+    the connected SSE clients."""
+    breaker = historian_breaker.snapshot()
+    return {
+        "status": "ok" if breaker["state"] == "closed" else "degraded",
+        "service": "separator-energy-dashboard",
+        "historian": breaker,
+        "historian_scheduler": historian_scheduler.stats(),
+        "event_loop": loop_monitor.stats(),
+        "analytics": analytics.stats(),
+        "analytics_executor": compute_pool.stats(),
+        "live_stream": live_stream.stats(),
+    }
 
 
 @app.get("/api/i3x/info")
@@ -38,8 +38,9 @@ class EnergySummary(BaseModel):
     by_shift:       dict[str, ShiftMetrics]
     by_tou_period:  dict[str, TouPeriodMetrics] = {}
     # Set when the aggregation could not be computed (sparse/missing data,
-    # historian fault, etc). When present, numeric fields are zeros and the
-    # UI should render a neutral "insufficient data" note rather than an error.
+    # historian fault, etc). When present, numeric fields are zeros — or,
+    # when only some days of the window could not be read, totals over the
+    # rest — and the UI should render a neutral note rather than an error.
     warning:        Optional[str] = None
 
 
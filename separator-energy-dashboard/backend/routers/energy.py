@@ -15,13 +15,16 @@
 
 import logging
 from datetime import datetime, timezone, timedelta
+from typing import Optional, Union
 
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 
 from models.schemas import (
     EnergyConfig, RawDebugResponse, EnergySummary, DailyRecord,
 )
-from services import historian_client, state_engine, cost_calculator, processing, analytics
+from services import historian_client, state_engine, cost_calculator, processing, analytics, compute_pool
+from services.live_stream import live_stream
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api")
@@ -38,7 +41,7 @@ def _empty_summary_with_warning(message: str) -> dict:
 # GET /api/energy/summary — totals by state, shift, and TOU period
 #
 # Window controls:
-#   days   = window length in days (default 7, max 90)
+#   days   = window length in days (default 7, max 366)
 #   offset = how many days before "now" the window ENDS (default 0 = ending now)
 #
 # Used by the frontend to fetch both the current period and a prior period for
@@ -53,7 +56,7 @@ def _empty_summary_with_warning(message: str) -> dict:
 # ---------------------------------------------------------------------------
 @router.get("/energy/summary", response_model=EnergySummary)
 async def get_summary(
-    days: int = Query(default=7, ge=1, le=90),
+    days: int = Query(default=7, ge=1, le=366),
     offset: int = Query(default=0, ge=0, le=365),
 ):
     try:
@@ -70,7 +73,7 @@ async def get_summary(
 # ---------------------------------------------------------------------------
 @router.get("/energy/daily", response_model=list[DailyRecord])
 async def get_daily(
-    days: int = Query(default=7, ge=1, le=90),
+    days: int = Query(default=7, ge=1, le=366),
     offset: int = Query(default=0, ge=0, le=365),
 ):
     try:
@@ -80,35 +83,106 @@ async def get_daily(
         return []
 
 
+# ---------------------------------------------------------------------------
+# GET /api/energy/what-if — summary recosted for another voltage / power factor
+#
+# Same window controls as /summary. Answers "what would this window have
+# cost at 460 V / 0.92 PF" from the minutes already held for /summary,
+# without touching the live configuration. Never cached.
+#
+# On any failure, returns the empty-summary shape with a `warning` set,
+# status 200 — never HTTP 500.
+# ---------------------------------------------------------------------------
+@router.get("/energy/what-if", response_model=EnergySummary)
+async def get_what_if(
+    voltage: float = Query(..., ge=100, le=600),
+    power_factor: float = Query(..., ge=0.5, le=1.0),
+    days: int = Query(default=7, ge=1, le=366),
+    offset: int = Query(default=0, ge=0, le=365),
+):
+    try:
+        return await analytics.what_if(days, offset, voltage, power_factor)
+    except Exception:
+        logger.exception("what-if aggregation failed (days=%s offset=%s)", days, offset)
+        return _empty_summary_with_warning("Could not compute what-if summary — see backend logs")
+
+
 # ---------------------------------------------------------------------------
 # GET /api/energy/timeline — last 24-hr minute-by-minute (from ring buffer)
 # ---------------------------------------------------------------------------
 @router.get("/energy/timeline")
-async def get_timeline():
+async def get_timeline(
+    request: Request,
+    since: Optional[str] = Query(default=None, description="Sequence number (X-Timeline-Seq / `seq`) or ISO timestamp"),
+    points: Optional[int] = Query(default=None, ge=3, description="Downsample to about this many points"),
+):
     """Return per-minute kW, state, and cost for the last 24 hours.
 
-    Sourced from the in-memory ring buffer maintained by the processing loop.
+    Sourced from the in-memory ring buffer maintained by the processing loop,
+    whose body is kept serialized and only changes once a minute: it is
+    served as-is with a strong ETag, and a matching If-None-Match gets a 304.
+    The X-Timeline-Seq header carries the newest minute's sequence number.
     On a cold start the buffer fills up over time; clients should expect a
     growing series until 24h have elapsed since boot. On any failure or
     empty dataset, returns an empty list, status 200.
+
+    With `since`, returns only what was appended after that cursor:
+    `{seq, reset, points, partial}` (see processing.timeline_since). Pollers
+    pass the returned `seq` back on the next call.
+
+    With `points`, the series is downsampled for display: LTTB over kW, with
+    every state/TOU/shift run boundary kept (services/downsample.py).
     """
+    if since is not None:
+        cursor = _parse_cursor(since)
+        try:
+            return processing.timeline_since(cursor, points)
+        except Exception:
+            logger.exception("timeline delta failed (since=%s)", since)
+            return {"seq": None, "reset": True, "points": [], "partial": None}
     try:
-        points = processing.timeline_points()
-        if points:
-            return points
+        if processing.buffer_size():
+            etag = processing.timeline_etag(points)
+            headers = {"ETag": etag, "Cache-Control": "no-cache", "X-Timeline-Seq": str(processing.timeline_seq())}
+            if _etag_matches(request.headers.get("if-none-match"), etag):
+                return Response(status_code=304, headers=headers)
+            body, _ = processing.timeline_body(points)
+            return Response(body, media_type="application/json", headers=headers)
         # Cold start fallback — read directly from the historian for the first tick.
         now   = datetime.now(timezone.utc)
         start = now - timedelta(hours=24)
-        raw   = await historian_client.fetch_all_tags(start=start, end=now)
-        df    = state_engine.build_dataframe(raw)
-        if df.empty:
-            return []
-        return cost_calculator.aggregate_timeline(df)
+        raw   = await historian_client.fetch_all_tags(start=start, end=now, columnar=True)
+        return await compute_pool.run(_timeline_from_raw, raw)
     except Exception:
         logger.exception("timeline aggregation failed")
         return []
 
 
+def _parse_cursor(since: str) -> Union[int, datetime]:
+    if since.isascii() and since.isdigit():   # not "²" and friends, which int() rejects
+        return int(since)
+    try:
+        ts = datetime.fromisoformat(since.replace("Z", "+00:00"))
+    except ValueError:
+        raise HTTPException(status_code=422, detail="since must be a sequence number or an ISO timestamp")
+    return ts if ts.tzinfo is not None else ts.replace(tzinfo=timezone.utc)
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags
+
+
+def _timeline_from_raw(raw: dict) -> list[dict]:
+    """Executor job for the cold-start timeline."""
+    df = state_engine.build_dataframe(raw)
+    if df.empty:
+        return []
+    return cost_calculator.aggregate_timeline(df)
+
+
 # ---------------------------------------------------------------------------
 # GET /api/energy/current — live snapshot (from LatestState, no historian I/O)
 # ---------------------------------------------------------------------------
@@ -122,6 +196,22 @@ async def get_current():
     return processing.current_metrics()
 
 
+# ---------------------------------------------------------------------------
+# GET /api/energy/stream — live Server-Sent Events (fed by the processing loop)
+# ---------------------------------------------------------------------------
+@router.get("/energy/stream")
+async def get_stream(request: Request):
+    """Push `metrics` (the /current payload) every processing tick and
+    `timeline` deltas as minutes land, to every connected client from one
+    broadcast. Reconnects resume from Last-Event-ID; see
+    services/live_stream.py for heartbeats and slow-client dropping."""
+    return StreamingResponse(
+        live_stream.subscribe(request.headers.get("last-event-id")),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 # ---------------------------------------------------------------------------
 # GET /api/config — current settings
 # ---------------------------------------------------------------------------
@@ -136,12 +226,18 @@ async def get_config():
 # ---------------------------------------------------------------------------
 @router.post("/config")
 async def post_config(cfg: EnergyConfig):
-    """Update $/kWh rate, voltage, or power factor."""
+    """Update $/kWh rate, voltage, or power factor.
+
+    Cached summaries are keyed by config version, so none computed under the
+    old settings is served again; the windows are recomputed in the
+    background from minutes already held.
+    """
     cost_calculator.update_config(
         rate_per_kwh=cfg.rate_per_kwh,
         voltage=cfg.voltage,
         power_factor=cfg.power_factor,
     )
+    analytics.config_changed()
     return {"status": "ok", "config": cost_calculator.get_config()}
 
 
@@ -4,29 +4,71 @@ Both the public /api/energy/{summary,daily} endpoints AND a periodic
 background task call into get_summary() / get_daily() here. First request
 for a given (days, offset) tuple computes from scratch (historian fetch +
 pandas aggregation, slow); subsequent calls within TTL serve from memory.
+Past the soft TTL the old payload is still returned at once and refreshed
+in the background. Entries are keyed by cost_calculator.config_version(),
+so a POST /api/config never serves dollars computed under the old rates.
 
 The pre-warm loop keeps the four common windows hot at all times so the
 first user click after a cold boot is fast — not a one-minute wait.
 
 Concurrency: each cache key has its own asyncio.Lock so that if two requests
 for the same window arrive while it's being computed, only one historian
-fetch happens; the second awaits the same result.
+fetch happens; the second awaits the same result. Across windows, a closed
+day being read for one window is awaited by the others that need it (unless
+they are more urgent), and no lock is held across a historian read.
+
+Windows are not computed from raw minutes each time: they are assembled
+from per-facility-local-day partials (services/day_partials.py). Closed
+days are fetched (strictly — a failed read raises rather than leaving a
+gap) and reduced once; a window then only reduces its two edge days and the
+open tail. A closed day that could not be read leaves its window
+incomplete: that payload is served (the summary with a `warning`) but
+never cached. The open tail of offset-0 windows comes from one
+state_engine.IncrementalFrameBuilder: a refresh fetches only the last few
+minutes and appends to the aligned frame, with a full rebuild every
+ANALYTICS_FULL_REBUILD_SECONDS. With ANALYTICS_WORKER_ENABLED the final
+assembly runs in a worker process (services/analytics_worker.py).
 """
 
 import asyncio
+import functools
+import json
 import logging
 import time
-from datetime import datetime, timedelta, timezone
-from typing import Any, Awaitable, Callable, Optional
-
-from services import cost_calculator, historian_client, state_engine
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Optional, Union
+
+from config import (
+    ANALYTICS_CACHE_MAX_ENTRIES,
+    ANALYTICS_CACHE_MAX_MB,
+    ANALYTICS_FULL_REBUILD_SECONDS,
+    ANALYTICS_INCREMENTAL_ENABLED,
+    ANALYTICS_PARTIALS_SETTLE_SECONDS,
+    ANALYTICS_REORDER_WINDOW_SECONDS,
+)
+from services import (
+    analytics_worker,
+    compute_pool,
+    cost_calculator,
+    day_partials,
+    historian_client,
+    state_engine,
+)
+from services.cost_calculator import CostRows, Rollup
+from services.circuit_breaker import historian_breaker
+from services.historian_scheduler import INTERACTIVE, PREWARM
+from services.lru_cache import LRUCache
+from services.tag_columns import datetime_to_ns, ns_to_datetime
 
 logger = logging.getLogger(__name__)
 
-# 5-minute TTL — analytical data is rolling; users tolerate 5-minute staleness
-# in exchange for sub-second response. Pre-warm runs every 4 minutes so the
-# cache is always under TTL when the next refresh fires.
-TTL_SECONDS = 300
+# 5-minute soft TTL — analytical data is rolling; users tolerate 5-minute
+# staleness in exchange for sub-second response. Pre-warm runs every 4
+# minutes so the cache is always under TTL when the next refresh fires.
+# Between the soft and hard TTL an entry is still served at once while a
+# background task refreshes it; only past the hard TTL does a request wait.
+SOFT_TTL_SECONDS = 300
+HARD_TTL_SECONDS = 1800
 PREWARM_INTERVAL_SECONDS = 240
 
 # (days, offset) tuples to pre-warm. Mirrors the windows the frontend asks
@@ -36,10 +78,42 @@ PREWARM_WINDOWS: tuple[tuple[int, int], ...] = (
     (30, 0), (30, 30),
 )
 
-_cache: dict[tuple, dict] = {}
-_locks: dict[tuple, asyncio.Lock] = {}
+def _entry_bytes(entry: dict) -> int:
+    # Serialized size: a fair proxy for what a summary or daily list holds.
+    return len(json.dumps(entry["v"], default=str))
+
+
+# Keys are (kind, days, offset, config version): a POST /api/config makes
+# every entry computed under the old rates/voltage/PF unreachable. Any
+# (days, offset) a client asks for gets an entry, so the cache is bounded
+# in entries and bytes, least recently used evicted first.
+_cache: LRUCache[tuple, dict] = LRUCache(
+    max_entries=ANALYTICS_CACHE_MAX_ENTRIES,
+    max_bytes=int(ANALYTICS_CACHE_MAX_MB * 1024 * 1024),
+    sizeof=_entry_bytes,
+)
+# key -> [lock, coroutines holding or waiting on it]; a lock lives only
+# while its key is being computed.
+_locks: dict[tuple, list] = {}
+_refreshing: dict[tuple, asyncio.Task] = {}
+_recompute_task: Optional[asyncio.Task] = None
 _prewarm_task: Optional[asyncio.Task] = None
 
+# Longest closed-day read in one historian request while filling partials.
+PARTIAL_FILL_CHUNK_DAYS = 31
+# Fetch margin around a day so its first and last minutes align against
+# real neighbours rather than the historian's clamped boundary seed.
+_EDGE = timedelta(minutes=1)
+
+# Closed day being read from the historian -> (priority, fill task), so a
+# window that needs a day another window is already reading awaits that read.
+_filling: dict[date, tuple[int, asyncio.Task]] = {}
+# Held while the live builder is extended — never across a historian read.
+_live_lock = asyncio.Lock()
+# (monotonic build time, earliest minute covered in ns, builder) for the
+# open tail of offset-0 windows.
+_live: Optional[tuple[float, int, state_engine.IncrementalFrameBuilder]] = None
+
 
 # --- public API used by routers and lifespan --------------------------------
 async def get_summary(days: int, offset: int) -> dict:
@@ -56,10 +130,80 @@ async def get_daily(days: int, offset: int) -> list[dict]:
     )
 
 
+async def what_if(days: int, offset: int, voltage: float, power_factor: float) -> dict:
+    """The (days, offset) summary recosted for another electrical config.
+
+    Served from the same partials as get_summary() — no extra historian
+    reads for closed days — and never cached.
+    """
+    return _summary(*await _window_rollup(days, offset, electrical=(voltage, power_factor)))
+
+
 def clear_cache() -> None:
     _cache.clear()
 
 
+def stats() -> dict:
+    """Cache counters for /health."""
+    return {
+        "cache":      _cache.stats(),
+        "locks":      len(_locks),
+        "refreshing": len(_refreshing),
+        "partials":   day_partials.stats(),
+    }
+
+
+def config_changed() -> None:
+    """Drop entries computed under the previous config and recompute those
+    windows in the background.
+
+    Closed days are recosted from the minutes day_partials already holds and
+    the open tail from the live frame, so this re-reads nothing but the last
+    few minutes from the historian.
+    """
+    version = cost_calculator.config_version()
+    stale = [key for key in _cache.keys() if key[-1] != version]
+    windows = sorted({key[1:3] for key in stale}, key=lambda w: -w[0])
+    for key in stale:
+        _cache.pop(key)
+    global _recompute_task
+    if _recompute_task is not None and not _recompute_task.done():
+        # Superseded: its results would be keyed to the previous version.
+        _recompute_task.cancel()
+    if windows:
+        _recompute_task = asyncio.create_task(_recompute(windows), name="analytics-config-recompute")
+
+
+def cache_snapshot() -> list[tuple[tuple, float, Any]]:
+    """(key without config version, computed-at, payload) of every entry for
+    the current config — for the warm-start snapshot."""
+    version = cost_calculator.config_version()
+    return [(key[:-1], entry["t"], entry["v"]) for key, entry in _cache.items() if key[-1] == version]
+
+
+def restore_cache(entries: list[tuple[tuple, float, Any]]) -> int:
+    """Load snapshot entries still inside the hard TTL, keyed to the current
+    config. The caller checks the snapshot was taken under this config."""
+    version = cost_calculator.config_version()
+    now = time.time()
+    restored = 0
+    for key, computed_at, value in entries:
+        if now - computed_at < HARD_TTL_SECONDS:
+            _cache.put(tuple(key) + (version,), {"t": computed_at, "v": value})
+            restored += 1
+    return restored
+
+
+def _reset_for_tests() -> None:
+    global _live, _recompute_task
+    _cache.clear()
+    _refreshing.clear()
+    _filling.clear()
+    _recompute_task = None
+    _live = None
+    day_partials._reset_for_tests()
+
+
 async def start_prewarm() -> None:
     global _prewarm_task
     if _prewarm_task is not None and not _prewarm_task.done():
@@ -86,73 +230,329 @@ async def stop_prewarm() -> None:
 
 
 # --- internals --------------------------------------------------------------
+class _Uncached:
+    """A payload computed with days missing: returned, never cached."""
+
+    def __init__(self, value: Any) -> None:
+        self.value = value
+
+
 async def _get_or_compute(
     key: tuple,
     compute_fn: Callable[[], Awaitable[Any]],
 ) -> Any:
-    now = time.time()
+    key = key + (cost_calculator.config_version(),)
     hit = _cache.get(key)
-    if hit and now - hit["t"] < TTL_SECONDS:
+    age = time.time() - hit["t"] if hit else None
+    if hit and age < SOFT_TTL_SECONDS:
+        return hit["v"]
+    if hit and historian_breaker.is_open():
+        # Historian down: an expired window beats recomputing it from the
+        # empty result every fast-failed fetch would return.
         return hit["v"]
+    if hit and age < HARD_TTL_SECONDS:
+        _refresh_in_background(key, compute_fn)
+        return hit["v"]
+    return await _compute_locked(key, compute_fn)
+
+
+async def _compute_locked(key: tuple, compute_fn: Callable[[], Awaitable[Any]]) -> Any:
+    held = _locks.setdefault(key, [asyncio.Lock(), 0])
+    held[1] += 1
+    try:
+        async with held[0]:
+            # Re-check after acquiring — another coroutine may have just filled it.
+            hit = _cache.peek(key)
+            if hit and time.time() - hit["t"] < SOFT_TTL_SECONDS:
+                return hit["v"]
+            started = time.time()
+            value = await compute_fn()
+            elapsed = time.time() - started
+            if isinstance(value, _Uncached):
+                return value.value
+            _cache.put(key, {"t": time.time(), "v": value})
+            if elapsed > 1.0:
+                logger.info("analytics computed %s in %.1fs", key, elapsed)
+            return value
+    finally:
+        held[1] -= 1
+        if not held[1]:
+            del _locks[key]
+
+
+def _refresh_in_background(key: tuple, compute_fn: Callable[[], Awaitable[Any]]) -> None:
+    """Recompute a soft-expired entry unless a refresh is already running."""
+    task = _refreshing.get(key)
+    if task is not None and not task.done():
+        return
 
-    lock = _locks.setdefault(key, asyncio.Lock())
-    async with lock:
-        # Re-check after acquiring — another coroutine may have just filled it.
-        hit = _cache.get(key)
-        if hit and time.time() - hit["t"] < TTL_SECONDS:
-            return hit["v"]
-        started = time.time()
-        value = await compute_fn()
-        elapsed = time.time() - started
-        _cache[key] = {"t": time.time(), "v": value}
-        if elapsed > 1.0:
-            logger.info("analytics computed %s in %.1fs", key, elapsed)
-        return value
+    async def refresh() -> None:
+        try:
+            await _compute_locked(key, compute_fn)
+        except Exception:
+            logger.exception("analytics background refresh of %s failed", key)
+        finally:
+            _refreshing.pop(key, None)
 
+    _refreshing[key] = asyncio.create_task(refresh(), name=f"analytics-refresh-{key}")
 
-async def _compute_summary(days: int, offset: int) -> dict:
-    df = await _build_df(days, offset)
-    return cost_calculator.aggregate_summary(df)
 
+async def _compute_summary(days: int, offset: int) -> Union[dict, _Uncached]:
+    rollup, unread = await _window_rollup(days, offset)
+    summary = _summary(rollup, unread)
+    return _Uncached(summary) if unread else summary
 
-async def _compute_daily(days: int, offset: int) -> list[dict]:
-    df = await _build_df(days, offset)
-    return cost_calculator.aggregate_daily(df)
 
+async def _compute_daily(days: int, offset: int) -> Union[list[dict], _Uncached]:
+    rollup, unread = await _window_rollup(days, offset)
+    daily = cost_calculator.daily_from_rollup(rollup)
+    return _Uncached(daily) if unread else daily
 
-async def _build_df(days: int, offset: int):
-    end = datetime.now(timezone.utc) - timedelta(days=offset)
-    start = end - timedelta(days=days)
-    raw = await historian_client.fetch_all_tags(start=start, end=end)
-    return state_engine.build_dataframe(raw)
 
+def _summary(rollup: Optional[Rollup], unread: list[date]) -> dict:
+    summary = cost_calculator.summary_from_rollup(rollup)
+    if unread:
+        summary["warning"] = (
+            f"{len(unread)} day(s) in this window could not be read from the historian — totals are incomplete"
+        )
+    return summary
 
-async def _prewarm_window(days: int, offset: int) -> None:
-    """Build the dataframe ONCE and populate both summary + daily caches.
+
+async def _window_rollup(
+    days: int,
+    offset: int,
+    priority: int = INTERACTIVE,
+    electrical: Optional[tuple[float, float]] = None,
+) -> tuple[Optional[Rollup], list[date]]:
+    """(Rollup of the window, closed days in it that could not be read)."""
+    now = datetime.now(timezone.utc)
+    end = now - timedelta(days=offset)
+    start = end - timedelta(days=days)
+    settled_ns = datetime_to_ns(now - timedelta(seconds=ANALYTICS_PARTIALS_SETTLE_SECONDS))
+    window_days = day_partials.days_between(start, end)
+    closed = [d for d in window_days if day_partials.day_bounds(d)[1] <= settled_ns]
+    open_days = window_days[len(closed):]
+
+    partials: dict[date, day_partials.DayPartial] = {}
+    pieces: dict[date, CostRows] = {}
+    missing = []
+    for day in closed:
+        partial = day_partials.get(day)
+        if partial is None:
+            missing.append(day)
+        else:
+            partials[day] = partial
+    filled, unread = await _read_closed(missing, priority)
+    for day, found in filled.items():
+        if isinstance(found, day_partials.DayPartial):
+            partials[day] = found
+        else:
+            pieces[day] = found
+    if open_days:
+        lo = day_partials.day_bounds(open_days[0])[0]
+        end_ns = datetime_to_ns(end)
+        if offset == 0 and ANALYTICS_INCREMENTAL_ENABLED:
+            rows = await _live_rows(lo, end, priority)
+        else:
+            rows = await _fetch_rows(lo, end_ns + 1, priority)
+        pieces.update(rows.window(lo, end_ns + 1).split_days())
+    if analytics_worker.enabled():
+        rollup = await analytics_worker.assemble(start, end, partials, pieces, electrical)
+    elif electrical is not None:
+        # A what-if recosts and reduces every minute of the window: off the loop.
+        rollup = await compute_pool.run(day_partials.assemble, start, end, partials, pieces, electrical)
+    else:
+        rollup = day_partials.assemble(start, end, partials, pieces, electrical)
+    return rollup, unread
+
+
+async def _read_closed(
+    days: list[date],
+    priority: int,
+) -> tuple[dict[date, Union[day_partials.DayPartial, CostRows]], list[date]]:
+    """Read closed days missing from day_partials.
+
+    Returns ({day: stored DayPartial, or unstored CostRows for a day the
+    historian had no minutes for}, days whose read failed). A day another
+    window is already reading at this priority or a more urgent one is
+    awaited rather than read again; a more urgent caller reads it itself
+    (historian_client coalesces the reads and promotes the queued one).
+    """
+    jobs: dict[asyncio.Task, list[date]] = {}
+    own = []
+    for day in days:
+        flight = _filling.get(day)
+        if flight is not None and flight[0] <= priority:
+            jobs.setdefault(flight[1], []).append(day)
+        else:
+            own.append(day)
+    for run in _runs(own):
+        task = asyncio.ensure_future(_fill_run(run, priority))
+        for day in run:
+            _filling[day] = (priority, task)
+        task.add_done_callback(functools.partial(_retire_fill, run))
+        jobs[task] = run
+
+    filled: dict[date, Union[day_partials.DayPartial, CostRows]] = {}
+    unread: list[date] = []
+    # shield: a cancelled window must not cancel a read other windows await.
+    results = await asyncio.gather(*[asyncio.shield(task) for task in jobs], return_exceptions=True)
+    for wanted, result in zip(jobs.values(), results):
+        if isinstance(result, BaseException):
+            logger.warning(
+                "analytics: reading %s -> %s failed (%r); window is incomplete", wanted[0], wanted[-1], result,
+            )
+            unread += wanted
+        else:
+            filled.update((day, result[day]) for day in wanted)
+    return filled, sorted(unread)
+
+
+async def _fill_run(run: list[date], priority: int) -> dict[date, Union[day_partials.DayPartial, CostRows]]:
+    """Strictly read a run of closed days and store every day that has
+    minutes. A day without any is returned unstored, so it is read again
+    next time rather than pinned as empty. The strict read raises if any
+    tag came back with an error, so a day is never stored with one tag's
+    history missing."""
+    lo, hi = day_partials.day_bounds(run[0])[0], day_partials.day_bounds(run[-1])[1]
+    by_day = dict((await _fetch_rows(lo, hi, priority, strict=True)).split_days())
+    out: dict[date, Union[day_partials.DayPartial, CostRows]] = {}
+    for day in run:
+        rows = by_day.get(day)
+        out[day] = day_partials.put(day, rows) if rows is not None and len(rows) else CostRows.empty()
+    return out
+
+
+def _retire_fill(run: list[date], task: asyncio.Task) -> None:
+    for day in run:
+        flight = _filling.get(day)
+        if flight is not None and flight[1] is task:
+            del _filling[day]
+    if not task.cancelled():
+        task.exception()  # reported by the windows that awaited it
+
+
+def _runs(days: list[date]) -> list[list[date]]:
+    """Consecutive days, at most PARTIAL_FILL_CHUNK_DAYS per run."""
+    runs: list[list[date]] = []
+    for day in days:
+        if runs and day - runs[-1][-1] == timedelta(days=1) and len(runs[-1]) < PARTIAL_FILL_CHUNK_DAYS:
+            runs[-1].append(day)
+        else:
+            runs.append([day])
+    return runs
+
+
+async def _fetch_rows(lo_ns: int, hi_ns: int, priority: int, strict: bool = False) -> CostRows:
+    """Costed minutes in [lo_ns, hi_ns) straight from the historian."""
+    raw = await historian_client.fetch_all_tags(
+        start=ns_to_datetime(lo_ns) - _EDGE,
+        end=min(ns_to_datetime(hi_ns) + _EDGE, datetime.now(timezone.utc)),
+        columnar=True,
+        priority=priority,
+        strict=strict,
+    )
+    return await compute_pool.run(_costed_minutes, raw, lo_ns, hi_ns)
+
+
+def _costed_minutes(raw: dict, lo_ns: int, hi_ns: int) -> CostRows:
+    """Executor job: align and cost a raw read, keeping minutes in [lo_ns, hi_ns)."""
+    return cost_calculator.cost_rows(state_engine.build_dataframe(raw)).window(lo_ns, hi_ns)
+
+
+async def _live_rows(lo_ns: int, end: datetime, priority: int) -> CostRows:
+    """Costed minutes from lo_ns to now, extended incrementally."""
+    global _live
+    live = _live
+    built_at, covers_from, builder = live or (0.0, None, None)
+    since = builder.resume_at() if builder is not None else None
+    start = ns_to_datetime(lo_ns) - _EDGE
+    if (
+        since is None
+        or covers_from > datetime_to_ns(start)
+        or time.monotonic() - built_at > ANALYTICS_FULL_REBUILD_SECONDS
+    ):
+        raw = await historian_client.fetch_all_tags(start=start, end=end, columnar=True, priority=priority)
+        # A new builder is this call's alone until it is published.
+        builder = state_engine.IncrementalFrameBuilder(timedelta(seconds=ANALYTICS_REORDER_WINDOW_SECONDS))
+        rows = await compute_pool.run_threaded(_extend_live, builder, raw, None, None)
+        _live = (time.monotonic(), datetime_to_ns(start), builder)
+        return rows
+    # Start just before `since` so the historian's clamped boundary
+    # seed lands before it and is dropped.
+    raw = await historian_client.fetch_all_tags(
+        start=since - timedelta(milliseconds=1), end=end, columnar=True, priority=priority,
+    )
+    async with _live_lock:
+        if _live is live:
+            try:
+                # Another window may have extended past `since` meanwhile;
+                # the overlap merges by timestamp.
+                return await compute_pool.run_threaded(_extend_live, builder, raw, since, start)
+            except asyncio.CancelledError:
+                # The job may still be mid-extend in its thread: abandon that builder.
+                _live = None
+                raise
+    # Rebuilt or abandoned while we read: start over from the current one.
+    return await _live_rows(lo_ns, end, priority)
+
+
+def _extend_live(
+    builder: state_engine.IncrementalFrameBuilder,
+    raw: dict,
+    since: Optional[datetime],
+    trim_from: Optional[datetime],
+) -> CostRows:
+    """Executor job (in-process: it mutates the builder, which callers only
+    extend under _live_lock)."""
+    builder.extend(raw, since=since)
+    if trim_from is not None:
+        builder.trim(trim_from)
+    return cost_calculator.cost_rows(builder.frame)
+
+
+async def _prewarm_window(days: int, offset: int, priority: int = PREWARM) -> None:
+    """Assemble the window ONCE and populate both summary + daily caches.
 
     Bypasses get_or_compute's per-key locking because we want to fold both
-    aggregations into a single historian round-trip. Halves the prewarm
-    work compared to calling get_summary() + get_daily() naively.
+    aggregations into a single rollup, which both payloads are sliced from.
     """
-    df = await _build_df(days, offset)
-    summary = cost_calculator.aggregate_summary(df)
-    daily = cost_calculator.aggregate_daily(df)
+    version = cost_calculator.config_version()
+    rollup, unread = await _window_rollup(days, offset, priority=priority)
+    if unread:
+        logger.warning("analytics: (%s, %s) is missing %d day(s); not caching it", days, offset, len(unread))
+        return
+    summary = cost_calculator.summary_from_rollup(rollup)
+    daily = cost_calculator.daily_from_rollup(rollup)
     now = time.time()
-    _cache[("summary", days, offset)] = {"t": now, "v": summary}
-    _cache[("daily", days, offset)] = {"t": now, "v": daily}
+    _cache.put(("summary", days, offset, version), {"t": now, "v": summary})
+    _cache.put(("daily", days, offset, version), {"t": now, "v": daily})
+
+
+async def _recompute(windows: list[tuple[int, int]]) -> None:
+    started = time.time()
+    for days, offset in windows:
+        try:
+            await _prewarm_window(days, offset, priority=INTERACTIVE)
+        except Exception:
+            logger.exception("analytics: recompute of (%s, %s) after config change failed", days, offset)
+    logger.info("analytics: recomputed %d windows for the new config in %.1fs", len(windows), time.time() - started)
 
 
 async def _prewarm_loop() -> None:
     # Wait for app fully online before first prewarm run.
     await asyncio.sleep(8)
     while True:
+        if historian_breaker.is_open():
+            logger.info("analytics prewarm: historian circuit open — skipping this cycle")
+            await asyncio.sleep(PREWARM_INTERVAL_SECONDS)
+            continue
         try:
             started = time.time()
-            # Run windows in parallel — 4 concurrent historian fetches let the
-            # 30-day work overlap with the 7-day work, dropping wall-clock by
-            # roughly half.
+            # Longest windows start first: the closed days they begin
+            # reading are awaited by the shorter ones, not read again.
             await asyncio.gather(
-                *[_prewarm_window(d, o) for d, o in PREWARM_WINDOWS]
+                *[_prewarm_window(d, o) for d, o in sorted(PREWARM_WINDOWS, key=lambda w: -w[0])]
             )
             logger.info(
                 "analytics prewarm: refreshed %d windows in %.1fs (cache size=%d)",
@@ -0,0 +1,118 @@
+"""Analytics worker processes.
+
+With ANALYTICS_WORKER_ENABLED, summary/daily windows and what-if reruns are
+assembled in compute_pool's worker processes instead of in the API
+process, so a year-long report uses another core rather than contending for
+the API's GIL.
+
+The historical minutes stay where day_partials put them: one shared-memory
+segment per closed day (services/shared_rows.py). A job carries only each
+day's SegmentRef plus the few costed minutes of the open tail; the worker
+attaches the segments it has not seen (zero copy, cached with the day's
+cube) and runs day_partials.assemble() over them. What comes back is a
+Rollup — a few arrays of [day, state, shift, period] sums — which the API
+process formats as usual.
+
+If a job fails (a segment evicted and unlinked while the job was queued, a
+worker process that died) the window is assembled in-process from the same
+partials, which the API process still maps.
+
+An unlinked segment's memory is only freed once no process maps it. Each
+job therefore also carries the names of every segment day_partials still
+holds, and the worker detaches anything else it has attached: days evicted
+or recosted (re-stored) since its last job.
+"""
+
+import atexit
+import logging
+from datetime import date, datetime
+from typing import Optional
+
+from config import ANALYTICS_WORKER_ENABLED
+from services import compute_pool, day_partials, shared_rows
+from services.cost_calculator import CostRows, Rollup
+from services.lru_cache import LRUCache
+from services.shared_rows import SegmentRef
+
+logger = logging.getLogger(__name__)
+
+# Days a worker keeps attached — a year-long window's worth, plus change.
+ATTACHED_DAYS = 400
+
+
+def enabled() -> bool:
+    return ANALYTICS_WORKER_ENABLED
+
+
+async def assemble(
+    start: datetime,
+    end: datetime,
+    partials: dict[date, day_partials.DayPartial],
+    pieces: dict[date, CostRows],
+    electrical: Optional[tuple[float, float]] = None,
+) -> Optional[Rollup]:
+    """day_partials.assemble(), run in a worker process."""
+    refs: dict[date, SegmentRef] = {}
+    shipped = dict(pieces)
+    for day, partial in partials.items():
+        if partial.segment is None:
+            # Stored before the worker was enabled: send the rows themselves.
+            shipped[day] = partial.rows
+        else:
+            refs[day] = shared_rows.ref(partial.segment, partial.rows)
+    live = day_partials.segment_names()
+    try:
+        return await compute_pool.run_in_process(_assemble_job, start, end, refs, shipped, electrical, live)
+    except Exception as exc:
+        logger.warning("analytics_worker: job failed (%s) — assembling in-process", exc)
+        if electrical is not None:
+            return await compute_pool.run_threaded(day_partials.assemble, start, end, partials, pieces, electrical)
+        return day_partials.assemble(start, end, partials, pieces, electrical)
+
+
+# --- Worker-process side ------------------------------------------------------
+def _detach(name: str, partial: day_partials.DayPartial) -> None:
+    shared_rows.release(partial.segment, unlink=False)
+
+
+# Segment name -> attached partial. Names are never reused for other data:
+# a re-stored day gets a new segment.
+_attached: LRUCache[str, day_partials.DayPartial] = LRUCache(max_entries=ATTACHED_DAYS, on_evict=_detach)
+
+
+def _assemble_job(
+    start: datetime,
+    end: datetime,
+    refs: dict[date, SegmentRef],
+    pieces: dict[date, CostRows],
+    electrical: Optional[tuple[float, float]],
+    live: frozenset[str],
+) -> Optional[Rollup]:
+    for name in _attached.keys():
+        if name not in live:
+            _detach(name, _attached.pop(name))
+    partials = {}
+    for day, ref in refs.items():
+        partial = _attached.get(ref.name)
+        if partial is None:
+            rows, segment = shared_rows.attach(ref)
+            partial = day_partials.DayPartial(day, rows, segment)
+            _attached.put(ref.name, partial)
+        partials[day] = partial
+    return day_partials.assemble(start, end, partials, pieces, electrical)
+
+
+def _detach_all() -> None:
+    segments = [p.segment for _, p in _attached.items()]
+    _attached.clear()
+    for segment in segments:
+        shared_rows.release(segment, unlink=False)
+
+
+# Worker processes exit through normal interpreter shutdown; close the
+# attached segments before module teardown finds them with views alive.
+atexit.register(_detach_all)
+
+
+def _reset_for_tests() -> None:
+    _detach_all()
@@ -0,0 +1,190 @@
+"""Circuit breaker for upstream historian calls.
+
+With Timebase unreachable, every tick, prewarm window and passthrough read
+used to sit in a connect attempt until the httpx timeout expired. The
+breaker turns that into an immediate CircuitOpenError once the upstream is
+known to be down, and lets a single probe through on an exponential
+schedule to find out when it's back.
+
+    closed     calls pass; FAILURE_THRESHOLD consecutive failures -> open
+    open       calls fail fast until the probe time        -> half_open
+    half_open  exactly one probe call passes; success -> closed,
+               failure -> open again with the probe interval doubled
+               (capped at MAX_PROBE_SECONDS)
+
+Only reachability counts as failure: transport errors (connect, timeout,
+protocol) and 5xx responses. A 4xx, a 206 or a malformed body means the
+historian answered, so the call counts as a success.
+
+CircuitOpenError subclasses RuntimeError, so every existing
+``except (httpx.HTTPError, RuntimeError, ValueError)`` degrade path in the
+clients handles a tripped breaker exactly like an upstream error — minus
+the wait.
+
+One process-wide instance, ``historian_breaker``, guards both historian
+clients; analytics, the processing loop and the i3X passthrough all go
+through it.
+"""
+
+import logging
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator, Callable, Optional
+
+import httpx
+
+from config import (
+    HISTORIAN_BREAKER_ENABLED,
+    HISTORIAN_BREAKER_FAILURE_THRESHOLD,
+    HISTORIAN_BREAKER_MAX_PROBE_SECONDS,
+    HISTORIAN_BREAKER_PROBE_SECONDS,
+)
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling an upstream the breaker considers down."""
+
+
+def is_upstream_failure(exc: BaseException) -> bool:
+    if isinstance(exc, httpx.TransportError):
+        return True
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code >= 500
+    return False
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 3,
+        probe_seconds: float = 5.0,
+        max_probe_seconds: float = 300.0,
+        enabled: bool = True,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.probe_seconds = probe_seconds
+        self.max_probe_seconds = max(probe_seconds, max_probe_seconds)
+        self.enabled = enabled
+        self._clock = clock
+        self.reset()
+
+    def reset(self) -> None:
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.trips = 0                      # opens since the last close
+        self.last_error: Optional[str] = None
+        self.opened_at: Optional[datetime] = None
+        self._probe_at = 0.0                # monotonic
+        self._probe_in_flight = False
+
+    # --- State transitions --------------------------------------------------
+    def _probe_interval(self) -> float:
+        return min(self.max_probe_seconds, self.probe_seconds * 2 ** max(0, self.trips - 1))
+
+    def _open(self) -> None:
+        self.trips += 1
+        self.state = OPEN
+        self.opened_at = datetime.now(timezone.utc)
+        self._probe_at = self._clock() + self._probe_interval()
+        logger.warning(
+            "circuit_breaker[%s]: OPEN after %d consecutive failure(s) (%s); next probe in %.0fs",
+            self.name, self.consecutive_failures, self.last_error, self._probe_interval(),
+        )
+
+    def before_call(self) -> None:
+        """Admit or reject a call. Raises CircuitOpenError when rejected."""
+        if not self.enabled or self.state == CLOSED:
+            return
+        if self.state == OPEN and self._clock() >= self._probe_at:
+            self.state = HALF_OPEN
+            logger.info("circuit_breaker[%s]: HALF_OPEN — probing upstream", self.name)
+        if self.state == HALF_OPEN and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return
+        raise CircuitOpenError(
+            f"{self.name} circuit open — upstream unavailable ({self.last_error}); "
+            f"next probe in {self.seconds_until_probe():.0f}s"
+        )
+
+    def record_success(self) -> None:
+        self._probe_in_flight = False
+        self.consecutive_failures = 0
+        if self.state != CLOSED:
+            logger.info("circuit_breaker[%s]: CLOSED — upstream reachable again", self.name)
+            self.state = CLOSED
+            self.trips = 0
+            self.opened_at = None
+
+    def record_failure(self, exc: BaseException) -> None:
+        self._probe_in_flight = False
+        self.consecutive_failures += 1
+        self.last_error = f"{type(exc).__name__}: {exc}" if str(exc) else type(exc).__name__
+        if self.state == HALF_OPEN or (
+            self.state == CLOSED and self.consecutive_failures >= self.failure_threshold
+        ):
+            self._open()
+
+    # --- Call wrapper -------------------------------------------------------
+    @asynccontextmanager
+    async def guard(self) -> AsyncIterator[None]:
+        """``async with breaker.guard(): <one upstream call>``"""
+        self.before_call()
+        try:
+            yield
+        except Exception as exc:
+            if is_upstream_failure(exc):
+                self.record_failure(exc)
+            else:
+                self.record_success()
+            raise
+        except BaseException:
+            # Cancelled mid-call: no verdict, but free the probe slot.
+            self._probe_in_flight = False
+            raise
+        else:
+            self.record_success()
+
+    # --- Introspection ------------------------------------------------------
+    def is_open(self) -> bool:
+        """True while calls are being rejected (probe not yet due)."""
+        return self.enabled and self.state != CLOSED and self.seconds_until_probe() > 0
+
+    def seconds_until_probe(self) -> float:
+        if self.state == CLOSED:
+            return 0.0
+        return max(0.0, self._probe_at - self._clock())
+
+    def snapshot(self) -> dict:
+        next_probe = None
+        if self.state != CLOSED:
+            next_probe = datetime.now(timezone.utc) + timedelta(seconds=self.seconds_until_probe())
+        return {
+            "state":                self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "last_error":           self.last_error,
+            "opened_at":            _iso(self.opened_at),
+            "next_probe_at":        _iso(next_probe),
+        }
+
+
+def _iso(value: Optional[datetime]) -> Optional[str]:
+    return value.strftime("%Y-%m-%dT%H:%M:%SZ") if value else None
+
+
+historian_breaker = CircuitBreaker(
+    "historian",
+    failure_threshold=HISTORIAN_BREAKER_FAILURE_THRESHOLD,
+    probe_seconds=HISTORIAN_BREAKER_PROBE_SECONDS,
+    max_probe_seconds=HISTORIAN_BREAKER_MAX_PROBE_SECONDS,
+    enabled=HISTORIAN_BREAKER_ENABLED,
+)
@@ -0,0 +1,137 @@
+"""Executor for analytics CPU work.
+
+Building aligned minute frames and costing them takes tens to hundreds of
+milliseconds per window. Run inline, that time is stolen from the event
+loop: the processing tick, /api/energy/current, the i3X endpoints and the
+UNS publisher all stall behind a 30-day prewarm. Everything CPU-bound on
+the analytics path is submitted here instead.
+
+ANALYTICS_EXECUTOR picks where ``run()`` jobs go:
+
+  thread   (default) a small ThreadPoolExecutor. NumPy and most of pandas'
+           grouping/alignment release the GIL, so the loop keeps ticking.
+  process  a ProcessPoolExecutor. Jobs must be module-level functions with
+           picklable arguments; the caller's electrical config is sent with
+           every job so workers cost minutes the way the API process would.
+  inline   call on the loop — for debugging and for the loop-lag benchmark.
+
+``run_in_process()`` always uses the process pool; services/analytics_worker
+sends its shared-memory jobs there. ``run_threaded()`` always uses the
+thread pool (or inline). It is for jobs that mutate in-process state, e.g.
+the live IncrementalFrameBuilder, which a worker process could only ever
+update a copy of. Callers must make sure nothing else touches that state
+until the job returns.
+"""
+
+import asyncio
+import functools
+import logging
+import multiprocessing
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional, TypeVar
+
+from config import ANALYTICS_EXECUTOR, ANALYTICS_EXECUTOR_WORKERS
+from services import cost_calculator
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+EXECUTOR_KINDS = ("thread", "process", "inline")
+
+_threads: Optional[ThreadPoolExecutor] = None
+_processes: Optional[ProcessPoolExecutor] = None
+_stats: dict[str, dict[str, float]] = {}
+
+
+def _kind() -> str:
+    if ANALYTICS_EXECUTOR not in EXECUTOR_KINDS:
+        logger.warning("compute_pool: unknown ANALYTICS_EXECUTOR %r — using thread", ANALYTICS_EXECUTOR)
+        return "thread"
+    return ANALYTICS_EXECUTOR
+
+
+def _thread_pool() -> ThreadPoolExecutor:
+    global _threads
+    if _threads is None:
+        _threads = ThreadPoolExecutor(max_workers=ANALYTICS_EXECUTOR_WORKERS, thread_name_prefix="analytics")
+    return _threads
+
+
+def _process_pool() -> ProcessPoolExecutor:
+    global _processes
+    if _processes is None:
+        # spawn, not fork: the API process has an event loop, httpx and
+        # executor threads running that a forked child must not inherit.
+        _processes = ProcessPoolExecutor(
+            max_workers=ANALYTICS_EXECUTOR_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _processes
+
+
+def _with_config(config: dict, fn: Callable[..., T], *args: Any) -> T:
+    """Worker-process side of run(): adopt the API's electrical config first."""
+    cost_calculator._runtime_config.update(config)
+    return fn(*args)
+
+
+async def _submit(pool: str, executor: Optional[Executor], fn: Callable[..., T], *args: Any) -> T:
+    stats = _stats.setdefault(pool, {"jobs": 0, "in_flight": 0, "busy_ms": 0.0, "max_ms": 0.0})
+    stats["jobs"] += 1
+    stats["in_flight"] += 1
+    started = time.perf_counter()
+    try:
+        if executor is None:
+            return fn(*args)
+        return await asyncio.get_running_loop().run_in_executor(executor, functools.partial(fn, *args))
+    finally:
+        elapsed = (time.perf_counter() - started) * 1000
+        stats["in_flight"] -= 1
+        stats["busy_ms"] += elapsed
+        stats["max_ms"] = max(stats["max_ms"], elapsed)
+
+
+async def run(fn: Callable[..., T], *args: Any) -> T:
+    """Run a pure, module-level ``fn(*args)`` on the configured executor."""
+    if _kind() == "process":
+        return await run_in_process(fn, *args)
+    return await run_threaded(fn, *args)
+
+
+async def run_in_process(fn: Callable[..., T], *args: Any) -> T:
+    """Run a pure, module-level ``fn(*args)`` in a worker process, whatever
+    ANALYTICS_EXECUTOR says — for jobs built to run there (analytics_worker)."""
+    return await _submit("process", _process_pool(), _with_config, cost_calculator.get_config(), fn, *args)
+
+
+async def run_threaded(fn: Callable[..., T], *args: Any) -> T:
+    """Run ``fn(*args)`` in this process, off the loop unless the executor is inline."""
+    if _kind() == "inline":
+        return await _submit("inline", None, fn, *args)
+    return await _submit("thread", _thread_pool(), fn, *args)
+
+
+def stats() -> dict:
+    return {
+        "executor": _kind(),
+        "workers":  ANALYTICS_EXECUTOR_WORKERS,
+        "pools":    {
+            name: {**s, "busy_ms": round(s["busy_ms"], 1), "max_ms": round(s["max_ms"], 1)}
+            for name, s in _stats.items()
+        },
+    }
+
+
+def shutdown() -> None:
+    global _threads, _processes
+    for executor in (_threads, _processes):
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+    _threads = _processes = None
+
+
+def _reset_for_tests() -> None:
+    shutdown()
+    _stats.clear()
@@ -9,9 +9,12 @@
 # =============================================================================
 
 import logging
-from datetime import datetime, timezone
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from functools import lru_cache
 from zoneinfo import ZoneInfo
 
+import numpy as np
 import pandas as pd
 
 from config import (
@@ -35,19 +38,32 @@ _runtime_config = {
 }
 
 
+# Bumped whenever update_config() changes a value; analytics keys cached
+# payloads by it.
+_config_version = 0
+
+
 def get_config() -> dict:
     """Return current electrical and rate config."""
     return dict(_runtime_config)
 
 
+def config_version() -> int:
+    return _config_version
+
+
 def update_config(rate_per_kwh: float = None, voltage: float = None, power_factor: float = None):
     """Update runtime config values."""
+    global _config_version
+    before = dict(_runtime_config)
     if rate_per_kwh is not None:
         _runtime_config["rate_per_kwh"] = round(rate_per_kwh, 4)
     if voltage is not None:
         _runtime_config["voltage"] = voltage
     if power_factor is not None:
         _runtime_config["power_factor"] = power_factor
+    if _runtime_config != before:
+        _config_version += 1
     logger.info("config updated: %s", _runtime_config)
 
 
@@ -147,6 +163,66 @@ def get_tou_period(timestamp) -> str:
         return "Off-Peak"
 
 
+# --- Compiled tariff / shift calendar -----------------------------------------
+# The rules above only look at local season (Jun–Sep or not), weekday vs
+# weekend and clock time, so they can be tabulated once per (season, day
+# class, minute of day) and looked up with array indexing. The tables are
+# filled by calling the scalar functions on reference days, so both paths
+# agree by construction; DST is handled by the one vectorized tz_convert.
+TOU_PERIODS = ("On-Peak", "Mid-Peak", "Off-Peak", "Super Off-Peak")
+_PERIOD_NAMES = np.array(TOU_PERIODS, dtype=object)
+_SHIFT_NAMES = np.array(list(SHIFTS), dtype=object)
+
+# [season][day class] — season 0 = winter, 1 = summer; day class 0 = Mon–Fri.
+_REFERENCE_DAYS = (
+    (date(2026, 1, 7), date(2026, 1, 10)),
+    (date(2026, 7, 8), date(2026, 7, 11)),
+)
+
+
+@lru_cache(maxsize=1)
+def _calendar() -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(period codes, rates) shaped [season, day class, minute of day], and
+    shift codes per minute of day."""
+    tz = ZoneInfo(FACILITY_TIMEZONE)
+    periods = np.empty((2, 2, 1440), dtype=np.int8)
+    rates = np.empty((2, 2, 1440), dtype=np.float64)
+    shifts = np.empty(1440, dtype=np.int8)
+    shift_codes = {name: i for i, name in enumerate(_SHIFT_NAMES)}
+    for season, days in enumerate(_REFERENCE_DAYS):
+        for day_class, day in enumerate(days):
+            midnight = datetime(day.year, day.month, day.day, tzinfo=tz)
+            for minute in range(1440):
+                ts = midnight + timedelta(minutes=minute)
+                periods[season, day_class, minute] = TOU_PERIODS.index(get_tou_period(ts))
+                rates[season, day_class, minute] = get_tou_rate(ts)
+                shifts[minute] = shift_codes[get_shift(ts)]
+    return periods, rates, shifts
+
+
+def tariff_columns(index: pd.DatetimeIndex) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Vectorized get_tou_rate / get_tou_period / get_shift over a whole index.
+
+    Returns:
+        (tou_rate float64, tou_period names, shift names), one entry per row
+    """
+    if index.tz is None:
+        index = index.tz_localize("UTC")
+    local = index.tz_convert(FACILITY_TIMEZONE)
+    month = np.asarray(local.month)
+    season = ((month >= 6) & (month <= 9)).astype(np.intp)
+    day_class = (np.asarray(local.dayofweek) >= 5).astype(np.intp)
+    minute = np.asarray(local.hour) * 60 + np.asarray(local.minute)
+
+    periods, rates, shifts = _calendar()
+    return (
+        rates[season, day_class, minute],
+        _PERIOD_NAMES[periods[season, day_class, minute]],
+        _SHIFT_NAMES[shifts[minute]],
+    )
+
+
 def interval_cost(kw: float, interval_minutes: float = 1.0) -> float:
     """
     Calculate the energy cost for a single time interval.
@@ -179,120 +255,266 @@ def calculate_costs(df: pd.DataFrame) -> pd.DataFrame:
         return df
 
     df = df.copy()
-    df["kw"]   = df["motor_amps"].apply(amps_to_kw)
+    v  = _runtime_config["voltage"]
+    pf = _runtime_config["power_factor"]
+    tou_rate, tou_period, shift = tariff_columns(df.index)
+    # Same arithmetic as amps_to_kw(), one array op instead of a row apply.
+    df["kw"]   = np.round((df["motor_amps"].to_numpy(dtype=float) * v * SQRT3 * pf) / 1000, 2)
     df["kwh"]  = df["kw"] * (1 / 60)  # 1-minute intervals
-    df["tou_rate"]   = df.index.map(get_tou_rate)
+    df["tou_rate"]   = tou_rate
     df["cost_usd"]   = (df["kwh"] * df["tou_rate"]).round(6)
-    df["shift"]      = df.index.map(get_shift)
-    df["tou_period"] = df.index.map(get_tou_period)
+    df["shift"]      = shift
+    df["tou_period"] = tou_period
 
     return df
 
 
-def aggregate_by_shift(df: pd.DataFrame) -> dict:
+# --- Grouped rollup -------------------------------------------------------------
+# Every summary/shift/daily figure is a count, kWh sum or cost sum over some
+# combination of local day × state × shift × TOU period. cost_rows() reduces
+# a frame to one integer cell code (state × shift × period) per minute, and
+# CostRows.reduce() sums a run of those rows in one bincount; the aggregate_*
+# functions only slice and format the resulting [day, state, shift, period]
+# cube. The extra state/shift slot collects rows whose label isn't one of
+# the canonical ones — they count toward totals but get no row of their
+# own, as before.
+_N_STATES  = len(ALL_STATES) + 1
+_N_SHIFTS  = len(SHIFTS) + 1
+_N_PERIODS = len(TOU_PERIODS)
+CELL_SHAPE = (_N_STATES, _N_SHIFTS, _N_PERIODS)
+_N_CELLS   = _N_STATES * _N_SHIFTS * _N_PERIODS
+
+
+@dataclass(frozen=True)
+class CostRows:
+    """Costed minutes as flat columns, time-ordered."""
+    t_ns: np.ndarray            # minute, epoch ns
+    cell: np.ndarray            # (state × shift × period) code
+    kwh:  np.ndarray
+    cost: np.ndarray
+    amps: np.ndarray            # inputs kwh/cost were derived from, so
+    rate: np.ndarray            # recost() can redo them for another config
+
+    COLUMNS = ("t_ns", "cell", "kwh", "cost", "amps", "rate")
+    DTYPES  = (np.int64, np.int16, np.float64, np.float64, np.float64, np.float64)
+
+    def __len__(self) -> int:
+        return len(self.t_ns)
+
+    @property
+    def nbytes(self) -> int:
+        return int(sum(getattr(self, c).nbytes for c in self.COLUMNS))
+
+    @classmethod
+    def empty(cls) -> "CostRows":
+        return cls(*(np.empty(0, dtype) for dtype in cls.DTYPES))
+
+    def _slice(self, i: int, j: int) -> "CostRows":
+        return CostRows(*(getattr(self, c)[i:j] for c in self.COLUMNS))
+
+    def window(self, start_ns: int, end_ns: int) -> "CostRows":
+        """Rows in [start_ns, end_ns)."""
+        i, j = np.searchsorted(self.t_ns, (start_ns, end_ns), side="left")
+        return self._slice(i, j)
+
+    def recost(self, voltage: float, power_factor: float) -> "CostRows":
+        """The same minutes costed for another electrical config —
+        calculate_costs()' arithmetic, step for step."""
+        kw = np.round((self.amps * voltage * SQRT3 * power_factor) / 1000, 2)
+        kwh = kw * (1 / 60)
+        return CostRows(self.t_ns, self.cell, kwh, np.round(kwh * self.rate, 6), self.amps, self.rate)
+
+    def reduce(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(minutes, kWh, cost), each shaped CELL_SHAPE."""
+        return (
+            np.bincount(self.cell, minlength=_N_CELLS).reshape(CELL_SHAPE),
+            np.bincount(self.cell, weights=self.kwh, minlength=_N_CELLS).reshape(CELL_SHAPE),
+            np.bincount(self.cell, weights=self.cost, minlength=_N_CELLS).reshape(CELL_SHAPE),
+        )
+
+    def split_days(self) -> list[tuple[date, "CostRows"]]:
+        """Split into facility-local days."""
+        if not len(self):
+            return []
+        local = pd.DatetimeIndex(self.t_ns.view("datetime64[ns]")).tz_localize("UTC").tz_convert(FACILITY_TIMEZONE)
+        days = np.asarray(local.normalize().asi8)
+        bounds = np.concatenate(([0], np.flatnonzero(days[1:] != days[:-1]) + 1, [len(days)]))
+        return [(local[i].date(), self._slice(i, j)) for i, j in zip(bounds[:-1], bounds[1:])]
+
+
+def _codes(values: pd.Series, labels) -> np.ndarray:
+    codes = pd.Categorical(values, categories=list(labels)).codes.astype(np.int16)
+    codes[codes < 0] = len(labels)
+    return codes
+
+
+def _cells(df: pd.DataFrame) -> np.ndarray:
+    """Cell code per row of a calculate_costs() frame."""
+    return (
+        (_codes(df["state"], ALL_STATES) * _N_SHIFTS + _codes(df["shift"], SHIFTS)) * _N_PERIODS
+        + _codes(df["tou_period"], TOU_PERIODS)
+    )
+
+
+def cost_rows(df: pd.DataFrame) -> CostRows:
+    """calculate_costs() over a state-classified frame, as CostRows."""
+    if df.empty:
+        return CostRows.empty()
+    df = calculate_costs(df)
+    index = df.index if df.index.tz is not None else df.index.tz_localize("UTC")
+    return CostRows(
+        t_ns=index.tz_convert("UTC").asi8,
+        cell=_cells(df),
+        kwh=df["kwh"].to_numpy(dtype=float),
+        cost=df["cost_usd"].to_numpy(dtype=float),
+        amps=df["motor_amps"].to_numpy(dtype=float),
+        rate=df["tou_rate"].to_numpy(dtype=float),
+    )
+
+
+@dataclass
+class Rollup:
+    """Counts (minutes), kWh and cost per [day, state, shift, TOU period]."""
+    dates: list[date]           # facility-local days, ascending
+    count: np.ndarray
+    kwh:   np.ndarray
+    cost:  np.ndarray
+    first: pd.Timestamp         # first/last row, for the summary's period label
+    last:  pd.Timestamp
+
+    @classmethod
+    def from_days(
+        cls,
+        days: list[tuple[date, tuple[np.ndarray, np.ndarray, np.ndarray]]],
+        first_ns: int,
+        last_ns: int,
+    ) -> "Rollup":
+        """Stack per-day CostRows.reduce() cubes (ascending dates)."""
+        return cls(
+            dates=[day for day, _ in days],
+            count=np.stack([cube[0] for _, cube in days]),
+            kwh=np.stack([cube[1] for _, cube in days]),
+            cost=np.stack([cube[2] for _, cube in days]),
+            first=pd.Timestamp(first_ns, tz="UTC"),
+            last=pd.Timestamp(last_ns, tz="UTC"),
+        )
+
+
+def rollup_rows(rows: CostRows) -> Rollup | None:
+    if not len(rows):
+        return None
+    days = [(day, part.reduce()) for day, part in rows.split_days()]
+    return Rollup.from_days(days, int(rows.t_ns[0]), int(rows.t_ns[-1]))
+
+
+def rollup(df: pd.DataFrame) -> Rollup | None:
     """
-    Aggregate the DataFrame by shift: for each shift, return total hours, kWh,
-    cost_usd, and a nested breakdown by state.
+    calculate_costs() plus the grouped reduction, once. Feed the result to
+    summary_from_rollup() and daily_from_rollup() to build both payloads
+    from one pass over the window.
+
+    Returns:
+        None for an empty frame
     """
-    if df.empty or "shift" not in df.columns:
-        return {name: {"hours": 0, "kwh": 0, "cost_usd": 0, "by_state": {s: {"hours": 0, "kwh": 0, "cost_usd": 0, "pct_time": 0, "color": STATE_COLORS[s]} for s in ALL_STATES}} for name in SHIFTS}
+    return rollup_rows(cost_rows(df))
+
 
+def _empty_shift_block() -> dict:
+    return {
+        "hours":    0,
+        "kwh":      0,
+        "cost_usd": 0,
+        "by_state": {s: {"hours": 0, "kwh": 0, "cost_usd": 0, "pct_time": 0, "color": STATE_COLORS.get(s, "#000000")} for s in ALL_STATES},
+    }
+
+
+def _state_block(n: int, kwh: float, cost: float, total: int | None, state: str) -> dict:
+    """One by_state entry; ``total`` = None leaves out pct_time (daily rows)."""
+    block = {
+        "hours":    round(n / 60, 1),               # 1 row = 1 minute
+        "kwh":      round(kwh, 1),
+        "cost_usd": round(cost, 2),
+    }
+    if total is not None:
+        block["pct_time"] = round((n / max(total, 1)) * 100, 1)
+    block["color"] = STATE_COLORS.get(state, "#000000")
+    return block
+
+
+def _by_shift(count: np.ndarray, kwh: np.ndarray, cost: np.ndarray) -> dict:
+    """Shift breakdown from [state, shift] slices of the cube."""
     by_shift = {}
-    for shift_name in SHIFTS:
-        mask = df["shift"] == shift_name
-        shift_df = df[mask]
-        if len(shift_df) == 0:
-            by_shift[shift_name] = {
-                "hours":    0,
-                "kwh":      0,
-                "cost_usd": 0,
-                "by_state": {s: {"hours": 0, "kwh": 0, "cost_usd": 0, "pct_time": 0, "color": STATE_COLORS.get(s, "#000000")} for s in ALL_STATES},
-            }
+    for h, shift_name in enumerate(SHIFTS):
+        n_shift = int(count[:, h].sum())
+        if n_shift == 0:
+            by_shift[shift_name] = _empty_shift_block()
             continue
-        by_state = {}
-        for state in ALL_STATES:
-            smask = shift_df["state"] == state
-            s_df = shift_df[smask]
-            hours = round(len(s_df) / 60, 1)
-            kwh = round(s_df["kwh"].sum(), 1)
-            cost = round(s_df["cost_usd"].sum(), 2)
-            pct_time = round((len(s_df) / max(len(shift_df), 1)) * 100, 1)
-            by_state[state] = {
-                "hours":    hours,
-                "kwh":      kwh,
-                "cost_usd": cost,
-                "pct_time": pct_time,
-                "color":    STATE_COLORS.get(state, "#000000"),
-            }
         by_shift[shift_name] = {
-            "hours":    round(len(shift_df) / 60, 1),
-            "kwh":      round(shift_df["kwh"].sum(), 1),
-            "cost_usd": round(shift_df["cost_usd"].sum(), 2),
-            "by_state": by_state,
+            "hours":    round(n_shift / 60, 1),
+            "kwh":      round(kwh[:, h].sum(), 1),
+            "cost_usd": round(cost[:, h].sum(), 2),
+            "by_state": {
+                state: _state_block(int(count[i, h]), kwh[i, h], cost[i, h], n_shift, state)
+                for i, state in enumerate(ALL_STATES)
+            },
         }
     return by_shift
 
 
-def aggregate_summary(df: pd.DataFrame) -> dict:
+def aggregate_by_shift(df: pd.DataFrame) -> dict:
     """
-    Roll up 7-day cost totals by state and by shift.
-
-    Returns:
-        {
-          "period": "...",
-          "rate_per_kwh": 0.30,
-          "total_cost_usd": 847.32,
-          "total_kwh": 2824.4,
-          "by_state": {...},
-          "by_shift": {...}
-        }
+    Aggregate a calculate_costs() frame by shift: for each shift, return
+    total hours, kWh, cost_usd, and a nested breakdown by state.
     """
-    if df.empty:
+    if df.empty or "shift" not in df.columns:
+        return {name: _empty_shift_block() for name in SHIFTS}
+    # Only cell/kwh/cost take part in reduce().
+    none = np.empty(0)
+    rows = CostRows(
+        np.empty(0, np.int64), _cells(df), df["kwh"].to_numpy(dtype=float), df["cost_usd"].to_numpy(dtype=float),
+        none, none,
+    )
+    count, kwh, cost = rows.reduce()
+    return _by_shift(count.sum(axis=2), kwh.sum(axis=2), cost.sum(axis=2))
+
+
+def summary_from_rollup(r: Rollup | None) -> dict:
+    """aggregate_summary()'s payload from a rollup()."""
+    if r is None:
         return _empty_summary()
 
-    df = calculate_costs(df)
+    total_n    = int(r.count.sum())
+    total_kwh  = round(r.kwh.sum(), 1)
+    total_cost = round(r.cost.sum(), 2)
 
-    total_kwh  = round(df["kwh"].sum(), 1)
-    total_cost = round(df["cost_usd"].sum(), 2)
-
-    by_state = {}
-    for state in ALL_STATES:
-        mask = df["state"] == state
-        state_df = df[mask]
-        hours     = round(len(state_df) / 60, 1)          # 1-row = 1 minute
-        kwh       = round(state_df["kwh"].sum(), 1)
-        cost      = round(state_df["cost_usd"].sum(), 2)
-        pct_time  = round((len(state_df) / max(len(df), 1)) * 100, 1)
-        by_state[state] = {
-            "hours":     hours,
-            "kwh":       kwh,
-            "cost_usd":  cost,
-            "pct_time":  pct_time,
-            "color":     STATE_COLORS.get(state, "#000000"),
-        }
+    by_state = {
+        state: _state_block(
+            int(r.count[:, i].sum()), r.kwh[:, i].sum(), r.cost[:, i].sum(), total_n, state,
+        )
+        for i, state in enumerate(ALL_STATES)
+    }
 
-    by_shift = aggregate_by_shift(df)
+    by_shift = _by_shift(r.count.sum(axis=(0, 3)), r.kwh.sum(axis=(0, 3)), r.cost.sum(axis=(0, 3)))
 
     # By TOU period — surfaces the on-peak/off-peak share so operators can see
     # how much of the bill comes from expensive hours.
     by_tou_period = {}
-    for period in ("On-Peak", "Mid-Peak", "Off-Peak", "Super Off-Peak"):
-        period_df = df[df["tou_period"] == period]
-        n = len(period_df)
+    for p, period in enumerate(TOU_PERIODS):
+        n = int(r.count[..., p].sum())
         if n == 0:
             by_tou_period[period] = {"hours": 0.0, "kwh": 0.0, "cost_usd": 0.0, "pct_cost": 0.0}
             continue
-        cost = round(period_df["cost_usd"].sum(), 2)
+        cost = round(r.cost[..., p].sum(), 2)
         by_tou_period[period] = {
             "hours":    round(n / 60, 1),
-            "kwh":      round(period_df["kwh"].sum(), 1),
+            "kwh":      round(r.kwh[..., p].sum(), 1),
             "cost_usd": cost,
             "pct_cost": round((cost / total_cost) * 100, 1) if total_cost > 0 else 0.0,
         }
 
-    period_start = df.index.min().strftime("%Y-%m-%d") if not df.empty else "N/A"
-    period_end   = df.index.max().strftime("%Y-%m-%d") if not df.empty else "N/A"
-    days_span    = max(1, int(round((df.index.max() - df.index.min()).total_seconds() / 86400)))
+    period_start = r.first.strftime("%Y-%m-%d")
+    period_end   = r.last.strftime("%Y-%m-%d")
+    days_span    = max(1, int(round((r.last - r.first).total_seconds() / 86400)))
 
     return {
         "period":         f"{period_start} to {period_end}",
@@ -306,9 +528,54 @@ def aggregate_summary(df: pd.DataFrame) -> dict:
     }
 
 
+def aggregate_summary(df: pd.DataFrame) -> dict:
+    """
+    Roll up 7-day cost totals by state and by shift.
+
+    Returns:
+        {
+          "period": "...",
+          "rate_per_kwh": 0.30,
+          "total_cost_usd": 847.32,
+          "total_kwh": 2824.4,
+          "by_state": {...},
+          "by_shift": {...}
+        }
+    """
+    return summary_from_rollup(rollup(df))
+
+
+def daily_from_rollup(r: Rollup | None) -> list[dict]:
+    """aggregate_daily()'s payload from a rollup()."""
+    if r is None:
+        return []
+
+    # Per day, collapse TOU periods: [day, state, shift].
+    count = r.count.sum(axis=3)
+    kwh   = r.kwh.sum(axis=3)
+    cost  = r.cost.sum(axis=3)
+    results = []
+    for d, day in enumerate(r.dates):
+        if not count[d].any():
+            continue
+        by_state = {
+            state: _state_block(int(count[d, i].sum()), kwh[d, i].sum(), cost[d, i].sum(), None, state)
+            for i, state in enumerate(ALL_STATES)
+        }
+        results.append({
+            "date":           str(day),
+            "total_cost_usd": round(cost[d].sum(), 2),
+            "total_kwh":      round(kwh[d].sum(), 1),
+            "by_state":       by_state,
+            "by_shift":       _by_shift(count[d], kwh[d], cost[d]),
+        })
+    return results
+
+
 def aggregate_daily(df: pd.DataFrame) -> list[dict]:
     """
-    Roll up cost by day, state, and shift — returns one row per day.
+    Roll up cost by day, state, and shift — returns one row per day
+    (facility-local days).
 
     Returns:
         [
@@ -322,65 +589,7 @@ def aggregate_daily(df: pd.DataFrame) -> list[dict]:
           ...
         ]
     """
-    if df.empty:
-        return []
-
-    df = calculate_costs(df)
-
-    # Group by local date (US/Pacific)
-    df = df.copy()
-    df["date"] = df.index.tz_convert("America/Los_Angeles").date
-
-    results = []
-    for date, day_df in df.groupby("date"):
-        by_state = {}
-        for state in ALL_STATES:
-            s = day_df[day_df["state"] == state]
-            by_state[state] = {
-                "hours":    round(len(s) / 60, 1),
-                "kwh":      round(s["kwh"].sum(), 1),
-                "cost_usd": round(s["cost_usd"].sum(), 2),
-                "color":    STATE_COLORS.get(state, "#000000"),
-            }
-        by_shift = {}
-        for shift_name in SHIFTS:
-            smask = day_df["shift"] == shift_name
-            shift_df = day_df[smask]
-            if len(shift_df) == 0:
-                by_shift[shift_name] = {
-                    "hours":    0,
-                    "kwh":      0,
-                    "cost_usd": 0,
-                    "by_state": {s: {"hours": 0, "kwh": 0, "cost_usd": 0, "pct_time": 0, "color": STATE_COLORS.get(s, "#000000")} for s in ALL_STATES},
-                }
-                continue
-            shift_by_state = {}
-            for state in ALL_STATES:
-                s = shift_df[shift_df["state"] == state]
-                n = len(s)
-                pct = round((n / max(len(shift_df), 1)) * 100, 1)
-                shift_by_state[state] = {
-                    "hours":    round(n / 60, 1),
-                    "kwh":      round(s["kwh"].sum(), 1),
-                    "cost_usd": round(s["cost_usd"].sum(), 2),
-                    "pct_time": pct,
-                    "color":   STATE_COLORS.get(state, "#000000"),
-                }
-            by_shift[shift_name] = {
-                "hours":    round(len(shift_df) / 60, 1),
-                "kwh":      round(shift_df["kwh"].sum(), 1),
-                "cost_usd": round(shift_df["cost_usd"].sum(), 2),
-                "by_state": shift_by_state,
-            }
-        results.append({
-            "date":           str(date),
-            "total_cost_usd":  round(day_df["cost_usd"].sum(), 2),
-            "total_kwh":      round(day_df["kwh"].sum(), 1),
-            "by_state":       by_state,
-            "by_shift":       by_shift,
-        })
-
-    return sorted(results, key=lambda r: r["date"])
+    return daily_from_rollup(rollup(df))
 
 
 def aggregate_timeline(df: pd.DataFrame) -> list[dict]:
@@ -0,0 +1,210 @@
+"""Per-facility-local-day aggregate partials.
+
+Every analytics window — (7, 0), (7, 7), (30, 0), (30, 30), up to a year —
+is a run of facility-local days, whole ones in the middle and at most a
+partial day at each end. A closed day is reduced once, when it is first
+needed after it closed, to a DayPartial: the day's costed minutes
+(cost_calculator.CostRows) plus their [state, shift, TOU period] cube.
+assemble() then builds any window's Rollup by stacking the stored cubes of
+whole days and reducing just the in-window minutes of the edge days and of
+the still-open tail, which the caller supplies.
+
+Partials are held in an LRU bounded by ANALYTICS_PARTIALS_MAX_MB; an
+evicted day is simply rebuilt from the historian the next time a window
+needs it. Their kWh and cost depend on the electrical config; a config
+change recosts every stored day from its amps and TOU rate. With
+ANALYTICS_WORKER_ENABLED a day's minutes live in shared memory
+(services/shared_rows.py) so worker processes can assemble windows from
+them without a copy.
+"""
+
+import atexit
+import logging
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from multiprocessing.shared_memory import SharedMemory
+from typing import Optional
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+from config import ANALYTICS_PARTIALS_MAX_MB, ANALYTICS_WORKER_ENABLED, FACILITY_TIMEZONE
+from services import cost_calculator, shared_rows
+from services.cost_calculator import CostRows, Rollup
+from services.lru_cache import LRUCache
+from services.tag_columns import datetime_to_ns
+
+logger = logging.getLogger(__name__)
+
+_TZ = ZoneInfo(FACILITY_TIMEZONE)
+
+
+@dataclass
+class DayPartial:
+    day:     date
+    rows:    CostRows
+    segment: Optional[SharedMemory] = None  # backing rows, when shared
+    cube:    tuple[np.ndarray, np.ndarray, np.ndarray] = field(init=False)
+
+    def __post_init__(self) -> None:
+        self.cube = self.rows.reduce()
+
+    @property
+    def nbytes(self) -> int:
+        return self.rows.nbytes + sum(int(a.nbytes) for a in self.cube)
+
+
+def _drop(day: date, partial: DayPartial) -> None:
+    shared_rows.release(partial.segment)
+
+
+_store: LRUCache[date, DayPartial] = LRUCache(
+    max_bytes=int(ANALYTICS_PARTIALS_MAX_MB * 1024 * 1024),
+    sizeof=lambda p: p.nbytes,
+    on_evict=_drop,
+)
+_config_key: Optional[tuple] = None
+
+
+# --- Calendar -------------------------------------------------------------------
+def day_bounds(day: date) -> tuple[int, int]:
+    """[local midnight, next local midnight) of ``day`` in epoch ns — 23, 24
+    or 25 hours long."""
+    start = datetime(day.year, day.month, day.day, tzinfo=_TZ)
+    nxt = day + timedelta(days=1)
+    end = datetime(nxt.year, nxt.month, nxt.day, tzinfo=_TZ)
+    return datetime_to_ns(start), datetime_to_ns(end)
+
+
+def days_between(start: datetime, end: datetime) -> list[date]:
+    """Local days overlapping [start, end)."""
+    first = start.astimezone(_TZ).date()
+    last = (end - timedelta(microseconds=1)).astimezone(_TZ).date()
+    return [first + timedelta(days=i) for i in range((last - first).days + 1)]
+
+
+# --- Store -----------------------------------------------------------------------
+def _check_config() -> None:
+    global _config_key
+    cfg = cost_calculator.get_config()
+    key = (cfg["voltage"], cfg["power_factor"])
+    if key == _config_key:
+        return
+    _config_key = key
+    if len(_store):
+        # kWh and cost follow from the stored amps and TOU rate: recost in
+        # place rather than re-reading the days from the historian.
+        logger.info("day_partials: electrical config changed — recosting %d days", len(_store))
+        for day, partial in _store.items():
+            _store_rows(day, partial.rows.recost(*key))
+
+
+def _clear() -> None:
+    segments = [p.segment for _, p in _store.items()]
+    # Drop the partials (and their views) first so the segments can close.
+    _store.clear()
+    for segment in segments:
+        shared_rows.release(segment)
+
+
+def get(day: date) -> Optional[DayPartial]:
+    _check_config()
+    return _store.get(day)
+
+
+def put(day: date, rows: CostRows) -> DayPartial:
+    """Store a closed day's costed minutes (all of them, and only them)."""
+    _check_config()
+    return _store_rows(day, rows)
+
+
+def _store_rows(day: date, rows: CostRows) -> DayPartial:
+    segment = None
+    if ANALYTICS_WORKER_ENABLED:
+        rows, segment = shared_rows.share(rows)
+    partial = DayPartial(day, rows, segment)
+    old = _store.pop(day)
+    if old is not None:
+        _drop(day, old)
+    _store.put(day, partial)
+    return partial
+
+
+def assemble(
+    start: datetime,
+    end: datetime,
+    partials: dict[date, DayPartial],
+    pieces: dict[date, CostRows],
+    electrical: Optional[tuple[float, float]] = None,
+) -> Optional[Rollup]:
+    """
+    Rollup of the minutes in [start, end).
+
+    Args:
+        partials:   stored closed days
+        pieces:     costed minutes for every other day the window touches
+                    (open days, or closed days that could not be stored)
+        electrical: (voltage, power_factor) to recost every minute with —
+                    a what-if; stored cubes are bypassed
+
+    Returns:
+        None when the window has no minutes at all
+    """
+    start_ns, end_ns = datetime_to_ns(start), datetime_to_ns(end)
+    days = []
+    first_ns = last_ns = None
+    for day in days_between(start, end):
+        lo, hi = day_bounds(day)
+        partial = partials.get(day)
+        if partial is not None and start_ns <= lo and hi <= end_ns and electrical is None:
+            rows, cube = partial.rows, partial.cube
+        else:
+            source = partial.rows if partial is not None else pieces.get(day, CostRows.empty())
+            rows = source.window(start_ns, end_ns)
+            if electrical is not None:
+                rows = rows.recost(*electrical)
+            cube = rows.reduce()
+        if not len(rows):
+            continue
+        days.append((day, cube))
+        first_ns = int(rows.t_ns[0]) if first_ns is None else first_ns
+        last_ns = int(rows.t_ns[-1])
+    if not days:
+        return None
+    return Rollup.from_days(days, first_ns, last_ns)
+
+
+def segment_names() -> frozenset[str]:
+    """Shared-memory segments currently backing stored days."""
+    return frozenset(p.segment.name for _, p in _store.items() if p.segment is not None)
+
+
+def stats() -> dict:
+    return _store.stats()
+
+
+# --- Warm start ------------------------------------------------------------------
+def snapshot() -> tuple[Optional[tuple], list[tuple[date, CostRows]]]:
+    """(electrical config the rows are costed for, stored days oldest first)."""
+    return _config_key, sorted((day, p.rows) for day, p in _store.items())
+
+
+def restore(config_key: tuple, days: list[tuple[date, CostRows]]) -> None:
+    """Load days from a snapshot. Rows costed for another config are
+    recosted on the next get()."""
+    global _config_key
+    _clear()
+    _config_key = tuple(config_key)
+    for day, rows in days:
+        _store_rows(day, rows)
+
+
+# Unlink shared segments on a clean exit rather than leaving them to the
+# resource tracker (which warns about each one).
+atexit.register(_clear)
+
+
+def _reset_for_tests() -> None:
+    global _config_key
+    _clear()
+    _config_key = None
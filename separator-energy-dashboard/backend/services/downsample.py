@@ -0,0 +1,72 @@
+"""Shape-preserving downsampling for chart-bound series.
+
+A 24h timeline is 1440 minutes and a history read can be far more, while
+the chart drawing it is a few hundred pixels wide. The ``points=N``
+parameter on /api/energy/timeline and i3X /objects/history thins a series
+before it is serialized:
+
+  numeric   Largest-Triangle-Three-Buckets: one real sample per bucket, the
+            one forming the largest triangle with its neighbours, so peaks
+            and steps survive
+  labels    run-length preserving: the first sample of every run (and the
+            last sample), so state/TOU/shift segments keep their exact
+            extents however short
+
+Everything returns indices into the original series, so callers pick
+whole rows. LTTB here is loop-free: instead of the previous bucket's
+*selected* point (which makes classic LTTB sequential), each bucket's
+triangle is anchored on the previous bucket's centroid (a common LTTB
+variant), so all buckets are scored at once with reduceat.
+"""
+
+import numpy as np
+
+
+def lttb(x: np.ndarray, y: np.ndarray, n: int) -> np.ndarray:
+    """Indices of the ``n`` samples LTTB keeps; the first and last always.
+    NaN values are only kept when a whole bucket is NaN."""
+    size = len(x)
+    if n >= size or n < 3:
+        return np.arange(size)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    filled = np.nan_to_num(y)
+
+    # n - 2 buckets over the interior samples 1 .. size - 2.
+    edges = np.linspace(1, size - 1, n - 1).astype(np.int64)
+    starts, counts = edges[:-1], np.diff(edges)
+    mx = np.add.reduceat(x[:-1], starts) / counts
+    my = np.add.reduceat(filled[:-1], starts) / counts
+
+    # Each bucket's triangle: previous bucket's centroid (a), the candidate,
+    # next bucket's centroid (c).
+    ax, ay = np.r_[x[0], mx[:-1]], np.r_[filled[0], my[:-1]]
+    cx, cy = np.r_[mx[1:], x[-1]], np.r_[my[1:], filled[-1]]
+    bucket = np.repeat(np.arange(n - 2), counts)
+    px, py = x[1:-1], y[1:-1]
+    area = np.abs((ax[bucket] - cx[bucket]) * (py - ay[bucket]) - (ax[bucket] - px) * (cy[bucket] - ay[bucket]))
+    area = np.where(np.isnan(area), -1.0, area)
+
+    best = np.maximum.reduceat(area, starts - 1)
+    hits = np.flatnonzero(area == best[bucket])
+    _, first = np.unique(bucket[hits], return_index=True)
+    return np.r_[0, hits[first] + 1, size - 1]
+
+
+def run_starts(labels: np.ndarray) -> np.ndarray:
+    """Indices of the first sample of every run of equal labels, plus the last sample."""
+    size = len(labels)
+    if size == 0:
+        return np.arange(0)
+    changed = np.r_[True, labels[1:] != labels[:-1]]
+    return np.union1d(np.flatnonzero(changed), [size - 1])
+
+
+def series(x: np.ndarray, values: list, n: int) -> np.ndarray:
+    """Indices to keep of a single series: LTTB when every value is a
+    number (or None), run starts otherwise (labels, booleans)."""
+    if len(values) <= n:
+        return np.arange(len(values))
+    if all(v is None or (isinstance(v, (int, float)) and not isinstance(v, bool)) for v in values):
+        return lttb(x, np.array([np.nan if v is None else v for v in values], dtype=np.float64), n)
+    return run_starts(np.asarray(values, dtype=object))
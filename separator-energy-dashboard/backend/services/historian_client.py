@@ -3,36 +3,281 @@
 Public surface used by the rest of the backend:
 
     fetch_current_values()
-    fetch_all_tags(start=None, end=None)
+    fetch_all_tags(start=None, end=None, columnar=False, priority=INTERACTIVE, strict=False)
+    fetch_passthrough_history(alias, start, end)
     startup()
     shutdown()
 
 `fetch_tag_history` is intentionally not re-exported: i3X expects a logical
 tag name as the first argument, while the legacy client expects a full
-historian path. External callers should go through `fetch_all_tags`.
+historian path. External callers should go through `fetch_all_tags`, or
+`fetch_passthrough_history` for a single tag by its logical alias (always
+read over i3X, whichever backend the dispatcher picked).
+
+When TAG_ARCHIVE_ENABLED is set, `fetch_all_tags` reads through the local
+tag archive (services/tag_archive.py) and only the un-archived tail of each
+window goes to the active backend. When SEGMENT_CACHE_ENABLED is set,
+columnar reads are assembled from cached closed-day segments plus a live
+tail (services/segment_cache.py).
+
+``columnar=True`` returns {alias: TagColumns} (services/tag_columns.py) —
+what state_engine.build_dataframe wants. The {t, v, q} lists stay the
+default for /api/raw and other callers that show points as-is.
+
+``strict=True`` raises when any part of the window could not be read,
+instead of returning it with gaps — for callers that keep the result
+(analytics day partials). A strict read only joins strict flights; a
+non-strict read that joined a strict flight which then failed makes its
+own non-strict read rather than raise.
+
+Request coalescing
+------------------
+Reads are single-flight. A request whose window lies inside one already in
+flight — same tags or a subset, end allowed to trail by
+HISTORIAN_COALESCE_SLACK_SECONDS — awaits that request and gets a slice of
+its result, led by the historian-style boundary seed clamped to its own
+start. A dashboard refresh storm after a restart therefore costs one
+upstream read per distinct window, not one per caller.
+
+Scheduling
+----------
+Every upstream read takes a slot in services/historian_scheduler.py at the
+caller's priority — LIVE for fetch_current_values, INTERACTIVE by default,
+PREWARM/BACKFILL for the background loops. Joiners take no slot; a joiner
+more urgent than a still-queued read promotes it.
 """
 
+import asyncio
+import bisect
 import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Optional
 
-from config import USE_I3X
-from services import i3x_client, timebase_client_legacy
+from config import (
+    HISTORIAN_COALESCE_ENABLED,
+    HISTORIAN_COALESCE_SLACK_SECONDS,
+    LOOKBACK_DAYS,
+    SEGMENT_CACHE_ENABLED,
+    TAG_ARCHIVE_ENABLED,
+    TAGS,
+    USE_I3X,
+)
+from services import i3x_client, segment_cache, tag_archive, tag_columns, timebase_client_legacy
+from services.historian_scheduler import INTERACTIVE, LIVE, Ticket, historian_scheduler
+from services.tag_columns import TagColumns
 
 logger = logging.getLogger(__name__)
 
 if USE_I3X:
     logger.info("historian_client: using i3X 1.0-Beta backend")
-    fetch_current_values = i3x_client.fetch_current_values
-    fetch_all_tags = i3x_client.fetch_all_tags
+    _backend_fetch_current_values = i3x_client.fetch_current_values
+    _backend_fetch_all_tags = i3x_client.fetch_all_tags
     startup = i3x_client.startup
     shutdown = i3x_client.shutdown
 else:
     logger.info("historian_client: using legacy TimeBase REST backend")
-    fetch_current_values = timebase_client_legacy.fetch_current_values
-    fetch_all_tags = timebase_client_legacy.fetch_all_tags
+    _backend_fetch_current_values = timebase_client_legacy.fetch_current_values
+    _backend_fetch_all_tags = timebase_client_legacy.fetch_all_tags
+    startup = timebase_client_legacy.startup
+    shutdown = timebase_client_legacy.shutdown
+
+if TAG_ARCHIVE_ENABLED:
+    logger.info("historian_client: analytical reads go through the local tag archive")
+
+
+# --- Single-flight registry --------------------------------------------------
+@dataclass
+class _Flight:
+    start:    datetime
+    end:      datetime
+    aliases:  frozenset[str]
+    columnar: bool
+    # Whether the read goes over i3X. Passthrough callers may only join
+    # flights that do.
+    i3x:      bool
+    strict:   bool
+    ticket:   Ticket
+    task:     asyncio.Future
+
+
+_flights: list[_Flight] = []
+_stats = {"upstream": 0, "coalesced": 0}
+
+
+def _find_flight(
+    start: datetime,
+    end: datetime,
+    aliases: frozenset[str],
+    need_i3x: bool,
+    need_strict: bool,
+) -> Optional[_Flight]:
+    slack = timedelta(seconds=HISTORIAN_COALESCE_SLACK_SECONDS)
+    for flight in _flights:
+        if flight.task.done() or (need_i3x and not flight.i3x) or (need_strict and not flight.strict):
+            continue
+        if aliases <= flight.aliases and flight.start <= start and end <= flight.end + slack:
+            return flight
+    return None
+
+
+async def _single_flight(
+    start: datetime,
+    end: datetime,
+    aliases: frozenset[str],
+    columnar: bool,
+    i3x: bool,
+    priority: int,
+    fetch: Callable[[], Awaitable[dict]],
+    strict: bool = False,
+) -> dict:
+    """Join a covering in-flight read, or start one that later callers can
+    join. The caller that started the read gets its result as-is; joiners
+    get their own slices."""
+    if not HISTORIAN_COALESCE_ENABLED:
+        async with historian_scheduler.slot(priority):
+            return await fetch()
+
+    flight = _find_flight(start, end, aliases, need_i3x=i3x, need_strict=strict)
+    if flight is not None:
+        _stats["coalesced"] += 1
+        logger.debug(
+            "historian_client: coalesced %s -> %s into in-flight %s -> %s",
+            start, end, flight.start, flight.end,
+        )
+        historian_scheduler.promote(flight.ticket, priority)
+        try:
+            # shield: a cancelled joiner must not cancel the read for everyone else.
+            shared = await asyncio.shield(flight.task)
+        except Exception as exc:
+            if strict or not flight.strict:
+                raise
+            # The strict read raised where this caller expects a degraded result.
+            logger.debug("historian_client: joined strict read failed (%s) — reading %s -> %s itself", exc, start, end)
+            async with historian_scheduler.slot(priority):
+                return await fetch()
+        return _slice(shared, aliases, start, end, flight.columnar, columnar)
+
+    _stats["upstream"] += 1
+    ticket = historian_scheduler.ticket(priority)
+
+    async def scheduled() -> dict:
+        async with historian_scheduler.slot(priority, ticket):
+            return await fetch()
+
+    flight = _Flight(start, end, aliases, columnar, i3x, strict, ticket, asyncio.ensure_future(scheduled()))
+    _flights.append(flight)
+    flight.task.add_done_callback(lambda _: _retire(flight))
+    return dict(await asyncio.shield(flight.task))
+
+
+def _retire(flight: _Flight) -> None:
+    if flight in _flights:
+        _flights.remove(flight)
+
+
+# --- Slicing -----------------------------------------------------------------
+def _slice(
+    shared: dict,
+    aliases: frozenset[str],
+    start: datetime,
+    end: datetime,
+    have_columnar: bool,
+    want_columnar: bool,
+) -> dict:
+    out: dict[str, Any] = {}
+    for alias, data in shared.items():
+        if alias not in aliases:
+            continue
+        if have_columnar:
+            cols = _slice_columns(data, start, end)
+            out[alias] = cols if want_columnar else cols.to_points()
+        else:
+            points = _slice_points(data, start, end)
+            out[alias] = TagColumns.from_points(alias, points) if want_columnar else points
+    return out
+
+
+def _slice_columns(cols: TagColumns, start: datetime, end: datetime) -> TagColumns:
+    return cols.window(tag_columns.datetime_to_ns(start), tag_columns.datetime_to_ns(end))
+
+
+def _point_ns(point: dict) -> int:
+    return tag_columns.parse_iso_ns(str(point["t"]))
+
+
+def _slice_points(points: list[dict], start: datetime, end: datetime) -> list[dict]:
+    start_ns = tag_columns.datetime_to_ns(start)
+    end_ns = tag_columns.datetime_to_ns(end)
+    i = bisect.bisect_left(points, start_ns, key=_point_ns)
+    j = bisect.bisect_right(points, end_ns, key=_point_ns)
+    out = points[i:j]
+    if i > 0 and (not out or _point_ns(out[0]) != start_ns):
+        # Boundary seed: last point before the window, clamped to its start.
+        out.insert(0, {**points[i - 1], "t": tag_columns.ns_to_iso(start_ns)})
+    return out
+
+
+# --- Public API --------------------------------------------------------------
+async def fetch_current_values() -> dict[str, float | bool | None]:
+    async with historian_scheduler.slot(LIVE):
+        return await _backend_fetch_current_values()
+
+
+async def _fetch_source(start: datetime, end: datetime, columnar: bool, strict: bool = False) -> dict:
+    if TAG_ARCHIVE_ENABLED:
+        raw = await tag_archive.fetch_all_tags(start, end, upstream=_backend_fetch_all_tags, strict=strict)
+        return tag_columns.from_raw(raw) if columnar else raw
+    return await _backend_fetch_all_tags(start=start, end=end, strict=strict, columnar=columnar)
+
+
+async def _fetch_columnar_source(start: datetime, end: datetime, strict: bool = False) -> dict:
+    return await _fetch_source(start, end, columnar=True, strict=strict)
+
+
+async def _fetch_uncoalesced(start: datetime, end: datetime, columnar: bool, strict: bool) -> dict:
+    if SEGMENT_CACHE_ENABLED and columnar:
+        return await segment_cache.fetch_all_tags(start, end, upstream=_fetch_columnar_source, strict=strict)
+    return await _fetch_source(start, end, columnar, strict=strict)
+
+
+async def fetch_all_tags(
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    columnar: bool = False,
+    priority: int = INTERACTIVE,
+    strict: bool = False,
+) -> dict[str, list[dict]] | dict[str, TagColumns]:
+    now = datetime.now(timezone.utc)
+    if end is None:
+        end = now
+    if start is None:
+        start = now - timedelta(days=LOOKBACK_DAYS)
+
+    return await _single_flight(
+        start, end, frozenset(TAGS), columnar, i3x=USE_I3X, priority=priority, strict=strict,
+        fetch=lambda: _fetch_uncoalesced(start, end, columnar, strict),
+    )
+
+
+async def fetch_passthrough_history(alias: str, start: datetime, end: datetime) -> list[dict]:
+    """One tag's {t, v, q} history over i3X, by logical alias. Served from an
+    in-flight all-tags read when one covers the window."""
+
+    async def fetch() -> dict:
+        return {alias: await i3x_client.fetch_tag_history(alias, start, end)}
+
+    result = await _single_flight(
+        start, end, frozenset((alias,)), False, i3x=True, priority=INTERACTIVE, fetch=fetch,
+    )
+    return result.get(alias, [])
+
+
+def coalescing_stats() -> dict[str, int]:
+    """Diagnostic — upstream reads issued vs. reads served from one in flight."""
+    return dict(_stats)
 
-    async def startup() -> None:
-        # Legacy client has no startup probe; validate_configuration is a no-op.
-        await timebase_client_legacy.validate_configuration()
 
-    async def shutdown() -> None:
-        return None
+def _reset_for_tests() -> None:
+    _flights.clear()
+    _stats.update(upstream=0, coalesced=0)
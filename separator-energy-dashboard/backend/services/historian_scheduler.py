@@ -0,0 +1,233 @@
+"""Priority scheduler and byte budget shared by every historian read.
+
+The processing tick, the prewarm loop, cold timeline fallbacks, /api/raw
+and the i3X passthrough all read from the same historian. Without a shared
+budget, four prewarm windows pulling 30 days each could sit in front of the
+5-second live tick. Every read now enters through ``slot(priority)``:
+
+    LIVE         processing tick's current values — admitted immediately,
+                 never queued and never throttled
+    INTERACTIVE  a user is waiting (router fallbacks, /api/raw, i3X
+                 passthrough, analytics cache misses)
+    PREWARM      analytics prewarm loop
+    BACKFILL     boot-time ring-buffer backfill
+
+At most HISTORIAN_MAX_CONCURRENT_READS non-LIVE reads run at once; when a
+slot frees up the most urgent waiter (then the oldest) gets it.
+historian_client coalesces onto in-flight reads, and a caller joining a
+read that is still queued promotes it to its own class. Inside a read,
+i3x_client admits its /history chunks through a second scheduler of the
+same kind, at the read's class (``current_priority()``).
+
+Bytes budget: with HISTORIAN_BYTES_PER_SECOND > 0, response bodies are
+metered through a token bucket as they stream in (``metered()`` in the
+clients). Every class draws from the bucket, but only PREWARM and BACKFILL
+ever wait on it — background reads slow down to leave the link to live and
+interactive traffic.
+
+``stats()`` reports per-class queue time (count, mean, max, p95 over the
+last QUEUE_SAMPLES grants), in-flight/queued counts and bytes read.
+"""
+
+import asyncio
+import contextvars
+import itertools
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import AsyncIterable, AsyncIterator, Callable, Optional
+
+from config import HISTORIAN_BYTES_PER_SECOND, HISTORIAN_MAX_CONCURRENT_READS
+
+LIVE, INTERACTIVE, PREWARM, BACKFILL = range(4)
+CLASS_NAMES = ("live", "interactive", "prewarm", "backfill")
+
+QUEUE_SAMPLES = 256
+
+_seq = itertools.count()
+
+
+@dataclass(eq=False)
+class Ticket:
+    priority:    int
+    enqueued_at: float
+    seq:         int = field(default_factory=lambda: next(_seq))
+    granted:     Optional[asyncio.Future] = None
+
+    @property
+    def waiting(self) -> bool:
+        return self.granted is not None and not self.granted.done()
+
+
+@dataclass
+class _ClassStats:
+    requests:   int = 0
+    queued:     int = 0
+    in_flight:  int = 0
+    bytes:      int = 0
+    wait_total: float = 0.0
+    wait_max:   float = 0.0
+    waits:      deque = field(default_factory=lambda: deque(maxlen=QUEUE_SAMPLES))
+
+    def snapshot(self) -> dict:
+        waits = sorted(self.waits)
+        p95 = waits[min(len(waits) - 1, int(len(waits) * 0.95))] if waits else 0.0
+        return {
+            "requests":       self.requests,
+            "queued":         self.queued,
+            "in_flight":      self.in_flight,
+            "bytes":          self.bytes,
+            "queue_ms_mean":  round(1000 * self.wait_total / self.requests, 1) if self.requests else 0.0,
+            "queue_ms_p95":   round(1000 * p95, 1),
+            "queue_ms_max":   round(1000 * self.wait_max, 1),
+        }
+
+
+class HistorianScheduler:
+    def __init__(
+        self,
+        max_concurrency: int = 3,
+        bytes_per_second: float = 0.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_concurrency = max(1, max_concurrency)
+        self.bytes_per_second = bytes_per_second
+        self._clock = clock
+        self.reset()
+
+    def reset(self) -> None:
+        self._waiters: list[Ticket] = []
+        self._running = 0                       # granted non-LIVE tickets
+        self._tokens = self.bytes_per_second    # bucket holds one second's worth
+        self._refilled_at = self._clock()
+        self._stats = [_ClassStats() for _ in CLASS_NAMES]
+
+    # --- Admission ----------------------------------------------------------------
+    def ticket(self, priority: int) -> Ticket:
+        return Ticket(priority, self._clock())
+
+    async def acquire(self, ticket: Ticket) -> None:
+        stats = self._stats[ticket.priority]
+        ticket.granted = asyncio.get_running_loop().create_future()
+        if ticket.priority == LIVE:
+            self._grant(ticket)
+        else:
+            stats.queued += 1
+            self._waiters.append(ticket)
+            self._dispatch()
+        try:
+            await ticket.granted
+        except asyncio.CancelledError:
+            if ticket in self._waiters:
+                self._waiters.remove(ticket)
+                self._stats[ticket.priority].queued -= 1
+            elif not ticket.granted.cancelled():
+                # Granted in the same loop turn we were cancelled: hand it back.
+                self.release(ticket)
+            raise
+
+    def release(self, ticket: Ticket) -> None:
+        self._stats[ticket.priority].in_flight -= 1
+        if ticket.priority != LIVE:
+            self._running -= 1
+        self._dispatch()
+
+    def promote(self, ticket: Ticket, priority: int) -> None:
+        """Raise a ticket to a more urgent class. Only affects its place in
+        the queue; a granted ticket keeps its accounting."""
+        if priority >= ticket.priority or not ticket.waiting:
+            return
+        self._stats[ticket.priority].queued -= 1
+        ticket.priority = priority
+        if priority == LIVE:
+            self._waiters.remove(ticket)
+            self._grant(ticket)
+        else:
+            self._stats[priority].queued += 1
+        self._dispatch()
+
+    def _grant(self, ticket: Ticket) -> None:
+        stats = self._stats[ticket.priority]
+        waited = self._clock() - ticket.enqueued_at
+        stats.requests += 1
+        stats.in_flight += 1
+        stats.wait_total += waited
+        stats.wait_max = max(stats.wait_max, waited)
+        stats.waits.append(waited)
+        if ticket.priority != LIVE:
+            self._running += 1
+        ticket.granted.set_result(None)
+
+    def _dispatch(self) -> None:
+        while self._waiters and self._running < self.max_concurrency:
+            ticket = min(self._waiters, key=lambda t: (t.priority, t.seq))
+            self._waiters.remove(ticket)
+            self._stats[ticket.priority].queued -= 1
+            if ticket.granted.cancelled():
+                continue    # its task is unwinding; acquire() won't release
+            self._grant(ticket)
+
+    @asynccontextmanager
+    async def slot(self, priority: int, ticket: Optional[Ticket] = None) -> AsyncIterator[Ticket]:
+        """``async with scheduler.slot(PREWARM): <historian read>``"""
+        ticket = ticket or self.ticket(priority)
+        await self.acquire(ticket)
+        token = _active.set(ticket)
+        try:
+            yield ticket
+        finally:
+            _active.reset(token)
+            self.release(ticket)
+
+    # --- Byte budget -----------------------------------------------------------------
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(
+            self.bytes_per_second,
+            self._tokens + (now - self._refilled_at) * self.bytes_per_second,
+        )
+        self._refilled_at = now
+
+    def record_bytes(self, n: int) -> float:
+        """Charge ``n`` bytes to the current read's class and the bucket.
+        Returns how long a background read should pause."""
+        priority = current_priority()
+        self._stats[priority].bytes += n
+        if self.bytes_per_second <= 0:
+            return 0.0
+        self._refill()
+        self._tokens -= n
+        if priority < PREWARM or self._tokens >= 0:
+            return 0.0
+        return -self._tokens / self.bytes_per_second
+
+    async def metered(self, chunks: AsyncIterable[bytes]) -> AsyncIterator[bytes]:
+        async for chunk in chunks:
+            pause = self.record_bytes(len(chunk))
+            if pause > 0:
+                await asyncio.sleep(pause)
+            yield chunk
+
+    # --- Introspection -----------------------------------------------------------------
+    def stats(self) -> dict:
+        return {
+            "max_concurrency":  self.max_concurrency,
+            "bytes_per_second": self.bytes_per_second,
+            "classes":          {name: s.snapshot() for name, s in zip(CLASS_NAMES, self._stats)},
+        }
+
+
+# The ticket of the read running in this task (and the tasks it spawns).
+_active: contextvars.ContextVar[Optional[Ticket]] = contextvars.ContextVar("historian_ticket", default=None)
+
+
+def current_priority() -> int:
+    """Class of the read running in this task; INTERACTIVE outside one."""
+    ticket = _active.get()
+    return ticket.priority if ticket is not None else INTERACTIVE
+
+historian_scheduler = HistorianScheduler(
+    max_concurrency=HISTORIAN_MAX_CONCURRENT_READS,
+    bytes_per_second=HISTORIAN_BYTES_PER_SECOND,
+)
@@ -0,0 +1,245 @@
+"""Incremental JSON decoding for historian history responses.
+
+Both history endpoints return one large JSON document whose bulk is a long
+array of small point objects:
+
+    i3X:     {"<elementId>": {"data": [{value, quality, timestamp}, ...]}, ...}
+    legacy:  {"tl": [{"d": [{t, v, q}, ...]}]}
+
+Calling ``resp.json()`` on that holds the raw body and the fully parsed tree
+in memory at once, and the clients then build a third, normalized list on
+top. ``IncrementalJSONParser`` instead consumes the body as text chunks
+(straight from ``resp.aiter_bytes()``) and hands back each value whose path
+matches a caller-supplied predicate the moment it is complete. Nothing else
+of the document is retained — containers on the way to a matching path are
+walked, not built.
+
+That does not bound the peak: the normalized points still grow with the
+window, and the pure-Python scan is about twice as slow as ``json.loads``.
+What it drops is the body and the parsed tree, which only matters for long
+windows (benchmarks/bench_history_stream.py: a 90-day, four-tag body peaks
+around 277 MB buffered and 56 MB streamed). ``iter_matches`` therefore only
+scans incrementally for windows longer than INCREMENTAL_MIN_WINDOW; shorter
+ones — every i3X chunk at the default I3X_HISTORY_CHUNK_HOURS — are read
+whole and parsed with ``json.loads``, yielding the same matches.
+
+Paths are tuples of object keys and array indices from the root, e.g.
+``("Driftwood Historian:.../Motor Amps", "data", 17)``. Stdlib only; each
+matched value is decoded by ``json.JSONDecoder.raw_decode`` so per-point
+parsing still runs in C.
+"""
+
+import codecs
+import json
+from datetime import timedelta
+from typing import Any, AsyncIterator, Callable, Iterator
+
+# Windows up to this long are parsed whole (see module docstring).
+INCREMENTAL_MIN_WINDOW = timedelta(hours=24)
+
+# Parser states
+_VALUE = 0          # expecting any value
+_ITEM_OR_END = 1    # just after '[' — a value or ']'
+_KEY_OR_END = 2     # just after '{' — a key or '}'
+_KEY = 3            # after ',' in an object — a key
+_COLON = 4          # after a key
+_COMMA_OR_END = 5   # after a value inside a container
+_DONE = 6
+
+_WHITESPACE = " \t\n\r"
+
+Path = tuple
+Match = Callable[[Path], bool]
+
+
+class IncrementalJSONParser:
+    """Push-style JSON scanner that yields ``(path, value)`` for every value
+    whose path satisfies ``match``. Feed text with ``feed()``; call
+    ``close()`` once the body is exhausted to flush and validate."""
+
+    def __init__(self, match: Match) -> None:
+        self._match = match
+        self._decoder = json.JSONDecoder()
+        self._buf = ""
+        self._pos = 0
+        # Frames are [kind, key_or_index]; kind is "{" or "[".
+        self._stack: list[list] = []
+        self._state = _VALUE
+        self.root_keys: set[str] = set()
+
+    # --- public ---------------------------------------------------------------
+    def feed(self, text: str) -> Iterator[tuple[Path, Any]]:
+        if text:
+            self._buf = self._buf[self._pos:] + text
+            self._pos = 0
+        yield from self._scan(final=False)
+
+    def close(self) -> Iterator[tuple[Path, Any]]:
+        yield from self._scan(final=True)
+        rest = self._buf[self._pos:].strip(_WHITESPACE)
+        if self._state != _DONE or rest:
+            raise ValueError("truncated or malformed JSON document")
+
+    # --- internals ------------------------------------------------------------
+    def _path(self) -> Path:
+        return tuple(frame[1] for frame in self._stack)
+
+    def _after_value(self) -> None:
+        self._state = _COMMA_OR_END if self._stack else _DONE
+
+    def _decode(self, final: bool) -> tuple[bool, Any]:
+        """raw_decode at the cursor. Returns (complete, value). A number that
+        runs to the end of the buffer may still be growing, so it only counts
+        as complete once more text (or EOF) follows it."""
+        try:
+            value, end = self._decoder.raw_decode(self._buf, self._pos)
+        except json.JSONDecodeError:
+            if final:
+                raise ValueError(f"malformed JSON at offset {self._pos}") from None
+            return False, None
+        if (
+            end == len(self._buf)
+            and not final
+            and isinstance(value, (int, float))
+            and not isinstance(value, bool)
+        ):
+            return False, None
+        self._pos = end
+        return True, value
+
+    def _scan(self, final: bool) -> Iterator[tuple[Path, Any]]:
+        buf_len = len(self._buf)
+        while True:
+            pos = self._pos
+            while pos < buf_len and self._buf[pos] in _WHITESPACE:
+                pos += 1
+            self._pos = pos
+            if pos >= buf_len or self._state == _DONE:
+                return
+            c = self._buf[pos]
+            state = self._state
+
+            if state == _ITEM_OR_END and c == "]":
+                self._pos += 1
+                self._stack.pop()
+                self._after_value()
+                continue
+
+            if state in (_VALUE, _ITEM_OR_END):
+                path = self._path()
+                if self._match(path):
+                    complete, value = self._decode(final)
+                    if not complete:
+                        return
+                    self._after_value()
+                    yield path, value
+                elif c == "{":
+                    self._pos += 1
+                    self._stack.append(["{", None])
+                    self._state = _KEY_OR_END
+                elif c == "[":
+                    self._pos += 1
+                    self._stack.append(["[", 0])
+                    self._state = _ITEM_OR_END
+                else:
+                    complete, _ = self._decode(final)
+                    if not complete:
+                        return
+                    self._after_value()
+                continue
+
+            if state in (_KEY_OR_END, _KEY):
+                if c == "}" and state == _KEY_OR_END:
+                    self._pos += 1
+                    self._stack.pop()
+                    self._after_value()
+                    continue
+                if c != '"':
+                    raise ValueError(f"expected object key at offset {pos}")
+                complete, key = self._decode(final)
+                if not complete:
+                    return
+                self._stack[-1][1] = key
+                if len(self._stack) == 1:
+                    self.root_keys.add(key)
+                self._state = _COLON
+                continue
+
+            if state == _COLON:
+                if c != ":":
+                    raise ValueError(f"expected ':' at offset {pos}")
+                self._pos += 1
+                self._state = _VALUE
+                continue
+
+            # _COMMA_OR_END
+            frame = self._stack[-1]
+            if c == ",":
+                self._pos += 1
+                if frame[0] == "[":
+                    frame[1] += 1
+                    self._state = _VALUE
+                else:
+                    self._state = _KEY
+            elif (c == "}" and frame[0] == "{") or (c == "]" and frame[0] == "["):
+                self._pos += 1
+                self._stack.pop()
+                self._after_value()
+            else:
+                raise ValueError(f"unexpected {c!r} at offset {pos}")
+
+
+def iter_document(doc: Any, match: Match, path: Path = ()) -> Iterator[tuple[Path, Any]]:
+    """The ``(path, value)`` pairs IncrementalJSONParser would yield, from an
+    already-parsed document."""
+    if match(path):
+        yield path, doc
+    elif isinstance(doc, dict):
+        for key, value in doc.items():
+            yield from iter_document(value, match, path + (key,))
+    elif isinstance(doc, list):
+        for i, value in enumerate(doc):
+            yield from iter_document(value, match, path + (i,))
+
+
+async def iter_matches(
+    chunks: AsyncIterator[bytes],
+    match: Match,
+    incremental: bool = True,
+) -> AsyncIterator[tuple[Path, Any]]:
+    """Decode a UTF-8 byte stream (e.g. ``resp.aiter_bytes()``) and yield
+    matching ``(path, value)`` pairs as they complete. With ``incremental``
+    false the body is read whole and parsed with ``json.loads`` instead."""
+    if not incremental:
+        body = b"".join([chunk async for chunk in chunks])
+        for item in iter_document(json.loads(body), match):
+            yield item
+        return
+
+    parser = IncrementalJSONParser(match)
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    async for chunk in chunks:
+        for item in parser.feed(decoder.decode(chunk)):
+            yield item
+    for item in parser.feed(decoder.decode(b"", final=True)):
+        yield item
+    for item in parser.close():
+        yield item
+
+
+# --- Path predicates for the two historian shapes ---------------------------
+def i3x_history_match(path: Path) -> bool:
+    """``<elementId>.data[i]`` points, per-tag ``<elementId>.error`` and a
+    request-level top-level ``error``."""
+    n = len(path)
+    if n == 3:
+        return path[1] == "data" and isinstance(path[2], int)
+    if n == 2:
+        return path[1] == "error"
+    return n == 1 and path[0] == "error"
+
+
+def legacy_history_match(path: Path) -> bool:
+    """``tl[0].d[i]`` points — the legacy client only ever reads the first
+    tag list entry."""
+    return len(path) == 4 and path[0] == "tl" and path[1] == 0 and path[2] == "d"
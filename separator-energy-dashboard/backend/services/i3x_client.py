@@ -4,6 +4,7 @@ Public surface (preserves the legacy contract — see docs/i3x-integration.md §
 
     fetch_current_values() -> dict[str, float|bool|None]
     fetch_all_tags(start, end) -> dict[str, list[{t,v,q}]]
+    fetch_all_tags(start, end, columnar=True) -> dict[str, TagColumns]
     fetch_tag_history(tag_path, start, end) -> list[{t,v,q}]
     startup()  / shutdown()
     get_info() -- diagnostic only (Timebase returns 404 here in practice)
@@ -27,17 +28,50 @@ When upstream is sparse or stale, Timebase returns the most-recent point
 points' timestamps to startTime instead of filtering them out — otherwise
 state_engine.build_dataframe sees an empty series and the dashboard goes
 blank exactly when staleness most needs to be visible.
+
+Chunked history
+---------------
+/history windows longer than I3X_HISTORY_CHUNK_HOURS are split at UTC-aligned
+chunk boundaries and fetched concurrently (bounded by
+I3X_HISTORY_MAX_CONCURRENCY). Chunks are admitted by their read's scheduler
+class, so an interactive read's chunks go ahead of queued prewarm and
+backfill chunks rather than behind them. Only the first chunk clamps its
+boundary seed; later chunks drop theirs — the previous chunk already carries
+that value — unless the previous chunk failed, in which case the seed keeps
+the stitched series forward-fillable across the gap. A 206 Partial Content
+chunk is bisected and refetched rather than silently accepted.
+
+Streaming decode
+----------------
+Each chunk is read with ``client.stream()`` and its VQTs are quality-filtered
+and normalized one at a time through services/history_stream.py. A request
+longer than history_stream.INCREMENTAL_MIN_WINDOW (only possible with
+chunking off) is scanned incrementally, so its raw body and parse tree are
+never held whole; shorter ones are parsed with ``json.loads``, which is
+faster and, at chunk size, small.
+
+Internally points are (epoch-ns, value) pairs; ISO strings are only produced
+at the end, and only for callers of the {t, v, q} contract. Columnar callers
+(see services/tag_columns.py) never see a formatted timestamp.
 """
 
+import asyncio
 import logging
 from datetime import datetime, timedelta, timezone
 from typing import Any, Optional
 
 import httpx
 
+from services import history_stream
+from services.circuit_breaker import CircuitOpenError, historian_breaker
+from services.historian_scheduler import HistorianScheduler, current_priority, historian_scheduler
+from services.tag_columns import TagColumns, datetime_to_ns, ns_to_iso
 from config import (
     I3X_BASE_URL,
     I3X_DATASET,
+    I3X_HISTORY_CHUNK_HOURS,
+    I3X_HISTORY_CHUNK_RETRIES,
+    I3X_HISTORY_MAX_CONCURRENCY,
     I3X_TAGS,
     I3X_TIMEOUT_SECONDS,
     LOOKBACK_DAYS,
@@ -48,7 +82,22 @@ logger = logging.getLogger(__name__)
 GOOD_QUALITY = "GOOD"
 GOOD_QUALITY_INT = 192
 
+# A chunk that keeps coming back 206 is bisected down to this span, then
+# accepted as-is (with a logged warning).
+MIN_HISTORY_CHUNK = timedelta(minutes=15)
+_RETRY_BACKOFF_SECONDS = 0.5
+
 _client: Optional[httpx.AsyncClient] = None
+_history_slots: Optional[HistorianScheduler] = None
+
+
+class PartialContentError(RuntimeError):
+    """Upstream answered 206 — the response body is truncated."""
+
+
+class TagError(RuntimeError):
+    """A strict read got a per-tag ``error`` entry — that tag's history is
+    missing from an otherwise successful response."""
 
 
 # --- ElementId construction -------------------------------------------------
@@ -72,10 +121,21 @@ async def get_client() -> httpx.AsyncClient:
 
 
 async def close_client() -> None:
-    global _client
+    global _client, _history_slots
     if _client is not None:
         await _client.aclose()
         _client = None
+    _history_slots = None
+
+
+def _history_chunk_slots() -> HistorianScheduler:
+    """Process-wide bound on in-flight /history chunk requests, shared by
+    every concurrent caller (prewarm windows, backfill, passthrough). A freed
+    slot goes to the most urgent queued chunk, then the oldest."""
+    global _history_slots
+    if _history_slots is None:
+        _history_slots = HistorianScheduler(max_concurrency=I3X_HISTORY_MAX_CONCURRENCY)
+    return _history_slots
 
 
 # --- Startup validation -----------------------------------------------------
@@ -177,11 +237,20 @@ async def _validate_element_ids(client: httpx.AsyncClient, element_ids: list[str
         )
 
 
-async def _post(path: str, payload: dict, client: httpx.AsyncClient) -> Any:
-    resp = await client.post(path, json=payload)
-    if resp.status_code == 206:
-        logger.warning("i3X %s returned 206 Partial Content — result truncated", path)
-    resp.raise_for_status()
+async def _post(
+    path: str,
+    payload: dict,
+    client: httpx.AsyncClient,
+    allow_partial: bool = True,
+) -> Any:
+    async with historian_breaker.guard():
+        resp = await client.post(path, json=payload)
+        if resp.status_code == 206:
+            if not allow_partial:
+                raise PartialContentError(f"i3X {path} returned 206 Partial Content")
+            logger.warning("i3X %s returned 206 Partial Content — result truncated", path)
+        resp.raise_for_status()
+    historian_scheduler.record_bytes(len(resp.content))
     body = resp.json()
     # A successful bulk response may include per-tag {"error": ...} entries
     # alongside its "data" keys; that's not a request-level failure. Only raise
@@ -234,15 +303,21 @@ def _normalize_bool(value: object) -> bool | None:
     return bool(value)
 
 
-def _to_contract_point(point: dict, start: Optional[datetime] = None) -> Optional[dict]:
-    """Convert a Timebase VQT to legacy {t, v, q}, applying boundary clamp."""
-    if not _is_good_quality(point.get("quality")):
+def _good_point_time(point: Any) -> Optional[datetime]:
+    """Timestamp of a GOOD-quality VQT, or None if the point is unusable."""
+    if not isinstance(point, dict) or not _is_good_quality(point.get("quality")):
         return None
     timestamp = point.get("timestamp")
     if not timestamp:
         return None
+    return _parse_iso(str(timestamp))
 
-    dt = _parse_iso(str(timestamp))
+
+def _to_contract_point(point: dict, start: Optional[datetime] = None) -> Optional[dict]:
+    """Convert a Timebase VQT to legacy {t, v, q}, applying boundary clamp."""
+    dt = _good_point_time(point)
+    if dt is None:
+        return None
     # Boundary clamp — Timebase staleness compensation; see module docstring.
     if start is not None and dt < start:
         dt = start
@@ -282,6 +357,206 @@ def _extract_value_results(payload: Any, requested_ids: list[str]) -> dict[str,
     return out
 
 
+def _chunk_window(start: datetime, end: datetime) -> list[tuple[datetime, datetime]]:
+    """Split [start, end] at multiples of I3X_HISTORY_CHUNK_HOURS since the
+    Unix epoch, so the same wall-clock day is always the same chunk no
+    matter which window asked for it."""
+    size = timedelta(hours=I3X_HISTORY_CHUNK_HOURS)
+    if size <= timedelta(0) or end - start <= size:
+        return [(start, end)]
+
+    epoch = datetime(1970, 1, 1, tzinfo=timezone.utc)
+    boundary = epoch + ((start - epoch) // size + 1) * size
+    chunks: list[tuple[datetime, datetime]] = []
+    lo = start
+    while boundary < end:
+        chunks.append((lo, boundary))
+        lo = boundary
+        boundary += size
+    chunks.append((lo, end))
+    return chunks
+
+
+# A normalized point: (epoch-ns, raw value).
+Pair = tuple[int, Any]
+
+# Per-chunk result: {elementId: (seed, points)}. `seed` is the boundary point
+# clamped to the chunk start (None when upstream sent none); `points` are the
+# in-window points.
+ChunkResult = dict[str, tuple[Optional[Pair], list[Pair]]]
+
+
+async def _stream_history(
+    client: httpx.AsyncClient,
+    request: dict,
+    start: datetime,
+    allow_partial: bool,
+    strict: bool = False,
+) -> ChunkResult:
+    """POST /i3x/objects/history and normalize VQTs as they stream in.
+
+    Same status/error semantics as _post: 206 raises PartialContentError
+    unless ``allow_partial``, HTTP errors raise, and a top-level ``error``
+    with no data raises RuntimeError. Per-tag errors are logged and leave
+    that tag empty; with ``strict`` they raise TagError.
+    """
+    path = "/i3x/objects/history"
+    element_ids = request["elementIds"]
+    out: ChunkResult = {eid: (None, []) for eid in element_ids}
+    seed_times: dict[str, int] = {}
+    top_error: Any = None
+    start_ns = datetime_to_ns(start)
+
+    async with historian_breaker.guard(), client.stream("POST", path, json=request) as resp:
+        if resp.status_code == 206:
+            if not allow_partial:
+                raise PartialContentError(f"i3X {path} returned 206 Partial Content")
+            logger.warning("i3X %s returned 206 Partial Content — result truncated", path)
+        resp.raise_for_status()
+
+        async for item_path, value in history_stream.iter_matches(
+            historian_scheduler.metered(resp.aiter_bytes()),
+            history_stream.i3x_history_match,
+            incremental=_parse_iso(request["endTime"]) - start > history_stream.INCREMENTAL_MIN_WINDOW,
+        ):
+            if len(item_path) == 1:
+                top_error = value
+                continue
+            eid = item_path[0]
+            if eid not in out:
+                continue
+            if item_path[1] == "error":
+                if value:
+                    logger.error("i3X per-tag error for %s: %s", eid, value)
+                    if strict:
+                        raise TagError(f"i3X per-tag error for {eid}: {value}")
+                continue
+
+            dt = _good_point_time(value)
+            if dt is None:
+                continue
+            t_ns = datetime_to_ns(dt)
+            seed, points = out[eid]
+            if t_ns < start_ns:
+                # Boundary clamp — Timebase staleness compensation; keep only
+                # the most recent pre-window point.
+                if eid not in seed_times or t_ns >= seed_times[eid]:
+                    seed_times[eid] = t_ns
+                    out[eid] = ((start_ns, value.get("value")), points)
+                continue
+            points.append((t_ns, value.get("value")))
+
+    if top_error and not any(seed or points for seed, points in out.values()):
+        raise RuntimeError(f"i3X error for {path}: {top_error}")
+    return out
+
+
+async def _fetch_history_chunk(
+    client: httpx.AsyncClient,
+    element_ids: list[str],
+    start: datetime,
+    end: datetime,
+    strict: bool = False,
+) -> ChunkResult:
+    """One chunk, retried individually. A 206 bisects the chunk; the second
+    half's seed is dropped because the first half already carries it."""
+    request = {
+        "elementIds": element_ids,
+        "startTime": _iso_utc(start),
+        "endTime": _iso_utc(end),
+    }
+    allow_partial = end - start <= MIN_HISTORY_CHUNK
+    attempt = 0
+    while True:
+        try:
+            async with _history_chunk_slots().slot(current_priority()):
+                return await _stream_history(client, request, start, allow_partial, strict=strict)
+        except CircuitOpenError:
+            # Upstream is known to be down — retrying would only fail fast again.
+            raise
+        except PartialContentError:
+            mid = start + (end - start) / 2
+            logger.info("i3X history chunk %s -> %s truncated; bisecting", request["startTime"], request["endTime"])
+            first, second = await asyncio.gather(
+                _fetch_history_chunk(client, element_ids, start, mid, strict),
+                _fetch_history_chunk(client, element_ids, mid, end, strict),
+            )
+            return {
+                eid: (first[eid][0], first[eid][1] + second[eid][1])
+                for eid in element_ids
+            }
+        except (httpx.HTTPError, RuntimeError, ValueError) as exc:
+            if attempt >= I3X_HISTORY_CHUNK_RETRIES:
+                raise
+            attempt += 1
+            logger.warning(
+                "i3X history chunk %s -> %s failed (%s); retry %d/%d",
+                request["startTime"], request["endTime"], exc, attempt, I3X_HISTORY_CHUNK_RETRIES,
+            )
+            await asyncio.sleep(_RETRY_BACKOFF_SECONDS * 2 ** (attempt - 1))
+
+
+async def _fetch_history(
+    element_ids: list[str],
+    start: datetime,
+    end: datetime,
+    strict: bool = False,
+) -> dict[str, list[Pair]]:
+    """Chunked, concurrent /history read returning (epoch-ns, value) pairs per
+    elementId. Non-strict: a chunk that exhausts its retries is logged and
+    left as a gap, and a tag that came back with an error is left empty.
+    Strict: the first such failure is raised."""
+    chunks = _chunk_window(start, end)
+    client = await get_client()
+    results = await asyncio.gather(
+        *[_fetch_history_chunk(client, element_ids, lo, hi, strict) for lo, hi in chunks],
+        return_exceptions=True,
+    )
+
+    out: dict[str, list[Pair]] = {eid: [] for eid in element_ids}
+    previous_ok = False
+    for (lo, hi), result in zip(chunks, results):
+        if isinstance(result, BaseException):
+            if strict or not isinstance(result, (httpx.HTTPError, RuntimeError, ValueError)):
+                raise result
+            logger.error("i3X history chunk %s -> %s failed: %s", _iso_utc(lo), _iso_utc(hi), result)
+            previous_ok = False
+            continue
+
+        for eid in element_ids:
+            seed, points = result[eid]
+            # Keyed by timestamp so a real point at exactly `lo` wins over the
+            # seed clamped onto the same instant. Later chunks drop their seed
+            # — it duplicates the tail of the chunk before — unless that chunk
+            # is missing and the seed is all that bridges the gap.
+            by_t: dict[int, Pair] = {}
+            if seed is not None and not previous_ok:
+                by_t[seed[0]] = seed
+            for p in points:
+                by_t[p[0]] = p
+
+            # Stitch + de-duplicate: chunk ends and starts are both inclusive,
+            # and bisected halves can repeat a point across the split.
+            merged = out[eid]
+            for t in sorted(by_t):
+                if not merged or t > merged[-1][0]:
+                    merged.append(by_t[t])
+        previous_ok = True
+
+    if len(chunks) > 1:
+        logger.debug("i3X history: %d chunks for %s -> %s", len(chunks), _iso_utc(start), _iso_utc(end))
+    return out
+
+
+def _to_contract(pairs: list[Pair]) -> list[dict]:
+    """(epoch-ns, value) pairs -> the legacy {t, v, q} contract."""
+    return [{"t": ns_to_iso(t), "v": v, "q": GOOD_QUALITY_INT} for t, v in pairs]
+
+
+def _to_columns(alias: str, pairs: list[Pair]) -> TagColumns:
+    return TagColumns.from_pairs(alias, [t for t, _ in pairs], [v for _, v in pairs])
+
+
 # --- Public API --------------------------------------------------------------
 async def fetch_tag_history(
     tag_path: str,
@@ -292,35 +567,28 @@ async def fetch_tag_history(
     if element_id is None:
         raise KeyError(f"Unknown tag path: {tag_path}")
 
-    client = await get_client()
-    request = {
-        "elementIds": [element_id],
-        "startTime": _iso_utc(start),
-        "endTime": _iso_utc(end),
-    }
-
     try:
-        body = await _post("/i3x/objects/history", request, client)
+        per_id = await _fetch_history([element_id], start, end)
     except (httpx.HTTPError, RuntimeError, ValueError) as exc:
         logger.error("i3X history error for %s: %s", element_id, exc)
         return []
-
-    raw_points = _extract_value_results(body, [element_id]).get(element_id, [])
-
-    normalized: list[dict] = []
-    for point in raw_points:
-        mapped = _to_contract_point(point, start=start)
-        if mapped is not None:
-            normalized.append(mapped)
-    normalized.sort(key=lambda p: p["t"])
-    return normalized
+    return _to_contract(per_id.get(element_id, []))
 
 
 async def fetch_all_tags(
     start: Optional[datetime] = None,
     end: Optional[datetime] = None,
-) -> dict[str, list[dict]]:
-    """Single bulk /history request for all four tags."""
+    strict: bool = False,
+    columnar: bool = False,
+) -> dict[str, list[dict]] | dict[str, TagColumns]:
+    """Bulk /history read for all four tags, chunked for long windows.
+
+    By default a failed request degrades to empty lists (the dashboard
+    renders "no data" rather than a 500). ``strict=True`` re-raises instead,
+    also when a single tag came back with an error, for callers such as the
+    tag archive that must not mistake an outage for an empty window. ``columnar=True`` returns TagColumns per alias instead
+    of {t, v, q} lists.
+    """
     now = datetime.now(timezone.utc)
     if end is None:
         end = now
@@ -330,32 +598,19 @@ async def fetch_all_tags(
     aliases = list(I3X_TAGS.keys())
     element_ids = [I3X_TAGS[a] for a in aliases]
 
-    request = {
-        "elementIds": element_ids,
-        "startTime": _iso_utc(start),
-        "endTime": _iso_utc(end),
-    }
-
-    client = await get_client()
     try:
-        body = await _post("/i3x/objects/history", request, client)
+        per_id = await _fetch_history(element_ids, start, end, strict=strict)
     except (httpx.HTTPError, RuntimeError, ValueError) as exc:
         logger.error("i3X bulk history failed: %s", exc)
-        return {alias: [] for alias in aliases}
-
-    per_id = _extract_value_results(body, element_ids)
+        if strict:
+            raise
+        per_id = {}
 
-    out: dict[str, list[dict]] = {}
+    out: dict = {}
     for alias in aliases:
-        eid = I3X_TAGS[alias]
-        normalized: list[dict] = []
-        for point in per_id.get(eid, []):
-            mapped = _to_contract_point(point, start=start)
-            if mapped is not None:
-                normalized.append(mapped)
-        normalized.sort(key=lambda p: p["t"])
-        out[alias] = normalized
-        logger.debug("i3X bulk history: alias=%s good=%d", alias, len(normalized))
+        pairs = per_id.get(I3X_TAGS[alias], [])
+        out[alias] = _to_columns(alias, pairs) if columnar else _to_contract(pairs)
+        logger.debug("i3X bulk history: alias=%s good=%d", alias, len(pairs))
     return out
 
 
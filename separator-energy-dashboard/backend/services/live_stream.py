@@ -0,0 +1,125 @@
+"""Server-Sent Events fan-out of the processing loop's output.
+
+Every open live tab used to poll /api/energy/current every 5s. Instead,
+/api/energy/stream holds one response open per client, and after each
+processing tick publish() encodes the tick's events once and puts the same
+bytes on every client's queue:
+
+  metrics   current_metrics(), every tick
+  timeline  {seq, reset, points} for minutes that landed since the last
+            event (processing.timeline_since); its SSE id is the seq, so a
+            reconnecting EventSource sends it back as Last-Event-ID and
+            gets exactly the minutes it missed
+
+A client whose queue is full (LIVE_STREAM_QUEUE_FRAMES frames behind — a
+stalled tab, a slow link) is disconnected rather than buffered for: the
+tick never waits on a socket, and the browser reconnects and resumes from
+its Last-Event-ID. Idle streams get a comment line every
+LIVE_STREAM_HEARTBEAT_SECONDS.
+"""
+
+import asyncio
+import json
+import logging
+from typing import AsyncIterator, Optional
+
+from config import LIVE_STREAM_HEARTBEAT_SECONDS, LIVE_STREAM_QUEUE_FRAMES, PROCESSING_INTERVAL_SECONDS
+from services import processing
+
+logger = logging.getLogger(__name__)
+
+HEARTBEAT = b": keepalive\n\n"
+# How soon a dropped or disconnected EventSource retries, in ms.
+RETRY = f"retry: {int(PROCESSING_INTERVAL_SECONDS * 1000)}\n\n".encode()
+
+# End-of-stream marker on a subscriber's queue.
+_CLOSE = object()
+
+
+def _frame(event: str, payload: dict, event_id: Optional[int] = None) -> bytes:
+    data = json.dumps(payload, separators=(",", ":"))
+    head = f"event: {event}\n" + (f"id: {event_id}\n" if event_id is not None else "")
+    return f"{head}data: {data}\n\n".encode()
+
+
+def _timeline_frame(cursor: int) -> Optional[bytes]:
+    delta = processing.timeline_since(cursor)
+    if not delta["points"] and not delta["reset"]:
+        return None
+    delta.pop("partial")  # the metrics event carries the live minute
+    return _frame("timeline", delta, delta["seq"])
+
+
+class LiveStream:
+    def __init__(self, queue_frames: int, heartbeat_seconds: float) -> None:
+        self.queue_frames = queue_frames
+        self.heartbeat_seconds = heartbeat_seconds
+        self._queues: set[asyncio.Queue] = set()
+        self._seq: Optional[int] = None  # timeline seq already published
+        self._published = 0
+        self._dropped = 0
+
+    def publish(self) -> None:
+        """Processing-tick listener: fan this tick's events out."""
+        seq = processing.timeline_seq()
+        frames = []
+        if self._queues:
+            frames.append(_frame("metrics", processing.current_metrics()))
+            if self._seq is not None and seq != self._seq:
+                timeline = _timeline_frame(self._seq)
+                if timeline is not None:
+                    frames.append(timeline)
+        self._seq = seq
+        for queue in list(self._queues):
+            for frame in frames:
+                try:
+                    queue.put_nowait(frame)
+                except asyncio.QueueFull:
+                    self._drop(queue)
+                    break
+        self._published += len(frames)
+
+    def _drop(self, queue: asyncio.Queue) -> None:
+        self._dropped += 1
+        self._close(queue)
+        logger.info("live_stream: dropped a client %d frames behind", self.queue_frames)
+
+    async def subscribe(self, last_event_id: Optional[str] = None) -> AsyncIterator[bytes]:
+        """One client's stream: retry hint, the current metrics, any minutes
+        missed since ``last_event_id``, then the broadcast."""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_frames)
+        self._queues.add(queue)
+        try:
+            yield RETRY + _frame("metrics", processing.current_metrics())
+            if last_event_id and last_event_id.isascii() and last_event_id.isdigit():
+                missed = _timeline_frame(int(last_event_id))
+                if missed is not None:
+                    yield missed
+            while True:
+                try:
+                    frame = await asyncio.wait_for(queue.get(), self.heartbeat_seconds)
+                except asyncio.TimeoutError:
+                    yield HEARTBEAT
+                    continue
+                if frame is _CLOSE:
+                    return
+                yield frame
+        finally:
+            self._queues.discard(queue)
+
+    def _close(self, queue: asyncio.Queue) -> None:
+        self._queues.discard(queue)
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(_CLOSE)
+
+    def close_all(self) -> None:
+        """End every open stream (shutdown)."""
+        for queue in list(self._queues):
+            self._close(queue)
+
+    def stats(self) -> dict:
+        return {"clients": len(self._queues), "frames": self._published, "dropped": self._dropped}
+
+
+live_stream = LiveStream(LIVE_STREAM_QUEUE_FRAMES, LIVE_STREAM_HEARTBEAT_SECONDS)
@@ -0,0 +1,79 @@
+"""Event-loop lag monitor.
+
+A task sleeps LOOP_LAG_SAMPLE_SECONDS at a time and records how late it
+wakes up. Any lag is time the loop spent running something else without
+yielding — an inline pandas aggregation, a blocking file read — during
+which the processing tick, /api/energy/current and the UNS publisher could
+not run either. Reported under ``event_loop`` on /health; a sample over
+LOOP_LAG_WARN_MS is logged.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Optional
+
+import numpy as np
+
+from config import LOOP_LAG_SAMPLE_SECONDS, LOOP_LAG_WARN_MS
+
+logger = logging.getLogger(__name__)
+
+# Samples kept for the percentiles — ten minutes at the default interval.
+WINDOW_SAMPLES = 1200
+
+
+class LagMonitor:
+    def __init__(self, interval: float = LOOP_LAG_SAMPLE_SECONDS, warn_ms: float = LOOP_LAG_WARN_MS) -> None:
+        self.interval = interval
+        self.warn_ms = warn_ms
+        self.samples: deque[float] = deque(maxlen=WINDOW_SAMPLES)
+        self.max_ms = 0.0
+        self.over_warn = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def record(self, lag_ms: float) -> None:
+        lag_ms = max(0.0, lag_ms)
+        self.samples.append(lag_ms)
+        self.max_ms = max(self.max_ms, lag_ms)
+        if lag_ms > self.warn_ms:
+            self.over_warn += 1
+            logger.warning("loop_monitor: event loop blocked for %.0f ms", lag_ms)
+
+    async def run(self) -> None:
+        while True:
+            expected = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            self.record((time.perf_counter() - expected) * 1000)
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run(), name="loop-lag-monitor")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def stats(self) -> dict:
+        recent = np.fromiter(self.samples, dtype=float)
+        if not len(recent):
+            return {"samples": 0, "max_ms": 0.0, "over_warn": self.over_warn}
+        p50, p99 = np.percentile(recent, [50, 99])
+        return {
+            "samples":       len(recent),
+            "p50_ms":        round(float(p50), 1),
+            "p99_ms":        round(float(p99), 1),
+            "recent_max_ms": round(float(recent.max()), 1),
+            "max_ms":        round(self.max_ms, 1),
+            "over_warn":     self.over_warn,
+        }
+
+
+loop_monitor = LagMonitor()
@@ -0,0 +1,100 @@
+"""Bounded LRU mapping with entry and byte limits.
+
+Small, synchronous, single-event-loop: no locking. Eviction happens on
+``put`` once either limit is exceeded; the most recently inserted entry is
+never evicted by its own insertion, so a single oversized value is still
+held (alone) rather than silently dropped.
+"""
+
+from collections import OrderedDict
+from typing import Callable, Generic, Hashable, Optional, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class LRUCache(Generic[K, V]):
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        sizeof: Callable[[V], int] = lambda _: 0,
+        on_evict: Optional[Callable[[K, V], None]] = None,
+    ) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._sizeof = sizeof
+        self._on_evict = on_evict
+        self._data: "OrderedDict[K, tuple[V, int]]" = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._data
+
+    def get(self, key: K, default: Optional[V] = None) -> Optional[V]:
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+        self.hits += 1
+        self._data.move_to_end(key)
+        return entry[0]
+
+    def peek(self, key: K, default: Optional[V] = None) -> Optional[V]:
+        """Look up without touching recency or hit/miss counters."""
+        entry = self._data.get(key)
+        return default if entry is None else entry[0]
+
+    def put(self, key: K, value: V) -> None:
+        old = self._data.pop(key, None)
+        if old is not None:
+            self.bytes -= old[1]
+        size = self._sizeof(value)
+        self._data[key] = (value, size)
+        self.bytes += size
+        self._evict()
+
+    def pop(self, key: K, default: Optional[V] = None) -> Optional[V]:
+        entry = self._data.pop(key, None)
+        if entry is None:
+            return default
+        self.bytes -= entry[1]
+        return entry[0]
+
+    def clear(self) -> None:
+        self._data.clear()
+        self.bytes = 0
+
+    def keys(self) -> list[K]:
+        return list(self._data)
+
+    def items(self) -> list[tuple[K, V]]:
+        return [(k, v) for k, (v, _) in self._data.items()]
+
+    def _over(self) -> bool:
+        if self.max_entries is not None and len(self._data) > self.max_entries:
+            return True
+        return self.max_bytes is not None and self.bytes > self.max_bytes
+
+    def _evict(self) -> None:
+        while len(self._data) > 1 and self._over():
+            key, (value, size) = self._data.popitem(last=False)
+            self.bytes -= size
+            self.evictions += 1
+            if self._on_evict is not None:
+                self._on_evict(key, value)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "entries":   len(self._data),
+            "bytes":     self.bytes,
+            "hits":      self.hits,
+            "misses":    self.misses,
+            "evictions": self.evictions,
+        }
@@ -0,0 +1,175 @@
+"""Preallocated minute ring buffer for the processing loop.
+
+One NumPy structured array row per minute:
+
+  minute  epoch minute (UTC)
+  kw      kW, NaN when unknown
+  state   code into STATES
+  tou     code into TOU period labels
+  rate    $/kWh, NaN when unknown
+  shift   code into shift labels
+  cost    cost_today as of that minute, NaN when unknown (before boot)
+  seq     sequence number, increasing across clear(): the cursor delta
+          timeline readers poll with
+
+Every row is written twice, at slot i and i + capacity, so the newest
+``len(ring)`` rows are always one contiguous run of the backing array:
+view() and between() return slices of it (no copy) and append() is a
+couple of item assignments. Minutes are appended in increasing order,
+which is what lets between() and after() bisect.
+
+Sequence numbers start at the ring's creation time in microseconds, so a
+cursor from before a restart is older than every row after it (a process
+would have to append a row per microsecond of downtime to collide).
+
+A view is only valid until the next append. Readers on the event loop
+finish with it before yielding; anything that keeps the rows across an
+await (or hands them to a thread) takes a copy.
+"""
+
+import time
+from typing import Optional
+
+import numpy as np
+
+from services.cost_calculator import SHIFTS, TOU_PERIODS
+from services.state_engine import ALL_STATES
+
+DTYPE = np.dtype([
+    ("minute", np.int64),
+    ("kw",     np.float64),
+    ("state",  np.int8),
+    ("tou",    np.int8),
+    ("rate",   np.float64),
+    ("shift",  np.int8),
+    ("cost",   np.float64),
+    ("seq",    np.int64),
+])
+
+
+class Labels:
+    """String <-> small-int code table. Seeded with the known vocabulary;
+    anything else seen later gets the next code."""
+
+    def __init__(self, known) -> None:
+        self.names: list[str] = list(known)
+        self._codes = {name: i for i, name in enumerate(self.names)}
+
+    def code(self, name: str) -> int:
+        code = self._codes.get(name)
+        if code is None:
+            code = self._codes[name] = len(self.names)
+            self.names.append(name)
+        return code
+
+    def encode(self, values) -> np.ndarray:
+        uniques, inverse = np.unique(np.asarray(values, dtype=str), return_inverse=True)
+        return np.array([self.code(name) for name in uniques.tolist()], dtype=np.int8)[inverse]
+
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        return np.asarray(self.names, dtype=object)[codes]
+
+
+STATES  = Labels(ALL_STATES)
+PERIODS = Labels(TOU_PERIODS)
+SHIFT_LABELS = Labels(list(SHIFTS) + ["Unknown"])
+
+# Label columns and their code tables, by structured-array field.
+LABELS = {"state": STATES, "tou": PERIODS, "shift": SHIFT_LABELS}
+
+
+class MinuteRing:
+    def __init__(self, capacity: int) -> None:
+        self.capacity = capacity
+        self._rows = np.zeros(2 * capacity, dtype=DTYPE)
+        # Readers that keep something derived from the rows (the serialized
+        # timeline) compare these to tell what changed since they last looked.
+        self.appended = 0    # rows appended since the last clear()
+        self.generation = 0  # bumped by clear()
+        self.seq = time.time_ns() // 1000  # last sequence number handed out
+
+    def __len__(self) -> int:
+        return min(self.appended, self.capacity)
+
+    def clear(self) -> None:
+        self.appended = 0
+        self.generation += 1
+
+    def append(
+        self,
+        minute: int,
+        kw: Optional[float],
+        state: str,
+        tou_period: str,
+        rate: Optional[float],
+        shift: str,
+        cost: float,
+    ) -> None:
+        row = (
+            minute,
+            np.nan if kw is None else kw,
+            STATES.code(state),
+            PERIODS.code(tou_period),
+            np.nan if rate is None else rate,
+            SHIFT_LABELS.code(shift),
+            cost,
+            self.seq + 1,
+        )
+        self.seq += 1
+        slot = self.appended % self.capacity
+        self._rows[slot] = row
+        self._rows[slot + self.capacity] = row
+        self.appended += 1
+
+    def extend(self, rows: np.ndarray) -> None:
+        """Append already-encoded rows (oldest first); they get new sequence numbers."""
+        rows = rows[-self.capacity:].copy()
+        rows["seq"] = self.seq + 1 + np.arange(len(rows))
+        self.seq += len(rows)
+        slots = (self.appended + np.arange(len(rows))) % self.capacity
+        self._rows[slots] = rows
+        self._rows[slots + self.capacity] = rows
+        self.appended += len(rows)
+
+    def view(self) -> np.ndarray:
+        """The buffered rows, oldest first, as a view."""
+        n = len(self)
+        end = (self.appended - 1) % self.capacity + self.capacity + 1 if n else 0
+        return self._rows[end - n:end]
+
+    def between(self, start_minute: int, end_minute: int) -> np.ndarray:
+        """View of the rows with start_minute <= minute <= end_minute."""
+        rows = self.view()
+        lo = np.searchsorted(rows["minute"], start_minute, side="left")
+        hi = np.searchsorted(rows["minute"], end_minute, side="right")
+        return rows[lo:hi]
+
+    def after(self, seq: int) -> np.ndarray:
+        """View of the rows with a sequence number above ``seq``."""
+        rows = self.view()
+        return rows[np.searchsorted(rows["seq"], seq, side="right"):]
+
+    def last_minute(self) -> Optional[int]:
+        rows = self.view()
+        return int(rows["minute"][-1]) if len(rows) else None
+
+
+# --- Columns (warm-start snapshot) ---------------------------------------------
+NUMERIC = ("minute", "kw", "rate", "cost")
+
+
+def to_columns(rows: np.ndarray) -> dict[str, np.ndarray]:
+    """Rows as plain arrays, label codes decoded to strings (a copy)."""
+    columns = {name: rows[name].copy() for name in NUMERIC}
+    for name, labels in LABELS.items():
+        columns[name] = labels.decode(rows[name]).astype(str)
+    return columns
+
+
+def from_columns(columns: dict[str, np.ndarray]) -> np.ndarray:
+    rows = np.zeros(len(columns["minute"]), dtype=DTYPE)
+    for name in NUMERIC:
+        rows[name] = columns[name]
+    for name, labels in LABELS.items():
+        rows[name] = labels.encode(columns[name])
+    return rows
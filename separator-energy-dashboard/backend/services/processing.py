@@ -13,18 +13,19 @@ and the ring buffer instead of round-tripping to the historian on every
 request.
 
 Concurrency model: single producer (the loop), many readers (request
-handlers). LatestState is replaced atomically; the deque is thread-safe for
-append/iter at the GIL level.
+handlers), all on the event loop. LatestState is replaced atomically; the
+ring buffer (services/minute_ring.py) hands out views that readers finish
+with before they next yield.
 """
 
 import asyncio
 import logging
-from collections import deque
 from dataclasses import dataclass, field
-from datetime import datetime, timedelta, timezone
-from typing import Optional
+from datetime import date, datetime, timedelta, timezone
+from typing import Callable, Optional, Union
 from zoneinfo import ZoneInfo
 
+import numpy as np
 import pandas as pd
 
 from config import (
@@ -33,7 +34,12 @@ from config import (
     PROCESSING_INTERVAL_SECONDS,
     STALE_THRESHOLD_SECONDS,
 )
-from services import cost_calculator, historian_client, state_engine
+from services import compute_pool, cost_calculator, historian_client, minute_ring, state_engine, timeline_cache
+from services.circuit_breaker import CLOSED, historian_breaker
+from services.historian_scheduler import BACKFILL
+from services.minute_ring import MinuteRing
+from services.tag_columns import datetime_to_ns
+from services.timeline_cache import TimelineBody
 
 logger = logging.getLogger(__name__)
 
@@ -58,14 +64,18 @@ class LatestState:
     last_updated:      Optional[datetime] = None  # last successful tick (any outcome)
     last_good_update:  Optional[datetime] = None  # last tick with at least one GOOD value
     is_stale:          bool = True
+    historian_state:   str  = "closed"                # circuit breaker: closed / open / half_open
+    next_probe_at:     Optional[datetime] = None      # while open, when the historian is retried
 
 
 # --- Module-level singletons ------------------------------------------------
 _latest: LatestState = LatestState()
-_buffer: deque = deque(maxlen=PROCESSING_BUFFER_MINUTES)
+_ring: MinuteRing = MinuteRing(PROCESSING_BUFFER_MINUTES)
+_timeline: TimelineBody = TimelineBody()
+_listeners: list[Callable[[], None]] = []  # called after every tick
 _task: Optional[asyncio.Task] = None
-_last_buffer_minute: Optional[datetime] = None
 _cost_today_local_date = None  # facility-local date for the active cost_today bucket
+_cost_today_as_of: Optional[datetime] = None  # set by restore(): cost_today covers minutes before this
 
 
 # --- Public accessors -------------------------------------------------------
@@ -91,35 +101,137 @@ def current_metrics() -> dict:
     }
 
 
-def timeline_points() -> list[dict]:
-    """Return ring-buffer samples as TimelinePoint-shaped dicts (oldest first)."""
-    out: list[dict] = []
-    for ts, sample in list(_buffer):
-        kw = sample.get("kw") or 0.0
-        kwh = round(kw / 60.0, 4)  # 1-minute interval
-        rate = sample.get("tou_rate") or 0.0
-        out.append({
-            "timestamp":  ts.strftime("%Y-%m-%dT%H:%M:%SZ"),
-            "kw":         round(kw, 2),
-            "kwh":        kwh,
-            "cost_usd":   round(kwh * rate, 4),
-            "state":      sample.get("state", state_engine.STATE_SHUTDOWN),
-            "color":      sample.get("color", "#000000"),
-            "tou_period": sample.get("tou_period", "Off-Peak"),
-            "tou_rate":   round(rate, 4),
-            "shift":      sample.get("shift", "Unknown"),
-        })
-    return out
+_MINUTE_NS = 60 * 10**9
+
+
+def timeline_points(max_points: Optional[int] = None) -> list[dict]:
+    """Return ring-buffer samples as TimelinePoint-shaped dicts (oldest first),
+    downsampled to about ``max_points`` when given."""
+    rows = _ring.view()
+    if max_points:
+        rows = timeline_cache.downsampled(rows, max_points)
+    return timeline_cache.points(rows)
+
+
+def timeline_etag(max_points: Optional[int] = None) -> str:
+    etag = _timeline.get(_ring)[1]
+    return f'{etag[:-1]}-{max_points}"' if max_points and len(_ring) > max_points else etag
+
+
+def timeline_body(max_points: Optional[int] = None) -> tuple[bytes, str]:
+    """timeline_points() as a serialized JSON body, plus its strong ETag.
+    The full body is re-encoded only when a new minute lands in the buffer;
+    a downsampled one is encoded per call."""
+    body, etag = _timeline.get(_ring)
+    if not max_points or len(_ring) <= max_points:
+        return body, etag
+    return timeline_cache.encode(timeline_cache.downsampled(_ring.view(), max_points)), timeline_etag(max_points)
+
+
+def add_tick_listener(listener: Callable[[], None]) -> None:
+    """Call ``listener`` (synchronously, on the loop) after every tick."""
+    if listener not in _listeners:
+        _listeners.append(listener)
+
+
+def remove_tick_listener(listener: Callable[[], None]) -> None:
+    if listener in _listeners:
+        _listeners.remove(listener)
+
+
+def timeline_seq() -> int:
+    """Sequence number of the newest buffered minute — the cursor a client
+    passes back as /timeline?since= to get only what came after."""
+    return _ring.seq
+
+
+def timeline_since(cursor: Union[int, datetime], max_points: Optional[int] = None) -> dict:
+    """Timeline points appended after ``cursor`` — a sequence number from an
+    earlier response, or a timestamp (minutes stamped after it).
+
+    ``reset`` is set when a sequence cursor no longer connects to the
+    buffer (older than its oldest minute, or from another process): the
+    client should replace its series with ``points``, which is then the
+    whole buffer. ``partial`` is the minute in progress at the latest
+    tick's readings; it is superseded by a buffered point once the minute
+    closes. ``max_points`` downsamples ``points`` as for the full timeline.
+    """
+    rows = _ring.view()
+    reset = False
+    if isinstance(cursor, datetime):
+        new = rows[np.searchsorted(rows["minute"], datetime_to_ns(cursor) // _MINUTE_NS, side="right"):]
+    else:
+        reset = not len(rows) or not rows["seq"][0] - 1 <= cursor <= _ring.seq
+        new = rows if reset else _ring.after(cursor)
+    if max_points:
+        new = timeline_cache.downsampled(new, max_points)
+    return {
+        "seq":     _ring.seq,
+        "reset":   reset,
+        "points":  timeline_cache.points(new),
+        "partial": _partial_point(),
+    }
+
+
+def _partial_point() -> Optional[dict]:
+    s = _latest
+    if s.last_updated is None:
+        return None
+    row = np.zeros(1, dtype=minute_ring.DTYPE)
+    row["minute"] = datetime_to_ns(s.last_updated) // _MINUTE_NS
+    row["kw"]     = np.nan if s.kw is None else s.kw
+    row["state"]  = minute_ring.STATES.code(s.state)
+    row["tou"]    = minute_ring.PERIODS.code(s.tou_period)
+    row["rate"]   = s.tou_rate
+    row["shift"]  = minute_ring.SHIFT_LABELS.code(s.shift)
+    return timeline_cache.points(row)[0]
+
+
+def buffer_rows(start: Optional[datetime] = None, end: Optional[datetime] = None) -> np.ndarray:
+    """Buffered minutes stamped within [start, end], oldest first — a view of
+    the ring (minute_ring.DTYPE rows), valid until the next tick."""
+    if start is None and end is None:
+        return _ring.view()
+    lo = -(-datetime_to_ns(start) // _MINUTE_NS) if start is not None else np.iinfo(np.int64).min
+    hi = datetime_to_ns(end) // _MINUTE_NS if end is not None else np.iinfo(np.int64).max
+    return _ring.between(lo, hi)
 
 
 def buffer_size() -> int:
-    return len(_buffer)
+    return len(_ring)
+
+
+def buffer_columns() -> dict[str, np.ndarray]:
+    """The buffered minutes as plain arrays, a copy (for the warm-start snapshot)."""
+    return minute_ring.to_columns(_ring.view())
+
+
+def cost_today_state() -> tuple[Optional[date], float]:
+    return _cost_today_local_date, _latest.cost_today
+
+
+def restore(
+    columns: dict[str, np.ndarray],
+    cost_today_date: Optional[date],
+    cost_today: float,
+    as_of: datetime,
+) -> None:
+    """Seed the ring buffer and cost_today from a warm-start snapshot taken
+    at ``as_of``. start() then backfills only the minutes after it."""
+    global _cost_today_local_date, _cost_today_as_of
+    _ring.clear()
+    _ring.extend(minute_ring.from_columns(columns))
+    today = datetime.now(timezone.utc).astimezone(ZoneInfo(FACILITY_TIMEZONE)).date()
+    if cost_today_date == today:
+        _cost_today_local_date = cost_today_date
+        _latest.cost_today = cost_today
+        _cost_today_as_of = as_of
 
 
 # --- Loop internals (visible for testing) -----------------------------------
 async def _tick() -> None:
     """Run one iteration of the processing loop. Safe to call directly in tests."""
-    global _last_buffer_minute, _cost_today_local_date
+    global _cost_today_local_date
 
     now_utc = datetime.now(timezone.utc)
     facility_tz = ZoneInfo(FACILITY_TIMEZONE)
@@ -130,13 +242,18 @@ async def _tick() -> None:
         _cost_today_local_date = now_local_date
         _latest.cost_today = 0.0
 
+    if historian_breaker.is_open():
+        # Historian known down — don't spend the tick waiting on a connect
+        # that will fail. _loop sleeps until the breaker's next probe.
+        _mark_unavailable(now_utc)
+        return
+
     try:
         values = await historian_client.fetch_current_values()
     except Exception as exc:
         # Retain last good state, just mark stale and bump last_updated.
         logger.error("processing tick: fetch_current_values failed: %s", exc)
-        _latest.last_updated = now_utc
-        _latest.is_stale = True
+        _mark_unavailable(now_utc)
         return
 
     amps    = values.get("motor_amps")
@@ -180,6 +297,7 @@ async def _tick() -> None:
     _latest.tou_rate      = tou_rate or 0.0
     _latest.shift         = shift
     _latest.last_updated  = now_utc
+    _record_historian_health()
     if has_good:
         _latest.last_good_update = now_utc
 
@@ -189,17 +307,34 @@ async def _tick() -> None:
         age = (now_utc - _latest.last_good_update).total_seconds()
         _latest.is_stale = age > STALE_THRESHOLD_SECONDS
 
-    minute_key = now_utc.replace(second=0, microsecond=0)
-    if _last_buffer_minute != minute_key:
-        _buffer.append((minute_key, {
-            "state":      _latest.state,
-            "color":      _latest.color,
-            "kw":         kw,
-            "tou_period": tou_period,
-            "tou_rate":   tou_rate,
-            "shift":      shift,
-        }))
-        _last_buffer_minute = minute_key
+    minute = datetime_to_ns(now_utc) // _MINUTE_NS
+    if _ring.last_minute() != minute:
+        _ring.append(minute, kw, _latest.state, tou_period, tou_rate, shift, _latest.cost_today)
+        _timeline.sync(_ring)  # so the next /timeline poll is a plain copy
+
+
+def _mark_unavailable(now_utc: datetime) -> None:
+    """Retain last good state, just mark stale and bump last_updated."""
+    _latest.last_updated = now_utc
+    _latest.is_stale = True
+    _record_historian_health()
+
+
+def _record_historian_health() -> None:
+    _latest.historian_state = historian_breaker.state
+    if historian_breaker.state == CLOSED:
+        _latest.next_probe_at = None
+    else:
+        _latest.next_probe_at = datetime.now(timezone.utc) + timedelta(
+            seconds=historian_breaker.seconds_until_probe()
+        )
+
+
+def _next_tick_delay() -> float:
+    """Adaptive polling: the normal interval while the historian is up; while
+    the breaker is open, wait for its next probe instead of ticking into a
+    guaranteed fast-fail."""
+    return max(float(PROCESSING_INTERVAL_SECONDS), historian_breaker.seconds_until_probe())
 
 
 async def _loop() -> None:
@@ -210,7 +345,12 @@ async def _loop() -> None:
             raise
         except Exception:
             logger.exception("processing loop tick raised")
-        await asyncio.sleep(PROCESSING_INTERVAL_SECONDS)
+        for listener in list(_listeners):
+            try:
+                listener()
+            except Exception:
+                logger.exception("processing tick listener raised")
+        await asyncio.sleep(_next_tick_delay())
 
 
 # --- Lifecycle --------------------------------------------------------------
@@ -223,16 +363,22 @@ async def _backfill_buffer() -> None:
     "24 hour" while displaying 5 minutes of data. The backfill blocks startup
     by ~2-5s but guarantees the live tab has a full 24h chart immediately.
     """
-    global _last_buffer_minute
-    if len(_buffer) > 0:
-        return  # already populated (e.g., test or hot-reload)
-
+    global _cost_today_as_of
     now = datetime.now(timezone.utc)
     start = now - timedelta(minutes=PROCESSING_BUFFER_MINUTES)
+    cost_from, _cost_today_as_of = _cost_today_as_of, None
+    after = _ring.last_minute()
+    if after is not None:
+        # Already populated (warm-start snapshot, hot-reload): fetch only the
+        # gap, from the last buffered minute so the first new one is aligned
+        # against a real neighbour.
+        if datetime_to_ns(now) // _MINUTE_NS - after < 2:
+            return
+        start = max(start, datetime.fromtimestamp(after * 60, tz=timezone.utc))
 
     try:
-        raw = await historian_client.fetch_all_tags(start=start, end=now)
-        df = state_engine.build_dataframe(raw)
+        raw = await historian_client.fetch_all_tags(start=start, end=now, columnar=True, priority=BACKFILL)
+        df = await compute_pool.run(_costed_frame, raw)
     except Exception as exc:
         logger.warning(
             "processing backfill: historian fetch failed (%s); buffer will fill from live ticks",
@@ -244,32 +390,51 @@ async def _backfill_buffer() -> None:
         logger.info("processing backfill: historian returned no data")
         return
 
-    df = cost_calculator.calculate_costs(df)
-
-    appended = 0
-    for ts, row in df.iterrows():
-        kw_raw = row.get("kw")
-        if pd.isna(kw_raw):
-            continue
-        minute_key = ts.to_pydatetime()
-        if minute_key.tzinfo is None:
-            minute_key = minute_key.replace(tzinfo=timezone.utc)
-        minute_key = minute_key.replace(second=0, microsecond=0)
-        state = row.get("state", state_engine.STATE_SHUTDOWN)
-        _buffer.append((minute_key, {
-            "state":      state,
-            "color":      state_engine.STATE_COLORS.get(state, "#000000"),
-            "kw":         float(kw_raw),
-            "tou_period": row.get("tou_period", "Off-Peak"),
-            "tou_rate":   float(row.get("tou_rate", 0.0)),
-            "shift":      row.get("shift", "Unknown"),
-        }))
-        appended += 1
-
-    if _buffer:
-        _last_buffer_minute = _buffer[-1][0]
-
-    logger.info("processing backfill: pre-populated %d minutes from historian", appended)
+    df = df[df["kw"].notna()]
+    index = df.index if df.index.tz is not None else df.index.tz_localize("UTC")
+    minutes = index.as_unit("ns").asi8 // _MINUTE_NS
+    if after is not None:
+        keep = minutes > after
+        df, index, minutes = df[keep], index[keep], minutes[keep]
+
+    facility_tz = ZoneInfo(FACILITY_TIMEZONE)
+    local_days = np.asarray(index.tz_convert(facility_tz).date, dtype=object)
+    costs = df["cost_usd"].fillna(0.0).to_numpy(dtype=np.float64)
+    if cost_from is not None:
+        # Downtime since a restored cost_today was snapshotted.
+        since = (index >= cost_from) & (local_days == _cost_today_local_date)
+        _latest.cost_today += float(costs[since].sum())
+
+    # The ring's cost column is the live accumulator as of each minute. A cold
+    # start has none before boot (NaN: unknown); filling a gap continues each
+    # local day's running total from the last buffered minute's.
+    accumulated = np.full(len(costs), np.nan)
+    if after is not None and len(costs):
+        accumulated = pd.Series(costs).groupby(local_days).cumsum().to_numpy()
+        last = _ring.view()[-1]
+        last_day = datetime.fromtimestamp(int(last["minute"]) * 60, tz=facility_tz).date()
+        accumulated[local_days == last_day] += last["cost"]
+
+    rows = np.zeros(len(df), dtype=minute_ring.DTYPE)
+    rows["minute"] = minutes
+    rows["kw"]     = df["kw"].to_numpy(dtype=np.float64)
+    rows["state"]  = minute_ring.STATES.encode(df["state"].to_numpy())
+    rows["tou"]    = minute_ring.PERIODS.encode(df["tou_period"].to_numpy())
+    rows["rate"]   = df["tou_rate"].to_numpy(dtype=np.float64)
+    rows["shift"]  = minute_ring.SHIFT_LABELS.encode(df["shift"].to_numpy())
+    rows["cost"]   = accumulated
+    _ring.extend(rows)
+
+    logger.info(
+        "processing backfill: %s %d minutes from historian",
+        "pre-populated" if after is None else "filled the gap with", len(rows),
+    )
+
+
+def _costed_frame(raw: dict) -> pd.DataFrame:
+    """Executor job: the backfill window aligned and costed."""
+    df = state_engine.build_dataframe(raw)
+    return df if df.empty else cost_calculator.calculate_costs(df)
 
 
 async def start() -> None:
@@ -302,9 +467,11 @@ async def stop() -> None:
 # --- Test hook --------------------------------------------------------------
 def _reset_for_tests() -> None:
     """Reset module state — only for use from unit tests."""
-    global _latest, _buffer, _last_buffer_minute, _cost_today_local_date, _task
+    global _latest, _ring, _timeline, _cost_today_local_date, _cost_today_as_of, _task
     _latest = LatestState()
-    _buffer = deque(maxlen=PROCESSING_BUFFER_MINUTES)
-    _last_buffer_minute = None
+    _ring = MinuteRing(PROCESSING_BUFFER_MINUTES)
+    _timeline = TimelineBody()
     _cost_today_local_date = None
+    _cost_today_as_of = None
     _task = None
+    _listeners.clear()
@@ -0,0 +1,331 @@
+"""Closed-day segment cache for columnar historian reads.
+
+A 30-day analytics window is 29 days of history that can no longer change
+plus one partial day. Without this cache every TTL miss re-downloaded all of
+it. With SEGMENT_CACHE_ENABLED, historian_client.fetch_all_tags(columnar=True)
+is assembled from:
+
+    cached day segments   one TagColumns per (elementId, facility-local day),
+                          for days that ended at least SEGMENT_CACHE_SETTLE_SECONDS
+                          ago — immutable, cached indefinitely
+    live tail             everything after the last closed day, fetched from
+                          the historian on every read
+
+Missing closed days are fetched together, one upstream read per contiguous
+run, and split per day. Fills are single-flight per day: a read missing a
+day that another read is already filling at the same or a more urgent
+class awaits that fill, and nothing is held locked across an upstream
+read. Segments live in a byte-bounded LRU
+(SEGMENT_CACHE_MAX_MB); with SEGMENT_CACHE_DIR set each segment is also
+written once to disk as .npz, and a memory miss reloads it from there
+instead of going upstream — across restarts too.
+
+Boundary seeds
+--------------
+A segment holds the points in [day start, day end) plus, when history
+exists before the day, the last earlier point at its own timestamp (not
+clamped). Runs are requested from 1 ms before the first day so that the
+historian's clamped seed can never be mistaken for a real point at
+midnight. Assembly keeps the first segment's leading point, drops the
+others', and clamps exactly like the historian does for the requested
+start — the result matches a direct read of the same window.
+
+Failure policy: fills use strict upstream reads. If one fails the whole
+window is read straight from the historian (strict only when the caller
+asked for it) and nothing is cached; an outage is never frozen into a
+segment. A run in which no tag
+returned a single point is not cached either.
+
+Keys are local days in FACILITY_TIMEZONE, which is part of the on-disk
+path so changing it can't serve segments cut at the wrong midnight.
+"""
+
+import asyncio
+import functools
+import io
+import logging
+import os
+import re
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Awaitable, Callable, Optional
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+from config import (
+    FACILITY_TIMEZONE,
+    I3X_TAGS,
+    SEGMENT_CACHE_DIR,
+    SEGMENT_CACHE_MAX_MB,
+    SEGMENT_CACHE_SETTLE_SECONDS,
+    TAGS,
+)
+from services.historian_scheduler import current_priority
+from services.lru_cache import LRUCache
+from services.tag_columns import TagColumns, datetime_to_ns
+
+logger = logging.getLogger(__name__)
+
+# upstream(start, end, strict=...) -> {alias: TagColumns}
+Upstream = Callable[..., Awaitable[dict[str, TagColumns]]]
+
+SegmentKey = tuple[str, str]   # (elementId, local day as YYYY-MM-DD)
+
+_TZ = ZoneInfo(FACILITY_TIMEZONE)
+# Runs and tails are requested this far before their first instant so a
+# real point at exactly that instant is distinguishable from the seed.
+_EDGE = timedelta(milliseconds=1)
+
+_memory: LRUCache[SegmentKey, TagColumns] = LRUCache(
+    max_bytes=int(SEGMENT_CACHE_MAX_MB * 1024 * 1024),
+    sizeof=lambda cols: cols.nbytes,
+)
+_stats = {"upstream_runs": 0, "disk_hits": 0, "fallbacks": 0}
+# Day -> (priority, task) of the run filling it, so two windows missing the
+# same day don't both fetch it.
+_filling: dict[date, tuple[int, asyncio.Task]] = {}
+
+
+# --- Day arithmetic -------------------------------------------------------------
+def _local_day(dt: datetime) -> date:
+    return dt.astimezone(_TZ).date()
+
+
+def _day_start(day: date) -> datetime:
+    return datetime.combine(day, time(0), tzinfo=_TZ).astimezone(timezone.utc)
+
+
+def _day_end(day: date) -> datetime:
+    return _day_start(day + timedelta(days=1))
+
+
+def _closed_days(start: datetime, end: datetime, now: datetime) -> list[date]:
+    """Local days overlapping [start, end] that are settled, oldest first."""
+    settled = now - timedelta(seconds=SEGMENT_CACHE_SETTLE_SECONDS)
+    days: list[date] = []
+    day = _local_day(start)
+    last = _local_day(end)
+    while day <= last and _day_end(day) <= settled:
+        days.append(day)
+        day += timedelta(days=1)
+    return days
+
+
+def _key(alias: str, day: date) -> SegmentKey:
+    return (I3X_TAGS.get(alias, alias), day.isoformat())
+
+
+# --- Disk tier --------------------------------------------------------------------
+def _segment_path(key: SegmentKey) -> str:
+    element_id, day = key
+    tz_dir = re.sub(r"[^A-Za-z0-9._-]", "_", FACILITY_TIMEZONE)
+    eid_dir = re.sub(r"[^A-Za-z0-9._-]", "_", element_id)
+    return os.path.join(SEGMENT_CACHE_DIR, tz_dir, eid_dir, f"{day}.npz")
+
+
+def _write_segment(key: SegmentKey, cols: TagColumns) -> None:
+    path = _segment_path(key)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    buf = io.BytesIO()
+    np.savez(buf, t_ns=cols.t_ns, values=cols.values)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as fh:
+        fh.write(buf.getvalue())
+    os.replace(tmp, path)
+
+
+def _read_segment(key: SegmentKey) -> Optional[TagColumns]:
+    path = _segment_path(key)
+    if not os.path.exists(path):
+        return None
+    try:
+        with np.load(path) as data:
+            return TagColumns(data["t_ns"], data["values"])
+    except (OSError, ValueError, KeyError) as exc:
+        logger.warning("segment_cache: unreadable segment %s (%s) — refetching", path, exc)
+        return None
+
+
+def _write_all(segments: dict[SegmentKey, TagColumns]) -> None:
+    for key, cols in segments.items():
+        _write_segment(key, cols)
+
+
+# --- Lookup and fill ------------------------------------------------------------
+async def _lookup(key: SegmentKey) -> Optional[TagColumns]:
+    cols = _memory.get(key)
+    if cols is None and SEGMENT_CACHE_DIR:
+        cols = await asyncio.to_thread(_read_segment, key)
+        if cols is not None:
+            _stats["disk_hits"] += 1
+            _memory.put(key, cols)
+    return cols
+
+
+def _split_run(days: list[date], fetched: dict[str, TagColumns]) -> dict[SegmentKey, TagColumns]:
+    """Cut one run's response into per-day segments, each led by the last
+    point before its day."""
+    out: dict[SegmentKey, TagColumns] = {}
+    for alias in TAGS:
+        cols = fetched.get(alias) or TagColumns.empty(alias)
+        for day in days:
+            i = int(np.searchsorted(cols.t_ns, datetime_to_ns(_day_start(day)), side="left"))
+            j = int(np.searchsorted(cols.t_ns, datetime_to_ns(_day_end(day)), side="left"))
+            lo = max(0, i - 1)
+            out[_key(alias, day)] = TagColumns(cols.t_ns[lo:j].copy(), cols.values[lo:j].copy())
+    return out
+
+
+async def _fill_run(days: list[date], upstream: Upstream) -> dict[SegmentKey, TagColumns]:
+    start, end = _day_start(days[0]), _day_end(days[-1])
+    _stats["upstream_runs"] += 1
+    fetched = await upstream(start - _EDGE, end, strict=True)
+    segments = _split_run(days, fetched)
+    if not any(len(cols) for cols in segments.values()):
+        logger.debug("segment_cache: %s -> %s returned no points; not caching", days[0], days[-1])
+        return segments
+    for key, cols in segments.items():
+        _memory.put(key, cols)
+    if SEGMENT_CACHE_DIR:
+        await asyncio.to_thread(_write_all, segments)
+    logger.debug("segment_cache: cached %d day(s) %s -> %s", len(days), days[0], days[-1])
+    return segments
+
+
+async def _segments(days: list[date], upstream: Upstream) -> dict[SegmentKey, TagColumns]:
+    found: dict[SegmentKey, TagColumns] = {}
+    missing: list[date] = []
+    for day in days:
+        day_segments = {}
+        for alias in TAGS:
+            cols = await _lookup(_key(alias, day))
+            if cols is None:
+                break
+            day_segments[_key(alias, day)] = cols
+        else:
+            found.update(day_segments)
+            continue
+        missing.append(day)
+    if not missing:
+        return found
+
+    # Another caller may have filled some while we were looking.
+    still: list[date] = []
+    for day in missing:
+        if all(_memory.peek(_key(alias, day)) is not None for alias in TAGS):
+            found.update({_key(a, day): _memory.peek(_key(a, day)) for a in TAGS})
+        else:
+            still.append(day)
+
+    # Join fills at this class or a more urgent one; a more urgent caller
+    # reads for itself rather than wait behind a throttled background fill.
+    priority = current_priority()
+    jobs: dict[asyncio.Task, list[date]] = {}
+    own: list[date] = []
+    for day in still:
+        flight = _filling.get(day)
+        if flight is not None and flight[0] <= priority:
+            jobs.setdefault(flight[1], []).append(day)
+        else:
+            own.append(day)
+    for run in _runs(own):
+        task = asyncio.ensure_future(_fill_run(run, upstream))
+        for day in run:
+            _filling[day] = (priority, task)
+        task.add_done_callback(functools.partial(_retire_fill, run))
+        jobs[task] = run
+
+    # shield: a cancelled reader must not cancel a fill other readers await.
+    results = await asyncio.gather(*[asyncio.shield(task) for task in jobs], return_exceptions=True)
+    for wanted, result in zip(jobs.values(), results):
+        if isinstance(result, BaseException):
+            raise result
+        found.update({_key(a, day): result[_key(a, day)] for day in wanted for a in TAGS})
+    return found
+
+
+def _runs(days: list[date]) -> list[list[date]]:
+    runs: list[list[date]] = []
+    for day in days:
+        if runs and runs[-1][-1] + timedelta(days=1) == day:
+            runs[-1].append(day)
+        else:
+            runs.append([day])
+    return runs
+
+
+def _retire_fill(run: list[date], task: asyncio.Task) -> None:
+    for day in run:
+        flight = _filling.get(day)
+        if flight is not None and flight[1] is task:
+            del _filling[day]
+    if not task.cancelled():
+        task.exception()  # reported by the readers that awaited it
+
+
+def _assemble(alias: str, days: list[date], segments: dict[SegmentKey, TagColumns]) -> TagColumns:
+    parts = []
+    for n, day in enumerate(days):
+        cols = segments[_key(alias, day)]
+        if n:
+            # Only the first segment's lead-in point is wanted; the others
+            # duplicate the previous day's last point.
+            k = int(np.searchsorted(cols.t_ns, datetime_to_ns(_day_start(day)), side="left"))
+            cols = TagColumns(cols.t_ns[k:], cols.values[k:])
+        parts.append(cols)
+    return TagColumns.concat(alias, parts)
+
+
+# --- Public API --------------------------------------------------------------------
+async def fetch_all_tags(
+    start: datetime,
+    end: datetime,
+    upstream: Upstream,
+    now: Optional[datetime] = None,
+    strict: bool = False,
+) -> dict[str, TagColumns]:
+    """Serve [start, end] from closed-day segments plus a live tail from
+    ``upstream``. Same result as ``upstream(start, end, strict=strict)``."""
+    now = now or datetime.now(timezone.utc)
+    days = _closed_days(start, end, now)
+    if not days:
+        return await upstream(start, end, strict=strict)
+
+    try:
+        segments = await _segments(days, upstream)
+    except Exception as exc:
+        _stats["fallbacks"] += 1
+        logger.warning("segment_cache: fill failed (%s) — reading window straight from historian", exc)
+        return await upstream(start, end, strict=strict)
+
+    closed_end = _day_end(days[-1])
+    start_ns = datetime_to_ns(start)
+    out: dict[str, TagColumns] = {}
+    for alias in TAGS:
+        head = _assemble(alias, days, segments)
+        if end < closed_end:
+            out[alias] = head.window(start_ns, datetime_to_ns(end))
+        else:
+            out[alias] = head.window(start_ns, datetime_to_ns(closed_end), end_inclusive=False)
+    if end < closed_end:
+        return out
+
+    tail = await upstream(closed_end - _EDGE, end, strict=strict)
+    closed_end_ns = datetime_to_ns(closed_end)
+    for alias in TAGS:
+        rest = tail.get(alias) or TagColumns.empty(alias)
+        k = int(np.searchsorted(rest.t_ns, closed_end_ns, side="left"))
+        out[alias] = TagColumns.concat(alias, [out[alias], TagColumns(rest.t_ns[k:], rest.values[k:])])
+    return out
+
+
+def stats() -> dict[str, int]:
+    """Diagnostic — memory tier counters plus upstream runs and disk reloads."""
+    return {**_memory.stats(), **_stats}
+
+
+def _reset_for_tests() -> None:
+    _filling.clear()
+    _memory.clear()
+    _memory.hits = _memory.misses = _memory.evictions = 0
+    _stats.update(upstream_runs=0, disk_hits=0, fallbacks=0)
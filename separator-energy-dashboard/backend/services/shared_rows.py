@@ -0,0 +1,89 @@
+"""CostRows in POSIX shared memory.
+
+share() copies a day's costed minutes into one multiprocessing.shared_memory
+block, columns back to back, and hands back CostRows whose arrays are views
+into it — the API process keeps no second copy. Analytics worker processes
+attach() the same block by name and get views of their own, so a year of
+minutes is never pickled across the process boundary.
+
+A block must outlive every view of it, and SharedMemory.close() refuses
+while views exist. release() therefore unlinks at once (no new attach can
+find the block) and closes as soon as the last view is gone; until then the
+segment waits in _closing and is retried on every later release().
+"""
+
+import logging
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import Optional
+
+import numpy as np
+
+from services.cost_calculator import CostRows
+
+logger = logging.getLogger(__name__)
+
+# Bytes per minute across CostRows.COLUMNS.
+ROW_BYTES = sum(np.dtype(d).itemsize for d in CostRows.DTYPES)
+
+_closing: list[shared_memory.SharedMemory] = []
+
+
+@dataclass(frozen=True)
+class SegmentRef:
+    """What a worker needs to attach a segment — small and picklable."""
+    name: str
+    rows: int
+
+
+def _views(shm: shared_memory.SharedMemory, n: int) -> CostRows:
+    columns, offset = [], 0
+    for dtype in CostRows.DTYPES:
+        # frombuffer, not ndarray(buffer=...): it holds a buffer export on the
+        # segment, which is what makes close() refuse while views are alive.
+        columns.append(np.frombuffer(shm.buf, dtype=dtype, count=n, offset=offset))
+        offset += n * np.dtype(dtype).itemsize
+    return CostRows(*columns)
+
+
+def share(rows: CostRows) -> tuple[CostRows, shared_memory.SharedMemory]:
+    """Copy ``rows`` into a new segment; return views of it plus the segment."""
+    n = len(rows)
+    # A zero-byte segment can't be created; keep one spare byte instead.
+    shm = shared_memory.SharedMemory(create=True, size=max(1, n * ROW_BYTES))
+    shared = _views(shm, n)
+    for column in CostRows.COLUMNS:
+        getattr(shared, column)[:] = getattr(rows, column)
+    return shared, shm
+
+
+def ref(shm: shared_memory.SharedMemory, rows: CostRows) -> SegmentRef:
+    return SegmentRef(shm.name, len(rows))
+
+
+def attach(segment: SegmentRef) -> tuple[CostRows, shared_memory.SharedMemory]:
+    """Views of a segment another process share()d."""
+    shm = shared_memory.SharedMemory(name=segment.name)
+    return _views(shm, segment.rows), shm
+
+
+def release(shm: Optional[shared_memory.SharedMemory], unlink: bool = True) -> None:
+    """Drop a segment: unlink it (creator only) and close once no views remain."""
+    if shm is not None:
+        if unlink:
+            try:
+                shm.unlink()
+            except FileNotFoundError:
+                pass
+        _closing.append(shm)
+    for pending in list(_closing):
+        try:
+            pending.close()
+        except BufferError:
+            continue
+        _closing.remove(pending)
+
+
+def pending() -> int:
+    """Segments released but still mapped because views of them are alive."""
+    return len(_closing)
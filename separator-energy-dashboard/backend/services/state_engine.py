@@ -10,46 +10,17 @@
 # =============================================================================
 
 import logging
-from datetime import datetime
+from datetime import datetime, timedelta
 
 import numpy as np
 import pandas as pd
 
-logger = logging.getLogger(__name__)
-
-_BOOL_TAGS = ("running", "cip", "process")
-_TRUTHY_STRINGS = frozenset({"1", "true", "t", "on", "yes", "y"})
-_FALSY_STRINGS = frozenset({"0", "false", "f", "off", "no", "n"})
-
+from services.tag_columns import BOOL_TAGS, BOOL_UNKNOWN, TagColumns, coerce_bool, datetime_to_ns
 
-def _coerce_bool(value: object) -> bool | None:
-    """Tolerant boolean coercion for historian values.
+logger = logging.getLogger(__name__)
 
-    Booleans from i3X / Timebase arrive in any of: native bool, 0/1 ints, 0.0/1.0
-    floats, or "true"/"false" strings (case-insensitive). The previous
-    `bool(int(value))` form raised ValueError on the string form, which is the
-    root cause of the post-outage Analysis-tab 500s when a tag has been
-    written with the string representation.
-    """
-    if value is None:
-        return None
-    if isinstance(value, bool):
-        return value
-    if isinstance(value, (int, float)):
-        if pd.isna(value):
-            return None
-        return bool(value)
-    if isinstance(value, str):
-        s = value.strip().lower()
-        if s in _TRUTHY_STRINGS:
-            return True
-        if s in _FALSY_STRINGS:
-            return False
-        return None
-    try:
-        return bool(value)
-    except Exception:
-        return None
+_BOOL_TAGS = BOOL_TAGS
+_coerce_bool = coerce_bool
 
 # State constants
 STATE_PROCESSING = "Processing"
@@ -90,85 +61,135 @@ def classify_state(process: bool, cip: bool, running: bool) -> str:
         return STATE_SHUTDOWN
 
 
-def build_dataframe(raw: dict[str, list[dict]]) -> pd.DataFrame:
+_NS_PER_MIN = 60_000_000_000
+_NEAREST_TOLERANCE_NS = 30_000_000_000
+_NO_DISTANCE = np.iinfo(np.int64).max
+
+
+def _to_columns(alias: str, points: list[dict] | TagColumns) -> TagColumns:
+    if isinstance(points, TagColumns):
+        cols = points
+    else:
+        # Defensive: the historian contract is {t, v, q}, but a feed may slip
+        # in points missing a timestamp or value (boundary / no-data
+        # markers). from_points skips them rather than KeyError on p["v"] —
+        # the legacy TimeBase client emits such points and they used to take
+        # down the whole Analysis tab.
+        cols = TagColumns.from_points(alias, points)
+    if len(cols) > 1 and (np.diff(cols.t_ns) < 0).any():
+        order = np.argsort(cols.t_ns, kind="stable")
+        cols = TagColumns(cols.t_ns[order], cols.values[order])
+    return cols
+
+
+def _ffill_bool(cols: TagColumns, minutes: np.ndarray) -> np.ndarray:
+    """Last known value at or before each minute; False before the first.
+    Points that couldn't be coerced are skipped, so the value before them
+    carries through."""
+    known = cols.values != BOOL_UNKNOWN
+    t, v = cols.t_ns[known], cols.values[known]
+    if not len(t):
+        return np.zeros(len(minutes), dtype=bool)
+    i = np.searchsorted(t, minutes, side="right") - 1
+    return np.where(i >= 0, v[np.maximum(i, 0)] == 1, False)
+
+
+def _nearest_analog(cols: TagColumns, minutes: np.ndarray) -> np.ndarray:
+    """Value of the nearest point within 30s of each minute, else NaN. An
+    exact tie goes to the later point, as pandas' reindex(method="nearest")
+    does."""
+    t, v = cols.t_ns, cols.values
+    n = len(t)
+    if not n:
+        return np.full(len(minutes), np.nan)
+    j = np.searchsorted(t, minutes, side="left")
+    right = np.minimum(j, n - 1)
+    left = np.maximum(j - 1, 0)
+    right_dist = np.where(j < n, t[right] - minutes, _NO_DISTANCE)
+    left_dist = np.where(j > 0, minutes - t[left], _NO_DISTANCE)
+    take_left = left_dist < right_dist
+    chosen = np.where(take_left, left, right)
+    dist = np.where(take_left, left_dist, right_dist)
+    return np.where(dist <= _NEAREST_TOLERANCE_NS, v[chosen], np.nan)
+
+
+def _align_minutes(columns: dict[str, TagColumns], start: int, end: int) -> pd.DataFrame | None:
+    """Aligned, classified rows for the minutes start..end (epoch ns, both
+    inclusive), or None when no minute has a motor_amps reading."""
+    minutes = np.arange(start, end + _NS_PER_MIN, _NS_PER_MIN, dtype=np.int64)
+
+    aligned: dict[str, np.ndarray] = {}
+    for alias, cols in columns.items():
+        if alias in _BOOL_TAGS:
+            aligned[alias] = _ffill_bool(cols, minutes)
+        else:
+            aligned[alias] = _nearest_analog(cols, minutes)
+
+    # Drop rows where motor_amps is missing (no raw reading within 30s of that minute)
+    amps = aligned.get("motor_amps")
+    keep = ~np.isnan(amps) if amps is not None else np.zeros(len(minutes), dtype=bool)
+    if not keep.any():
+        return None
+
+    if keep.all():
+        index = pd.date_range(start=pd.Timestamp(start, tz="UTC"), periods=len(minutes), freq="1min")
+    else:
+        index = pd.DatetimeIndex(minutes[keep].view("datetime64[ns]")).tz_localize("UTC")
+        aligned = {alias: values[keep] for alias, values in aligned.items()}
+    # Tags absent from raw default to False (Shutdown is the safe default).
+    for col in _BOOL_TAGS:
+        if col not in aligned:
+            aligned[col] = np.zeros(len(index), dtype=bool)
+    df = pd.DataFrame(aligned, index=index)
+
+    process = aligned["process"]
+    cip     = aligned["cip"]
+    running = aligned["running"]
+    df["state"] = np.where(
+        process, STATE_PROCESSING,
+        np.where(cip, STATE_CIP,
+                 np.where(running, STATE_IDLE, STATE_SHUTDOWN))
+    )
+    return df
+
+
+def build_dataframe(raw: dict[str, list[dict] | TagColumns]) -> pd.DataFrame:
     """
     Align the 4 raw tag streams (motor_amps, running, cip, process) into a
     single 1-minute resampled DataFrame.
 
+    Booleans take the last known value at or before each minute (forward
+    fill); motor_amps takes the nearest reading within 30s, no
+    interpolation, and minutes without one are dropped. Alignment is plain
+    searchsorted over the epoch-ns columns — no per-tag Series, index unions
+    or reindexing — and matches the pandas Series/reindex version it replaced
+    (tests/pandas_reference.py) frame for frame.
+
     Args:
-        raw: Output from timebase_client.fetch_all_tags()
-             {"motor_amps": [...], "running": [...], "cip": [...], "process": [...]}
+        raw: Output from historian_client.fetch_all_tags() — either the
+             {t, v, q} point lists or, with columnar=True, TagColumns per tag
+             {"motor_amps": ..., "running": ..., "cip": ..., "process": ...}
 
     Returns:
         DataFrame with columns: motor_amps, running, cip, process, state —
         indexed by UTC datetime at 1-minute intervals.
     """
-    if not any(raw.values()):
+    columns = {alias: _to_columns(alias, points) for alias, points in raw.items()}
+    if not any(len(c) for c in columns.values()):
         logger.warning("state_engine: all tag streams are empty")
         return pd.DataFrame()
-
-    # Build a Series for each tag
-    series = {}
-    for alias, points in raw.items():
-        # Defensive: the historian contract is {t, v, q}, but a feed may slip in
-        # points missing a timestamp or value (boundary / no-data markers). Skip
-        # them rather than KeyError on p["v"] — the legacy TimeBase client emits
-        # such points and they used to take down the whole Analysis tab.
-        points = [p for p in points if isinstance(p, dict) and "t" in p and "v" in p]
-        if not points:
+    for alias, cols in columns.items():
+        if not len(cols):
             logger.warning("state_engine: tag '%s' has no usable points", alias)
-            series[alias] = pd.Series(dtype=float)
-            continue
-
-        idx = pd.to_datetime([p["t"] for p in points], utc=True)
-        vals = [p["v"] for p in points]
-        series[alias] = pd.Series(vals, index=idx, name=alias)
-
-    # Determine overall time range from all tags
-    all_times = pd.DatetimeIndex([
-        t for s in series.values() if not s.empty for t in s.index
-    ])
-    if all_times.empty:
-        return pd.DataFrame()
-
-    start = all_times.min().floor("min")
-    end   = all_times.max().floor("min")
-    minute_index = pd.date_range(start=start, end=end, freq="1min", tz="UTC")
-
-    # Resample each tag to 1-minute uniform index
-    df = pd.DataFrame(index=minute_index)
 
-    for alias, s in series.items():
-        if alias in _BOOL_TAGS:
-            # Coerce values up front using the tolerant helper. The raw stream
-            # may contain native bools, 0/1 ints, or "true"/"false" strings —
-            # downstream code only handles bool/None safely.
-            if s.empty:
-                df[alias] = pd.Series([False] * len(minute_index), index=minute_index, dtype="boolean")
-                continue
-
-            coerced = s.map(_coerce_bool).astype("boolean")
-            # Forward-fill over the union of the tag's own timestamps and the
-            # minute grid, then reindex back to the grid. This propagates the
-            # last known value into otherwise-empty minute buckets. Casting
-            # up front avoids pandas' deprecated object-dtype ffill downcast.
-            s_reindexed = coerced.reindex(minute_index.union(coerced.index)).sort_index()
-            s_reindexed = s_reindexed.ffill().reindex(minute_index)
-            df[alias] = s_reindexed
-        else:
-            # Analog tags: snap to nearest 1-min bucket, no interpolation.
-            if s.empty:
-                df[alias] = None
-                continue
-            s_reindexed = s.reindex(minute_index, method="nearest", tolerance=pd.Timedelta("30s"))
-            df[alias] = s_reindexed
-
-    # Drop rows where motor_amps is missing (no raw reading within 30s of that minute)
-    df = df.dropna(subset=["motor_amps"])
-
-    if df.empty:
+    # Minute grid spanning every tag's points.
+    non_empty = [c.t_ns for c in columns.values() if len(c)]
+    start = min(int(t[0]) for t in non_empty) // _NS_PER_MIN * _NS_PER_MIN
+    end = max(int(t[-1]) for t in non_empty) // _NS_PER_MIN * _NS_PER_MIN
+    df = _align_minutes(columns, start, end)
+    if df is None:
         logger.info("state_engine: no motor_amps rows survived nearest-bucket join")
-        return df
+        return pd.DataFrame(columns=list(raw), index=pd.DatetimeIndex([], tz="UTC"))
 
     # Log suspect motor amp readings but let them pass through
     if (df["motor_amps"] > 100).any():
@@ -177,29 +198,170 @@ def build_dataframe(raw: dict[str, list[dict]]) -> pd.DataFrame:
             (df["motor_amps"] > 100).sum(),
         )
 
-    # Backfill any remaining NaN booleans with False (Shutdown is the safe default)
-    # and cast to plain numpy bool — eliminates BooleanDtype/pd.NA traps in apply().
-    for col in _BOOL_TAGS:
-        if col not in df.columns:
-            df[col] = False
-        df[col] = df[col].fillna(False).astype(bool)
-
-    # Vectorized state classification — equivalent to classify_state() row-wise
-    # but skips a slow Python apply over 10k+ rows and avoids any value that
-    # could trip the row-iteration with a `pd.NA or 0` short-circuit.
-    process = df["process"].to_numpy(dtype=bool)
-    cip     = df["cip"].to_numpy(dtype=bool)
-    running = df["running"].to_numpy(dtype=bool)
-    state = np.where(
-        process, STATE_PROCESSING,
-        np.where(cip, STATE_CIP,
-                 np.where(running, STATE_IDLE, STATE_SHUTDOWN))
-    )
-    df["state"] = state
-
     logger.info(
         "state_engine: built DataFrame rows=%d  state_counts=%s",
         len(df),
         df["state"].value_counts().to_dict(),
     )
     return df
+
+
+# --- Incremental builder -------------------------------------------------------
+# Slack kept below the reorder horizon so the minutes re-aligned after a late
+# point still see every reading within 30s of them.
+_TAIL_MARGIN_NS = 2 * _NS_PER_MIN
+
+
+def _floor_minute(t_ns: int) -> int:
+    return t_ns // _NS_PER_MIN * _NS_PER_MIN
+
+
+def _merge_columns(old: TagColumns, new: TagColumns) -> TagColumns:
+    """Union of two point sets; on an equal timestamp the new point wins."""
+    if not len(old):
+        return new
+    t = np.concatenate((old.t_ns, new.t_ns))
+    v = np.concatenate((old.values, new.values))
+    order = np.argsort(t, kind="stable")
+    t, v = t[order], v[order]
+    last = np.append(t[1:] != t[:-1], True)
+    return TagColumns(t[last], v[last])
+
+
+class IncrementalFrameBuilder:
+    """
+    build_dataframe() for a window that keeps moving forward.
+
+    The first extend() is a full build. After that the builder holds the
+    aligned frame, the raw points of the last few minutes and, per boolean
+    tag, the last known value before them. Each extend() merges newly
+    fetched points into that tail and re-aligns only the minutes they can
+    affect, so a rolling 7-day window costs a few rows per refresh instead
+    of 10k+.
+
+    Points may arrive out of order up to ``reorder_window`` behind the
+    newest point seen; resume_at() is where the next fetch should start.
+    Anything older is counted in ``late_points`` and ignored — callers
+    rebuild from scratch now and then to pick those up. Within that
+    contract the frame equals build_dataframe() over every point fed in.
+    """
+
+    def __init__(self, reorder_window: timedelta = timedelta(minutes=5)) -> None:
+        self.reorder_ns = reorder_window // timedelta(microseconds=1) * 1000
+        self.late_points = 0
+        self._frame = pd.DataFrame()
+        self._order: list[str] = []
+        self._tails: dict[str, TagColumns] = {}
+        self._seeds: dict[str, int] = {}          # bool tag → last known code before the tail
+        self._tail_from: int | None = None
+        self._first_ns: int | None = None         # earliest point seen; the grid starts there
+        self._edge_ns: int | None = None          # newest point seen
+
+    @property
+    def frame(self) -> pd.DataFrame:
+        return self._frame
+
+    def resume_at(self) -> datetime | None:
+        """Start of the next incremental fetch; None until a point arrives."""
+        if self._edge_ns is None:
+            return None
+        horizon = (self._edge_ns - self.reorder_ns) // 1000 * 1000
+        return pd.Timestamp(horizon, tz="UTC").to_pydatetime()
+
+    def extend(
+        self,
+        raw: dict[str, list[dict] | TagColumns],
+        since: datetime | None = None,
+    ) -> pd.DataFrame:
+        """Fold in a fetch. Points before ``since`` (the historian's clamped
+        boundary seed) are dropped. Returns the updated frame."""
+        columns = {alias: _to_columns(alias, points) for alias, points in raw.items()}
+        if since is not None:
+            since_ns = datetime_to_ns(since)
+            columns = {alias: _after(cols, since_ns) for alias, cols in columns.items()}
+        if self._edge_ns is None:
+            return self._rebuild(columns)
+
+        horizon = self._edge_ns - self.reorder_ns
+        incoming = {}
+        for alias, cols in columns.items():
+            on_time = _after(cols, horizon)
+            self.late_points += len(cols) - len(on_time)
+            if len(on_time):
+                incoming[alias] = on_time
+        if not incoming:
+            return self._frame
+
+        for alias, cols in incoming.items():
+            if alias not in self._tails:
+                self._order.append(alias)
+            self._tails[alias] = _merge_columns(self._tails.get(alias, TagColumns.empty(alias)), cols)
+        changed_from = min(int(c.t_ns[0]) for c in incoming.values())
+        self._first_ns = min(self._first_ns, changed_from)
+        self._edge_ns = max(self._edge_ns, max(int(c.t_ns[-1]) for c in incoming.values()))
+
+        # A point at t can only change minutes from floor(t) on: the booleans
+        # at or after t, and the amps at most 30s either side of it.
+        start = max(_floor_minute(changed_from), _floor_minute(self._first_ns))
+        rows = _align_minutes(
+            {alias: self._seeded(alias) for alias in self._order},
+            start,
+            _floor_minute(self._edge_ns),
+        )
+        parts = [rows] if rows is not None else []
+        if len(self._frame):
+            kept = self._frame[self._frame.index < pd.Timestamp(start, tz="UTC")]
+            parts.insert(0, kept)
+        parts = [p for p in parts if len(p)]
+        if parts:
+            self._frame = pd.concat(parts) if len(parts) > 1 else parts[0]
+        self._trim_tail()
+        return self._frame
+
+    def trim(self, start: datetime) -> None:
+        """Drop frame rows before the minute containing ``start``."""
+        if len(self._frame):
+            cut = pd.Timestamp(_floor_minute(datetime_to_ns(start)), tz="UTC")
+            self._frame = self._frame[self._frame.index >= cut]
+
+    def _rebuild(self, columns: dict[str, TagColumns]) -> pd.DataFrame:
+        self._frame = build_dataframe(columns)
+        non_empty = [c.t_ns for c in columns.values() if len(c)]
+        if non_empty:
+            self._order = list(columns)
+            self._tails = dict(columns)
+            self._seeds = {}
+            self._tail_from = None
+            self._first_ns = min(int(t[0]) for t in non_empty)
+            self._edge_ns = max(int(t[-1]) for t in non_empty)
+            self._trim_tail()
+        return self._frame
+
+    def _seeded(self, alias: str) -> TagColumns:
+        cols = self._tails[alias]
+        seed = self._seeds.get(alias)
+        if seed is None:
+            return cols
+        return TagColumns(
+            np.concatenate(([self._tail_from - 1], cols.t_ns)),
+            np.concatenate((np.array([seed], dtype=cols.values.dtype), cols.values)),
+        )
+
+    def _trim_tail(self) -> None:
+        tail_from = self._edge_ns - self.reorder_ns - _TAIL_MARGIN_NS
+        if self._tail_from is not None and tail_from <= self._tail_from:
+            return
+        for alias, cols in self._tails.items():
+            cut = int(np.searchsorted(cols.t_ns, tail_from, side="left"))
+            if alias in _BOOL_TAGS:
+                dropped = cols.values[:cut]
+                known = dropped[dropped != BOOL_UNKNOWN]
+                if len(known):
+                    self._seeds[alias] = int(known[-1])
+            self._tails[alias] = TagColumns(cols.t_ns[cut:], cols.values[cut:])
+        self._tail_from = tail_from
+
+
+def _after(cols: TagColumns, start_ns: int) -> TagColumns:
+    i = int(np.searchsorted(cols.t_ns, start_ns, side="left"))
+    return cols if i == 0 else TagColumns(cols.t_ns[i:], cols.values[i:])
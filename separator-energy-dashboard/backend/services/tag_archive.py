@@ -0,0 +1,458 @@
+"""Local persistent tag archive — an incremental on-disk mirror of the historian.
+
+Every analytical read (summary/daily misses, the prewarm loop, the boot
+backfill) used to re-pull days of raw points from Timebase. With the archive
+enabled, historian_client.fetch_all_tags reads archived days from local disk
+and only asks the historian for what the archive doesn't hold yet.
+
+Layout under TAG_ARCHIVE_DIR:
+
+    _meta.json                   {"low": "<iso>", "high": "<iso>"}
+    motor_amps/2026-05-21.jsonl  one {t, v, q} point per line, sorted by t
+    running/2026-05-21.jsonl
+    ...
+
+Partitions are UTC days. ``low``/``high`` bound the contiguous span the
+archive has synced for ALL tags (sync always pulls every tag together, so
+one watermark pair is enough). ``high`` only ever advances to
+``now - TAG_ARCHIVE_SETTLE_SECONDS`` — younger points are served live from
+the historian and never frozen, so late store-and-forward data still lands.
+
+Boundary seeds
+--------------
+The historian clamps the most-recent point before startTime to startTime
+(see services/i3x_client.py). Reads from the archive emulate that: the last
+archived point before ``start`` is emitted with its timestamp clamped to
+``start``. Seeds the historian returned at the edges of a *sync* request are
+synthetic and are dropped whenever the archive already has real data there.
+
+Partitions are append-only: a sync that only brings points newer than a
+partition's last one appends their lines, and a partition is rewritten only
+when points land inside it (a backfill retiring its seed). Parsed
+partitions are kept in an LRU bounded by TAG_ARCHIVE_CACHE_MB and updated
+as they are written, so a read bisects cached points instead of decoding
+every line of every day it touches.
+
+Retention: with TAG_ARCHIVE_RETENTION_DAYS > 0, UTC days older than that are
+deleted after each sync and ``low`` moves up to the horizon, carrying each
+tag's last earlier point over as a seed clamped to it (as the initial sync's
+seed was). Windows starting before the horizon are read straight from the
+historian.
+
+Failure policy: if a sync request fails, the watermark is left untouched and
+the read falls through to the historian exactly as it would without the
+archive. An outage never gets recorded as an empty stretch of history.
+``strict=True`` reads (segment-cache fills) pass it on to every upstream
+request, so a failed pull raises instead of coming back empty or partial.
+"""
+
+import asyncio
+import bisect
+import json
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Optional
+
+from config import (
+    TAG_ARCHIVE_CACHE_MB,
+    TAG_ARCHIVE_DIR,
+    TAG_ARCHIVE_RETENTION_DAYS,
+    TAG_ARCHIVE_SETTLE_SECONDS,
+    TAGS,
+)
+from services.lru_cache import LRUCache
+from services.tag_columns import datetime_to_ns
+
+logger = logging.getLogger(__name__)
+
+# upstream(start, end, strict=...) -> {alias: [{t, v, q}, ...]}
+Upstream = Callable[..., Awaitable[dict[str, list[dict]]]]
+
+_META_FILE = "_meta.json"
+
+# Serializes syncs so four concurrent prewarm windows don't each pull the
+# same missing span from the historian.
+_sync_lock = asyncio.Lock()
+
+# Rough in-memory cost of one parsed point (dict, ISO string, value, index).
+_POINT_BYTES = 300
+
+
+@dataclass(frozen=True)
+class _Partition:
+    """One tag-day's points, sorted, with their epoch-ns times to bisect.
+    Never mutated: a write caches a new one."""
+    t_ns:   list[int]
+    points: list[dict]
+
+
+_EMPTY = _Partition([], [])
+_partitions: LRUCache[str, _Partition] = LRUCache(
+    max_bytes=int(TAG_ARCHIVE_CACHE_MB * 1024 * 1024),
+    sizeof=lambda part: len(part.points) * _POINT_BYTES,
+)
+# Reads run in worker threads next to the (single) sync writer: a partition
+# is loaded, written and cached under this lock.
+_partitions_lock = threading.Lock()
+
+
+# --- Timestamp helpers ------------------------------------------------------
+def _parse_iso(value: str) -> datetime:
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+def _iso_utc(value: datetime) -> str:
+    """Same wire format the i3X client emits — ms precision, 'Z' suffix."""
+    return (
+        value.astimezone(timezone.utc)
+        .isoformat(timespec="milliseconds")
+        .replace("+00:00", "Z")
+    )
+
+
+def _point_time(point: dict) -> Optional[datetime]:
+    t = point.get("t") if isinstance(point, dict) else None
+    if not t:
+        return None
+    try:
+        return _parse_iso(str(t))
+    except ValueError:
+        return None
+
+
+def _day_key(dt: datetime) -> str:
+    return dt.astimezone(timezone.utc).strftime("%Y-%m-%d")
+
+
+# --- Metadata (sync watermarks) --------------------------------------------
+def _meta_path() -> str:
+    return os.path.join(TAG_ARCHIVE_DIR, _META_FILE)
+
+
+def _load_meta() -> tuple[Optional[datetime], Optional[datetime]]:
+    try:
+        with open(_meta_path(), encoding="utf-8") as fh:
+            meta = json.load(fh)
+        return _parse_iso(meta["low"]), _parse_iso(meta["high"])
+    except FileNotFoundError:
+        return None, None
+    except (ValueError, KeyError, TypeError) as exc:
+        # A corrupt meta file means we can't trust what's covered; start over
+        # from the historian rather than serve holes.
+        logger.warning("tag_archive: unreadable %s (%s) — treating archive as empty", _META_FILE, exc)
+        return None, None
+
+
+def _save_meta(low: datetime, high: datetime) -> None:
+    os.makedirs(TAG_ARCHIVE_DIR, exist_ok=True)
+    _atomic_write(_meta_path(), json.dumps({"low": _iso_utc(low), "high": _iso_utc(high)}))
+
+
+def _atomic_write(path: str, text: str) -> None:
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        fh.write(text)
+    os.replace(tmp, path)
+
+
+# --- Partition I/O -----------------------------------------------------------
+def _tag_dir(alias: str) -> str:
+    return os.path.join(TAG_ARCHIVE_DIR, alias)
+
+
+def _partition_path(alias: str, day: str) -> str:
+    return os.path.join(_tag_dir(alias), f"{day}.jsonl")
+
+
+def _load_partition(path: str) -> _Partition:
+    """Parse a partition file. A trailing line without its newline is an
+    append still in progress and is skipped."""
+    try:
+        with open(path, encoding="utf-8") as fh:
+            lines = [line for line in fh if line.endswith("\n") and line.strip()]
+    except FileNotFoundError:
+        return _EMPTY
+    pairs = []
+    for line in lines:
+        point = json.loads(line)
+        dt = _point_time(point)
+        if dt is not None:
+            pairs.append((datetime_to_ns(dt), point))
+    pairs.sort(key=lambda pair: pair[0])
+    return _Partition([t for t, _ in pairs], [point for _, point in pairs])
+
+
+def _partition(alias: str, day: str) -> _Partition:
+    """Cached parse of one partition. Caller holds _partitions_lock."""
+    path = _partition_path(alias, day)
+    part = _partitions.get(path)
+    if part is None:
+        part = _load_partition(path)
+        if part.points:
+            _partitions.put(path, part)
+    return part
+
+
+def _read_partition(alias: str, day: str) -> _Partition:
+    with _partitions_lock:
+        return _partition(alias, day)
+
+
+def _partition_days(alias: str) -> list[str]:
+    try:
+        names = os.listdir(_tag_dir(alias))
+    except FileNotFoundError:
+        return []
+    return sorted(n[:-6] for n in names if n.endswith(".jsonl"))
+
+
+def _line(point: dict) -> str:
+    return json.dumps(point, separators=(",", ":")) + "\n"
+
+
+def _write_day(alias: str, day: str, incoming: dict[int, dict], drop_ns: Optional[int]) -> None:
+    """Merge one day's points into its partition. Caller holds _partitions_lock."""
+    path = _partition_path(alias, day)
+    existing = _partition(alias, day)
+    if existing.t_ns:
+        # A re-pulled point the day already holds (the one exactly at the
+        # previous high-watermark) doesn't force a rewrite.
+        for t in [t for t in incoming if t <= existing.t_ns[-1]]:
+            i = bisect.bisect_left(existing.t_ns, t)
+            if i < len(existing.t_ns) and existing.t_ns[i] == t and existing.points[i] == incoming[t]:
+                del incoming[t]
+    new_t = sorted(incoming)
+    if not new_t and drop_ns not in existing.t_ns:
+        return
+    if drop_ns is None and (not existing.t_ns or new_t[0] > existing.t_ns[-1]):
+        # Everything is newer than what the day holds: append.
+        with open(path, "a", encoding="utf-8") as fh:
+            fh.write("".join(_line(incoming[t]) for t in new_t))
+        merged = _Partition(existing.t_ns + new_t, existing.points + [incoming[t] for t in new_t])
+    else:
+        by_t = dict(zip(existing.t_ns, existing.points))
+        by_t.pop(drop_ns, None)
+        by_t.update(incoming)
+        order = sorted(by_t)
+        merged = _Partition(order, [by_t[t] for t in order])
+        if merged.points:
+            _atomic_write(path, "".join(_line(point) for point in merged.points))
+        elif os.path.exists(path):
+            os.remove(path)
+    _partitions.pop(path)
+    if merged.points:
+        _partitions.put(path, merged)
+
+
+def _write_points(alias: str, points: list[dict], drop_at: Optional[datetime] = None) -> int:
+    """Merge points into their day partitions. Newer writes win on equal
+    timestamps. ``drop_at`` removes an existing point at exactly that instant
+    first — used to retire a synthetic boundary seed once real history
+    before it has been archived. Returns the number of points written."""
+    by_day: dict[str, dict[int, dict]] = {}
+    written = 0
+    for p in points:
+        dt = _point_time(p)
+        if dt is None or "v" not in p:
+            continue
+        by_day.setdefault(_day_key(dt), {})[datetime_to_ns(dt)] = {"t": p["t"], "v": p["v"], "q": p.get("q")}
+        written += 1
+
+    drop_day, drop_ns = None, None
+    if drop_at is not None:
+        drop_day, drop_ns = _day_key(drop_at), datetime_to_ns(drop_at)
+        by_day.setdefault(drop_day, {})
+
+    if not by_day:
+        return 0
+
+    os.makedirs(_tag_dir(alias), exist_ok=True)
+    with _partitions_lock:
+        for day, incoming in by_day.items():
+            _write_day(alias, day, incoming, drop_ns if day == drop_day else None)
+    return written
+
+
+def _read_window(alias: str, start: datetime, end: datetime) -> list[dict]:
+    """Archived points in [start, end], led by a clamped seed when the last
+    point before ``start`` lies outside the window."""
+    days = _partition_days(alias)
+    first_day, last_day = _day_key(start), _day_key(end)
+    start_ns, end_ns = datetime_to_ns(start), datetime_to_ns(end)
+
+    out: list[dict] = []
+    for day in days:
+        if day < first_day or day > last_day:
+            continue
+        part = _read_partition(alias, day)
+        i = bisect.bisect_left(part.t_ns, start_ns)
+        j = bisect.bisect_right(part.t_ns, end_ns)
+        out.extend(part.points[i:j])
+
+    if out and _point_time(out[0]) == start:
+        return out
+
+    # Walk partitions backwards from the start day for the seed point.
+    for day in reversed([d for d in days if d <= first_day]):
+        part = _read_partition(alias, day)
+        i = bisect.bisect_left(part.t_ns, start_ns)
+        if i:
+            seed = part.points[i - 1]
+            return [{"t": _iso_utc(start), "v": seed["v"], "q": seed.get("q")}] + out
+    return out
+
+
+# --- Sync --------------------------------------------------------------------
+async def _pull(upstream: Upstream, start: datetime, end: datetime) -> dict[str, list[dict]]:
+    return await upstream(start, end, strict=True)
+
+
+def _store(raw: dict[str, list[dict]], seed_at: Optional[datetime], drop_at: Optional[datetime]) -> int:
+    """Persist one sync response. Points at exactly ``seed_at`` are the
+    historian's clamped boundary seed and are skipped for tags the archive
+    already holds history for."""
+    written = 0
+    for alias, points in raw.items():
+        if seed_at is not None and _partition_days(alias):
+            points = [p for p in points if _point_time(p) != seed_at]
+        written += _write_points(alias, points, drop_at=drop_at)
+    return written
+
+
+def _horizon() -> Optional[datetime]:
+    """Start of the oldest UTC day kept, or None without retention."""
+    if TAG_ARCHIVE_RETENTION_DAYS <= 0:
+        return None
+    today = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    return today - timedelta(days=TAG_ARCHIVE_RETENTION_DAYS)
+
+
+def _prune(horizon: datetime) -> int:
+    """Delete every partition before ``horizon``'s day, first carrying each
+    tag's last earlier point over as a seed clamped to the horizon. Returns
+    the number of partitions deleted."""
+    cutoff = _day_key(horizon)
+    horizon_ns = datetime_to_ns(horizon)
+    removed = 0
+    for alias in TAGS:
+        old = [day for day in _partition_days(alias) if day < cutoff]
+        if not old:
+            continue
+        kept = _read_partition(alias, cutoff)
+        if not kept.t_ns or kept.t_ns[0] != horizon_ns:
+            for day in reversed(old):
+                part = _read_partition(alias, day)
+                if part.points:
+                    seed = part.points[-1]
+                    _write_points(alias, [{"t": _iso_utc(horizon), "v": seed["v"], "q": seed.get("q")}])
+                    break
+        with _partitions_lock:
+            for day in old:
+                path = _partition_path(alias, day)
+                _partitions.pop(path)
+                os.remove(path)
+                removed += 1
+    return removed
+
+
+async def _sync(start: datetime, settled: datetime, upstream: Upstream) -> None:
+    """Extend the archived span to cover [start, settled]."""
+    low, high = await asyncio.to_thread(_load_meta)
+
+    if low is None or high is None:
+        raw = await _pull(upstream, start, settled)
+        n = await asyncio.to_thread(_store, raw, None, None)
+        await asyncio.to_thread(_save_meta, start, settled)
+        logger.info("tag_archive: initial sync %s -> %s (%d points)", _iso_utc(start), _iso_utc(settled), n)
+        return
+
+    if start < low:
+        raw = await _pull(upstream, start, low)
+        # The seed the first sync clamped to `low` was synthetic; the real
+        # history before it is now archived.
+        n = await asyncio.to_thread(_store, raw, None, low)
+        low = start
+        await asyncio.to_thread(_save_meta, low, high)
+        logger.info("tag_archive: backfilled to %s (%d points)", _iso_utc(low), n)
+
+    if settled > high:
+        raw = await _pull(upstream, high, settled)
+        n = await asyncio.to_thread(_store, raw, high, None)
+        high = settled
+        await asyncio.to_thread(_save_meta, low, high)
+        logger.debug("tag_archive: advanced high-watermark to %s (%d points)", _iso_utc(settled), n)
+
+    horizon = _horizon()
+    if horizon is not None and low < horizon <= high:
+        n = await asyncio.to_thread(_prune, horizon)
+        await asyncio.to_thread(_save_meta, horizon, high)
+        logger.info("tag_archive: pruned %d partition(s) before %s", n, _iso_utc(horizon))
+
+
+def _read_all(aliases: list[str], start: datetime, end: datetime) -> dict[str, list[dict]]:
+    return {alias: _read_window(alias, start, end) for alias in aliases}
+
+
+# --- Public API --------------------------------------------------------------
+async def fetch_all_tags(
+    start: datetime,
+    end: datetime,
+    upstream: Upstream,
+    strict: bool = False,
+) -> dict[str, list[dict]]:
+    """Serve [start, end] from the archive, syncing it first and appending
+    the live (unsettled) tail from ``upstream``. ``strict=True`` raises
+    rather than returning a window with tags or stretches missing."""
+    settled = datetime.now(timezone.utc) - timedelta(seconds=TAG_ARCHIVE_SETTLE_SECONDS)
+    if start >= settled:
+        # Entirely inside the unsettled tail — nothing the archive can serve.
+        return await upstream(start, end, strict=strict)
+    horizon = _horizon()
+    if horizon is not None and start < horizon:
+        # Reaches past retention — archiving it would only be pruned again.
+        return await upstream(start, end, strict=strict)
+
+    try:
+        async with _sync_lock:
+            await _sync(start, settled, upstream)
+    except Exception as exc:
+        logger.warning("tag_archive: sync failed (%s) — reading window straight from historian", exc)
+        return await upstream(start, end, strict=strict)
+
+    archived_end = min(end, settled)
+    archived = await asyncio.to_thread(_read_all, list(TAGS), start, archived_end)
+    if end <= settled:
+        return archived
+
+    tail = await upstream(archived_end, end, strict=strict)
+    out: dict[str, list[dict]] = {}
+    for alias in set(archived) | set(tail):
+        head = archived.get(alias, [])
+        rest = tail.get(alias, [])
+        if head:
+            # Drop the tail's clamped seed; the archive already covers that instant.
+            rest = [p for p in rest if (_point_time(p) or archived_end) > archived_end]
+        out[alias] = head + rest
+    return out
+
+
+def cache_stats() -> dict[str, int]:
+    """Diagnostic — the parsed-partition LRU."""
+    return _partitions.stats()
+
+
+def watermarks() -> dict[str, Optional[str]]:
+    """Diagnostic — the archived span as ISO strings (None when empty)."""
+    low, high = _load_meta()
+    return {
+        "low":  _iso_utc(low) if low else None,
+        "high": _iso_utc(high) if high else None,
+    }
+
+
+def _reset_for_tests() -> None:
+    _partitions.clear()
+    _partitions.hits = _partitions.misses = _partitions.evictions = 0
@@ -0,0 +1,195 @@
+"""Columnar tag history — the opt-in alternative to the {t, v, q} point lists.
+
+``fetch_all_tags(..., columnar=True)`` on either historian client (and on
+historian_client) returns ``{alias: TagColumns}`` instead of
+``{alias: [{t, v, q}, ...]}``. Each TagColumns holds two parallel arrays:
+
+    t_ns    int64    epoch nanoseconds (UTC), ascending
+    values  float64  analog tags (motor_amps); NaN where the value wasn't numeric
+            int8     boolean tags (running, cip, process): 1 / 0, or
+                     BOOL_UNKNOWN where the value couldn't be coerced
+
+state_engine.build_dataframe takes these without formatting or re-parsing a
+single timestamp string. The dict contract stays the default — /api/raw and
+anything else that shows points to a human keeps using it.
+
+Only GOOD-quality points are ever turned into columns, so there is no
+quality array.
+"""
+
+import math
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Iterable, Optional
+
+import numpy as np
+
+BOOL_TAGS = ("running", "cip", "process")
+BOOL_UNKNOWN = -1
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_ONE_US = timedelta(microseconds=1)
+
+_TRUTHY_STRINGS = frozenset({"1", "true", "t", "on", "yes", "y"})
+_FALSY_STRINGS = frozenset({"0", "false", "f", "off", "no", "n"})
+
+
+def coerce_bool(value: object) -> bool | None:
+    """Tolerant boolean coercion for historian values.
+
+    Booleans from i3X / Timebase arrive in any of: native bool, 0/1 ints, 0.0/1.0
+    floats, or "true"/"false" strings (case-insensitive). The previous
+    `bool(int(value))` form raised ValueError on the string form, which is the
+    root cause of the post-outage Analysis-tab 500s when a tag has been
+    written with the string representation.
+    """
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, (int, float)):
+        if isinstance(value, float) and math.isnan(value):
+            return None
+        return bool(value)
+    if isinstance(value, str):
+        s = value.strip().lower()
+        if s in _TRUTHY_STRINGS:
+            return True
+        if s in _FALSY_STRINGS:
+            return False
+        return None
+    try:
+        return bool(value)
+    except Exception:
+        return None
+
+
+def _coerce_float(value: object) -> float:
+    if value is None or isinstance(value, str) and not value.strip():
+        return math.nan
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+def _coerce_bool_code(value: object) -> int:
+    b = coerce_bool(value)
+    return BOOL_UNKNOWN if b is None else int(b)
+
+
+# --- Timestamp conversion ----------------------------------------------------
+def datetime_to_ns(value: datetime) -> int:
+    """Epoch nanoseconds of an aware datetime (microsecond precision)."""
+    return (value - _EPOCH) // _ONE_US * 1000
+
+
+def ns_to_datetime(value: int) -> datetime:
+    """Aware UTC datetime of epoch ns (truncated to microseconds)."""
+    return _EPOCH + timedelta(microseconds=value // 1000)
+
+
+def parse_iso_ns(value: str) -> int:
+    """Epoch ns of an ISO 8601 timestamp; a naive one is taken as UTC."""
+    dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return datetime_to_ns(dt)
+
+
+def ns_to_iso(value: int) -> str:
+    """ISO 8601 UTC, millisecond precision, 'Z' suffix — the i3X wire format."""
+    dt = _EPOCH + timedelta(microseconds=value // 1000)
+    return dt.isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+
+@dataclass(frozen=True)
+class TagColumns:
+    t_ns:   np.ndarray
+    values: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.t_ns)
+
+    @property
+    def is_bool(self) -> bool:
+        return self.values.dtype == np.int8
+
+    @classmethod
+    def empty(cls, alias: str) -> "TagColumns":
+        dtype = np.int8 if alias in BOOL_TAGS else np.float64
+        return cls(np.empty(0, dtype=np.int64), np.empty(0, dtype=dtype))
+
+    @classmethod
+    def from_pairs(cls, alias: str, times_ns: list[int], values: list[Any]) -> "TagColumns":
+        """Build from parallel lists of epoch-ns timestamps and raw values."""
+        t_ns = np.fromiter(times_ns, dtype=np.int64, count=len(times_ns))
+        if alias in BOOL_TAGS:
+            vals = np.fromiter((_coerce_bool_code(v) for v in values), dtype=np.int8, count=len(values))
+        else:
+            vals = np.fromiter((_coerce_float(v) for v in values), dtype=np.float64, count=len(values))
+        return cls(t_ns, vals)
+
+    @classmethod
+    def from_points(cls, alias: str, points: Iterable[dict]) -> "TagColumns":
+        """Adapter from the {t, v, q} contract. Points missing ``t``/``v`` or
+        with an unparseable timestamp are skipped."""
+        times: list[int] = []
+        values: list[Any] = []
+        for p in points:
+            if not isinstance(p, dict) or "t" not in p or "v" not in p:
+                continue
+            try:
+                times.append(parse_iso_ns(str(p["t"])))
+            except ValueError:
+                continue
+            values.append(p["v"])
+        return cls.from_pairs(alias, times, values)
+
+    def window(self, start_ns: int, end_ns: int, end_inclusive: bool = True) -> "TagColumns":
+        """Points in [start_ns, end_ns] (or [start_ns, end_ns) with
+        ``end_inclusive=False``), led by a historian-style boundary seed: the
+        last earlier point, clamped to ``start_ns``, unless a point already
+        sits exactly there. Always returns fresh arrays."""
+        i = int(np.searchsorted(self.t_ns, start_ns, side="left"))
+        j = int(np.searchsorted(self.t_ns, end_ns, side="right" if end_inclusive else "left"))
+        j = max(i, j)
+        t_ns, values = self.t_ns[i:j], self.values[i:j]
+        if i > 0 and (i == j or t_ns[0] != start_ns):
+            t_ns = np.concatenate(([start_ns], t_ns))
+            values = np.concatenate((self.values[i - 1:i], values))
+        return TagColumns(t_ns.copy(), values.copy())
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.t_ns.nbytes + self.values.nbytes)
+
+    @classmethod
+    def concat(cls, alias: str, parts: list["TagColumns"]) -> "TagColumns":
+        """Join time-ordered, non-overlapping pieces of one tag."""
+        parts = [p for p in parts if len(p)]
+        if not parts:
+            return cls.empty(alias)
+        if len(parts) == 1:
+            return parts[0]
+        return cls(
+            np.concatenate([p.t_ns for p in parts]),
+            np.concatenate([p.values for p in parts]),
+        )
+
+    def to_points(self, quality: int = 192) -> list[dict]:
+        """Adapter back to {t, v, q}. Values come out coerced (float / bool /
+        None), not as the raw wire values."""
+        if self.is_bool:
+            vals: list[Optional[Any]] = [None if c == BOOL_UNKNOWN else bool(c) for c in self.values.tolist()]
+        else:
+            vals = [None if math.isnan(v) else v for v in self.values.tolist()]
+        return [
+            {"t": ns_to_iso(t), "v": v, "q": quality}
+            for t, v in zip(self.t_ns.tolist(), vals)
+        ]
+
+
+def from_raw(raw: dict[str, list[dict]]) -> dict[str, TagColumns]:
+    """Convert a whole {alias: [{t, v, q}]} mapping to columns."""
+    return {alias: TagColumns.from_points(alias, points) for alias, points in raw.items()}
@@ -1,6 +1,23 @@
+"""Legacy TimeBase REST client (USE_I3X=false).
+
+One pooled httpx.AsyncClient serves every request; it is created lazily and
+closed by ``shutdown()`` (historian_client wires that into the app
+lifespan), so rolling back from i3X doesn't mean a TCP handshake per tag per
+call.
+
+Current values
+--------------
+The REST API has no latest-value endpoint. ``fetch_current_values`` keeps a
+per-tag cursor — the newest good point seen so far — and asks only for
+points at or after it. A value is reported as long as its point is younger
+than CURRENT_WINDOW (2 minutes, what the old full-window read covered);
+older, or a failed read for that tag, reports None.
+"""
+
 import asyncio
 import logging
 from datetime import datetime, timedelta, timezone
+from typing import Optional
 from urllib.parse import quote
 
 import httpx
@@ -12,9 +29,19 @@ from config import (
     TIMEBASE_BASE_URL,
     TIMEBASE_DATASET,
 )
+from services import history_stream
+from services.circuit_breaker import CircuitOpenError, historian_breaker
+from services.historian_scheduler import historian_scheduler
+from services.tag_columns import TagColumns, datetime_to_ns, parse_iso_ns
 
 logger = logging.getLogger(__name__)
 
+CURRENT_WINDOW = timedelta(minutes=2)
+
+_client: Optional[httpx.AsyncClient] = None
+# alias -> (epoch ns, point) of the newest good point fetch_current_values has seen.
+_cursors: dict[str, tuple[int, dict]] = {}
+
 
 def _encode_dataset(name: str) -> str:
     return quote(name, safe="")
@@ -25,16 +52,40 @@ def _build_url() -> str:
     return f"{TIMEBASE_BASE_URL}/api/datasets/{dataset_enc}/data"
 
 
+async def get_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(timeout=30.0)
+    return _client
+
+
+async def close_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+    _cursors.clear()
+
+
 async def validate_configuration() -> None:
     """Legacy client has no startup validation endpoint."""
     return None
 
 
+async def startup() -> None:
+    await validate_configuration()
+
+
+async def shutdown() -> None:
+    await close_client()
+
+
 async def fetch_tag_history(
     tag_path: str,
     start: datetime,
     end: datetime,
     client: httpx.AsyncClient,
+    strict: bool = False,
 ) -> list[dict]:
     url = _build_url()
     params = {
@@ -44,27 +95,35 @@ async def fetch_tag_history(
     }
 
     try:
-        response = await client.get(url, params=params, timeout=30.0)
-        response.raise_for_status()
-        payload = response.json()
-        tl = payload.get("tl", [])
-        raw_points = tl[0]["d"] if tl else []
-
-        # TimeBase occasionally returns good-quality points that carry only a
-        # timestamp (boundary / no-data markers) with no "v" key. The contract
-        # the rest of the app expects is {t, v, q}; a point missing "t" or "v"
-        # is unusable and previously crashed state_engine with KeyError: 'v'.
-        quality_ok = [
-            p for p in raw_points
-            if isinstance(p, dict) and p.get("q", 0) >= MIN_GOOD_QUALITY
-        ]
-        good_points = [p for p in quality_ok if "t" in p and "v" in p]
-        dropped = len(quality_ok) - len(good_points)
+        # A multi-day window is scanned incrementally and filtered point by
+        # point instead of materialized whole; short ones are parsed whole.
+        total = 0
+        quality_ok = 0
+        good_points: list[dict] = []
+        async with historian_breaker.guard(), client.stream("GET", url, params=params, timeout=30.0) as response:
+            response.raise_for_status()
+            async for _, p in history_stream.iter_matches(
+                historian_scheduler.metered(response.aiter_bytes()),
+                history_stream.legacy_history_match,
+                incremental=end - start > history_stream.INCREMENTAL_MIN_WINDOW,
+            ):
+                total += 1
+                # TimeBase occasionally returns good-quality points that carry
+                # only a timestamp (boundary / no-data markers) with no "v" key.
+                # The contract the rest of the app expects is {t, v, q}; a
+                # point missing "t" or "v" is unusable and previously crashed
+                # state_engine with KeyError: 'v'.
+                if not isinstance(p, dict) or p.get("q", 0) < MIN_GOOD_QUALITY:
+                    continue
+                quality_ok += 1
+                if "t" in p and "v" in p:
+                    good_points.append(p)
+        dropped = quality_ok - len(good_points)
 
         logger.info(
             "TimeBase legacy: tag=%s total=%d good=%d window=%s->%s",
             tag_path.split("/")[-1],
-            len(raw_points),
+            total,
             len(good_points),
             params["start"],
             params["end"],
@@ -76,6 +135,11 @@ async def fetch_tag_history(
                 dropped,
             )
         return good_points
+    except CircuitOpenError as exc:
+        logger.debug("TimeBase legacy: skipping tag %s — %s", tag_path, exc)
+        if strict:
+            raise
+        return []
     except httpx.HTTPStatusError as exc:
         logger.error(
             "TimeBase legacy HTTP error %s for tag %s: %s",
@@ -83,46 +147,91 @@ async def fetch_tag_history(
             tag_path,
             exc,
         )
+        if strict:
+            raise
         return []
     except httpx.RequestError as exc:
         logger.error("TimeBase legacy connection error for tag %s: %s", tag_path, exc)
+        if strict:
+            raise
         return []
     except Exception as exc:
         logger.error("TimeBase legacy unexpected error fetching tag %s: %s", tag_path, exc)
+        if strict:
+            raise
         return []
 
 
 async def fetch_all_tags(
     start: datetime | None = None,
     end: datetime | None = None,
-) -> dict[str, list[dict]]:
+    strict: bool = False,
+    columnar: bool = False,
+) -> dict[str, list[dict]] | dict[str, TagColumns]:
+    """Fetch every configured tag concurrently. ``strict=True`` propagates
+    per-tag failures instead of degrading them to empty lists;
+    ``columnar=True`` returns TagColumns per alias instead of point lists."""
     now = datetime.now(timezone.utc)
     if end is None:
         end = now
     if start is None:
         start = now - timedelta(days=LOOKBACK_DAYS)
 
-    async with httpx.AsyncClient() as client:
-        tasks = {
-            alias: fetch_tag_history(path, start, end, client) for alias, path in TAGS.items()
-        }
-        results = await asyncio.gather(*tasks.values(), return_exceptions=False)
+    client = await get_client()
+    tasks = {
+        alias: fetch_tag_history(path, start, end, client, strict=strict) for alias, path in TAGS.items()
+    }
+    results = await asyncio.gather(*tasks.values(), return_exceptions=False)
 
+    if columnar:
+        return {alias: TagColumns.from_points(alias, points) for alias, points in zip(tasks.keys(), results)}
     return dict(zip(tasks.keys(), results))
 
 
+def _newest(points: list[dict]) -> Optional[tuple[int, dict]]:
+    newest = None
+    for p in points:
+        try:
+            t_ns = parse_iso_ns(str(p["t"]))
+        except ValueError:
+            continue
+        if newest is None or t_ns > newest[0]:
+            newest = (t_ns, p)
+    return newest
+
+
 async def fetch_current_values() -> dict[str, float | bool | None]:
     now = datetime.now(timezone.utc)
-    start = now - timedelta(minutes=2)
-
-    raw = await fetch_all_tags(start=start, end=now)
+    floor = now - CURRENT_WINDOW
+    floor_ns = datetime_to_ns(floor)
+    client = await get_client()
+
+    async def read(alias: str, path: str) -> list[dict]:
+        cursor = _cursors.get(alias)
+        start = floor
+        if cursor is not None and cursor[0] > floor_ns:
+            # The legacy API takes whole seconds, so the cursor's own point
+            # usually comes back again; _newest sorts that out.
+            start = datetime.fromtimestamp(cursor[0] / 1e9, tz=timezone.utc)
+        return await fetch_tag_history(path, start, now, client, strict=True)
+
+    aliases = list(TAGS)
+    results = await asyncio.gather(
+        *(read(alias, TAGS[alias]) for alias in aliases), return_exceptions=True
+    )
 
     current: dict[str, float | bool | None] = {}
-    for alias, points in raw.items():
-        if points:
-            latest = max(points, key=lambda point: point["t"])
-            current[alias] = latest["v"]
-        else:
+    for alias, result in zip(aliases, results):
+        if isinstance(result, BaseException):
             current[alias] = None
-
+            continue
+        newest = _newest(result)
+        cursor = _cursors.get(alias)
+        if newest is not None and (cursor is None or newest[0] >= cursor[0]):
+            cursor = _cursors[alias] = newest
+        if cursor is None or cursor[0] < floor_ns:
+            _cursors.pop(alias, None)
+            current[alias] = None
+        else:
+            current[alias] = cursor[1]["v"]
     return current
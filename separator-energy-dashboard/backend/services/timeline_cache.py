@@ -0,0 +1,98 @@
+"""The /api/energy/timeline response, kept serialized.
+
+The live tab polls the timeline every few seconds, and between two polls
+its 1440 points change by at most one minute. TimelineBody keeps every
+buffered minute's point already JSON-encoded, in ring order. When a new
+minute lands it encodes that one point and drops the oldest. Then it joins
+the body and hashes it into a strong ETag, once per minute. Until the next
+minute the endpoint hands out the same bytes, or a 304.
+
+points() is the one place a ring row becomes a TimelinePoint. A
+``points=N`` request is downsampled() per request from the ring; its ETag
+is the full body's plus N, so it still 304s without any work.
+"""
+
+import hashlib
+import json
+from collections import deque
+from typing import Optional
+
+import numpy as np
+
+from services import downsample, minute_ring, state_engine
+from services.minute_ring import MinuteRing
+
+_KEYS = ("timestamp", "kw", "kwh", "cost_usd", "state", "color", "tou_period", "tou_rate", "shift")
+
+
+def points(rows: np.ndarray) -> list[dict]:
+    """Ring rows as TimelinePoint-shaped dicts (oldest first)."""
+    kw = np.nan_to_num(rows["kw"])
+    rate = np.nan_to_num(rows["rate"])
+    kwh = np.round(kw / 60.0, 4)  # 1-minute interval
+    stamps = np.datetime_as_string(rows["minute"].astype("datetime64[m]"), unit="s")
+    colors = [state_engine.STATE_COLORS.get(state, "#000000") for state in minute_ring.STATES.names]
+    columns = (
+        [f"{stamp}Z" for stamp in stamps.tolist()],
+        np.round(kw, 2).tolist(),
+        kwh.tolist(),
+        np.round(kwh * rate, 4).tolist(),
+        minute_ring.STATES.decode(rows["state"]).tolist(),
+        np.asarray(colors, dtype=object)[rows["state"]].tolist(),
+        minute_ring.PERIODS.decode(rows["tou"]).tolist(),
+        np.round(rate, 4).tolist(),
+        minute_ring.SHIFT_LABELS.decode(rows["shift"]).tolist(),
+    )
+    return [dict(zip(_KEYS, values)) for values in zip(*columns)]
+
+
+def encode(rows: np.ndarray) -> bytes:
+    """Rows as a JSON timeline body."""
+    return b"[" + b",".join(_encode(rows)) + b"]"
+
+
+def downsampled(rows: np.ndarray, max_points: int) -> np.ndarray:
+    """About ``max_points`` rows: LTTB over kW, plus the first row of every
+    state, TOU-period and shift run so those segments stay exact (so more
+    rows than asked for when labels change often)."""
+    if len(rows) <= max_points:
+        return rows
+    keep = [downsample.lttb(rows["minute"], np.nan_to_num(rows["kw"]), max_points)]
+    keep += [downsample.run_starts(rows[column]) for column in ("state", "tou", "shift")]
+    return rows[np.unique(np.concatenate(keep))]
+
+
+def _encode(rows: np.ndarray) -> list[bytes]:
+    # Starlette's JSONResponse encoding, so the body is byte-for-byte what
+    # returning the list would have produced.
+    return [
+        json.dumps(point, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+        for point in points(rows)
+    ]
+
+
+class TimelineBody:
+    def __init__(self) -> None:
+        self._fragments: deque[bytes] = deque()
+        self._generation: Optional[int] = None
+        self._appended = 0
+        self._body = b"[]"
+        self._etag = ""
+
+    def sync(self, ring: MinuteRing) -> None:
+        """Catch up with rows appended to ``ring`` since the last call."""
+        new = ring.appended - self._appended
+        if ring.generation != self._generation or not 0 <= new <= ring.capacity:
+            self._fragments = deque(_encode(ring.view()), maxlen=ring.capacity)
+        elif new:
+            self._fragments.extend(_encode(ring.view()[-new:]))
+        else:
+            return
+        self._generation, self._appended = ring.generation, ring.appended
+        self._body = b"[" + b",".join(self._fragments) + b"]"
+        self._etag = f'"{hashlib.blake2b(self._body, digest_size=16).hexdigest()}"'
+
+    def get(self, ring: MinuteRing) -> tuple[bytes, str]:
+        """(JSON body, strong ETag) for the ring's current rows."""
+        self.sync(ring)
+        return self._body, self._etag
@@ -0,0 +1,204 @@
+"""Warm-start snapshot of in-memory state.
+
+After a deploy the dashboard used to start empty. It blocked on a 24h
+ring-buffer backfill, then served slow Analysis-tab requests until the
+first prewarm finished. With WARM_START_ENABLED the state that makes it
+fast is written to one compressed .npz file every
+WARM_START_INTERVAL_SECONDS, and once more at shutdown. The file holds:
+
+  ring buffer     processing's minute samples
+  cost_today      the accumulator and the local day it belongs to
+  day partials    closed days' costed minutes (services/day_partials.py)
+  payload cache   finished summary/daily payloads (services/analytics.py)
+
+restore() runs before processing.start(). processing's backfill then reads
+only the minutes since the last buffered one, and the analytics cache
+serves restored payloads (refreshing them in the background once past
+their soft TTL).
+
+A snapshot is ignored when it is older than WARM_START_MAX_AGE_SECONDS,
+comes from the future, or was cut for another FACILITY_TIMEZONE. Payloads
+computed under another electrical/rate config are skipped. Partials are
+recosted rather than skipped.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from datetime import date, datetime, timezone
+from typing import Optional
+
+import numpy as np
+
+from config import (
+    FACILITY_TIMEZONE,
+    PROCESSING_BUFFER_MINUTES,
+    WARM_START_INTERVAL_SECONDS,
+    WARM_START_MAX_AGE_SECONDS,
+    WARM_START_PATH,
+)
+from services import analytics, cost_calculator, day_partials, processing
+from services.cost_calculator import CostRows
+from services.tag_columns import datetime_to_ns
+
+logger = logging.getLogger(__name__)
+
+FORMAT = 2
+
+_task: Optional[asyncio.Task] = None
+
+
+# --- Encode / decode ---------------------------------------------------------------
+def _collect() -> dict[str, np.ndarray]:
+    """Everything the snapshot holds, as arrays. Runs on the loop: it copies
+    the ring buffer and references the rest; compression happens in _write."""
+    arrays = {f"buf_{name}": column for name, column in processing.buffer_columns().items()}
+
+    partials_config, days = day_partials.snapshot()
+    lengths = [len(rows) for _, rows in days]
+    arrays["p_days"] = np.array([day.toordinal() for day, _ in days], dtype=np.int64)
+    arrays["p_offsets"] = np.concatenate(([0], np.cumsum(lengths, dtype=np.int64)))
+    for column, dtype in zip(CostRows.COLUMNS, CostRows.DTYPES):
+        parts = [getattr(rows, column) for _, rows in days]
+        arrays[f"p_{column}"] = np.concatenate(parts) if parts else np.empty(0, dtype)
+
+    cost_date, cost_today = processing.cost_today_state()
+    meta = {
+        "format":          FORMAT,
+        "saved_at":        time.time(),
+        "timezone":        FACILITY_TIMEZONE,
+        "config":          cost_calculator.get_config(),
+        "partials_config": list(partials_config) if partials_config is not None else None,
+        "cost_today_date": cost_date.isoformat() if cost_date else None,
+        "cost_today":      cost_today,
+        "cache":           [[list(key), t, value] for key, t, value in analytics.cache_snapshot()],
+    }
+    arrays["meta"] = np.array(json.dumps(meta, default=str))
+    return arrays
+
+
+def _buffer(data: dict[str, np.ndarray], since_minute: int) -> dict[str, np.ndarray]:
+    columns = {name[len("buf_"):]: column for name, column in data.items() if name.startswith("buf_")}
+    keep = columns["minute"] >= since_minute
+    return {name: column[keep] for name, column in columns.items()}
+
+
+def _partials(data: dict[str, np.ndarray]) -> list[tuple[date, CostRows]]:
+    offsets = data["p_offsets"]
+    columns = [data[f"p_{column}"] for column in CostRows.COLUMNS]
+    return [
+        (date.fromordinal(int(day)), CostRows(*(c[offsets[i]:offsets[i + 1]] for c in columns)))
+        for i, day in enumerate(data["p_days"])
+    ]
+
+
+# --- Disk ------------------------------------------------------------------------
+def _write(arrays: dict[str, np.ndarray]) -> int:
+    os.makedirs(os.path.dirname(WARM_START_PATH) or ".", exist_ok=True)
+    tmp = WARM_START_PATH + ".tmp"
+    with open(tmp, "wb") as fh:
+        np.savez_compressed(fh, **arrays)
+        fh.flush()
+        # On disk before the rename, so a crash can't leave a truncated
+        # snapshot under the real name.
+        os.fsync(fh.fileno())
+    os.replace(tmp, WARM_START_PATH)
+    return os.path.getsize(WARM_START_PATH)
+
+
+def _read() -> Optional[dict[str, np.ndarray]]:
+    if not os.path.exists(WARM_START_PATH):
+        return None
+    with np.load(WARM_START_PATH, allow_pickle=False) as data:
+        return {name: data[name] for name in data.files}
+
+
+# --- Public API ----------------------------------------------------------------------
+async def save() -> None:
+    started = time.perf_counter()
+    size = await asyncio.to_thread(_write, _collect())
+    logger.debug("warm_start: wrote %d bytes in %.0f ms", size, (time.perf_counter() - started) * 1000)
+
+
+async def restore() -> bool:
+    """Load the snapshot if it is usable. Returns whether anything was
+    restored; never raises — a snapshot that can't be read or applied (empty,
+    truncated, from an older build) means a cold start, not a failed boot."""
+    try:
+        return await _restore()
+    except Exception as exc:
+        logger.warning("warm_start: unusable snapshot %s (%r) — cold start", WARM_START_PATH, exc)
+        return False
+
+
+async def _restore() -> bool:
+    data = await asyncio.to_thread(_read)
+    if data is None:
+        logger.info("warm_start: no snapshot at %s — cold start", WARM_START_PATH)
+        return False
+    meta = json.loads(str(data["meta"]))
+
+    age = time.time() - meta.get("saved_at", 0)
+    if meta.get("format") != FORMAT or meta.get("timezone") != FACILITY_TIMEZONE:
+        logger.info("warm_start: snapshot format/timezone differs — cold start")
+        return False
+    if not -60 <= age <= WARM_START_MAX_AGE_SECONDS:
+        logger.info("warm_start: snapshot is %.0fs old — cold start", age)
+        return False
+
+    # Decode everything before touching any module state.
+    saved_at = datetime.fromtimestamp(meta["saved_at"], tz=timezone.utc)
+    now_minute = datetime_to_ns(datetime.now(timezone.utc)) // (60 * 10**9)
+    buffer = _buffer(data, now_minute - PROCESSING_BUFFER_MINUTES)
+    cost_date = date.fromisoformat(meta["cost_today_date"]) if meta["cost_today_date"] else None
+    days = _partials(data)
+
+    processing.restore(buffer, cost_date, meta["cost_today"], saved_at)
+    if meta["partials_config"] is not None:
+        day_partials.restore(tuple(meta["partials_config"]), days)
+
+    payloads = 0
+    if meta["config"] == cost_calculator.get_config():
+        payloads = analytics.restore_cache([(tuple(k), t, v) for k, t, v in meta["cache"]])
+
+    logger.info(
+        "warm_start: restored %d buffer minutes, %d partial days, %d payloads from a %.0fs-old snapshot",
+        len(buffer["minute"]), len(days), payloads, age,
+    )
+    return True
+
+
+async def _loop() -> None:
+    while True:
+        await asyncio.sleep(WARM_START_INTERVAL_SECONDS)
+        try:
+            await save()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("warm_start: snapshot failed")
+
+
+def start() -> None:
+    global _task
+    if _task is None or _task.done():
+        _task = asyncio.create_task(_loop(), name="warm-start-snapshot")
+        logger.info("warm_start: snapshotting to %s every %ss", WARM_START_PATH, WARM_START_INTERVAL_SECONDS)
+
+
+async def stop() -> None:
+    """Stop the periodic snapshot and write a final one."""
+    global _task
+    if _task is not None:
+        _task.cancel()
+        try:
+            await _task
+        except asyncio.CancelledError:
+            pass
+        _task = None
+    try:
+        await save()
+    except Exception:
+        logger.exception("warm_start: final snapshot failed")
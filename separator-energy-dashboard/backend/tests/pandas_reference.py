@@ -0,0 +1,138 @@
+"""The pandas Series/reindex alignment state_engine.build_dataframe replaced.
+
+Kept as the reference for the parity tests in tests/test_state_engine.py and
+for benchmarks/bench_build_dataframe.py; nothing in services/ imports it.
+"""
+
+import logging
+
+import numpy as np
+import pandas as pd
+
+from services.state_engine import STATE_CIP, STATE_IDLE, STATE_PROCESSING, STATE_SHUTDOWN
+from services.tag_columns import BOOL_TAGS, BOOL_UNKNOWN, TagColumns, coerce_bool
+
+logger = logging.getLogger(__name__)
+
+
+def series_from_points(alias: str, points: list[dict]) -> pd.Series:
+    # Defensive: the historian contract is {t, v, q}, but a feed may slip in
+    # points missing a timestamp or value (boundary / no-data markers). Skip
+    # them rather than KeyError on p["v"] — the legacy TimeBase client emits
+    # such points and they used to take down the whole Analysis tab.
+    points = [p for p in points if isinstance(p, dict) and "t" in p and "v" in p]
+    if not points:
+        return pd.Series(dtype=float)
+
+    idx = pd.to_datetime([p["t"] for p in points], utc=True)
+    s = pd.Series([p["v"] for p in points], index=idx, name=alias)
+    if alias in BOOL_TAGS:
+        # Coerce values up front using the tolerant helper. The raw stream
+        # may contain native bools, 0/1 ints, or "true"/"false" strings —
+        # downstream code only handles bool/None safely.
+        s = s.map(coerce_bool).astype("boolean")
+    return s
+
+
+def series_from_columns(alias: str, cols: TagColumns) -> pd.Series:
+    """Columnar fast path — timestamps are already epoch-ns, values already
+    typed, so this is a couple of zero-copy wraps."""
+    if len(cols) == 0:
+        return pd.Series(dtype=float)
+    idx = pd.DatetimeIndex(cols.t_ns.view("datetime64[ns]")).tz_localize("UTC")
+    if cols.is_bool:
+        values = pd.arrays.BooleanArray(cols.values == 1, cols.values == BOOL_UNKNOWN)
+    else:
+        values = cols.values
+    return pd.Series(values, index=idx, name=alias)
+
+
+def build_dataframe_pandas(raw: dict[str, list[dict] | TagColumns]) -> pd.DataFrame:
+
+    if not any(len(v) for v in raw.values()):
+        logger.warning("state_engine: all tag streams are empty")
+        return pd.DataFrame()
+
+    # Build a Series for each tag (bool tags already coerced to "boolean")
+    series = {}
+    for alias, points in raw.items():
+        if isinstance(points, TagColumns):
+            s = series_from_columns(alias, points)
+        else:
+            s = series_from_points(alias, points)
+        if s.empty:
+            logger.warning("state_engine: tag '%s' has no usable points", alias)
+        series[alias] = s
+
+    # Determine overall time range from all tags
+    non_empty = [s.index for s in series.values() if not s.empty]
+    if not non_empty:
+        return pd.DataFrame()
+    start = min(i.min() for i in non_empty).floor("min")
+    end   = max(i.max() for i in non_empty).floor("min")
+    minute_index = pd.date_range(start=start, end=end, freq="1min", tz="UTC")
+
+    # Resample each tag to 1-minute uniform index
+    df = pd.DataFrame(index=minute_index)
+
+    for alias, s in series.items():
+        if alias in BOOL_TAGS:
+            if s.empty:
+                df[alias] = pd.Series([False] * len(minute_index), index=minute_index, dtype="boolean")
+                continue
+
+            # Forward-fill over the union of the tag's own timestamps and the
+            # minute grid, then reindex back to the grid. This propagates the
+            # last known value into otherwise-empty minute buckets. Casting
+            # up front avoids pandas' deprecated object-dtype ffill downcast.
+            s_reindexed = s.reindex(minute_index.union(s.index)).sort_index()
+            s_reindexed = s_reindexed.ffill().reindex(minute_index)
+            df[alias] = s_reindexed
+        else:
+            # Analog tags: snap to nearest 1-min bucket, no interpolation.
+            if s.empty:
+                df[alias] = None
+                continue
+            s_reindexed = s.reindex(minute_index, method="nearest", tolerance=pd.Timedelta("30s"))
+            df[alias] = s_reindexed
+
+    # Drop rows where motor_amps is missing (no raw reading within 30s of that minute)
+    df = df.dropna(subset=["motor_amps"])
+
+    if df.empty:
+        logger.info("state_engine: no motor_amps rows survived nearest-bucket join")
+        return df
+
+    # Log suspect motor amp readings but let them pass through
+    if (df["motor_amps"] > 100).any():
+        logger.warning(
+            "state_engine: %d rows with Motor Amps > 100A",
+            (df["motor_amps"] > 100).sum(),
+        )
+
+    # Backfill any remaining NaN booleans with False (Shutdown is the safe default)
+    # and cast to plain numpy bool — eliminates BooleanDtype/pd.NA traps in apply().
+    for col in BOOL_TAGS:
+        if col not in df.columns:
+            df[col] = False
+        df[col] = df[col].fillna(False).astype(bool)
+
+    # Vectorized state classification — equivalent to classify_state() row-wise
+    # but skips a slow Python apply over 10k+ rows and avoids any value that
+    # could trip the row-iteration with a `pd.NA or 0` short-circuit.
+    process = df["process"].to_numpy(dtype=bool)
+    cip     = df["cip"].to_numpy(dtype=bool)
+    running = df["running"].to_numpy(dtype=bool)
+    state = np.where(
+        process, STATE_PROCESSING,
+        np.where(cip, STATE_CIP,
+                 np.where(running, STATE_IDLE, STATE_SHUTDOWN))
+    )
+    df["state"] = state
+
+    logger.info(
+        "state_engine: built DataFrame rows=%d  state_counts=%s",
+        len(df),
+        df["state"].value_counts().to_dict(),
+    )
+    return df
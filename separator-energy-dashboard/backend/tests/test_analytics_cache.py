@@ -0,0 +1,134 @@
+"""Tests for the analytics window cache (services/analytics.py): soft/hard
+TTL with background refresh, and config-versioned keys."""
+
+import asyncio
+import time
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import patch
+
+from services import analytics, cost_calculator
+
+
+class CacheTests(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        analytics._reset_for_tests()
+        self.calls = 0
+        self.release = asyncio.Event()
+        self.release.set()
+
+    async def asyncTearDown(self) -> None:
+        analytics._reset_for_tests()
+
+    async def _compute(self) -> int:
+        self.calls += 1
+        await self.release.wait()
+        return self.calls
+
+    async def _get(self) -> int:
+        return await analytics._get_or_compute(("summary", 7, 0), self._compute)
+
+    def _age(self, seconds: float) -> None:
+        for _, entry in analytics._cache.items():
+            entry["t"] = time.time() - seconds
+
+    async def test_soft_expired_entry_is_served_while_it_refreshes(self) -> None:
+        self.assertEqual(await self._get(), 1)
+        self._age(analytics.SOFT_TTL_SECONDS + 1)
+        self.release.clear()
+        # Served at once; one refresh in flight however many callers ask.
+        self.assertEqual(await self._get(), 1)
+        self.assertEqual(await self._get(), 1)
+        await asyncio.sleep(0)
+        self.assertEqual(self.calls, 2)
+        self.release.set()
+        await asyncio.gather(*analytics._refreshing.values())
+        self.assertEqual(await self._get(), 2)
+        self.assertEqual(self.calls, 2)
+
+    async def test_hard_expired_entry_blocks_for_a_recompute(self) -> None:
+        await self._get()
+        self._age(analytics.HARD_TTL_SECONDS + 1)
+        self.assertEqual(await self._get(), 2)
+        self.assertEqual(analytics._refreshing, {})
+
+    async def test_failed_refresh_keeps_serving_the_old_entry(self) -> None:
+        await self._get()
+        self._age(analytics.SOFT_TTL_SECONDS + 1)
+
+        async def broken() -> int:
+            raise RuntimeError("historian gone")
+
+        with self.assertLogs(analytics.logger, level="ERROR"):
+            self.assertEqual(await analytics._get_or_compute(("summary", 7, 0), broken), 1)
+            await asyncio.gather(*analytics._refreshing.values())
+        self.assertEqual(await self._get(), 1)
+
+    async def test_config_change_recomputes_cached_windows(self) -> None:
+        await self._get()
+        saved = cost_calculator.get_config()
+        self.addCleanup(cost_calculator.update_config, **saved)
+        version = cost_calculator.config_version()
+
+        cost_calculator.update_config(rate_per_kwh=saved["rate_per_kwh"])  # no change, no new version
+        self.assertEqual(cost_calculator.config_version(), version)
+
+        with patch.object(analytics, "_prewarm_window") as prewarm:
+            cost_calculator.update_config(voltage=saved["voltage"] + 20)
+            analytics.config_changed()
+            await analytics._recompute_task
+        prewarm.assert_awaited_once_with(7, 0, priority=analytics.INTERACTIVE)
+        self.assertEqual(len(analytics._cache), 0)
+        # Nothing computed under the old version is served.
+        self.assertEqual(await self._get(), 2)
+
+
+class BoundedCacheTests(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        analytics._reset_for_tests()
+        self.addAsyncCleanup(self._restore, analytics._cache)
+        analytics._cache = analytics.LRUCache(max_entries=3, max_bytes=2000, sizeof=analytics._entry_bytes)
+
+    async def _restore(self, cache) -> None:
+        analytics._cache = cache
+        analytics._reset_for_tests()
+
+    async def test_crawled_windows_are_evicted_and_leave_no_locks(self) -> None:
+        async def payload() -> dict:
+            return {"total_kwh": 1.0}
+
+        for days in range(1, 11):
+            await analytics._get_or_compute(("summary", days, 0), payload)
+        stats = analytics.stats()
+        self.assertEqual(stats["cache"]["entries"], 3)
+        self.assertEqual(stats["cache"]["evictions"], 7)
+        self.assertEqual(stats["cache"]["misses"], 10)
+        self.assertEqual(stats["locks"], 0)
+
+        await analytics._get_or_compute(("summary", 10, 0), payload)
+        self.assertEqual(analytics.stats()["cache"]["hits"], 1)
+
+    async def test_byte_bound(self) -> None:
+        async def big() -> list:
+            return [{"date": "2026-01-01", "total_kwh": 123.4}] * 20  # ~800 bytes
+
+        for days in range(1, 4):
+            await analytics._get_or_compute(("daily", days, 0), big)
+        self.assertEqual(len(analytics._cache), 2)
+        self.assertLessEqual(analytics._cache.bytes, 2000)
+
+    async def test_concurrent_callers_share_one_lock_then_drop_it(self) -> None:
+        release = asyncio.Event()
+        calls = 0
+
+        async def slow() -> int:
+            nonlocal calls
+            calls += 1
+            await release.wait()
+            return calls
+
+        waiters = [asyncio.create_task(analytics._get_or_compute(("summary", 7, 0), slow)) for _ in range(3)]
+        await asyncio.sleep(0)
+        self.assertEqual(analytics._locks[("summary", 7, 0, cost_calculator.config_version())][1], 3)
+        release.set()
+        self.assertEqual(await asyncio.gather(*waiters), [1, 1, 1])
+        self.assertEqual(analytics._locks, {})
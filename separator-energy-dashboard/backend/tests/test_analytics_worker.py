@@ -0,0 +1,143 @@
+"""Tests for shared-memory day minutes (services/shared_rows.py) and the
+analytics worker processes (services/analytics_worker.py)."""
+
+import gc
+from datetime import timedelta
+from unittest import IsolatedAsyncioTestCase, TestCase
+from unittest.mock import patch
+
+import numpy as np
+
+from services import analytics, analytics_worker, compute_pool, cost_calculator, day_partials, shared_rows
+from tests.test_day_partials import NOW, _FrozenDatetime, _Historian
+
+
+def _rows(n: int = 1440) -> cost_calculator.CostRows:
+    rng = np.random.default_rng(11)
+    amps = np.round(rng.uniform(0, 60, n), 2)
+    rate = rng.choice([0.16, 0.22, 0.30], n)
+    rows = cost_calculator.CostRows(
+        np.arange(n, dtype=np.int64) * 60 * 10**9, rng.integers(0, 60, n).astype(np.int16),
+        np.zeros(n), np.zeros(n), amps, rate,
+    )
+    return rows.recost(460, 0.88)
+
+
+class SharedRowsTests(TestCase):
+    def test_share_and_attach_see_the_same_minutes(self) -> None:
+        rows = _rows()
+        shared, segment = shared_rows.share(rows)
+        attached, other = shared_rows.attach(shared_rows.ref(segment, shared))
+        for column in cost_calculator.CostRows.COLUMNS:
+            np.testing.assert_array_equal(getattr(shared, column), getattr(rows, column))
+            np.testing.assert_array_equal(getattr(attached, column), getattr(rows, column))
+        self.assertEqual(shared.t_ns.dtype, np.int64)
+        self.assertEqual(shared.cell.dtype, np.int16)
+
+        # Live views keep a released segment mapped until they are gone.
+        shared_rows.release(other, unlink=False)
+        shared_rows.release(segment)
+        self.assertEqual(shared_rows.pending(), 2)
+        del shared, attached
+        shared_rows.release(None)
+        self.assertEqual(shared_rows.pending(), 0)
+
+    def test_empty_day(self) -> None:
+        shared, segment = shared_rows.share(cost_calculator.CostRows.empty())
+        self.assertEqual(len(shared), 0)
+        del shared
+        shared_rows.release(segment)
+        self.assertEqual(shared_rows.pending(), 0)
+
+    def test_recost_matches_calculate_costs(self) -> None:
+        rows = _rows()
+        saved = cost_calculator.get_config()
+        self.addCleanup(cost_calculator._runtime_config.update, saved)
+        cost_calculator.update_config(voltage=480, power_factor=0.95)
+        got = rows.recost(480, 0.95)
+        kw = np.array([cost_calculator.amps_to_kw(a) for a in rows.amps])
+        np.testing.assert_array_equal(got.kwh, kw * (1 / 60))
+        np.testing.assert_array_equal(got.cost, np.round(kw * (1 / 60) * rows.rate, 6))
+
+
+class WorkerTests(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        analytics._reset_for_tests()
+        compute_pool._reset_for_tests()
+        self.historian = _Historian()
+        self._patches = [
+            patch.object(analytics, "datetime", _FrozenDatetime),
+            patch.object(analytics.historian_client, "fetch_all_tags", self.historian.fetch_all_tags),
+            patch.object(day_partials, "ANALYTICS_WORKER_ENABLED", True),
+            patch.object(analytics_worker, "ANALYTICS_WORKER_ENABLED", True),
+        ]
+        for p in self._patches:
+            p.start()
+
+    async def asyncTearDown(self) -> None:
+        for p in self._patches:
+            p.stop()
+        analytics._reset_for_tests()
+        compute_pool._reset_for_tests()
+        gc.collect()  # views reachable only from logged exceptions' tracebacks
+        shared_rows.release(None)
+        self.assertEqual(shared_rows.pending(), 0)
+
+    async def _in_process(self, days: int, offset: int, electrical=None):
+        start = NOW - timedelta(days=offset + days)
+        end = NOW - timedelta(days=offset)
+        partials = {d: p for d in day_partials.days_between(start, end) if (p := day_partials._store.peek(d))}
+        return day_partials.assemble(start, end, partials, {}, electrical)
+
+    def assertSameRollup(self, got, expected) -> None:
+        self.assertEqual(got.dates, expected.dates)
+        np.testing.assert_array_equal(got.count, expected.count)
+        np.testing.assert_array_equal(got.kwh, expected.kwh)
+        np.testing.assert_array_equal(got.cost, expected.cost)
+
+    async def test_worker_assembles_from_shared_days(self) -> None:
+        got, _ = await analytics._window_rollup(7, 7)
+        self.assertEqual(compute_pool.stats()["pools"]["process"]["jobs"], 1)
+        self.assertTrue(all(p.segment is not None for _, p in day_partials._store.items()))
+        self.assertSameRollup(got, await self._in_process(7, 7))
+
+    async def test_what_if_recosts_without_rereading(self) -> None:
+        await analytics._window_rollup(7, 7)
+        self.historian.calls.clear()
+        got, _ = await analytics._window_rollup(7, 7, electrical=(480.0, 0.95))
+        self.assertEqual(self.historian.calls, [])
+        self.assertSameRollup(got, await self._in_process(7, 7, (480.0, 0.95)))
+
+        saved = cost_calculator.get_config()
+        try:
+            cost_calculator.update_config(voltage=480.0, power_factor=0.95)
+            expected, _ = await analytics._window_rollup(7, 7)
+        finally:
+            cost_calculator.update_config(voltage=saved["voltage"], power_factor=saved["power_factor"])
+        np.testing.assert_allclose(got.kwh, expected.kwh, rtol=1e-12)
+        np.testing.assert_allclose(got.cost, expected.cost, rtol=1e-12)
+
+    async def test_worker_detaches_segments_the_api_dropped(self) -> None:
+        await analytics._window_rollup(7, 7)
+        start, end = NOW - timedelta(days=14), NOW - timedelta(days=7)
+        refs = {d: shared_rows.ref(p.segment, p.rows) for d, p in day_partials._store.items()}
+        analytics_worker._assemble_job(start, end, refs, {}, None, day_partials.segment_names())
+        self.assertEqual(len(analytics_worker._attached), len(refs))
+
+        dropped = min(refs)
+        day_partials._drop(dropped, day_partials._store.pop(dropped))  # as if evicted
+        del refs[dropped]
+        got = analytics_worker._assemble_job(start, end, refs, {}, None, day_partials.segment_names())
+        self.assertEqual(sorted(analytics_worker._attached.keys()), sorted(r.name for r in refs.values()))
+        self.assertNotIn(dropped, got.dates)
+        del got
+        analytics_worker._reset_for_tests()
+
+    async def test_failed_job_falls_back_to_in_process(self) -> None:
+        await analytics._window_rollup(7, 7)
+        for _, partial in day_partials._store.items():
+            partial.segment.unlink()  # as if evicted while the job was queued
+        compute_pool.shutdown()  # fresh workers, nothing attached yet
+        with self.assertLogs(analytics_worker.logger, level="WARNING"):
+            got, _ = await analytics._window_rollup(7, 7)
+        self.assertSameRollup(got, await self._in_process(7, 7))
@@ -0,0 +1,113 @@
+"""Tests for the historian circuit breaker (services/circuit_breaker.py).
+
+A hand-cranked clock drives the probe schedule so every transition is
+deterministic.
+"""
+
+import asyncio
+from unittest import IsolatedAsyncioTestCase
+
+import httpx
+
+from services import circuit_breaker
+from services.circuit_breaker import CircuitBreaker, CircuitOpenError
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _connect_error() -> httpx.ConnectError:
+    return httpx.ConnectError("connection refused")
+
+
+def _status_error(code: int) -> httpx.HTTPStatusError:
+    request = httpx.Request("POST", "http://historian/i3x/objects/value")
+    return httpx.HTTPStatusError("boom", request=request, response=httpx.Response(code, request=request))
+
+
+class CircuitBreakerTests(IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.clock = FakeClock()
+        self.breaker = CircuitBreaker("test", failure_threshold=3, probe_seconds=5, max_probe_seconds=30,
+                                      clock=self.clock)
+
+    async def _call(self, exc: Exception | None = None) -> None:
+        async with self.breaker.guard():
+            if exc is not None:
+                raise exc
+
+    async def _fail(self, exc: Exception | None = None) -> None:
+        with self.assertRaises(type(exc) if exc else httpx.ConnectError):
+            await self._call(exc or _connect_error())
+
+    async def test_opens_after_threshold_consecutive_failures(self) -> None:
+        await self._fail()
+        await self._fail()
+        await self._call()  # success resets the run
+        for _ in range(3):
+            await self._fail()
+        self.assertEqual(self.breaker.state, circuit_breaker.OPEN)
+        with self.assertRaises(CircuitOpenError):
+            await self._call()
+
+    async def test_only_reachability_errors_count(self) -> None:
+        for exc in (_status_error(404), ValueError("bad json"), _status_error(404)):
+            with self.assertRaises(type(exc)):
+                await self._call(exc)
+        self.assertEqual(self.breaker.state, circuit_breaker.CLOSED)
+        for _ in range(3):
+            await self._fail(_status_error(503))
+        self.assertEqual(self.breaker.state, circuit_breaker.OPEN)
+
+    async def test_half_open_admits_a_single_probe(self) -> None:
+        for _ in range(3):
+            await self._fail()
+        self.clock.now += 5
+        self.breaker.before_call()  # the probe
+        self.assertEqual(self.breaker.state, circuit_breaker.HALF_OPEN)
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.before_call()
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.state, circuit_breaker.CLOSED)
+        await self._call()
+
+    async def test_failed_probes_back_off_exponentially_up_to_the_cap(self) -> None:
+        for _ in range(3):
+            await self._fail()
+        waits = []
+        for _ in range(5):
+            waits.append(self.breaker.seconds_until_probe())
+            self.clock.now += waits[-1]
+            await self._fail()
+        self.assertEqual(waits, [5, 10, 20, 30, 30])
+        self.assertTrue(self.breaker.is_open())
+
+    async def test_cancelled_probe_frees_the_slot(self) -> None:
+        for _ in range(3):
+            await self._fail()
+        self.clock.now += 5
+        with self.assertRaises(asyncio.CancelledError):
+            await self._call(asyncio.CancelledError())
+        self.assertEqual(self.breaker.state, circuit_breaker.HALF_OPEN)
+        await self._call()
+        self.assertEqual(self.breaker.state, circuit_breaker.CLOSED)
+
+    async def test_disabled_breaker_never_rejects(self) -> None:
+        self.breaker.enabled = False
+        for _ in range(10):
+            await self._fail()
+        await self._call()
+
+    async def test_snapshot_reports_next_probe_while_open(self) -> None:
+        self.assertIsNone(self.breaker.snapshot()["next_probe_at"])
+        for _ in range(3):
+            await self._fail()
+        snap = self.breaker.snapshot()
+        self.assertEqual(snap["state"], "open")
+        self.assertIsNotNone(snap["next_probe_at"])
+        self.assertIn("ConnectError", snap["last_error"])
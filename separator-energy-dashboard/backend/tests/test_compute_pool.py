@@ -0,0 +1,78 @@
+"""Tests for the analytics executor (services/compute_pool.py) and the
+event-loop lag monitor (services/loop_monitor.py)."""
+
+import asyncio
+import threading
+import time
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import patch
+
+from services import compute_pool, cost_calculator
+from services.loop_monitor import LagMonitor
+
+
+def _thread_name() -> str:
+    return threading.current_thread().name
+
+
+def _kw_at_100_amps() -> float:
+    return cost_calculator.amps_to_kw(100.0)
+
+
+class ComputePoolTests(IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        compute_pool._reset_for_tests()
+        self.addCleanup(compute_pool._reset_for_tests)
+
+    async def test_thread_mode_runs_off_the_loop(self) -> None:
+        with patch.object(compute_pool, "ANALYTICS_EXECUTOR", "thread"):
+            name = await compute_pool.run(_thread_name)
+            self.assertTrue(name.startswith("analytics"), name)
+            self.assertTrue((await compute_pool.run_threaded(_thread_name)).startswith("analytics"))
+        self.assertEqual(compute_pool.stats()["pools"]["thread"]["jobs"], 2)
+
+    async def test_inline_mode_runs_on_the_loop(self) -> None:
+        with patch.object(compute_pool, "ANALYTICS_EXECUTOR", "inline"):
+            self.assertEqual(await compute_pool.run(_thread_name), _thread_name())
+
+    async def test_unknown_mode_falls_back_to_threads(self) -> None:
+        with patch.object(compute_pool, "ANALYTICS_EXECUTOR", "gpu"), self.assertLogs(compute_pool.logger):
+            self.assertTrue((await compute_pool.run(_thread_name)).startswith("analytics"))
+
+    async def test_process_mode_ships_the_current_config(self) -> None:
+        saved = cost_calculator.get_config()
+        self.addCleanup(cost_calculator._runtime_config.update, saved)
+        cost_calculator.update_config(voltage=400.0, power_factor=0.9)
+        with patch.object(compute_pool, "ANALYTICS_EXECUTOR", "process"):
+            got = await compute_pool.run(_kw_at_100_amps)
+            # Stateful jobs never leave the process.
+            self.assertTrue((await compute_pool.run_threaded(_thread_name)).startswith("analytics"))
+        self.assertEqual(got, cost_calculator.amps_to_kw(100.0))
+        self.assertEqual(compute_pool.stats()["pools"]["process"]["jobs"], 1)
+
+    async def test_a_blocking_job_does_not_stall_the_loop(self) -> None:
+        monitor = LagMonitor(interval=0.01, warn_ms=1000)
+        monitor.start()
+        with patch.object(compute_pool, "ANALYTICS_EXECUTOR", "thread"):
+            await compute_pool.run(time.sleep, 0.3)
+        await monitor.stop()
+        self.assertGreater(monitor.stats()["samples"], 10)
+        self.assertLess(monitor.max_ms, 150)
+
+
+class LagMonitorTests(IsolatedAsyncioTestCase):
+    async def test_blocking_the_loop_shows_up_as_lag(self) -> None:
+        monitor = LagMonitor(interval=0.01, warn_ms=100)
+        monitor.start()
+        await asyncio.sleep(0.05)
+        with self.assertLogs("services.loop_monitor", level="WARNING"):
+            time.sleep(0.25)
+            await asyncio.sleep(0.05)
+        await monitor.stop()
+        stats = monitor.stats()
+        self.assertGreaterEqual(stats["max_ms"], 200)
+        self.assertEqual(stats["over_warn"], 1)
+        self.assertLess(stats["p50_ms"], 100)
+
+    def test_stats_before_any_sample(self) -> None:
+        self.assertEqual(LagMonitor().stats(), {"samples": 0, "max_ms": 0.0, "over_warn": 0})
@@ -0,0 +1,123 @@
+"""Tests for cost_calculator.calculate_costs' compiled tariff calendar.
+
+The vectorized lookup must agree row for row with the scalar
+get_tou_rate / get_tou_period / get_shift helpers it replaced in
+calculate_costs — across seasons, weekends and both DST transitions.
+"""
+
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+
+from services import cost_calculator
+
+
+def _frame(index: pd.DatetimeIndex) -> pd.DataFrame:
+    rng = np.random.default_rng(3)
+    return pd.DataFrame(
+        {
+            "motor_amps": np.round(rng.uniform(0, 80, len(index)), 2),
+            "state": "Processing",
+        },
+        index=index,
+    )
+
+
+class CompiledCalendarTests(TestCase):
+    def assertMatchesScalar(self, index: pd.DatetimeIndex) -> None:
+        got = cost_calculator.calculate_costs(_frame(index))
+        self.assertEqual(got["tou_rate"].tolist(), [cost_calculator.get_tou_rate(t) for t in index])
+        self.assertEqual(got["tou_period"].tolist(), [cost_calculator.get_tou_period(t) for t in index])
+        self.assertEqual(got["shift"].tolist(), [cost_calculator.get_shift(t) for t in index])
+        self.assertEqual(got["kw"].tolist(), [cost_calculator.amps_to_kw(a) for a in got["motor_amps"]])
+
+    def test_dst_transitions_minute_by_minute(self) -> None:
+        for day in ("2026-03-08", "2026-11-01"):
+            with self.subTest(day=day):
+                start = pd.Timestamp(day, tz="UTC") - pd.Timedelta(hours=12)
+                self.assertMatchesScalar(pd.date_range(start, periods=2 * 1440, freq="1min"))
+
+    def test_season_and_weekday_boundaries_across_a_year(self) -> None:
+        # 37 is coprime with 1440: a year of samples hits every minute of day.
+        self.assertMatchesScalar(pd.date_range("2026-01-01", "2027-01-01", freq="37min", tz="UTC"))
+
+    def test_naive_index_is_taken_as_utc(self) -> None:
+        naive = pd.date_range("2026-06-30 22:00", periods=240, freq="1min")
+        rate, period, shift = cost_calculator.tariff_columns(naive)
+        expected = cost_calculator.tariff_columns(naive.tz_localize("UTC"))
+        np.testing.assert_array_equal(rate, expected[0])
+        self.assertEqual(period.tolist(), expected[1].tolist())
+        self.assertEqual(shift.tolist(), expected[2].tolist())
+
+    def test_columns_and_dtypes_unchanged(self) -> None:
+        got = cost_calculator.calculate_costs(_frame(pd.date_range("2026-05-01", periods=60, freq="1min", tz="UTC")))
+        self.assertEqual(
+            list(got.columns),
+            ["motor_amps", "state", "kw", "kwh", "tou_rate", "cost_usd", "shift", "tou_period"],
+        )
+        self.assertEqual(got["tou_rate"].dtype, np.float64)
+        self.assertEqual(got["shift"].dtype, object)
+
+
+class RollupTests(TestCase):
+    """summary/shift/daily payloads sliced from the one grouped rollup."""
+
+    def setUp(self) -> None:
+        rng = np.random.default_rng(5)
+        # Three Pacific days, with gaps, across the Nov 1 DST fall-back.
+        index = pd.date_range("2026-10-31 07:00", periods=3 * 1440, freq="1min", tz="UTC")
+        index = index[rng.random(len(index)) > 0.2]
+        self.df = _frame(index)
+        self.df["state"] = rng.choice(["Processing", "CIP", "Idle", "Shutdown"], len(index))
+        self.costed = cost_calculator.calculate_costs(self.df)
+
+    def _expected(self, rows: pd.DataFrame, total: int | None = None) -> dict:
+        block = {
+            "hours":    round(len(rows) / 60, 1),
+            "kwh":      round(rows["kwh"].sum(), 1),
+            "cost_usd": round(rows["cost_usd"].sum(), 2),
+        }
+        if total is not None:
+            block["pct_time"] = round(len(rows) / total * 100, 1)
+        return block
+
+    def assertBlock(self, got: dict, rows: pd.DataFrame, total: int | None = None) -> None:
+        for key, value in self._expected(rows, total).items():
+            # Sums group in a different order than pandas; allow one unit in the last place.
+            self.assertAlmostEqual(got[key], value, delta=0.0101, msg=key)
+
+    def test_summary_matches_masked_sums(self) -> None:
+        summary = cost_calculator.aggregate_summary(self.df)
+        self.assertBlock({"hours": round(len(self.costed) / 60, 1), "kwh": summary["total_kwh"],
+                          "cost_usd": summary["total_cost_usd"]}, self.costed)
+        for state, block in summary["by_state"].items():
+            self.assertBlock(block, self.costed[self.costed["state"] == state], len(self.costed))
+        for period, block in summary["by_tou_period"].items():
+            self.assertBlock(block, self.costed[self.costed["tou_period"] == period])
+        for shift, block in summary["by_shift"].items():
+            rows = self.costed[self.costed["shift"] == shift]
+            self.assertBlock(block, rows)
+            for state, inner in block["by_state"].items():
+                self.assertBlock(inner, rows[rows["state"] == state], len(rows))
+        self.assertEqual(summary["by_shift"], cost_calculator.aggregate_by_shift(self.costed))
+
+    def test_daily_groups_by_facility_local_day(self) -> None:
+        daily = cost_calculator.aggregate_daily(self.df)
+        local = self.costed.index.tz_convert("US/Pacific").date
+        self.assertEqual([d["date"] for d in daily], sorted({str(d) for d in local}))
+        for day in daily:
+            rows = self.costed[local == pd.Timestamp(day["date"]).date()]
+            self.assertBlock({"hours": round(len(rows) / 60, 1), "kwh": day["total_kwh"],
+                              "cost_usd": day["total_cost_usd"]}, rows)
+            for state, block in day["by_state"].items():
+                self.assertNotIn("pct_time", block)
+                self.assertBlock(block, rows[rows["state"] == state])
+
+    def test_one_rollup_feeds_both_payloads(self) -> None:
+        rollup = cost_calculator.rollup(self.df)
+        self.assertEqual(cost_calculator.summary_from_rollup(rollup), cost_calculator.aggregate_summary(self.df))
+        self.assertEqual(cost_calculator.daily_from_rollup(rollup), cost_calculator.aggregate_daily(self.df))
+        self.assertIsNone(cost_calculator.rollup(self.df.iloc[:0]))
+        self.assertEqual(cost_calculator.summary_from_rollup(None)["period"], "No data")
+        self.assertEqual(cost_calculator.daily_from_rollup(None), [])
@@ -0,0 +1,216 @@
+"""Tests for analytics windows assembled from per-day partials
+(services/day_partials.py), against the fake Timebase simulator."""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import patch
+
+import numpy as np
+
+from config import I3X_TAGS
+from fake_timebase.simulator import ALIASES, SeparatorSimulator
+from services import analytics, compute_pool, cost_calculator, day_partials, historian_client, i3x_client, state_engine
+from services.circuit_breaker import historian_breaker
+from services.historian_scheduler import INTERACTIVE, PREWARM
+from services.tag_columns import TagColumns, datetime_to_ns
+from tests.test_i3x_client import _history_upstream, _hourly_history
+
+# The 30-day windows span the Nov 1 fall-back (a 25-hour local day).
+NOW = datetime(2026, 11, 12, 15, 23, 17, 500000, tzinfo=timezone.utc)
+
+
+class _FrozenDatetime(datetime):
+    @classmethod
+    def now(cls, tz=None):
+        return NOW
+
+
+class _Historian:
+    def __init__(self) -> None:
+        self.sim = SeparatorSimulator(interval_seconds=23, history_days=70, clock=lambda: NOW)
+        self.calls: list[tuple[datetime, datetime]] = []
+        self.down: list[tuple[datetime, datetime]] = []  # strict reads overlapping these fail
+
+    async def fetch_all_tags(self, start=None, end=None, columnar=False, priority=None, strict=False):
+        self.calls.append((start, end))
+        if strict and any(lo < end and start < hi for lo, hi in self.down):
+            raise RuntimeError("historian chunk failed")
+        start_ns, end_ns = datetime_to_ns(start), datetime_to_ns(end)
+        raw = {}
+        for alias in ALIASES:
+            t, v = self.sim.points(alias, start_ns - 3600 * 10**9, end_ns)
+            values = v.astype("int8") if v.dtype == bool else v.astype("float64")
+            raw[alias] = TagColumns(t, values).window(start_ns, end_ns)
+        return raw
+
+
+class WindowAssemblyTests(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        analytics._reset_for_tests()
+        self.historian = _Historian()
+        self._patches = [
+            patch.object(analytics, "datetime", _FrozenDatetime),
+            patch.object(analytics.historian_client, "fetch_all_tags", self.historian.fetch_all_tags),
+        ]
+        for p in self._patches:
+            p.start()
+
+    async def asyncTearDown(self) -> None:
+        for p in self._patches:
+            p.stop()
+        analytics._reset_for_tests()
+
+    async def _direct(self, days: int, offset: int) -> cost_calculator.Rollup:
+        end = NOW - timedelta(days=offset)
+        start = end - timedelta(days=days)
+        # The window is the minutes starting in [start, end), each aligned
+        # against its neighbours on both sides.
+        raw = await self.historian.fetch_all_tags(start - timedelta(minutes=1), end + timedelta(minutes=1))
+        rows = cost_calculator.cost_rows(state_engine.build_dataframe(raw))
+        return cost_calculator.rollup_rows(rows.window(datetime_to_ns(start), datetime_to_ns(end)))
+
+    def assertSameRollup(self, got: cost_calculator.Rollup, expected: cost_calculator.Rollup) -> None:
+        self.assertEqual(got.dates, expected.dates)
+        self.assertEqual((got.first, got.last), (expected.first, expected.last))
+        np.testing.assert_array_equal(got.count, expected.count)
+        np.testing.assert_allclose(got.kwh, expected.kwh, rtol=1e-12)
+        np.testing.assert_allclose(got.cost, expected.cost, rtol=1e-12)
+
+    async def test_windows_match_a_direct_build(self) -> None:
+        # (7, 7) first, so the (30, 0) fill starts runs on whole days.
+        for days, offset in ((7, 7), (30, 0), (7, 0), (30, 30), (1, 3)):
+            with self.subTest(days=days, offset=offset):
+                got, unread = await analytics._window_rollup(days, offset)
+                self.assertEqual(unread, [])
+                self.assertSameRollup(got, await self._direct(days, offset))
+
+    async def test_day_edges_align_against_real_neighbours(self) -> None:
+        # A day read on its own must not let the historian's boundary seed
+        # (clamped to the request start) stand in for the midnight reading.
+        for back in range(3, 9):
+            day = (NOW - timedelta(days=back)).astimezone(day_partials._TZ).date()
+            lo, hi = day_partials.day_bounds(day)
+            got = await analytics._fetch_rows(lo, hi, priority=0)
+            raw = await self.historian.fetch_all_tags(
+                NOW - timedelta(days=back + 2), NOW - timedelta(days=back - 2),
+            )
+            expected = cost_calculator.cost_rows(state_engine.build_dataframe(raw)).window(lo, hi)
+            np.testing.assert_array_equal(got.t_ns, expected.t_ns)
+            np.testing.assert_array_equal(got.kwh, expected.kwh)
+
+    async def test_closed_days_are_read_once(self) -> None:
+        await analytics._window_rollup(30, 0)
+        self.historian.calls.clear()
+        await analytics._window_rollup(7, 7)
+        await analytics._window_rollup(20, 3)
+        self.assertEqual(self.historian.calls, [])
+
+        # The open tail is extended from where the live frame left off.
+        await analytics._window_rollup(7, 0)
+        (start, _), = self.historian.calls
+        self.assertGreater(start, NOW - timedelta(minutes=10))
+
+    async def test_config_change_recosts_partials_without_rereading(self) -> None:
+        await analytics._window_rollup(7, 7)
+        self.assertGreater(day_partials.stats()["entries"], 0)
+        before = cost_calculator.get_config()
+        try:
+            cost_calculator.update_config(voltage=480)
+            self.historian.calls.clear()
+            got, _ = await analytics._window_rollup(7, 7)
+            self.assertEqual(self.historian.calls, [])
+            self.assertSameRollup(got, await self._direct(7, 7))
+        finally:
+            cost_calculator.update_config(voltage=before["voltage"])
+
+    async def test_what_if_assembles_on_the_executor(self) -> None:
+        await analytics._window_rollup(7, 7)
+        compute_pool._reset_for_tests()
+        await analytics._window_rollup(7, 7)
+        self.assertEqual(compute_pool.stats()["pools"], {})
+        got, _ = await analytics._window_rollup(7, 7, electrical=(480.0, 0.95))
+        self.assertEqual(compute_pool.stats()["pools"]["thread"]["jobs"], 1)
+        expected = day_partials.assemble(
+            NOW - timedelta(days=14), NOW - timedelta(days=7),
+            {d: p for d in got.dates if (p := day_partials.get(d))}, {}, (480.0, 0.95),
+        )
+        np.testing.assert_array_equal(got.cost, expected.cost)
+
+    async def test_empty_historian_result_is_not_pinned(self) -> None:
+        async def empty(start=None, end=None, columnar=False, priority=None, strict=False):
+            return {alias: TagColumns.empty(alias) for alias in ALIASES}
+
+        with patch.object(analytics.historian_client, "fetch_all_tags", empty):
+            self.assertEqual(await analytics._window_rollup(7, 7), (None, []))
+        self.assertEqual(day_partials.stats()["entries"], 0)
+        self.assertSameRollup((await analytics._window_rollup(7, 7))[0], await self._direct(7, 7))
+
+    async def test_failed_read_leaves_the_window_incomplete_and_uncached(self) -> None:
+        # One day of the (7, 7) window fails; the days around it still return rows.
+        bad = (NOW - timedelta(days=10)).astimezone(day_partials._TZ).date()
+        lo, hi = day_partials.day_bounds(bad)
+        # Inside the day: reads of its neighbours overlap it by a minute.
+        self.historian.down.append((analytics.ns_to_datetime(lo) + timedelta(hours=1), analytics.ns_to_datetime(hi) - timedelta(hours=1)))
+        with patch.object(analytics, "PARTIAL_FILL_CHUNK_DAYS", 1), self.assertLogs(analytics.logger, "WARNING"):
+            rollup, unread = await analytics._window_rollup(7, 7)
+            summary = await analytics.get_summary(7, 7)
+        self.assertEqual(unread, [bad])
+        self.assertNotIn(bad, rollup.dates)
+        self.assertIsNone(day_partials.get(bad))
+        self.assertEqual(day_partials.stats()["entries"], 7)
+        self.assertIn("1 day(s)", summary["warning"])
+        self.assertEqual(len(analytics._cache), 0)
+
+        self.historian.down.clear()
+        rollup, unread = await analytics._window_rollup(7, 7)
+        self.assertEqual(unread, [])
+        self.assertSameRollup(rollup, await self._direct(7, 7))
+        self.assertNotIn("warning", await analytics.get_summary(7, 7))
+        self.assertEqual(len(analytics._cache), 1)
+
+    async def test_concurrent_windows_share_closed_day_reads(self) -> None:
+        await asyncio.gather(
+            analytics._window_rollup(30, 0, priority=PREWARM), analytics._window_rollup(7, 7, priority=PREWARM),
+        )
+        closed = [c for c in self.historian.calls if c[1] < NOW - timedelta(hours=2)]
+        self.assertEqual(len(closed), 1, "the (7, 7) days are awaited from the (30, 0) read")
+        self.assertEqual(analytics._filling, {})
+
+        # A more urgent window reads for itself rather than waiting.
+        analytics._reset_for_tests()
+        self.historian.calls.clear()
+        await asyncio.gather(analytics._window_rollup(30, 0, priority=PREWARM), analytics._window_rollup(7, 7))
+        closed = [c for c in self.historian.calls if c[1] < NOW - timedelta(hours=2)]
+        self.assertEqual(len(closed), 2)
+
+
+class StrictFillTests(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        analytics._reset_for_tests()
+        historian_client._reset_for_tests()
+        historian_breaker.reset()
+        i3x_client._history_slots = None
+
+    async def asyncTearDown(self) -> None:
+        analytics._reset_for_tests()
+        historian_client._reset_for_tests()
+        historian_breaker.reset()
+
+    async def test_day_with_a_failed_tag_is_not_stored(self) -> None:
+        # kW comes back, Process carries a per-tag error: the day must not be
+        # pinned with every minute classified as not processing.
+        day = (datetime.now(timezone.utc) - timedelta(days=3)).astimezone(day_partials._TZ).date()
+
+        def process_offline(request):
+            body = _hourly_history(request)
+            body[I3X_TAGS["process"]] = {"error": "tag offline"}
+            return body
+
+        with patch.object(historian_client, "_backend_fetch_all_tags", i3x_client.fetch_all_tags), \
+             patch.object(i3x_client, "_RETRY_BACKOFF_SECONDS", 0), \
+             _history_upstream(process_offline), \
+             self.assertLogs(analytics.logger, "WARNING"):
+            filled, unread = await analytics._read_closed([day], INTERACTIVE)
+        self.assertEqual((filled, unread), ({}, [day]))
+        self.assertIsNone(day_partials.get(day))
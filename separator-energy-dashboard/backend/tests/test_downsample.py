@@ -0,0 +1,90 @@
+"""Tests for shape-preserving downsampling (services/downsample.py) and the
+downsampled /api/energy/timeline."""
+
+from unittest import TestCase
+
+import numpy as np
+
+from services import downsample, processing
+from services.timeline_cache import downsampled, points
+
+M0 = 29734200  # 2026-07-14T18:00Z, in epoch minutes
+
+
+def _reference_lttb(x: np.ndarray, y: np.ndarray, n: int) -> np.ndarray:
+    """Bucketing as downsample.lttb, anchored the same way, one bucket at a time."""
+    edges = np.linspace(1, len(x) - 1, n - 1).astype(np.int64)
+    mean = [(x[a:b].mean(), y[a:b].mean()) for a, b in zip(edges[:-1], edges[1:])]
+    anchors = [(x[0], y[0])] + mean + [(x[-1], y[-1])]
+    keep = [0]
+    for i, (a, b) in enumerate(zip(edges[:-1], edges[1:])):
+        (ax, ay), (cx, cy) = anchors[i], anchors[i + 2]
+        area = np.abs((ax - cx) * (y[a:b] - ay) - (ax - x[a:b]) * (cy - ay))
+        keep.append(a + int(np.argmax(area)))
+    return np.array(keep + [len(x) - 1])
+
+
+class LttbTests(TestCase):
+    def test_matches_a_per_bucket_reference(self) -> None:
+        rng = np.random.default_rng(5)
+        x = np.arange(1440, dtype=np.float64)
+        y = np.cumsum(rng.normal(0, 1, 1440))
+        for n in (3, 4, 100, 333, 1439):
+            with self.subTest(n=n):
+                got = downsample.lttb(x, y, n)
+                self.assertEqual(len(got), n)
+                np.testing.assert_array_equal(got, _reference_lttb(x, y, n))
+
+    def test_keeps_spikes_and_short_series(self) -> None:
+        x = np.arange(1000, dtype=np.float64)
+        y = np.zeros(1000)
+        y[[137, 612]] = [50.0, -30.0]
+        got = downsample.lttb(x, y, 20)
+        self.assertIn(137, got)
+        self.assertIn(612, got)
+        np.testing.assert_array_equal(downsample.lttb(x[:10], y[:10], 20), np.arange(10))
+
+    def test_nan_only_kept_for_an_all_nan_bucket(self) -> None:
+        x = np.arange(100, dtype=np.float64)
+        y = np.sin(x / 7)
+        y[10:12] = np.nan
+        got = downsample.lttb(x, y, 10)
+        self.assertEqual(len(got), 10)
+        self.assertFalse(np.isnan(y[got]).any())
+
+    def test_series_picks_by_value_type(self) -> None:
+        x = np.arange(8)
+        np.testing.assert_array_equal(
+            downsample.series(x, [True, True, False, False, False, True, True, True], 3), [0, 2, 5, 7],
+        )
+        self.assertEqual(len(downsample.series(x, [1.0, None, 3, 4.5, 2, 1, 0.5, 9], 4)), 4)
+        np.testing.assert_array_equal(downsample.series(x[:2], ["a", "b"], 3), [0, 1])
+
+
+class TimelineDownsampleTests(TestCase):
+    def setUp(self) -> None:
+        processing._reset_for_tests()
+        for i in range(1440):
+            state = "Idle" if 700 <= i < 702 else "Processing"
+            period = "On-Peak" if 960 <= i < 1260 else "Off-Peak"
+            processing._ring.append(M0 + i, 40.0 + np.sin(i / 30), state, period, 0.31, "1st Shift", 0.0)
+
+    def tearDown(self) -> None:
+        processing._reset_for_tests()
+
+    def test_runs_survive_downsampling(self) -> None:
+        rows = downsampled(processing.buffer_rows(), 100)
+        self.assertLessEqual(len(rows), 100 + 6)
+        got = points(rows)
+        idle = next(i for i, p in enumerate(got) if p["state"] == "Idle")
+        # The 2-minute Idle run starts and ends exactly where it did.
+        self.assertEqual(got[idle]["timestamp"][11:16], "05:40")
+        self.assertEqual((got[idle + 1]["timestamp"][11:16], got[idle + 1]["state"]), ("05:42", "Processing"))
+        self.assertEqual(next(p for p in got if p["tou_period"] == "On-Peak")["timestamp"][11:16], "10:00")
+        self.assertEqual(got[-1], processing.timeline_points()[-1])
+
+    def test_downsampled_body_has_its_own_etag(self) -> None:
+        body, etag = processing.timeline_body(100)
+        self.assertEqual(etag, processing.timeline_etag(100))
+        self.assertNotEqual(etag, processing.timeline_etag())
+        self.assertEqual(processing.timeline_body(5000), processing.timeline_body())
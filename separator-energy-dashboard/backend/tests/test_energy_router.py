@@ -19,6 +19,7 @@ from fastapi.testclient import TestClient
 
 import main
 from services import analytics, processing
+from services.circuit_breaker import historian_breaker
 
 
 @asynccontextmanager
@@ -97,6 +98,18 @@ class DailyEndpointTests(IsolatedAsyncioTestCase):
         self.assertEqual(response.json(), [])
 
 
+class WhatIfEndpointTests(IsolatedAsyncioTestCase):
+    async def test_exception_returns_200_with_warning(self) -> None:
+        with patch("services.analytics.what_if", side_effect=RuntimeError("simulated worker failure")):
+            with _client() as client:
+                response = client.get("/api/energy/what-if?voltage=480&power_factor=0.95")
+                missing = client.get("/api/energy/what-if?voltage=480")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNotNone(response.json()["warning"])
+        self.assertEqual(missing.status_code, 422)
+
+
 class TimelineEndpointTests(IsolatedAsyncioTestCase):
     async def test_state_engine_exception_returns_200_with_empty_list(self) -> None:
         # Force the cold-start branch by emptying the ring buffer first.
@@ -115,3 +128,66 @@ class TimelineEndpointTests(IsolatedAsyncioTestCase):
 
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.json(), [])
+
+
+class TimelineBodyEndpointTests(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        processing._reset_for_tests()
+        for minute in range(29734200, 29734203):
+            processing._ring.append(minute, 40.0, "Processing", "On-Peak", 0.31, "1st Shift", 0.0)
+
+    async def asyncTearDown(self) -> None:
+        processing._reset_for_tests()
+
+    async def test_serves_the_cached_body_with_a_strong_etag(self) -> None:
+        with _client() as client:
+            first = client.get("/api/energy/timeline")
+            etag = first.headers["etag"]
+            cached = client.get("/api/energy/timeline", headers={"If-None-Match": etag})
+            processing._ring.append(29734203, 41.0, "Idle", "On-Peak", 0.31, "1st Shift", 0.0)
+            changed = client.get("/api/energy/timeline", headers={"If-None-Match": etag})
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.json(), processing.timeline_points()[:3])
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(cached.content, b"")
+        self.assertEqual(changed.status_code, 200)
+        self.assertEqual(len(changed.json()), 4)
+        self.assertNotEqual(changed.headers["etag"], etag)
+
+    async def test_since_cursor_returns_only_new_minutes(self) -> None:
+        with _client() as client:
+            seq = client.get("/api/energy/timeline").headers["x-timeline-seq"]
+            processing._ring.append(29734203, 41.0, "Idle", "On-Peak", 0.31, "1st Shift", 0.0)
+            delta = client.get(f"/api/energy/timeline?since={seq}").json()
+            by_time = client.get("/api/energy/timeline?since=2026-07-14T18:01:30Z").json()
+            bad = client.get("/api/energy/timeline?since=yesterday")
+            superscript = client.get("/api/energy/timeline", params={"since": "²"})
+
+        self.assertEqual(delta["seq"], int(seq) + 1)
+        self.assertEqual([p["state"] for p in delta["points"]], ["Idle"])
+        self.assertEqual(len(by_time["points"]), 2)
+        self.assertEqual(bad.status_code, 422)
+        self.assertEqual(superscript.status_code, 422)
+
+
+class HealthEndpointTests(IsolatedAsyncioTestCase):
+    async def asyncTearDown(self) -> None:
+        historian_breaker.reset()
+
+    async def test_health_reports_open_breaker_as_degraded_but_stays_200(self) -> None:
+        with _client() as client:
+            ok = client.get("/health").json()
+        self.assertEqual(ok["status"], "ok")
+        self.assertEqual(ok["historian"]["state"], "closed")
+
+        for _ in range(historian_breaker.failure_threshold):
+            historian_breaker.record_failure(RuntimeError("connect timeout"))
+        with _client() as client:
+            response = client.get("/health")
+
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(body["status"], "degraded")
+        self.assertEqual(body["historian"]["state"], "open")
+        self.assertIsNotNone(body["historian"]["next_probe_at"])
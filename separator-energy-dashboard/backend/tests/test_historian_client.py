@@ -0,0 +1,199 @@
+"""Tests for single-flight coalescing in services/historian_client.py.
+
+The backend is a fake that blocks until released, so every test controls
+exactly which reads are in flight together.
+"""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import patch
+
+from services import historian_client
+from services.tag_columns import TagColumns, datetime_to_ns
+
+ALIASES = ("motor_amps", "running", "cip", "process")
+ORIGIN = datetime(2026, 5, 1, tzinfo=timezone.utc)
+
+
+def _iso(dt: datetime) -> str:
+    return dt.astimezone(timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+
+class GatedBackend:
+    """One point per tag every 10 minutes from ORIGIN plus a clamped seed,
+    returned only once `release` is set."""
+
+    def __init__(self) -> None:
+        self.calls: list[tuple[datetime, datetime, bool]] = []
+        self.release = asyncio.Event()
+        self.fail = False
+        self.fail_strict = False
+
+    def _points(self, start: datetime, end: datetime) -> list[dict]:
+        out, seed, t = [], None, ORIGIN
+        while t <= end:
+            point = {"t": _iso(t), "v": float((t - ORIGIN) // timedelta(minutes=10)), "q": 192}
+            if t < start:
+                seed = point
+            else:
+                out.append(point)
+            t += timedelta(minutes=10)
+        if seed is not None and (not out or out[0]["t"] != _iso(start)):
+            out.insert(0, {**seed, "t": _iso(start)})
+        return out
+
+    async def __call__(self, start: datetime, end: datetime, columnar: bool = False, strict: bool = False) -> dict:
+        self.calls.append((start, end, columnar))
+        await self.release.wait()
+        if self.fail or (strict and self.fail_strict):
+            raise RuntimeError("historian down")
+        raw = {alias: self._points(start, end) for alias in ALIASES}
+        if columnar:
+            return {alias: TagColumns.from_points(alias, pts) for alias, pts in raw.items()}
+        return raw
+
+
+class CoalescingTests(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        historian_client._reset_for_tests()
+        self.backend = GatedBackend()
+        self._patchers = [
+            patch.object(historian_client, "_backend_fetch_all_tags", self.backend),
+            patch.object(historian_client, "TAG_ARCHIVE_ENABLED", False),
+            patch.object(historian_client, "HISTORIAN_COALESCE_ENABLED", True),
+        ]
+        for p in self._patchers:
+            p.start()
+
+    async def asyncTearDown(self) -> None:
+        for p in self._patchers:
+            p.stop()
+        historian_client._reset_for_tests()
+
+    async def _settle(self) -> None:
+        for _ in range(5):
+            await asyncio.sleep(0)
+
+    async def test_contained_window_shares_one_upstream_read(self) -> None:
+        outer = asyncio.create_task(historian_client.fetch_all_tags(ORIGIN, ORIGIN + timedelta(days=2)))
+        await self._settle()
+        inner_start = ORIGIN + timedelta(hours=5, minutes=3)
+        inner_end = ORIGIN + timedelta(days=1)
+        inner = asyncio.create_task(historian_client.fetch_all_tags(inner_start, inner_end))
+        await self._settle()
+        self.backend.release.set()
+        await outer
+        got = await inner
+
+        self.assertEqual(len(self.backend.calls), 1)
+        self.assertEqual(got, {a: self.backend._points(inner_start, inner_end) for a in ALIASES})
+        self.assertEqual(got["running"][0]["t"], _iso(inner_start), "seed must clamp to the joiner's start")
+        self.assertEqual(historian_client.coalescing_stats(), {"upstream": 1, "coalesced": 1})
+
+    async def test_columnar_joiner_of_point_flight_gets_columns(self) -> None:
+        outer = asyncio.create_task(historian_client.fetch_all_tags(ORIGIN, ORIGIN + timedelta(days=1)))
+        await self._settle()
+        inner_start = ORIGIN + timedelta(hours=2)
+        inner = asyncio.create_task(
+            historian_client.fetch_all_tags(inner_start, ORIGIN + timedelta(hours=3), columnar=True)
+        )
+        await self._settle()
+        self.backend.release.set()
+        await outer
+        got = await inner
+
+        self.assertEqual(len(self.backend.calls), 1)
+        self.assertIsInstance(got["motor_amps"], TagColumns)
+        self.assertEqual(int(got["motor_amps"].t_ns[0]), datetime_to_ns(inner_start))
+        self.assertEqual(len(got["motor_amps"]), 7)
+
+    async def test_window_reaching_past_the_flight_gets_its_own_read(self) -> None:
+        first = asyncio.create_task(historian_client.fetch_all_tags(ORIGIN + timedelta(hours=1), ORIGIN + timedelta(hours=5)))
+        await self._settle()
+        second = asyncio.create_task(historian_client.fetch_all_tags(ORIGIN, ORIGIN + timedelta(hours=4)))
+        await self._settle()
+        self.backend.release.set()
+        await asyncio.gather(first, second)
+        self.assertEqual(len(self.backend.calls), 2)
+
+    async def test_strict_read_joins_only_strict_flights(self) -> None:
+        window = (ORIGIN, ORIGIN + timedelta(days=2))
+        loose = asyncio.create_task(historian_client.fetch_all_tags(*window, columnar=True))
+        await self._settle()
+        strict = asyncio.create_task(historian_client.fetch_all_tags(*window, columnar=True, strict=True))
+        await self._settle()
+        joiner = asyncio.create_task(historian_client.fetch_all_tags(*window, columnar=True))
+        await self._settle()
+        self.backend.release.set()
+        await asyncio.gather(loose, strict, joiner)
+        self.assertEqual(len(self.backend.calls), 2)
+        self.assertEqual(historian_client.coalescing_stats(), {"upstream": 2, "coalesced": 1})
+
+    async def test_loose_joiner_of_a_failed_strict_read_reads_for_itself(self) -> None:
+        self.backend.fail_strict = True
+        window = (ORIGIN, ORIGIN + timedelta(days=1))
+        strict = asyncio.create_task(historian_client.fetch_all_tags(*window, columnar=True, strict=True))
+        await self._settle()
+        joiner = asyncio.create_task(historian_client.fetch_all_tags(*window, columnar=True))
+        await self._settle()
+        self.backend.release.set()
+
+        with self.assertRaises(RuntimeError):
+            await strict
+        got = await joiner
+        self.assertEqual(len(got["cip"]), 145)
+        self.assertEqual(len(self.backend.calls), 2)
+
+    async def test_end_within_slack_still_coalesces(self) -> None:
+        end = ORIGIN + timedelta(days=1)
+        first = asyncio.create_task(historian_client.fetch_all_tags(ORIGIN, end))
+        await self._settle()
+        second = asyncio.create_task(historian_client.fetch_all_tags(ORIGIN + timedelta(seconds=2), end + timedelta(seconds=2)))
+        await self._settle()
+        self.backend.release.set()
+        await asyncio.gather(first, second)
+        self.assertEqual(len(self.backend.calls), 1)
+
+    async def test_passthrough_joins_bulk_read(self) -> None:
+        with patch.object(historian_client, "USE_I3X", True), \
+             patch("services.historian_client.i3x_client.fetch_tag_history") as single:
+            bulk = asyncio.create_task(historian_client.fetch_all_tags(ORIGIN, ORIGIN + timedelta(days=1)))
+            await self._settle()
+            one = asyncio.create_task(historian_client.fetch_passthrough_history(
+                "cip", ORIGIN + timedelta(hours=1), ORIGIN + timedelta(hours=2),
+            ))
+            await self._settle()
+            self.backend.release.set()
+            await bulk
+            points = await one
+
+        single.assert_not_called()
+        self.assertEqual([p["v"] for p in points], [float(v) for v in range(6, 13)])
+
+    async def test_upstream_failure_reaches_every_waiter(self) -> None:
+        self.backend.fail = True
+        outer = asyncio.create_task(historian_client.fetch_all_tags(ORIGIN, ORIGIN + timedelta(days=1)))
+        await self._settle()
+        inner = asyncio.create_task(historian_client.fetch_all_tags(ORIGIN, ORIGIN + timedelta(hours=1)))
+        await self._settle()
+        self.backend.release.set()
+        for task in (outer, inner):
+            with self.assertRaises(RuntimeError):
+                await task
+
+        # Nothing lingers — the next read goes upstream again.
+        self.backend.fail = False
+        await historian_client.fetch_all_tags(ORIGIN, ORIGIN + timedelta(hours=1))
+        self.assertEqual(len(self.backend.calls), 2)
+
+    async def test_cancelled_joiner_does_not_cancel_the_shared_read(self) -> None:
+        outer = asyncio.create_task(historian_client.fetch_all_tags(ORIGIN, ORIGIN + timedelta(days=1)))
+        await self._settle()
+        inner = asyncio.create_task(historian_client.fetch_all_tags(ORIGIN, ORIGIN + timedelta(hours=1)))
+        await self._settle()
+        inner.cancel()
+        await self._settle()
+        self.backend.release.set()
+        got = await outer
+        self.assertTrue(got["motor_amps"])
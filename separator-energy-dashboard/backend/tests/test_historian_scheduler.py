@@ -0,0 +1,160 @@
+"""Tests for the historian priority scheduler (services/historian_scheduler.py)."""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import patch
+
+from services import historian_client
+from services.historian_scheduler import (
+    BACKFILL,
+    INTERACTIVE,
+    LIVE,
+    PREWARM,
+    HistorianScheduler,
+    _active,
+)
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class SchedulerTests(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.clock = FakeClock()
+        self.scheduler = HistorianScheduler(max_concurrency=1, clock=self.clock)
+        self.order: list[int] = []
+
+    async def _read(self, priority: int, release: asyncio.Event) -> None:
+        async with self.scheduler.slot(priority):
+            self.order.append(priority)
+            await release.wait()
+
+    async def _settle(self) -> None:
+        for _ in range(5):
+            await asyncio.sleep(0)
+
+    async def test_freed_slot_goes_to_the_most_urgent_waiter(self) -> None:
+        release = asyncio.Event()
+        holder = asyncio.create_task(self._read(PREWARM, release))
+        await self._settle()
+        waiters = [asyncio.create_task(self._read(p, release)) for p in (BACKFILL, PREWARM, INTERACTIVE)]
+        await self._settle()
+        self.assertEqual(self.order, [PREWARM])
+
+        self.clock.now += 2.0
+        release.set()
+        await asyncio.gather(holder, *waiters)
+        self.assertEqual(self.order, [PREWARM, INTERACTIVE, PREWARM, BACKFILL])
+
+        classes = self.scheduler.stats()["classes"]
+        self.assertEqual(classes["interactive"]["queue_ms_max"], 2000.0)
+        self.assertEqual(classes["prewarm"]["requests"], 2)
+        self.assertEqual(classes["backfill"]["queued"], 0)
+
+    async def test_live_reads_never_queue(self) -> None:
+        release = asyncio.Event()
+        holder = asyncio.create_task(self._read(BACKFILL, release))
+        await self._settle()
+        async with self.scheduler.slot(LIVE):
+            self.assertEqual(self.scheduler.stats()["classes"]["live"]["in_flight"], 1)
+        release.set()
+        await holder
+
+    async def test_promoted_ticket_jumps_the_queue(self) -> None:
+        release = asyncio.Event()
+        holder = asyncio.create_task(self._read(INTERACTIVE, release))
+        await self._settle()
+        first = asyncio.create_task(self._read(PREWARM, release))
+        ticket = self.scheduler.ticket(BACKFILL)
+
+        async def promoted() -> None:
+            async with self.scheduler.slot(BACKFILL, ticket):
+                self.order.append(ticket.priority)
+
+        second = asyncio.create_task(promoted())
+        await self._settle()
+        self.scheduler.promote(ticket, INTERACTIVE)
+        release.set()
+        await asyncio.gather(holder, first, second)
+        self.assertEqual(self.order, [INTERACTIVE, INTERACTIVE, PREWARM])
+
+    async def test_cancelled_waiter_leaves_no_trace(self) -> None:
+        release = asyncio.Event()
+        holder = asyncio.create_task(self._read(INTERACTIVE, release))
+        await self._settle()
+        waiter = asyncio.create_task(self._read(PREWARM, release))
+        await self._settle()
+        waiter.cancel()
+        await self._settle()
+        release.set()
+        await holder
+        prewarm = self.scheduler.stats()["classes"]["prewarm"]
+        self.assertEqual((prewarm["queued"], prewarm["in_flight"]), (0, 0))
+        async with self.scheduler.slot(BACKFILL):
+            pass
+
+    async def test_byte_budget_only_pauses_background_reads(self) -> None:
+        scheduler = HistorianScheduler(max_concurrency=4, bytes_per_second=1000, clock=self.clock)
+        async with scheduler.slot(INTERACTIVE):
+            self.assertEqual(scheduler.record_bytes(3000), 0.0)
+        async with scheduler.slot(PREWARM):
+            # Bucket is 2000 bytes in debt after the interactive read.
+            self.assertAlmostEqual(scheduler.record_bytes(500), 2.5)
+            self.clock.now += 10
+            self.assertEqual(scheduler.record_bytes(500), 0.0)
+        classes = scheduler.stats()["classes"]
+        self.assertEqual((classes["interactive"]["bytes"], classes["prewarm"]["bytes"]), (3000, 1000))
+        self.assertIsNone(_active.get())
+
+
+class HistorianClientSchedulingTests(IsolatedAsyncioTestCase):
+    async def test_interactive_joiner_promotes_a_queued_prewarm_read(self) -> None:
+        scheduler = HistorianScheduler(max_concurrency=1)
+        historian_client._reset_for_tests()
+        release = asyncio.Event()
+        calls: list[tuple[datetime, datetime]] = []
+
+        async def backend(start, end, columnar=False, strict=False):
+            calls.append((start, end))
+            await release.wait()
+            return {alias: [] for alias in historian_client.TAGS}
+
+        origin = datetime(2026, 5, 1, tzinfo=timezone.utc)
+        with patch.object(historian_client, "historian_scheduler", scheduler), \
+             patch.object(historian_client, "_backend_fetch_all_tags", backend), \
+             patch.object(historian_client, "TAG_ARCHIVE_ENABLED", False), \
+             patch.object(historian_client, "SEGMENT_CACHE_ENABLED", False), \
+             patch.object(historian_client, "HISTORIAN_COALESCE_ENABLED", True):
+            # Occupies the only slot.
+            blocker = asyncio.create_task(historian_client.fetch_all_tags(
+                origin + timedelta(days=10), origin + timedelta(days=11), priority=BACKFILL,
+            ))
+            await asyncio.sleep(0)
+            other = asyncio.create_task(historian_client.fetch_all_tags(
+                origin + timedelta(days=20), origin + timedelta(days=21), priority=PREWARM,
+            ))
+            await asyncio.sleep(0)
+            prewarm = asyncio.create_task(historian_client.fetch_all_tags(
+                origin, origin + timedelta(days=7), priority=PREWARM,
+            ))
+            await asyncio.sleep(0)
+            joiner = asyncio.create_task(historian_client.fetch_all_tags(
+                origin + timedelta(days=1), origin + timedelta(days=2),
+            ))
+            for _ in range(5):
+                await asyncio.sleep(0)
+            release.set()
+            await asyncio.gather(blocker, prewarm, other, joiner)
+
+        # The promoted 7-day read overtook the prewarm read queued before it.
+        self.assertEqual([c[0] for c in calls], [
+            origin + timedelta(days=10), origin, origin + timedelta(days=20),
+        ])
+        self.assertEqual(scheduler.stats()["classes"]["interactive"]["requests"], 1)
+        historian_client._reset_for_tests()
@@ -0,0 +1,83 @@
+"""Tests for the incremental history decoder (services/history_stream.py).
+
+Every case feeds the same document in several chunkings — including one byte
+at a time — and checks the matches against a plain json.loads walk, which is
+also what the whole-body path (``incremental=False``) must reproduce.
+"""
+
+import asyncio
+import json
+import random
+from unittest import TestCase
+
+from services import history_stream
+
+
+async def _aiter(chunks):
+    for c in chunks:
+        yield c
+
+
+def _chunked(body: bytes, size: int) -> list[bytes]:
+    return [body[i:i + size] for i in range(0, len(body), size)]
+
+
+def _collect(body: bytes, match, size: int, incremental: bool = True) -> list:
+    async def run():
+        chunks = _aiter(_chunked(body, size))
+        return [item async for item in history_stream.iter_matches(chunks, match, incremental)]
+
+    return asyncio.run(run())
+
+
+class IncrementalParserTests(TestCase):
+    def test_i3x_points_errors_and_unmatched_noise(self) -> None:
+        doc = {
+            "tag/a": {"data": [{"value": 1.5, "quality": "GOOD", "timestamp": "2026-05-10T00:00:00Z"},
+                               {"value": True, "quality": "BAD", "timestamp": "2026-05-10T00:01:00Z"}],
+                      "meta": {"nested": [1, 2, {"x": None}]}},
+            "tag/b": {"error": {"code": 404, "message": "not found"}},
+            "tag/ü": {"data": [{"value": -12e-3, "quality": "GOOD", "timestamp": "2026-05-10T00:02:00Z"}]},
+        }
+        body = json.dumps(doc, ensure_ascii=False).encode("utf-8")
+        expected = [
+            (("tag/a", "data", 0), doc["tag/a"]["data"][0]),
+            (("tag/a", "data", 1), doc["tag/a"]["data"][1]),
+            (("tag/b", "error"), doc["tag/b"]["error"]),
+            (("tag/ü", "data", 0), doc["tag/ü"]["data"][0]),
+        ]
+        for size in (1, 2, 7, 64, len(body)):
+            self.assertEqual(_collect(body, history_stream.i3x_history_match, size), expected, size)
+        self.assertEqual(_collect(body, history_stream.i3x_history_match, 7, incremental=False), expected)
+
+    def test_bare_number_split_across_chunks_is_not_cut_short(self) -> None:
+        body = b'{"tl": [{"d": [{"t": "x", "v": 12345.678, "q": 192}, 42]}]}'
+        for size in range(1, 12):
+            got = _collect(body, history_stream.legacy_history_match, size)
+            self.assertEqual([v for _, v in got], [{"t": "x", "v": 12345.678, "q": 192}, 42])
+
+    def test_random_documents_match_json_loads(self) -> None:
+        rng = random.Random(7)
+        for _ in range(25):
+            points = [
+                {"t": f"2026-05-10T00:{i % 60:02d}:00Z", "v": rng.choice([rng.random() * 100, True, 3, None]),
+                 "q": rng.choice([0, 192])}
+                for i in range(rng.randint(0, 40))
+            ]
+            body = json.dumps({"tl": [{"d": points}, {"d": [{"ignored": 1}]}], "extra": "s\"}"}).encode()
+            size = rng.randint(1, 50)
+            got = _collect(body, history_stream.legacy_history_match, size)
+            self.assertEqual([v for _, v in got], points)
+            self.assertEqual(_collect(body, history_stream.legacy_history_match, size, incremental=False), got)
+
+    def test_truncated_body_raises(self) -> None:
+        body = b'{"tl": [{"d": [{"t": "x", "v": 1, "q": 192}, {"t": "y"'
+        for incremental in (True, False):
+            with self.assertRaises(ValueError):
+                _collect(body, history_stream.legacy_history_match, 5, incremental)
+
+    def test_root_keys_are_recorded_without_building_values(self) -> None:
+        parser = history_stream.IncrementalJSONParser(lambda path: False)
+        list(parser.feed('{"a": [1, 2], "b": {"c": 3}}'))
+        list(parser.close())
+        self.assertEqual(parser.root_keys, {"a", "b"})
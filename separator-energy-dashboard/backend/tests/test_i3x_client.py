@@ -1,11 +1,71 @@
-from datetime import datetime, timezone
+import asyncio
+import json
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
 from unittest import IsolatedAsyncioTestCase, TestCase
 from unittest.mock import AsyncMock, MagicMock, patch
 
+import httpx
+
 from services import i3x_client
+from services.circuit_breaker import historian_breaker
+from services.historian_scheduler import INTERACTIVE, PREWARM, HistorianScheduler, current_priority
 from config import I3X_TAGS
 
 
+# ============================================================================
+# Streaming /history fake
+# ============================================================================
+class _FakeStreamResponse:
+    """Just enough of httpx.Response for i3x_client._stream_history. The body
+    is served in small, uneven slices so tests exercise the incremental
+    decoder across token boundaries."""
+
+    def __init__(self, status_code: int, body: bytes) -> None:
+        self.status_code = status_code
+        self._body = body
+
+    def raise_for_status(self) -> None:
+        if self.status_code >= 400:
+            request = httpx.Request("POST", "http://historian/i3x/objects/history")
+            raise httpx.HTTPStatusError(
+                "upstream error", request=request,
+                response=httpx.Response(self.status_code, request=request),
+            )
+
+    async def aiter_bytes(self):
+        pos, step = 0, 7
+        while pos < len(self._body):
+            yield self._body[pos:pos + step]
+            pos += step
+            step = 7 if step > 40 else step + 5
+
+
+class _FakeStreamClient:
+    """handler(request_json) -> body dict, or (status, body); may raise."""
+
+    def __init__(self, handler) -> None:
+        self.handler = handler
+        self.calls: list[dict] = []
+
+    @asynccontextmanager
+    async def stream(self, method: str, path: str, json=None):
+        self.calls.append(json)
+        result = self.handler(json)
+        status, body = result if isinstance(result, tuple) else (200, result)
+        yield _FakeStreamResponse(status, _dumps(body))
+
+
+def _dumps(body) -> bytes:
+    return json.dumps(body).encode("utf-8")
+
+
+def _history_upstream(handler):
+    """Patch get_client with a streaming fake driven by ``handler``."""
+    fake = _FakeStreamClient(handler)
+    return patch("services.i3x_client.get_client", new_callable=AsyncMock, return_value=fake)
+
+
 # ============================================================================
 # Pure unit tests
 # ============================================================================
@@ -98,7 +158,7 @@ class FetchTagHistoryTests(IsolatedAsyncioTestCase):
                 ]
             }
         }
-        with patch("services.i3x_client._post", new_callable=AsyncMock, return_value=payload):
+        with _history_upstream(lambda request: payload):
             result = await i3x_client.fetch_tag_history("running", start, end)
 
         self.assertEqual(len(result), 1)
@@ -120,7 +180,7 @@ class FetchTagHistoryTests(IsolatedAsyncioTestCase):
                 ]
             }
         }
-        with patch("services.i3x_client._post", new_callable=AsyncMock, return_value=payload):
+        with _history_upstream(lambda request: payload):
             result = await i3x_client.fetch_tag_history("motor_amps", start, end)
 
         self.assertEqual(len(result), 1, "boundary point must NOT be filtered out")
@@ -139,7 +199,7 @@ class FetchTagHistoryTests(IsolatedAsyncioTestCase):
                 ]
             }
         }
-        with patch("services.i3x_client._post", new_callable=AsyncMock, return_value=payload):
+        with _history_upstream(lambda request: payload):
             result = await i3x_client.fetch_tag_history("motor_amps", start, end)
 
         self.assertEqual(result[0]["t"], "2026-05-10T13:30:00.000Z")
@@ -162,7 +222,7 @@ class FetchAllTagsTests(IsolatedAsyncioTestCase):
         end = datetime(2026, 5, 10, 14, 0, tzinfo=timezone.utc)
 
         payload = {eid: {"data": []} for eid in I3X_TAGS.values()}
-        with patch("services.i3x_client._post", new_callable=AsyncMock, return_value=payload):
+        with _history_upstream(lambda request: payload):
             result = await i3x_client.fetch_all_tags(start, end)
 
         for alias in I3X_TAGS:
@@ -170,6 +230,208 @@ class FetchAllTagsTests(IsolatedAsyncioTestCase):
             self.assertEqual(result[alias], [], f"alias {alias!r} should be empty list")
 
 
+class ChunkWindowTests(TestCase):
+    def test_short_window_is_a_single_chunk(self) -> None:
+        start = datetime(2026, 5, 10, 13, 0, tzinfo=timezone.utc)
+        end = datetime(2026, 5, 10, 14, 0, tzinfo=timezone.utc)
+        self.assertEqual(i3x_client._chunk_window(start, end), [(start, end)])
+
+    def test_long_window_splits_on_utc_day_boundaries(self) -> None:
+        start = datetime(2026, 5, 10, 13, 0, tzinfo=timezone.utc)
+        end = datetime(2026, 5, 13, 2, 0, tzinfo=timezone.utc)
+        chunks = i3x_client._chunk_window(start, end)
+        self.assertEqual(len(chunks), 4)
+        self.assertEqual(chunks[0], (start, datetime(2026, 5, 11, tzinfo=timezone.utc)))
+        self.assertEqual(chunks[-1], (datetime(2026, 5, 13, tzinfo=timezone.utc), end))
+        for (_, hi), (lo, _) in zip(chunks, chunks[1:]):
+            self.assertEqual(hi, lo, "chunks must tile the window without gaps")
+
+
+def _hourly_history(request: dict) -> dict:
+    """Fake Timebase /history: one motor_amps point per hour on the hour,
+    inclusive of both ends, plus a boundary seed from before startTime."""
+    from datetime import timedelta
+
+    start = i3x_client._parse_iso(request["startTime"])
+    end = i3x_client._parse_iso(request["endTime"])
+    t = start.replace(minute=0, second=0, microsecond=0)
+    data = []
+    if t < start:
+        data.append({"value": t.hour, "quality": "GOOD", "timestamp": i3x_client._iso_utc(t)})
+        t += timedelta(hours=1)
+    elif t == start:
+        prior = t - timedelta(hours=1)
+        data.append({"value": prior.hour, "quality": "GOOD", "timestamp": i3x_client._iso_utc(prior)})
+    while t <= end:
+        data.append({"value": t.hour, "quality": "GOOD", "timestamp": i3x_client._iso_utc(t)})
+        t += timedelta(hours=1)
+    return {eid: {"data": list(data)} for eid in request["elementIds"]}
+
+
+class ChunkedFetchAllTagsTests(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        historian_breaker.reset()
+        self._patchers = [patch("services.i3x_client._RETRY_BACKOFF_SECONDS", 0)]
+        for p in self._patchers:
+            p.start()
+        i3x_client._history_slots = None
+        self.start = datetime(2026, 5, 10, 20, 30, tzinfo=timezone.utc)
+        self.end = datetime(2026, 5, 12, 4, 0, tzinfo=timezone.utc)
+
+    async def asyncTearDown(self) -> None:
+        for p in self._patchers:
+            p.stop()
+        historian_breaker.reset()
+
+    async def test_stitched_chunks_match_a_single_request(self) -> None:
+        with _history_upstream(_hourly_history) as get_client:
+            result = await i3x_client.fetch_all_tags(self.start, self.end)
+        self.assertEqual(len(get_client.return_value.calls), 3)
+
+        expected = [
+            i3x_client._to_contract_point(p, start=self.start)
+            for p in _hourly_history({
+                "elementIds": ["x"],
+                "startTime": i3x_client._iso_utc(self.start),
+                "endTime": i3x_client._iso_utc(self.end),
+            })["x"]["data"]
+        ]
+        self.assertEqual(result["motor_amps"], expected)
+        times = [p["t"] for p in result["motor_amps"]]
+        self.assertEqual(len(times), len(set(times)), "boundary points must be de-duplicated")
+
+    async def test_failed_chunk_is_retried_individually(self) -> None:
+        failures = {"left": 1}
+
+        def flaky(request):
+            if request["startTime"].startswith("2026-05-11") and failures["left"]:
+                failures["left"] -= 1
+                return 503, {"error": "upstream hiccup"}
+            return _hourly_history(request)
+
+        with _history_upstream(flaky) as get_client:
+            result = await i3x_client.fetch_all_tags(self.start, self.end)
+        self.assertEqual(len(get_client.return_value.calls), 4, "only the failed chunk is re-requested")
+        self.assertIn("2026-05-11T12:00:00.000Z", [p["t"] for p in result["motor_amps"]])
+
+    async def test_permanently_failed_chunk_leaves_the_rest_of_the_window(self) -> None:
+        def broken_middle(request):
+            if request["startTime"].startswith("2026-05-11"):
+                raise httpx.ConnectError("upstream down for this day")
+            return _hourly_history(request)
+
+        with _history_upstream(broken_middle):
+            result = await i3x_client.fetch_all_tags(self.start, self.end)
+        times = [p["t"] for p in result["motor_amps"]]
+        self.assertIn("2026-05-10T21:00:00.000Z", times)
+        self.assertIn("2026-05-12T03:00:00.000Z", times)
+        self.assertFalse(any(t.startswith("2026-05-11T1") for t in times))
+
+    async def test_strict_mode_raises_on_exhausted_chunk(self) -> None:
+        def broken_middle(request):
+            if request["startTime"].startswith("2026-05-11"):
+                raise httpx.ConnectError("upstream down for this day")
+            return _hourly_history(request)
+
+        with _history_upstream(broken_middle):
+            with self.assertRaises(httpx.ConnectError):
+                await i3x_client.fetch_all_tags(self.start, self.end, strict=True)
+
+    async def test_partial_content_chunk_is_bisected(self) -> None:
+        truncated_once = {"done": False}
+
+        def truncating(request):
+            if not truncated_once["done"]:
+                truncated_once["done"] = True
+                return 206, _hourly_history(request)
+            return _hourly_history(request)
+
+        start = datetime(2026, 5, 10, 0, 0, tzinfo=timezone.utc)
+        end = datetime(2026, 5, 10, 8, 0, tzinfo=timezone.utc)
+        with _history_upstream(truncating) as get_client:
+            result = await i3x_client.fetch_all_tags(start, end)
+        self.assertEqual(len(get_client.return_value.calls), 3)
+        self.assertEqual([p["v"] for p in result["motor_amps"]], list(range(9)))
+
+    async def test_columnar_result_matches_point_contract(self) -> None:
+        with _history_upstream(_hourly_history):
+            points = await i3x_client.fetch_all_tags(self.start, self.end)
+            cols = await i3x_client.fetch_all_tags(self.start, self.end, columnar=True)
+
+        amps = cols["motor_amps"]
+        self.assertEqual(amps.t_ns.dtype.name, "int64")
+        self.assertEqual(amps.to_points(), points["motor_amps"])
+        # Boolean tags come back typed: hour values coerce to 1/0.
+        self.assertEqual(cols["running"].values.dtype.name, "int8")
+        self.assertEqual(
+            cols["running"].values.tolist(),
+            [int(bool(p["v"])) for p in points["running"]],
+        )
+
+    async def test_open_breaker_fails_fast_without_retries(self) -> None:
+        def down(request):
+            raise httpx.ConnectError("connection refused")
+
+        with _history_upstream(down) as get_client:
+            result = await i3x_client.fetch_all_tags(self.start, self.end)
+            calls_while_closed = len(get_client.return_value.calls)
+            again = await i3x_client.fetch_all_tags(self.start, self.end)
+
+        self.assertEqual(result["motor_amps"], [])
+        self.assertEqual(again["motor_amps"], [])
+        self.assertEqual(historian_breaker.state, "open")
+        self.assertEqual(len(get_client.return_value.calls), calls_while_closed, "open breaker must not call upstream")
+
+    async def test_chunk_slots_go_to_the_most_urgent_read(self) -> None:
+        release = asyncio.Event()
+        order: list[int] = []
+
+        async def stream(client, request, start, allow_partial, strict=False):
+            await release.wait()
+            order.append(current_priority())
+            return {}
+
+        async def read(priority: int, day: int) -> None:
+            async with HistorianScheduler().slot(priority):
+                lo = datetime(2026, 5, day, tzinfo=timezone.utc)
+                await i3x_client._fetch_history_chunk(None, [], lo, lo + timedelta(hours=1))
+
+        with patch.object(i3x_client, "I3X_HISTORY_MAX_CONCURRENCY", 1), \
+             patch.object(i3x_client, "_stream_history", stream):
+            reads = [asyncio.create_task(read(PREWARM, day)) for day in (1, 2, 3)]
+            for _ in range(5):
+                await asyncio.sleep(0)
+            reads.append(asyncio.create_task(read(INTERACTIVE, 4)))
+            for _ in range(5):
+                await asyncio.sleep(0)
+            release.set()
+            await asyncio.gather(*reads)
+        # The first prewarm chunk already held the slot; the interactive one
+        # overtook the two still queued.
+        self.assertEqual(order, [PREWARM, INTERACTIVE, PREWARM, PREWARM])
+
+    async def test_top_level_error_body_is_a_failure(self) -> None:
+        with _history_upstream(lambda request: {"error": "dataset offline"}):
+            with self.assertRaises(RuntimeError):
+                await i3x_client.fetch_all_tags(self.start, self.start, strict=True)
+
+
+    async def test_per_tag_error_fails_only_strict_reads(self) -> None:
+        eid_process = I3X_TAGS["process"]
+
+        def process_offline(request):
+            body = _hourly_history(request)
+            body[eid_process] = {"error": "tag offline"}
+            return body
+
+        with _history_upstream(process_offline):
+            result = await i3x_client.fetch_all_tags(self.start, self.end)
+            with self.assertRaises(i3x_client.TagError):
+                await i3x_client.fetch_all_tags(self.start, self.end, strict=True)
+        self.assertEqual(result["process"], [])
+        self.assertTrue(result["motor_amps"])
+
+
 class FetchCurrentValuesTests(IsolatedAsyncioTestCase):
     async def asyncSetUp(self) -> None:
         self._get_client_patcher = patch(
@@ -0,0 +1,125 @@
+"""Tests for the /api/energy/stream fan-out (services/live_stream.py):
+one encode per tick shared by every subscriber, timeline minutes with
+Last-Event-ID resume, heartbeats, and dropping a client that falls behind."""
+
+import asyncio
+import json
+from datetime import datetime, timezone
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import AsyncMock, patch
+
+from services import processing
+from services.live_stream import HEARTBEAT, RETRY, LiveStream
+
+M0 = int(datetime(2026, 7, 14, 18, 0, tzinfo=timezone.utc).timestamp()) // 60
+
+
+def _append(n: int, first: int) -> None:
+    for i in range(n):
+        processing._ring.append(first + i, 40.0 + i, "Processing", "On-Peak", 0.31, "2nd Shift", 0.1 * i)
+
+
+def _events(chunk: bytes) -> list[tuple[str, dict]]:
+    events = []
+    for block in chunk.decode().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines() if not line.startswith(":"))
+        if "event" in fields:
+            events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+class LiveStreamTests(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        processing._reset_for_tests()
+        _append(5, M0)
+        self.stream = LiveStream(queue_frames=4, heartbeat_seconds=60)
+        self.stream.publish()  # a tick before anyone listens: sets the cursor
+
+    async def asyncTearDown(self) -> None:
+        self.stream.close_all()
+        processing._reset_for_tests()
+
+    async def _subscribe(self, last_event_id=None):
+        client = self.stream.subscribe(last_event_id)
+        first = await anext(client)
+        self.assertTrue(first.startswith(RETRY))
+        self.assertEqual(_events(first)[0][0], "metrics")
+        return client
+
+    async def test_every_client_gets_the_same_frames(self) -> None:
+        a, b = await self._subscribe(), await self._subscribe()
+        _append(2, M0 + 5)
+        self.stream.publish()
+
+        got_a = [await anext(a), await anext(a)]
+        got_b = [await anext(b), await anext(b)]
+        self.assertEqual(got_a, got_b)
+        self.assertEqual(got_a[0], got_b[0])
+        (metrics,), (timeline,) = _events(got_a[0]), _events(got_a[1])
+        self.assertEqual(metrics, ("metrics", processing.current_metrics()))
+        self.assertEqual(timeline[0], "timeline")
+        self.assertEqual(timeline[1]["points"], processing.timeline_points()[-2:])
+        self.assertIn(f"id: {processing.timeline_seq()}\n".encode(), got_a[1])
+        self.assertEqual(self.stream.stats(), {"clients": 2, "frames": 2, "dropped": 0})
+
+        # No new minute: metrics only.
+        self.stream.publish()
+        self.assertEqual(_events(await anext(a))[0][0], "metrics")
+        await a.aclose()
+        self.assertEqual(self.stream.stats()["clients"], 1)
+
+    async def test_resume_from_last_event_id(self) -> None:
+        cursor = processing.timeline_seq()
+        _append(3, M0 + 5)
+        client = await self._subscribe(str(cursor))
+        (event, delta), = _events(await anext(client))
+        self.assertEqual(event, "timeline")
+        self.assertFalse(delta["reset"])
+        self.assertEqual([p["timestamp"][11:16] for p in delta["points"]], ["18:05", "18:06", "18:07"])
+
+    async def test_unusable_last_event_id_is_ignored(self) -> None:
+        _append(3, M0 + 5)
+        client = await self._subscribe("²")
+        self.stream.publish()
+        self.assertEqual(_events(await anext(client))[0][0], "metrics")
+
+    async def test_slow_client_is_dropped_not_buffered(self) -> None:
+        slow, fast = await self._subscribe(), await self._subscribe()
+        for _ in range(4):
+            self.stream.publish()
+            await anext(fast)
+        self.stream.publish()  # slow's queue is full
+        await anext(fast)
+        self.assertEqual(self.stream.stats()["dropped"], 1)
+        self.assertEqual(self.stream.stats()["clients"], 1)
+        with self.assertRaises(StopAsyncIteration):
+            await anext(slow)
+
+    async def test_heartbeat_when_idle_and_close_all_ends_streams(self) -> None:
+        self.stream.heartbeat_seconds = 0.01
+        client = await self._subscribe()
+        self.assertEqual(await anext(client), HEARTBEAT)
+        self.stream.close_all()
+        with self.assertRaises(StopAsyncIteration):
+            await asyncio.wait_for(anext(client), 1)
+        self.assertEqual(self.stream.stats()["clients"], 0)
+
+
+class TickListenerTests(IsolatedAsyncioTestCase):
+    async def asyncTearDown(self) -> None:
+        processing._reset_for_tests()
+
+    async def test_loop_calls_listeners_after_each_tick(self) -> None:
+        calls = []
+        processing.add_tick_listener(lambda: calls.append(1))
+        processing.add_tick_listener(lambda: 1 / 0)  # logged, doesn't stop the loop
+
+        with patch.object(processing, "_tick", AsyncMock()), \
+                self.assertLogs("services.processing", "ERROR"):
+            task = asyncio.create_task(processing._loop())
+            for _ in range(100):
+                await asyncio.sleep(0)
+                if calls:
+                    break
+            task.cancel()
+        self.assertEqual(calls, [1])
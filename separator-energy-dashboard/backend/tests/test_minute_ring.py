@@ -0,0 +1,168 @@
+"""Tests for the processing loop's minute ring buffer (services/minute_ring.py)
+and the readers built on it: /api/energy/timeline points and the serialized
+body (services/timeline_cache.py), and i3X derived history."""
+
+import json
+from datetime import datetime, timedelta, timezone
+from unittest import IsolatedAsyncioTestCase, TestCase
+
+import numpy as np
+
+from i3x_server import envelope, values
+from services import processing
+from services.minute_ring import MinuteRing
+from services.timeline_cache import TimelineBody, points
+
+T0 = datetime(2026, 7, 14, 18, 0, tzinfo=timezone.utc)
+M0 = int(T0.timestamp()) // 60
+
+
+def _fill(ring: MinuteRing, n: int, first: int = M0) -> None:
+    for i in range(n):
+        ring.append(first + i, None if i % 7 == 3 else 40.0 + i / 3, "Processing" if i % 2 else "CIP",
+                    "On-Peak", None if i % 11 == 5 else 0.31, "2nd Shift", 0.05 * i)
+
+
+class MinuteRingTests(TestCase):
+    def test_view_is_contiguous_and_ordered_across_wraparound(self) -> None:
+        ring = MinuteRing(10)
+        self.assertEqual(len(ring.view()), 0)
+        self.assertIsNone(ring.last_minute())
+        for n in (1, 9, 10, 11, 25):
+            with self.subTest(n=n):
+                ring.clear()
+                _fill(ring, n)
+                rows = ring.view()
+                self.assertEqual(len(rows), min(n, 10))
+                np.testing.assert_array_equal(rows["minute"], M0 + np.arange(max(0, n - 10), n))
+                self.assertTrue(np.shares_memory(rows, ring._rows))
+                self.assertEqual(ring.last_minute(), M0 + n - 1)
+
+    def test_between_is_inclusive_and_a_view(self) -> None:
+        ring = MinuteRing(10)
+        _fill(ring, 14)
+        np.testing.assert_array_equal(ring.between(M0 + 6, M0 + 8)["minute"], [M0 + 6, M0 + 7, M0 + 8])
+        np.testing.assert_array_equal(ring.between(M0, M0 + 4)["minute"], [M0 + 4])
+        self.assertEqual(len(ring.between(M0 + 20, M0 + 30)), 0)
+        self.assertTrue(np.shares_memory(ring.between(M0 + 5, M0 + 9), ring._rows))
+
+    def test_extend_matches_append(self) -> None:
+        appended, extended = MinuteRing(10), MinuteRing(10)
+        _fill(appended, 13)
+        source = MinuteRing(20)
+        _fill(source, 13)
+        extended.extend(source.view()[:4])
+        extended.extend(source.view()[4:])
+        for name in appended.view().dtype.names:
+            if name != "seq":
+                np.testing.assert_array_equal(extended.view()[name], appended.view()[name])
+        self.assertTrue((np.diff(extended.view()["seq"]) == 1).all())
+        self.assertEqual(extended.view()["seq"][-1], extended.seq)
+
+
+class TimelineBodyTests(TestCase):
+    def test_incremental_body_matches_a_full_encode(self) -> None:
+        ring, body = MinuteRing(10), TimelineBody()
+        self.assertEqual(body.get(ring)[0], b"[]")
+        etags = set()
+        for n in range(1, 25):
+            _fill(ring, 1, first=M0 + n)
+            got, etag = body.get(ring)
+            self.assertEqual(json.loads(got), points(ring.view()))
+            etags.add(etag)
+        self.assertEqual(len(etags), 24)
+        self.assertEqual(body.get(ring)[1], etag)  # nothing new, same tag
+        self.assertTrue(etag.startswith('"') and not etag.startswith('W/'))
+
+    def test_clear_and_bulk_extend_rebuild(self) -> None:
+        ring, body = MinuteRing(10), TimelineBody()
+        _fill(ring, 5)
+        body.get(ring)
+        ring.clear()
+        _fill(ring, 5, first=M0 + 100)
+        self.assertEqual(json.loads(body.get(ring)[0]), points(ring.view()))
+        _fill(ring, 30, first=M0 + 200)  # more than a full lap since the last look
+        self.assertEqual(json.loads(body.get(ring)[0]), points(ring.view()))
+
+
+class ReaderTests(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        processing._reset_for_tests()
+        _fill(processing._ring, 30)
+
+    async def asyncTearDown(self) -> None:
+        processing._reset_for_tests()
+
+    async def test_timeline_points_shape(self) -> None:
+        points = processing.timeline_points()
+        self.assertEqual(len(points), 30)
+        kw = 40.0 + 4 / 3
+        kwh = round(kw / 60.0, 4)
+        self.assertEqual(points[4], {
+            "timestamp":  "2026-07-14T18:04:00Z",
+            "kw":         round(kw, 2),
+            "kwh":        kwh,
+            "cost_usd":   round(kwh * 0.31, 4),
+            "state":      "CIP",
+            "color":      points[0]["color"],
+            "tou_period": "On-Peak",
+            "tou_rate":   0.31,
+            "shift":      "2nd Shift",
+        })
+        # Unknown kW and rate read as zero, as the dict-based buffer did.
+        self.assertEqual((points[3]["kw"], points[3]["kwh"]), (0.0, 0.0))
+        self.assertEqual((points[5]["tou_rate"], points[5]["cost_usd"]), (0.0, 0.0))
+        self.assertNotEqual(points[1]["color"], points[0]["color"])
+
+    async def test_delta_since_sequence_and_timestamp(self) -> None:
+        seq = processing.timeline_seq()
+        empty = processing.timeline_since(seq)
+        self.assertEqual((empty["seq"], empty["reset"], empty["points"]), (seq, False, []))
+        self.assertIsNone(empty["partial"])  # no tick yet
+
+        _fill(processing._ring, 2, first=M0 + 30)
+        delta = processing.timeline_since(seq)
+        self.assertEqual(delta["seq"], seq + 2)
+        self.assertFalse(delta["reset"])
+        self.assertEqual(delta["points"], processing.timeline_points()[-2:])
+        self.assertEqual(processing.timeline_since(delta["seq"])["points"], [])
+
+        by_time = processing.timeline_since(T0 + timedelta(minutes=29, seconds=1))
+        self.assertEqual([p["timestamp"][11:16] for p in by_time["points"]], ["18:30", "18:31"])
+
+    async def test_delta_resets_when_the_cursor_fell_off_the_buffer(self) -> None:
+        first_seq = int(processing.buffer_rows()["seq"][0])
+        _fill(processing._ring, processing._ring.capacity, first=M0 + 30)
+        for cursor in (first_seq, processing.timeline_seq() + 5):
+            delta = processing.timeline_since(cursor)
+            self.assertTrue(delta["reset"])
+            self.assertEqual(len(delta["points"]), processing._ring.capacity)
+
+        # Restored rows get new sequence numbers, after any earlier cursor.
+        cursor = processing.timeline_seq()
+        processing.restore(processing.buffer_columns(), None, 0.0, T0)
+        self.assertEqual(len(processing.timeline_since(cursor)["points"]), processing._ring.capacity)
+
+    async def test_derived_history_filters_by_time(self) -> None:
+        start, end = T0 + timedelta(minutes=10, seconds=30), T0 + timedelta(minutes=13)
+        kw = values._derived_history({"latest_field": "kw"}, start, end)
+        self.assertEqual([p["timestamp"][11:16] for p in kw], ["18:11", "18:12", "18:13"])
+        self.assertEqual(kw[0]["value"], round(40.0 + 11 / 3, 2))
+
+        cost_today = values._derived_history({"latest_field": "cost_today"}, start, end)
+        self.assertEqual([p["value"] for p in cost_today], [0.55, 0.6, 0.65])
+        per_hour = values._derived_history({"latest_field": "cost_per_hour"}, start, end)
+        self.assertEqual(per_hour[0]["value"], round(round(40.0 + 11 / 3, 2) * 0.31, 2))
+        self.assertEqual(
+            [p["value"] for p in values._derived_history({"latest_field": "state"}, start, end)],
+            ["Processing", "CIP", "Processing"],
+        )
+        self.assertEqual(values._derived_history({"latest_field": "amps"}, start, end)[0]["value"], None)
+
+        # Unknown kW / rate are reported as such, not as a good 0.
+        start, end = T0 + timedelta(minutes=3), T0 + timedelta(minutes=5)
+        kw = values._derived_history({"latest_field": "kw"}, start, end)
+        per_hour = values._derived_history({"latest_field": "cost_per_hour"}, start, end)
+        self.assertEqual([(p["value"], p["quality"]) for p in kw][0], (None, envelope.QUALITY_BAD))
+        self.assertEqual(kw[2]["quality"], envelope.QUALITY_GOOD)
+        self.assertEqual([p["value"] for p in per_hour][::2], [None, None])
@@ -12,6 +12,7 @@ from unittest import IsolatedAsyncioTestCase
 from unittest.mock import AsyncMock, patch
 
 from services import processing
+from services.circuit_breaker import historian_breaker
 from services.state_engine import STATE_PROCESSING, STATE_SHUTDOWN
 
 
@@ -26,6 +27,10 @@ def _all_none_values() -> dict:
 class ProcessingTickTests(IsolatedAsyncioTestCase):
     async def asyncSetUp(self) -> None:
         processing._reset_for_tests()
+        historian_breaker.reset()
+
+    async def asyncTearDown(self) -> None:
+        historian_breaker.reset()
 
     async def test_tick_populates_latest_state(self) -> None:
         with patch(
@@ -96,14 +101,37 @@ class ProcessingTickTests(IsolatedAsyncioTestCase):
         # Default state when all booleans coerce to False is Shutdown.
         self.assertEqual(s.state, STATE_SHUTDOWN)
 
+    async def test_open_breaker_skips_the_historian_and_stretches_the_interval(self) -> None:
+        for _ in range(historian_breaker.failure_threshold):
+            historian_breaker.record_failure(RuntimeError("connect timeout"))
+
+        with patch(
+            "services.processing.historian_client.fetch_current_values",
+            new_callable=AsyncMock,
+            return_value=_good_values(),
+        ) as fetch:
+            await processing._tick()
+
+        fetch.assert_not_called()
+        s = processing.get_latest()
+        self.assertTrue(s.is_stale)
+        self.assertEqual(s.historian_state, "open")
+        self.assertIsNotNone(s.next_probe_at)
+        self.assertGreaterEqual(processing._next_tick_delay(), historian_breaker.seconds_until_probe())
+
+    async def test_closed_breaker_keeps_the_normal_interval(self) -> None:
+        self.assertEqual(processing._next_tick_delay(), float(processing.PROCESSING_INTERVAL_SECONDS))
+
     async def test_ring_buffer_trims_to_max_length(self) -> None:
-        # Stuff the buffer past its configured cap by pushing through the
-        # underlying deque (avoids needing to wait real time between ticks).
-        cap = processing._buffer.maxlen
-        self.assertIsNotNone(cap)
+        # Stuff the buffer past its configured cap by appending to the ring
+        # directly (avoids needing to wait real time between ticks).
+        cap = processing._ring.capacity
         for i in range(cap + 50):
-            processing._buffer.append((datetime.now(timezone.utc), {"kw": float(i)}))
-        self.assertEqual(len(processing._buffer), cap)
+            processing._ring.append(i, float(i), STATE_PROCESSING, "Off-Peak", 0.16, "1st Shift", 0.0)
+        self.assertEqual(processing.buffer_size(), cap)
+        rows = processing.buffer_rows()
+        self.assertEqual(rows["minute"][0], 50)
+        self.assertEqual(rows["kw"][-1], float(cap + 49))
 
     async def test_current_metrics_shape_matches_currentmetrics_schema(self) -> None:
         with patch(
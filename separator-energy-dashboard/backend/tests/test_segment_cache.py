@@ -0,0 +1,188 @@
+"""Tests for the closed-day segment cache (services/segment_cache.py).
+
+The upstream is a fake historian over fixed columnar series with
+Timebase-style clamped boundary seeds. Every assembled window is compared
+against a direct read of the same window, and the recorded calls show how
+much actually went over the wire.
+"""
+
+import asyncio
+import shutil
+import tempfile
+from datetime import datetime, timedelta, timezone
+from unittest import IsolatedAsyncioTestCase, TestCase
+from unittest.mock import patch
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+from services import segment_cache
+from services.lru_cache import LRUCache
+from services.tag_columns import TagColumns, datetime_to_ns
+
+ALIASES = ("motor_amps", "running", "cip", "process")
+ORIGIN = datetime(2026, 10, 25, tzinfo=timezone.utc)
+# US/Pacific falls back on 2026-11-01: that local day is 25 hours long.
+NOW = datetime(2026, 11, 4, 19, 30, tzinfo=timezone.utc)
+
+
+def _series(alias: str) -> TagColumns:
+    # cip changes rarely, so its seeds reach back across whole days.
+    step = timedelta(hours=30) if alias == "cip" else timedelta(minutes=7)
+    times, values = [], []
+    t, n = ORIGIN, 0
+    while t <= NOW:
+        times.append(datetime_to_ns(t))
+        values.append(n % 2 if alias != "motor_amps" else 40.0 + n % 13)
+        t += step
+        n += 1
+    return TagColumns.from_pairs(alias, times, values)
+
+
+class FakeHistorian:
+    def __init__(self) -> None:
+        self.series = {alias: _series(alias) for alias in ALIASES}
+        self.calls: list[tuple[datetime, datetime, bool]] = []
+        self.fail_strict = False
+        self.gate: asyncio.Event | None = None   # holds strict reads while set
+
+    async def __call__(self, start: datetime, end: datetime, strict: bool = False) -> dict:
+        self.calls.append((start, end, strict))
+        if strict and self.gate is not None:
+            await self.gate.wait()
+        if strict and self.fail_strict:
+            raise RuntimeError("historian down")
+        return self.direct(start, end)
+
+    def direct(self, start: datetime, end: datetime) -> dict:
+        return {
+            alias: cols.window(datetime_to_ns(start), datetime_to_ns(end))
+            for alias, cols in self.series.items()
+        }
+
+
+class SegmentCacheTests(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        segment_cache._reset_for_tests()
+        self.historian = FakeHistorian()
+        self._patchers = [
+            patch.object(segment_cache, "_TZ", ZoneInfo("US/Pacific")),
+            patch.object(segment_cache, "SEGMENT_CACHE_DIR", ""),
+            patch.object(segment_cache, "SEGMENT_CACHE_SETTLE_SECONDS", 3600.0),
+        ]
+        for p in self._patchers:
+            p.start()
+
+    async def asyncTearDown(self) -> None:
+        for p in self._patchers:
+            p.stop()
+        segment_cache._reset_for_tests()
+
+    async def _read(self, start: datetime, end: datetime) -> dict:
+        return await segment_cache.fetch_all_tags(start, end, upstream=self.historian, now=NOW)
+
+    def assertSameColumns(self, got: dict, want: dict) -> None:
+        self.assertEqual(set(got), set(want))
+        for alias in want:
+            np.testing.assert_array_equal(got[alias].t_ns, want[alias].t_ns, err_msg=alias)
+            np.testing.assert_array_equal(got[alias].values, want[alias].values, err_msg=alias)
+            self.assertEqual(got[alias].values.dtype, want[alias].values.dtype)
+
+    async def test_assembled_windows_match_direct_reads(self) -> None:
+        windows = [
+            (ORIGIN + timedelta(hours=13, minutes=3), NOW),                   # closed days + tail
+            (ORIGIN + timedelta(days=2, hours=1), ORIGIN + timedelta(days=4, hours=5)),  # closed only
+            (datetime(2026, 11, 1, 7, tzinfo=timezone.utc), datetime(2026, 11, 2, 8, tzinfo=timezone.utc)),  # local midnight to local midnight, DST day
+            (ORIGIN - timedelta(days=1), ORIGIN + timedelta(days=3)),         # starts before any history
+            (NOW - timedelta(minutes=30), NOW),                               # open day only
+        ]
+        for start, end in windows:
+            with self.subTest(start=start, end=end):
+                self.assertSameColumns(await self._read(start, end), self.historian.direct(start, end))
+
+    async def test_second_read_only_fetches_the_live_tail(self) -> None:
+        start = ORIGIN + timedelta(days=1, hours=2)
+        first = await self._read(start, NOW)
+        upstream_calls = len(self.historian.calls)
+        self.historian.calls.clear()
+
+        second = await self._read(start, NOW)
+        self.assertSameColumns(second, first)
+        self.assertEqual(len(self.historian.calls), 1)
+        tail_start, tail_end, _ = self.historian.calls[0]
+        # Last closed local day is Nov 3 (Pacific); the tail starts at its end.
+        self.assertEqual(tail_start + timedelta(milliseconds=1), datetime(2026, 11, 4, 8, tzinfo=timezone.utc))
+        self.assertEqual(tail_end, NOW)
+        self.assertEqual(upstream_calls, 2, "one run for all missing days plus the tail")
+
+    async def test_overlapping_window_fetches_only_missing_days(self) -> None:
+        await self._read(ORIGIN + timedelta(days=3), ORIGIN + timedelta(days=5))
+        self.historian.calls.clear()
+        start, end = ORIGIN + timedelta(days=1), ORIGIN + timedelta(days=6, hours=2)
+        got = await self._read(start, end)
+        self.assertSameColumns(got, self.historian.direct(start, end))
+        strict_runs = [c for c in self.historian.calls if c[2]]
+        self.assertEqual(len(strict_runs), 2, "one run before the cached days, one after")
+
+    async def test_disk_tier_survives_memory_loss(self) -> None:
+        tmp = tempfile.mkdtemp(prefix="segment-cache-")
+        self.addCleanup(shutil.rmtree, tmp, True)
+        start, end = ORIGIN + timedelta(hours=5), ORIGIN + timedelta(days=4)
+        with patch.object(segment_cache, "SEGMENT_CACHE_DIR", tmp):
+            first = await self._read(start, end)
+            segment_cache._memory.clear()
+            self.historian.calls.clear()
+            second = await self._read(start, end)
+
+        self.assertEqual(self.historian.calls, [])
+        self.assertSameColumns(second, first)
+        self.assertGreater(segment_cache.stats()["disk_hits"], 0)
+
+    async def test_failed_fill_falls_back_and_caches_nothing(self) -> None:
+        self.historian.fail_strict = True
+        start = ORIGIN + timedelta(days=1)
+        got = await self._read(start, NOW)
+        self.assertSameColumns(got, self.historian.direct(start, NOW))
+        self.assertEqual(len(segment_cache._memory), 0)
+        self.assertEqual(segment_cache.stats()["fallbacks"], 1)
+
+    async def test_fills_are_single_flight_per_day_not_serialized(self) -> None:
+        self.historian.gate = asyncio.Event()
+        a = (ORIGIN + timedelta(days=1), ORIGIN + timedelta(days=3))
+        b = (ORIGIN + timedelta(days=5), ORIGIN + timedelta(days=7))
+        reads = [asyncio.ensure_future(self._read(*w)) for w in (a, a, b)]
+        for _ in range(5):
+            await asyncio.sleep(0)
+
+        # Both disjoint runs are in flight together; the repeat of `a` joined.
+        self.assertEqual(len([c for c in self.historian.calls if c[2]]), 2)
+        self.historian.gate.set()
+        got = await asyncio.gather(*reads)
+        for window, result in zip((a, a, b), got):
+            self.assertSameColumns(result, self.historian.direct(*window))
+        self.assertEqual(len([c for c in self.historian.calls if c[2]]), 2)
+        self.assertEqual(segment_cache._filling, {})
+
+    async def test_run_without_any_points_is_not_cached(self) -> None:
+        start, end = ORIGIN - timedelta(days=5), ORIGIN - timedelta(days=2)
+        await self._read(start, end)
+        self.assertEqual(len(segment_cache._memory), 0)
+
+
+class LRUCacheTests(TestCase):
+    def test_evicts_least_recently_used_past_byte_budget(self) -> None:
+        evicted = []
+        cache = LRUCache(max_bytes=10, sizeof=len, on_evict=lambda k, v: evicted.append(k))
+        cache.put("a", "xxxx")
+        cache.put("b", "xxxx")
+        cache.get("a")
+        cache.put("c", "xxxx")
+        self.assertEqual(evicted, ["b"])
+        self.assertEqual(cache.keys(), ["a", "c"])
+        self.assertEqual(cache.stats()["bytes"], 8)
+
+    def test_oversized_entry_is_kept_alone(self) -> None:
+        cache = LRUCache(max_entries=5, max_bytes=3, sizeof=len)
+        cache.put("a", "x")
+        cache.put("b", "xxxxxx")
+        self.assertEqual(cache.keys(), ["b"])
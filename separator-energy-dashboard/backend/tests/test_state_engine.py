@@ -15,10 +15,14 @@ Covers:
 from datetime import datetime, timedelta, timezone
 from unittest import TestCase
 
-from services import state_engine
+import numpy as np
+import pandas as pd
+
+from services import state_engine, tag_columns
 from services.state_engine import (
     STATE_PROCESSING, STATE_CIP, STATE_IDLE, STATE_SHUTDOWN,
 )
+from tests.pandas_reference import build_dataframe_pandas
 
 
 def _iso(dt: datetime) -> str:
@@ -162,3 +166,200 @@ class BuildDataframeTests(TestCase):
         }
         df = state_engine.build_dataframe(raw)
         self.assertTrue((df["state"] == STATE_CIP).all())
+
+
+class ColumnarBuildDataframeTests(TestCase):
+    """The TagColumns fast path must produce exactly the frame the {t, v, q}
+    path does."""
+
+    def setUp(self) -> None:
+        self.start = datetime(2026, 5, 27, 6, 0, tzinfo=timezone.utc)
+
+    def _raw(self) -> dict[str, list[dict]]:
+        amps = [
+            {"t": _iso(self.start + timedelta(seconds=50 * i + 7)), "v": 40.0 + (i % 9), "q": 192}
+            for i in range(200)
+            if i % 17  # leave holes wider than the 30s nearest tolerance
+        ]
+        amps.append({"t": _iso(self.start + timedelta(minutes=190)), "v": None, "q": 192})
+
+        def toggles(period: int, first) -> list[dict]:
+            return [
+                {"t": _iso(self.start + timedelta(minutes=m, seconds=13)), "v": first if (m // period) % 2 else "false",
+                 "q": 192}
+                for m in range(0, 180, period)
+            ]
+
+        running = toggles(7, True)
+        running.insert(5, {"t": _iso(self.start + timedelta(minutes=31)), "v": "maybe", "q": 192})
+        return {
+            "motor_amps": amps,
+            "running":    running,
+            "cip":        toggles(41, 1),
+            "process":    toggles(23, "TRUE"),
+        }
+
+    def test_columnar_frame_matches_point_frame(self) -> None:
+        raw = self._raw()
+        expected = state_engine.build_dataframe(raw)
+        got = state_engine.build_dataframe(tag_columns.from_raw(raw))
+
+        self.assertFalse(expected.empty)
+        pd.testing.assert_frame_equal(got, expected)
+
+    def test_columnar_empty_tags_return_empty_frame(self) -> None:
+        raw = {alias: tag_columns.TagColumns.empty(alias) for alias in ("motor_amps", "running", "cip", "process")}
+        self.assertTrue(state_engine.build_dataframe(raw).empty)
+
+    def test_points_adapter_round_trips(self) -> None:
+        raw = self._raw()
+        cols = tag_columns.TagColumns.from_points("motor_amps", raw["motor_amps"])
+        back = cols.to_points()
+        self.assertEqual([p["t"] for p in back], [p["t"] for p in raw["motor_amps"]])
+        self.assertEqual([p["v"] for p in back[:-1]], [p["v"] for p in raw["motor_amps"][:-1]])
+        self.assertIsNone(back[-1]["v"])
+
+
+class AlignmentParityTests(TestCase):
+    """build_dataframe's searchsorted alignment against the pandas
+    Series/reindex implementation it replaced."""
+
+    ORIGIN = datetime(2026, 5, 27, 6, 0, tzinfo=timezone.utc)
+
+    def assertParity(self, raw: dict) -> pd.DataFrame:
+        expected = build_dataframe_pandas(raw)
+        got = state_engine.build_dataframe(raw)
+        pd.testing.assert_frame_equal(got, expected)
+        return got
+
+    def _random_columns(self, seed: int, seconds: int, step: int) -> dict:
+        rng = np.random.default_rng(seed)
+        origin_ns = tag_columns.datetime_to_ns(self.ORIGIN)
+        raw = {}
+        for alias in ("motor_amps", "running", "cip", "process"):
+            # Jittered, irregular sampling with gaps wider than the tolerance.
+            t = np.cumsum(rng.integers(1, 2 * step, size=seconds // step)).astype(np.int64) * 1_000_000_000
+            t = t[rng.random(len(t)) > 0.05] + origin_ns
+            if alias == "motor_amps":
+                v = np.round(rng.normal(40, 5, len(t)), 2)
+                v[rng.random(len(t)) < 0.01] = np.nan
+            else:
+                v = rng.choice(np.array([0, 1, tag_columns.BOOL_UNKNOWN], dtype=np.int8), size=len(t), p=[0.45, 0.5, 0.05])
+            raw[alias] = tag_columns.TagColumns(t, v)
+        return raw
+
+    def test_random_irregular_columns(self) -> None:
+        for seed in range(5):
+            with self.subTest(seed=seed):
+                self.assertFalse(self.assertParity(self._random_columns(seed, 6 * 3600, 20)).empty)
+
+    def test_nearest_ties_and_tolerance_edges(self) -> None:
+        t0 = self.ORIGIN
+        amps = [
+            (t0, 1.0),
+            (t0 + timedelta(seconds=90), 2.0),             # 30s from both 1:00 and 2:00 — tie goes later
+            (t0 + timedelta(minutes=2, seconds=30), 3.0),  # exactly at tolerance for 2:00 and 3:00
+            (t0 + timedelta(minutes=5, seconds=31), 4.0),  # 31s past 5:00 (dropped), 29s before 6:00
+            (t0 + timedelta(minutes=7), 5.0),
+        ]
+        raw = {
+            "motor_amps": tag_columns.TagColumns.from_pairs(
+                "motor_amps", [tag_columns.datetime_to_ns(t) for t, _ in amps], [v for _, v in amps]),
+            "running": tag_columns.TagColumns.from_pairs("running", [tag_columns.datetime_to_ns(t0)], [True]),
+            "cip": tag_columns.TagColumns.empty("cip"),
+            "process": tag_columns.TagColumns.from_pairs(
+                "process", [tag_columns.datetime_to_ns(t0 + timedelta(minutes=3))], [True]),
+        }
+        got = self.assertParity(raw)
+        self.assertEqual(got["motor_amps"].tolist(), [1.0, 2.0, 3.0, 3.0, 4.0, 5.0])
+
+    def test_point_lists_and_full_grid(self) -> None:
+        raw = {
+            "motor_amps": [{"t": _iso(self.ORIGIN + timedelta(minutes=m)), "v": 40.0 + m, "q": 192} for m in range(30)],
+            "running":    [{"t": _iso(self.ORIGIN + timedelta(minutes=m, seconds=5)), "v": m % 3 != 0, "q": 192}
+                           for m in range(0, 30, 4)],
+            "cip":        [{"t": _iso(self.ORIGIN), "v": "false", "q": 192}],
+            "process":    [{"t": _iso(self.ORIGIN + timedelta(minutes=10)), "v": "TRUE", "q": 192},
+                           {"t": _iso(self.ORIGIN + timedelta(minutes=12)), "q": 192}],
+        }
+        got = self.assertParity(raw)
+        self.assertEqual(got.index.freqstr, "min")
+
+    def test_missing_bool_tag_defaults_to_false(self) -> None:
+        raw = self._random_columns(7, 3600, 15)
+        del raw["cip"]
+        self.assertParity(raw)
+
+
+class IncrementalFrameBuilderTests(TestCase):
+    """Extending a frame with successive fetches must land on the same frame
+    build_dataframe() produces from all the points at once."""
+
+    ORIGIN = AlignmentParityTests.ORIGIN
+    MIN_NS = 60_000_000_000
+
+    def setUp(self) -> None:
+        self.raw = AlignmentParityTests._random_columns(self, 11, 6 * 3600, 20)
+        self.origin_ns = tag_columns.datetime_to_ns(self.ORIGIN)
+
+    def _upto(self, raw: dict, end_ns: int) -> dict:
+        return {a: c.window(self.origin_ns, end_ns) for a, c in raw.items()}
+
+    def _fetch(self, raw: dict, since, end_ns: int) -> dict:
+        # What the historian returns for [since - 1ms, end]: a clamped seed
+        # just before `since`, then the points.
+        start_ns = tag_columns.datetime_to_ns(since) - 1_000_000
+        return {a: c.window(start_ns, end_ns) for a, c in raw.items()}
+
+    def test_stepwise_extension_matches_full_build(self) -> None:
+        # Sparse booleans: the value in force comes from far behind the tail.
+        hour = 3600 * 10**9
+        self.raw["cip"] = tag_columns.TagColumns.from_pairs(
+            "cip", [self.origin_ns + hour, self.origin_ns + 5 * hour], [True, False])
+        self.raw["process"] = tag_columns.TagColumns.from_pairs(
+            "process", [self.origin_ns + 2 * hour, self.origin_ns + 2 * hour + 1], [True, None])
+        builder = state_engine.IncrementalFrameBuilder(timedelta(minutes=5))
+        end_ns = self.origin_ns + 4 * 3600 * 10**9
+        builder.extend(self._upto(self.raw, end_ns))
+        while end_ns < self.origin_ns + 6 * 3600 * 10**9:
+            end_ns += 7 * self.MIN_NS + 13 * 10**9
+            since = builder.resume_at()
+            builder.extend(self._fetch(self.raw, since, end_ns), since=since)
+        expected = state_engine.build_dataframe(self.raw)
+        pd.testing.assert_frame_equal(builder.frame, expected, check_freq=False)
+        self.assertEqual(builder.late_points, 0)
+
+    def test_late_points_within_reorder_window_are_folded_in(self) -> None:
+        end_ns = self.origin_ns + 3 * 3600 * 10**9
+        amps = self.raw["motor_amps"]
+        # The last three minutes of amps readings haven't reached the historian yet.
+        delayed = (amps.t_ns > end_ns - 3 * self.MIN_NS) & (amps.t_ns <= end_ns)
+        first = self._upto(self.raw, end_ns)
+        first["motor_amps"] = tag_columns.TagColumns(amps.t_ns[~delayed], amps.values[~delayed]).window(self.origin_ns, end_ns)
+
+        builder = state_engine.IncrementalFrameBuilder(timedelta(minutes=5))
+        builder.extend(first)
+        self.assertLess(len(builder.frame), len(state_engine.build_dataframe(self._upto(self.raw, end_ns))))
+        since = builder.resume_at()
+        builder.extend(self._fetch(self.raw, since, end_ns + 10 * self.MIN_NS), since=since)
+
+        expected = state_engine.build_dataframe(self._upto(self.raw, end_ns + 10 * self.MIN_NS))
+        pd.testing.assert_frame_equal(builder.frame, expected, check_freq=False)
+
+    def test_points_older_than_the_reorder_window_are_dropped(self) -> None:
+        end_ns = self.origin_ns + 3600 * 10**9
+        builder = state_engine.IncrementalFrameBuilder(timedelta(minutes=5))
+        builder.extend(self._upto(self.raw, end_ns))
+        before = builder.frame.copy()
+        stale = {"process": tag_columns.TagColumns.from_pairs("process", [end_ns - 20 * self.MIN_NS], [True])}
+        builder.extend(stale)
+        self.assertEqual(builder.late_points, 1)
+        pd.testing.assert_frame_equal(builder.frame, before)
+
+    def test_trim_and_empty_start(self) -> None:
+        builder = state_engine.IncrementalFrameBuilder()
+        self.assertTrue(builder.extend({a: tag_columns.TagColumns.empty(a) for a in self.raw}).empty)
+        self.assertIsNone(builder.resume_at())
+        builder.extend(self._upto(self.raw, self.origin_ns + 3600 * 10**9))
+        builder.trim(self.ORIGIN + timedelta(minutes=30, seconds=20))
+        self.assertEqual(builder.frame.index[0], pd.Timestamp(self.ORIGIN + timedelta(minutes=30)))
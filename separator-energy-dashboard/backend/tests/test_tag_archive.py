@@ -0,0 +1,189 @@
+"""Tests for the local tag archive (services/tag_archive.py).
+
+The upstream historian is a fake that records every window it was asked for,
+so each test can assert both what the caller got back and how much of it
+actually went over the wire.
+"""
+
+import os
+import shutil
+import tempfile
+from datetime import datetime, timedelta, timezone
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import patch
+
+from services import tag_archive
+
+ALIASES = ("motor_amps", "running", "cip", "process")
+
+
+def _iso(dt: datetime) -> str:
+    return dt.astimezone(timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+
+class FakeHistorian:
+    """One point per tag every 10 minutes from `origin`, with Timebase-style
+    boundary seeds clamped to startTime."""
+
+    def __init__(self, origin: datetime) -> None:
+        self.origin = origin
+        self.calls: list[tuple[datetime, datetime]] = []
+        self.fail = False
+
+    def _points(self, start: datetime, end: datetime) -> list[dict]:
+        out: list[dict] = []
+        t = self.origin
+        seed = None
+        while t <= end:
+            point = {"t": _iso(t), "v": float((t - self.origin).total_seconds() // 600), "q": 192}
+            if t < start:
+                seed = point
+            else:
+                out.append(point)
+            t += timedelta(minutes=10)
+        if seed is not None and (not out or out[0]["t"] != _iso(start)):
+            out.insert(0, {**seed, "t": _iso(start)})
+        return out
+
+    async def __call__(self, start: datetime, end: datetime, strict: bool = False) -> dict:
+        self.calls.append((start, end))
+        if self.fail:
+            if strict:
+                raise RuntimeError("historian down")
+            return {alias: [] for alias in ALIASES}
+        return {alias: self._points(start, end) for alias in ALIASES}
+
+
+class TagArchiveTests(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.tmp = tempfile.mkdtemp(prefix="tag-archive-")
+        self._patchers = [
+            patch.object(tag_archive, "TAG_ARCHIVE_DIR", self.tmp),
+            patch.object(tag_archive, "TAG_ARCHIVE_SETTLE_SECONDS", 0),
+            patch.object(tag_archive, "TAG_ARCHIVE_RETENTION_DAYS", 0),
+        ]
+        for p in self._patchers:
+            p.start()
+        tag_archive._reset_for_tests()
+        self.now = datetime.now(timezone.utc).replace(second=0, microsecond=0)
+        self.upstream = FakeHistorian(self.now - timedelta(days=10))
+
+    async def asyncTearDown(self) -> None:
+        for p in self._patchers:
+            p.stop()
+        tag_archive._reset_for_tests()
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    async def test_archived_read_matches_direct_historian_read(self) -> None:
+        start = self.now - timedelta(days=2, minutes=3)
+        end = self.now - timedelta(hours=1)
+        direct = await self.upstream(start, end)
+
+        via_archive = await tag_archive.fetch_all_tags(start, end, upstream=self.upstream)
+
+        self.assertEqual(via_archive["motor_amps"], direct["motor_amps"])
+        self.assertEqual(via_archive["running"][0]["t"], _iso(start), "seed must clamp to start")
+
+    async def test_second_read_only_pulls_the_unarchived_tail(self) -> None:
+        start = self.now - timedelta(days=3)
+        await tag_archive.fetch_all_tags(start, self.now - timedelta(days=1), upstream=self.upstream)
+        self.upstream.calls.clear()
+
+        await tag_archive.fetch_all_tags(start, self.now - timedelta(days=1), upstream=self.upstream)
+        # Window fully archived but high-watermark advances to "now" — one
+        # incremental pull from the old watermark, nothing before it.
+        self.assertEqual(len(self.upstream.calls), 1)
+        pulled_from, _ = self.upstream.calls[0]
+        self.assertGreaterEqual(pulled_from, self.now - timedelta(days=1, minutes=1))
+
+    async def test_backfill_before_low_watermark_replaces_synthetic_seed(self) -> None:
+        late_start = self.now - timedelta(days=1, minutes=5)
+        await tag_archive.fetch_all_tags(late_start, self.now, upstream=self.upstream)
+
+        early_start = self.now - timedelta(days=2)
+        got = await tag_archive.fetch_all_tags(early_start, self.now, upstream=self.upstream)
+        expected = await self.upstream(early_start, self.now)
+
+        self.assertEqual(got["motor_amps"], expected["motor_amps"])
+        times = [p["t"] for p in got["motor_amps"]]
+        self.assertNotIn(_iso(late_start), times, "old clamped seed must not survive backfill")
+
+    async def test_sync_failure_falls_through_and_keeps_watermark(self) -> None:
+        start = self.now - timedelta(days=1)
+        self.upstream.fail = True
+
+        got = await tag_archive.fetch_all_tags(start, self.now, upstream=self.upstream)
+
+        self.assertEqual(got["motor_amps"], [])
+        self.assertEqual(tag_archive.watermarks(), {"low": None, "high": None})
+
+    async def test_strict_read_raises_instead_of_returning_empty(self) -> None:
+        start = self.now - timedelta(days=1)
+        self.upstream.fail = True
+        with self.assertRaises(RuntimeError):
+            await tag_archive.fetch_all_tags(start, self.now, upstream=self.upstream, strict=True)
+
+        # Archived head, failing live tail.
+        self.upstream.fail = False
+        with patch.object(tag_archive, "TAG_ARCHIVE_SETTLE_SECONDS", 3600):
+            await tag_archive.fetch_all_tags(start, self.now - timedelta(hours=2), upstream=self.upstream)
+            self.upstream.fail = True
+            with self.assertRaises(RuntimeError):
+                await tag_archive.fetch_all_tags(start, self.now, upstream=self.upstream, strict=True)
+            self.assertEqual(
+                (await tag_archive.fetch_all_tags(start, self.now, upstream=self.upstream))["motor_amps"], [],
+            )
+
+    async def test_window_inside_settle_period_bypasses_archive(self) -> None:
+        with patch.object(tag_archive, "TAG_ARCHIVE_SETTLE_SECONDS", 3600):
+            await tag_archive.fetch_all_tags(
+                self.now - timedelta(minutes=30), self.now, upstream=self.upstream,
+            )
+        self.assertEqual(tag_archive.watermarks()["high"], None)
+
+    async def test_advancing_sync_appends_without_rewriting(self) -> None:
+        start = self.now - timedelta(hours=6)
+        with patch.object(tag_archive, "TAG_ARCHIVE_SETTLE_SECONDS", 3600):
+            await tag_archive.fetch_all_tags(start, self.now - timedelta(hours=2), upstream=self.upstream)
+        path = tag_archive._partition_path("motor_amps", tag_archive._day_key(self.now))
+        inode = os.stat(path).st_ino
+
+        with patch.object(tag_archive, "_atomic_write", wraps=tag_archive._atomic_write) as write:
+            got = await tag_archive.fetch_all_tags(start, self.now, upstream=self.upstream)
+        self.assertEqual([c.args[0] for c in write.call_args_list], [tag_archive._meta_path()])
+        self.assertEqual(os.stat(path).st_ino, inode)
+        self.assertEqual(got["motor_amps"], (await self.upstream(start, self.now))["motor_amps"])
+
+    async def test_repeat_reads_use_parsed_partitions(self) -> None:
+        start = self.now - timedelta(days=3)
+        end = self.now - timedelta(days=1)
+        first = await tag_archive.fetch_all_tags(start, end, upstream=self.upstream)
+        tag_archive._reset_for_tests()
+
+        with patch.object(tag_archive, "_load_partition", wraps=tag_archive._load_partition) as load:
+            self.assertEqual(await tag_archive.fetch_all_tags(start, end, upstream=self.upstream), first)
+            loads = load.call_count
+            self.assertGreater(loads, 0)
+            self.assertEqual(await tag_archive.fetch_all_tags(start, end, upstream=self.upstream), first)
+        self.assertEqual(load.call_count, loads)
+
+    async def test_retention_prunes_old_days_and_keeps_the_seed(self) -> None:
+        await tag_archive.fetch_all_tags(self.now - timedelta(days=8), self.now, upstream=self.upstream)
+
+        with patch.object(tag_archive, "TAG_ARCHIVE_RETENTION_DAYS", 3):
+            horizon = tag_archive._horizon()
+            await tag_archive.fetch_all_tags(self.now - timedelta(days=1), self.now, upstream=self.upstream)
+            self.assertEqual(tag_archive.watermarks()["low"], _iso(horizon))
+            for alias in ALIASES:
+                self.assertEqual(min(tag_archive._partition_days(alias)), tag_archive._day_key(horizon))
+
+            for start in (horizon, horizon + timedelta(minutes=5)):
+                got = await tag_archive.fetch_all_tags(start, self.now, upstream=self.upstream)
+                self.assertEqual(got["running"], (await self.upstream(start, self.now))["running"])
+
+            # Reaching past the horizon goes to the historian and archives nothing.
+            self.upstream.calls.clear()
+            early = horizon - timedelta(days=1)
+            got = await tag_archive.fetch_all_tags(early, self.now, upstream=self.upstream)
+            self.assertEqual(self.upstream.calls, [(early, self.now)])
+            self.assertEqual(tag_archive.watermarks()["low"], _iso(horizon))
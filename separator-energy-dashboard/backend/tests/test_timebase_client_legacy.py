@@ -6,26 +6,40 @@ markers. The client must drop them so downstream consumers (state_engine,
 fetch_current_values) get the clean {t, v, q} contract and never KeyError.
 """
 
-from datetime import datetime, timezone
+import json
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
 from unittest import IsolatedAsyncioTestCase
-from unittest.mock import AsyncMock, MagicMock, patch
+from unittest.mock import MagicMock, patch
 
 import httpx
 
 from services import timebase_client_legacy as legacy
 
 
-def _resp(points: list[dict]) -> MagicMock:
-    r = MagicMock()
-    r.raise_for_status = MagicMock()
-    r.json = MagicMock(return_value={"tl": [{"d": points}]})
-    return r
+def _streaming_client(points: list[dict]) -> MagicMock:
+    """A client whose stream() serves {"tl": [{"d": points}]} in small chunks."""
+    body = json.dumps({"tl": [{"d": points}]}).encode("utf-8")
+
+    async def aiter_bytes():
+        for i in range(0, len(body), 11):
+            yield body[i:i + 11]
+
+    @asynccontextmanager
+    async def stream(method, url, **kwargs):
+        r = MagicMock()
+        r.raise_for_status = MagicMock()
+        r.aiter_bytes = aiter_bytes
+        yield r
+
+    client = MagicMock()
+    client.stream = stream
+    return client
 
 
 class FetchTagHistoryFilteringTests(IsolatedAsyncioTestCase):
     async def _run(self, points: list[dict]) -> list[dict]:
-        client = MagicMock()
-        client.get = AsyncMock(return_value=_resp(points))
+        client = _streaming_client(points)
         start = datetime(2026, 5, 21, 0, 0, tzinfo=timezone.utc)
         end = datetime(2026, 5, 28, 0, 0, tzinfo=timezone.utc)
         return await legacy.fetch_tag_history("Some/Tag/Path", start, end, client)
@@ -64,3 +78,116 @@ class FetchTagHistoryFilteringTests(IsolatedAsyncioTestCase):
         ]
         result = await self._run(points)
         self.assertEqual(result, [])
+
+
+class _HistoryServer:
+    """Per-tag point lists served through a fake pooled client, honouring the
+    start/end query params at the API's one-second resolution."""
+
+    def __init__(self) -> None:
+        self.points: dict[str, list[dict]] = {}
+        self.requests: list[dict] = []
+        self.down = False
+
+    def client(self) -> MagicMock:
+        @asynccontextmanager
+        async def stream(method, url, params=None, **kwargs):
+            self.requests.append(params)
+            if self.down:
+                raise httpx.ConnectError("refused")
+            tag = params["tagname"]
+            window = [
+                p for p in self.points.get(tag, [])
+                if params["start"] <= p["t"] <= params["end"]
+            ]
+            body = json.dumps({"tl": [{"d": window}]}).encode("utf-8")
+
+            async def aiter_bytes():
+                yield body
+
+            r = MagicMock()
+            r.raise_for_status = MagicMock()
+            r.aiter_bytes = aiter_bytes
+            yield r
+
+        client = MagicMock()
+        client.stream = stream
+        return client
+
+
+def _t(dt: datetime) -> str:
+    return dt.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+class CurrentValueCursorTests(IsolatedAsyncioTestCase):
+    NOW = datetime(2026, 5, 21, 12, 0, 0, tzinfo=timezone.utc)
+
+    async def asyncSetUp(self) -> None:
+        self.server = _HistoryServer()
+        self.tags = {"motor_amps": "Separator/Amps", "running": "Separator/Running"}
+        self._patchers = [
+            patch.object(legacy, "TAGS", self.tags),
+            patch.object(legacy, "_client", self.server.client()),
+            patch.object(legacy, "historian_breaker", MagicMock(guard=_no_guard)),
+        ]
+        for p in self._patchers:
+            p.start()
+        legacy._cursors.clear()
+
+    async def asyncTearDown(self) -> None:
+        for p in self._patchers:
+            p.stop()
+        legacy._cursors.clear()
+
+    async def _current(self, now: datetime) -> dict:
+        with patch.object(legacy, "datetime", MagicMock(now=lambda tz: now, fromtimestamp=datetime.fromtimestamp)):
+            return await legacy.fetch_current_values()
+
+    async def test_follow_up_reads_start_at_the_cursor(self) -> None:
+        self.server.points = {
+            "Separator/Amps": [{"t": _t(self.NOW - timedelta(seconds=30)), "v": 41.0, "q": 192}],
+            "Separator/Running": [{"t": _t(self.NOW - timedelta(seconds=90)), "v": True, "q": 192}],
+        }
+        first = await self._current(self.NOW)
+        self.assertEqual(first, {"motor_amps": 41.0, "running": True})
+        self.assertTrue(all(r["start"] == _t(self.NOW - timedelta(minutes=2)) for r in self.server.requests))
+
+        self.server.requests.clear()
+        self.server.points["Separator/Amps"].append({"t": _t(self.NOW + timedelta(seconds=3)), "v": 42.5, "q": 192})
+        second = await self._current(self.NOW + timedelta(seconds=5))
+        self.assertEqual(second, {"motor_amps": 42.5, "running": True})
+        starts = {r["tagname"]: r["start"] for r in self.server.requests}
+        self.assertEqual(starts["Separator/Amps"], _t(self.NOW - timedelta(seconds=30)))
+        self.assertEqual(starts["Separator/Running"], _t(self.NOW - timedelta(seconds=90)))
+
+    async def test_value_expires_after_the_current_window(self) -> None:
+        self.server.points = {"Separator/Amps": [{"t": _t(self.NOW), "v": 41.0, "q": 192}]}
+        self.assertEqual((await self._current(self.NOW))["motor_amps"], 41.0)
+        later = await self._current(self.NOW + timedelta(minutes=2, seconds=1))
+        self.assertIsNone(later["motor_amps"])
+        self.assertNotIn("motor_amps", legacy._cursors)
+
+    async def test_failed_read_reports_none_but_keeps_cursor(self) -> None:
+        self.server.points = {"Separator/Amps": [{"t": _t(self.NOW), "v": 41.0, "q": 192}]}
+        await self._current(self.NOW)
+        self.server.down = True
+        self.assertEqual(await self._current(self.NOW + timedelta(seconds=5)), {"motor_amps": None, "running": None})
+        self.server.down = False
+        self.assertEqual((await self._current(self.NOW + timedelta(seconds=10)))["motor_amps"], 41.0)
+
+
+@asynccontextmanager
+async def _no_guard():
+    yield
+
+
+class PooledClientTests(IsolatedAsyncioTestCase):
+    async def asyncTearDown(self) -> None:
+        await legacy.close_client()
+
+    async def test_client_is_reused_until_shutdown(self) -> None:
+        first = await legacy.get_client()
+        self.assertIs(await legacy.get_client(), first)
+        await legacy.shutdown()
+        self.assertTrue(first.is_closed)
+        self.assertIsNot(await legacy.get_client(), first)
@@ -0,0 +1,200 @@
+"""Tests for the warm-start snapshot (services/warm_start.py) and the
+gap-only backfill it leaves processing with."""
+
+import os
+import tempfile
+import time
+from datetime import date, datetime, timedelta, timezone
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import patch
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+from config import FACILITY_TIMEZONE
+from fake_timebase.simulator import ALIASES, SeparatorSimulator
+from i3x_server import envelope, values
+from services import analytics, cost_calculator, day_partials, processing, warm_start
+from services.tag_columns import TagColumns, datetime_to_ns
+
+
+def _buffer(last: datetime, n: int) -> dict[str, np.ndarray]:
+    """n buffered minutes ending at ``last``, as processing.buffer_columns() has them."""
+    minutes = datetime_to_ns(last) // (60 * 10**9) - np.arange(n)[::-1]
+    return {
+        "minute":  minutes,
+        "kw":      30.0 + np.arange(n),
+        "rate":    np.where(np.arange(n) % 5 == 0, np.nan, 0.16),
+        "cost":    np.cumsum(np.full(n, 0.01)),
+        "state":   np.array(["Processing"] * n),
+        "tou":     np.array(["Off-Peak"] * n),
+        "shift":   np.array(["Day"] * n),  # not a known shift: gets its own code
+    }
+
+
+def assertColumnsEqual(got: dict, expected: dict) -> None:
+    for name, column in expected.items():
+        np.testing.assert_array_equal(got[name], column)
+
+
+def _day_rows(day: date) -> cost_calculator.CostRows:
+    rng = np.random.default_rng(day.toordinal())
+    t0 = datetime(day.year, day.month, day.day, tzinfo=timezone.utc)
+    return cost_calculator.CostRows(
+        datetime_to_ns(t0) + np.arange(1440, dtype=np.int64) * 60 * 10**9,
+        rng.integers(0, 60, 1440).astype(np.int16),
+        rng.uniform(0, 1, 1440), rng.uniform(0, 0.2, 1440),
+        rng.uniform(0, 60, 1440), rng.choice([0.16, 0.22], 1440),
+    )
+
+
+class _Historian:
+    """The fake Timebase simulator, ending at the real clock."""
+
+    def __init__(self) -> None:
+        self.sim = SeparatorSimulator(interval_seconds=23, history_days=2)
+        self.calls: list[tuple[datetime, datetime]] = []
+
+    async def fetch_all_tags(self, start=None, end=None, columnar=False, priority=None):
+        self.calls.append((start, end))
+        start_ns, end_ns = datetime_to_ns(start), datetime_to_ns(end)
+        raw = {}
+        for alias in ALIASES:
+            t, v = self.sim.points(alias, start_ns - 3600 * 10**9, end_ns)
+            values = v.astype("int8") if v.dtype == bool else v.astype("float64")
+            raw[alias] = TagColumns(t, values).window(start_ns, end_ns)
+        return raw
+
+
+class _Base(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self._reset()
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, "snap", "warm_start.npz")
+        patcher = patch.object(warm_start, "WARM_START_PATH", self.path)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self._reset)
+
+    def _reset(self) -> None:
+        processing._reset_for_tests()
+        analytics._reset_for_tests()
+
+    def _today(self) -> date:
+        return datetime.now(timezone.utc).astimezone(ZoneInfo(FACILITY_TIMEZONE)).date()
+
+
+class SnapshotTests(_Base):
+    def _populate(self) -> None:
+        now = datetime.now(timezone.utc).replace(second=0, microsecond=0)
+        processing.restore(_buffer(now - timedelta(minutes=1), 30), self._today(), 12.5, now)
+        for back in (3, 2):
+            day = self._today() - timedelta(days=back)
+            day_partials.put(day, _day_rows(day))
+        analytics.restore_cache([(("summary", 7, 0), time.time() - 60, {"total_cost_usd": 41.0})])
+
+    async def test_round_trip(self) -> None:
+        self._populate()
+        buffer = processing.buffer_columns()
+        config_key, days = day_partials.snapshot()
+        await warm_start.save()
+        self.assertTrue(os.path.exists(self.path))
+
+        self._reset()
+        self.assertTrue(await warm_start.restore())
+
+        assertColumnsEqual(processing.buffer_columns(), buffer)
+        self.assertEqual(processing.cost_today_state(), (self._today(), 12.5))
+        got_key, got_days = day_partials.snapshot()
+        self.assertEqual(got_key, config_key)
+        self.assertEqual([d for d, _ in got_days], [d for d, _ in days])
+        for (_, got), (_, expected) in zip(got_days, days):
+            for column in cost_calculator.CostRows.COLUMNS:
+                np.testing.assert_array_equal(getattr(got, column), getattr(expected, column))
+        self.assertEqual(analytics.cache_snapshot()[0][2], {"total_cost_usd": 41.0})
+
+    async def test_missing_stale_or_foreign_snapshot_is_a_cold_start(self) -> None:
+        self.assertFalse(await warm_start.restore())
+
+        self._populate()
+        await warm_start.save()
+        self._reset()
+        with patch.object(warm_start.time, "time", return_value=time.time() + 7 * 3600):
+            self.assertFalse(await warm_start.restore())
+        with patch.object(warm_start, "FACILITY_TIMEZONE", "Europe/Berlin"):
+            self.assertFalse(await warm_start.restore())
+        self.assertEqual(processing.buffer_size(), 0)
+
+        with open(self.path, "rb") as fh:
+            good = fh.read()
+        # Garbage, empty (EOFError) and truncated (BadZipFile) files.
+        for body in (b"not a snapshot", b"", good[: len(good) // 2]):
+            with open(self.path, "wb") as fh:
+                fh.write(body)
+            with self.subTest(size=len(body)), self.assertLogs(warm_start.logger, level="WARNING"):
+                self.assertFalse(await warm_start.restore())
+        self.assertEqual(processing.buffer_size(), 0)
+
+    async def test_payloads_from_another_config_are_not_restored(self) -> None:
+        self._populate()
+        await warm_start.save()
+        self._reset()
+        saved = cost_calculator.get_config()
+        self.addCleanup(cost_calculator._runtime_config.update, saved)
+        cost_calculator.update_config(voltage=saved["voltage"] + 20)
+
+        self.assertTrue(await warm_start.restore())
+        self.assertEqual(analytics.cache_snapshot(), [])
+        self.assertEqual(len(day_partials.snapshot()[1]), 2)  # recosted on use
+
+
+class GapBackfillTests(_Base):
+    async def test_backfill_reads_only_the_gap_and_extends_cost_today(self) -> None:
+        historian = _Historian()
+        now = datetime.now(timezone.utc)
+        last = now.replace(second=0, microsecond=0) - timedelta(minutes=20)
+        buffer = _buffer(last, 10)
+        processing.restore(buffer, self._today(), 5.0, last + timedelta(minutes=1))
+
+        with patch.object(processing.historian_client, "fetch_all_tags", historian.fetch_all_tags):
+            await processing._backfill_buffer()
+
+        self.assertEqual(len(historian.calls), 1)
+        self.assertEqual(historian.calls[0][0], last)
+        buffered = processing.buffer_columns()
+        assertColumnsEqual({name: column[:10] for name, column in buffered.items()}, buffer)
+        added = buffered["minute"][10:]
+        self.assertGreaterEqual(len(added), 18)
+        self.assertTrue((np.diff(buffered["minute"]) > 0).all())
+
+        frame = processing._costed_frame(await historian.fetch_all_tags(start=last, end=now, columnar=True))
+        gap = frame[(frame.index > last + timedelta(seconds=59)) & frame["kw"].notna()]
+        gap = gap[[t.astimezone(ZoneInfo(FACILITY_TIMEZONE)).date() == self._today() for t in gap.index]]
+        self.assertAlmostEqual(processing.cost_today_state()[1], 5.0 + float(gap["cost_usd"].sum()), places=6)
+
+    async def test_cold_backfill_leaves_cost_today_to_the_live_accumulator(self) -> None:
+        historian = _Historian()
+        with patch.object(processing.historian_client, "fetch_all_tags", historian.fetch_all_tags):
+            await processing._backfill_buffer()
+
+        self.assertGreater(processing.buffer_size(), 0)
+        self.assertEqual(processing.cost_today_state(), (None, 0.0))
+        self.assertTrue(np.isnan(processing.buffer_columns()["cost"]).all())
+
+        # i3X history reports the pre-boot accumulator as unknown, not a good 0.
+        now = datetime.now(timezone.utc)
+        history = await values.history_for_tag("separator-1-cost-today", now - timedelta(days=1), now)
+        self.assertTrue(history)
+        self.assertEqual({(p["value"], p["quality"]) for p in history}, {(None, envelope.QUALITY_BAD)})
+        kw = await values.history_for_tag("separator-1-kw", now - timedelta(days=1), now)
+        self.assertTrue(all(p["quality"] == envelope.QUALITY_GOOD for p in kw))
+
+    async def test_recent_snapshot_skips_the_backfill(self) -> None:
+        historian = _Historian()
+        last = datetime.now(timezone.utc).replace(second=0, microsecond=0)
+        processing.restore(_buffer(last, 1), self._today(), 5.0, last)
+        with patch.object(processing.historian_client, "fetch_all_tags", historian.fetch_all_tags):
+            await processing._backfill_buffer()
+        self.assertEqual(historian.calls, [])
+        self.assertEqual(processing.buffer_size(), 1)
@@ -6,7 +6,8 @@ const api = axios.create({ baseURL: "/api" })
 // 30-day fetches pull ~170K points from the historian and take real time;
 // caching means subsequent window toggles are instant.
 //
-// Live-data endpoints (/current, /timeline) are NOT cached.
+// Live-data endpoints (/current, /timeline) are NOT cached; /timeline is
+// fetched as deltas (see fetchTimeline).
 //
 // Manual refresh from the UI calls clearCache() to bust everything.
 const CACHE_TTL_MS = 30_000
@@ -28,7 +29,11 @@ async function getCached(path, params) {
   return res
 }
 
-export const clearCache = () => cache.clear()
+export const clearCache = () => {
+  cache.clear()
+  // The next timeline call reloads the full 24 h instead of extending.
+  timeline = { seq: null, points: [] }
+}
 
 // Cached — analytical, window-aware.
 export const fetchSummary = ({ days, offset } = {}) =>
@@ -37,8 +42,43 @@ export const fetchSummary = ({ days, offset } = {}) =>
 export const fetchDaily = ({ days, offset } = {}) =>
   getCached("/energy/daily", cleanParams({ days, offset }))
 
+// Live timeline, fetched incrementally: the first call loads the full 24 h
+// and keeps the X-Timeline-Seq cursor; later calls send it as ?since= and
+// get only the minutes appended since (a few hundred bytes, not ~200 KB).
+// Both timeline charts share the series and any in-flight request.
+const TIMELINE_SPAN_MS = 24 * 60 * 60 * 1000
+let timeline = { seq: null, points: [] }
+let timelineInFlight = null
+
+async function loadTimeline() {
+  if (timeline.seq == null) {
+    const res = await api.get("/energy/timeline")
+    const seq = res.headers["x-timeline-seq"]
+    timeline = { seq: seq != null ? Number(seq) : null, points: res.data }
+    return
+  }
+  const { data } = await api.get("/energy/timeline", { params: { since: timeline.seq } })
+  if (data.reset) {
+    timeline = { seq: data.seq, points: data.points }
+    return
+  }
+  const points = timeline.points.concat(data.points)
+  const newest = points.length ? Date.parse(points[points.length - 1].timestamp) : 0
+  timeline = {
+    seq: data.seq,
+    points: points.filter((p) => newest - Date.parse(p.timestamp) < TIMELINE_SPAN_MS),
+  }
+}
+
 // Live — no caching.
-export const fetchTimeline = () => api.get("/energy/timeline")
+export const fetchTimeline = () => {
+  if (!timelineInFlight) {
+    timelineInFlight = loadTimeline()
+      .then(() => ({ data: timeline.points }))
+      .finally(() => { timelineInFlight = null })
+  }
+  return timelineInFlight
+}
 export const fetchCurrent = () => api.get("/energy/current")
 export const fetchConfig = () => api.get("/config")
 export const updateConfig = (cfg) => api.post("/config", cfg)
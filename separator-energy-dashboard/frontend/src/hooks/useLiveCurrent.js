@@ -1,13 +1,19 @@
-// useLiveCurrent — single-source hook for /api/energy/current.
+// useLiveCurrent — single-source hook for the live current metrics.
 //
-// Polls every 5s (matches the backend processing loop tick). Owner component
-// (App.jsx) holds it once and threads `current` + `lastFetch` to whichever
-// children render live values, so we don't have N components hammering the
-// endpoint.
+// Listens on /api/energy/stream (Server-Sent Events): the backend pushes a
+// `metrics` event every processing tick, to all tabs from one broadcast.
+// Where EventSource is unavailable, the stream is closed for good, or no
+// `metrics` event has arrived for two ticks (backend down, EventSource stuck
+// reconnecting), it polls /api/energy/current every 5s (the processing loop
+// tick) until the stream delivers again. Owner component (App.jsx) holds it
+// once and threads `current` + `lastFetch` to whichever children render live
+// values, so we don't have N components hammering the endpoint.
 import { useEffect, useState } from "react"
 import { fetchCurrent } from "../api/energyApi"
 
 const POLL_MS = 5000
+const STALE_MS = 2 * POLL_MS
+const STREAM_URL = "/api/energy/stream"
 
 export function useLiveCurrent(refreshKey) {
   const [data, setData] = useState(null)
@@ -16,6 +22,9 @@ export function useLiveCurrent(refreshKey) {
 
   useEffect(() => {
     let cancelled = false
+    let pollId = null
+    let staleId = null
+    let source = null
 
     const tick = async () => {
       try {
@@ -29,12 +38,52 @@ export function useLiveCurrent(refreshKey) {
       }
     }
 
-    tick()
-    const id = setInterval(tick, POLL_MS)
+    const poll = () => {
+      if (pollId !== null) return
+      tick()
+      pollId = setInterval(tick, POLL_MS)
+    }
+
+    const stopPolling = () => {
+      if (pollId !== null) clearInterval(pollId)
+      pollId = null
+    }
+
+    // Falls back to polling if the stream goes quiet for STALE_MS.
+    const watch = () => {
+      clearTimeout(staleId)
+      staleId = setTimeout(poll, STALE_MS)
+    }
+
+    if (typeof EventSource === "undefined") {
+      poll()
+    } else {
+      source = new EventSource(STREAM_URL)
+      watch()
+      source.addEventListener("metrics", (event) => {
+        if (cancelled) return
+        stopPolling()
+        watch()
+        setData(JSON.parse(event.data))
+        setLastFetch(Date.now())
+        setError(null)
+      })
+      // EventSource reconnects by itself (including after the server drops
+      // a slow client) and sits in CONNECTING while the backend is down, so
+      // surface every error; the next metrics event clears it. CLOSED means
+      // it gave up, e.g. a non-SSE response.
+      source.onerror = () => {
+        if (cancelled) return
+        setError("Live stream disconnected — reconnecting")
+        if (source.readyState === EventSource.CLOSED) poll()
+      }
+    }
 
     return () => {
       cancelled = true
-      clearInterval(id)
+      if (source) source.close()
+      clearTimeout(staleId)
+      stopPolling()
     }
   }, [refreshKey])
 